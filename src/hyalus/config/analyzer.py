@@ -0,0 +1,345 @@
+"""Static analysis of hyalus config files, resolving tags and required fields without executing the config"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import ast
+from contextlib import contextmanager
+import importlib
+import inspect
+import logging
+from pathlib import Path
+import threading
+import types
+from typing import Any, Iterator, NamedTuple, get_origin
+
+from hyalus.config.common import ConfigStatus, InvalidHyalusConfig
+from hyalus.config.loader import REQUIRED_FIELDS, TAGS, ConfigLoader
+from hyalus.config.tags.base import TagBase
+from hyalus.utils.typing_utils import type_check
+
+#: Only tag classes importable from this package are resolved statically
+TAGS_PACKAGE = "hyalus.config.tags"
+
+_logger = logging.getLogger("hyalus.config.analyzer")
+
+# Tags of each config loaded so far, or the error loading it, while tags are cached, see cached_config_tags
+_tags_cache: dict[Path, list[TagBase] | InvalidHyalusConfig] | None = None
+_tags_cache_lock = threading.Lock()
+
+# Container/literal types that can be known from the AST node alone, even when the contents are not literals
+_NODE_TYPES: dict[type, type] = {
+    ast.List: list,
+    ast.ListComp: list,
+    ast.Set: set,
+    ast.SetComp: set,
+    ast.Dict: dict,
+    ast.DictComp: dict,
+    ast.Tuple: tuple,
+    ast.JoinedStr: str,
+}
+
+
+class DynamicConfig(Exception):
+    """To be raised when a config cannot be analyzed without executing it, e.g. TAGS is built dynamically"""
+
+
+class Unresolved(NamedTuple):
+    """Placeholder for a config field whose value cannot be determined without executing the config"""
+
+    node_type: type | None
+
+
+class StaticConfigLoader(ConfigLoader):
+    """Loads a hyalus config file by parsing it with ``ast`` rather than executing it. Fields that are literals are
+    evaluated and ``TAGS`` is resolved to instances of classes from :py:mod:`hyalus.config.tags`. Any other field
+    value is left unresolved, and only its type is checked where it can be known from the syntax alone.
+
+    The same lint checks as :py:class:`ConfigLoader` are run, so problems that can only be detected by executing the
+    config (e.g. failing imports) are not found here.
+    """
+
+    def load_module(self) -> None:
+        """Build a module object holding the statically resolved values of the config's required fields
+
+        :raises InvalidHyalusConfig: If the config does not exist or cannot be parsed
+        :raises DynamicConfig: If ``TAGS`` or the presence of required fields depends on executing the config, or if a
+            required field is changed after it is assigned
+        """
+        if not Path(self.config_path).is_file():
+            raise InvalidHyalusConfig(ConfigStatus.NOT_FOUND)
+
+        try:
+            with open(self.config_path, 'r', encoding="utf-8") as fh:
+                tree = ast.parse(fh.read(), filename=str(self.config_path))
+        except (SyntaxError, ValueError, UnicodeDecodeError) as exc:
+            raise InvalidHyalusConfig(ConfigStatus.COULD_NOT_BE_LOADED) from exc
+
+        # Names bound by anything other than a plain import map to None - their values are only known at run time
+        imports: dict[str, str | None] = {}
+        values: dict[str, ast.expr] = {}
+        required = {field.name for field in REQUIRED_FIELDS}
+
+        for node in tree.body:
+            if mutated := _mutated_names(node) & required:
+                raise DynamicConfig(f"{', '.join(sorted(mutated))} changed after being assigned in {self.config_path}")
+
+            match node:
+                case ast.Import(names=aliases):
+                    for alias in aliases:
+                        # "import a.b.c" binds "a", "import a.b.c as d" binds "d" to a.b.c
+                        bound = alias.asname if alias.asname else alias.name.split('.')[0]
+                        imports[bound] = alias.name if alias.asname else bound
+                        values.pop(bound, None)
+                case ast.ImportFrom(module=module, names=aliases, level=0):
+                    for alias in aliases:
+                        if alias.name == '*':
+                            raise DynamicConfig(f"Star import from {module} in {self.config_path}")
+                        bound = alias.asname if alias.asname else alias.name
+                        imports[bound] = f"{module}.{alias.name}"
+                        values.pop(bound, None)
+                case ast.Assign(targets=[ast.Name(id=name)], value=value) | ast.AnnAssign(
+                    target=ast.Name(id=name), value=value
+                ) if value is not None:
+                    values[name] = value
+                    imports.pop(name, None)
+                case _:
+                    for bound in _bound_names(node):
+                        values.pop(bound, None)
+                        imports[bound] = None
+
+        if TAGS.name not in values or any(field.name in imports for field in REQUIRED_FIELDS):
+            raise DynamicConfig(f"Required fields of {self.config_path} are not plainly assigned")
+
+        self.module = types.ModuleType("config.py")
+
+        for name, value in values.items():
+            setattr(self.module, name, _evaluate(value))
+
+        self.module.TAGS = _resolve_tags(values[TAGS.name], imports)
+
+    def _type_check(self) -> None:
+        """Asserts that the given fields have the correct type, skipping unresolved fields whose type is unknown
+
+        :raises InvalidHyalusConfig: If any of the fields have a value with an invalid type
+        """
+        invalid = set()
+
+        for required_field in REQUIRED_FIELDS:
+            module_field = getattr(self.module, required_field.name)
+
+            if isinstance(module_field, Unresolved):
+                expected = get_origin(required_field.type) or required_field.type
+                if module_field.node_type is not None and module_field.node_type is not expected:
+                    invalid.add(required_field.name)
+            elif not type_check(module_field, required_field.type):
+                invalid.add(required_field.name)
+
+        if invalid:
+            fields = [field for field in REQUIRED_FIELDS if field.name in invalid]
+            msg = '\n'.join([f"type({field.name}) != {field.type}" for field in fields])
+            raise InvalidHyalusConfig(ConfigStatus.INVALID_FIELDS, additional_info=msg)
+
+
+def _bound_names(node: ast.stmt) -> set[str]:
+    """Find all names bound anywhere within a module-level statement, e.g. by functions, classes, loops, or
+    conditional assignments
+
+    :param node: The statement to inspect
+    :return: The names bound by the statement
+    """
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return {node.name}
+
+    bound = set()
+
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+            bound.add(child.id)
+        elif isinstance(child, ast.alias):
+            bound.add(child.asname if child.asname else child.name.split('.')[0])
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(child.name)
+
+    return bound
+
+
+def _mutated_names(node: ast.stmt) -> set[str]:
+    """Find all names whose values may be changed in place anywhere within a module-level statement, e.g. by
+    ``TAGS.append(...)``, ``TAGS[0] = ...``, ``TAGS += ...`` or ``del TAGS``
+
+    :param node: The statement to inspect
+    :return: The names whose values may be changed by the statement
+    """
+    mutated = set()
+
+    for child in ast.walk(node):
+        match child:
+            case ast.Call(func=ast.Attribute(value=ast.Name(id=name))):
+                mutated.add(name)
+            case ast.Subscript(value=ast.Name(id=name), ctx=ast.Store() | ast.Del()) | ast.Attribute(
+                value=ast.Name(id=name), ctx=ast.Store() | ast.Del()
+            ):
+                mutated.add(name)
+            case ast.AugAssign(target=ast.Name(id=name)) | ast.Name(id=name, ctx=ast.Del()):
+                mutated.add(name)
+
+    return mutated
+
+
+def _evaluate(node: ast.expr) -> Any:
+    """Evaluate an expression if it is a literal
+
+    :param node: The expression to evaluate
+    :return: The literal value, or an Unresolved placeholder with the type of the expression if it is known
+    """
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return Unresolved(_NODE_TYPES.get(type(node)))
+
+
+def _dotted_name(node: ast.expr, imports: dict[str, str | None]) -> str:
+    """Resolve a name or chain of attribute accesses to the fully qualified name it refers to via imports
+
+    :param node: The Name/Attribute expression
+    :param imports: Mapping of names bound at module level to the fully qualified names they were imported as. Names
+        bound by anything other than an import map to None.
+    :return: The fully qualified name
+    :raises DynamicConfig: If the expression does not refer to something imported
+    """
+    attrs = []
+
+    while isinstance(node, ast.Attribute):
+        attrs.insert(0, node.attr)
+        node = node.value
+
+    if not isinstance(node, ast.Name) or imports.get(node.id) is None:
+        raise DynamicConfig(f"Could not resolve {ast.unparse(node)} to an imported name")
+
+    return '.'.join([imports[node.id]] + attrs)
+
+
+def _import_tag_class(dotted_name: str) -> type[TagBase]:
+    """Import a tag class from its fully qualified name
+
+    :param dotted_name: The fully qualified name of the tag class
+    :return: The tag class
+    :raises DynamicConfig: If the name does not refer to a concrete tag class from the tags package
+    """
+    if not dotted_name.startswith(f"{TAGS_PACKAGE}."):
+        raise DynamicConfig(f"{dotted_name} is not defined in {TAGS_PACKAGE}")
+
+    obj: Any = importlib.import_module(TAGS_PACKAGE)
+
+    for attr in dotted_name.removeprefix(f"{TAGS_PACKAGE}.").split('.'):
+        try:
+            obj = getattr(obj, attr)
+        except AttributeError as exc:
+            if not inspect.ismodule(obj):
+                raise DynamicConfig(f"Could not find {dotted_name}") from exc
+
+            try:
+                obj = importlib.import_module(f"{obj.__name__}.{attr}")
+            except ImportError as import_exc:
+                raise DynamicConfig(f"Could not import {dotted_name}") from import_exc
+
+    if not (inspect.isclass(obj) and issubclass(obj, TagBase)) or inspect.isabstract(obj):
+        raise DynamicConfig(f"{dotted_name} is not a concrete tag class")
+
+    return obj
+
+
+def _resolve_tags(node: ast.expr, imports: dict[str, str | None]) -> list[TagBase]:
+    """Resolve the expression assigned to TAGS into tag instances. Only a list of tag constructor calls with literal
+    arguments can be resolved.
+
+    :param node: The expression assigned to TAGS
+    :param imports: Mapping of names bound at module level to the fully qualified names they were imported as
+    :return: The tags
+    :raises DynamicConfig: If the tags cannot be resolved statically
+    """
+    if not isinstance(node, ast.List):
+        raise DynamicConfig(f"TAGS is not a list literal: {ast.unparse(node)}")
+
+    tags = []
+
+    for element in node.elts:
+        if not isinstance(element, ast.Call) or any(kw.arg is None for kw in element.keywords):
+            raise DynamicConfig(f"Tag is not a constructor call with explicit arguments: {ast.unparse(element)}")
+
+        tag_class = _import_tag_class(_dotted_name(element.func, imports))
+
+        try:
+            args = [ast.literal_eval(arg) for arg in element.args]
+            kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in element.keywords}
+            tags.append(tag_class(*args, **kwargs))
+        except Exception as exc:  # pylint: disable=broad-except
+            raise DynamicConfig(f"Could not statically construct tag {ast.unparse(element)}") from exc
+
+    return tags
+
+
+def load_config_tags(config_path: str | Path) -> list[TagBase]:
+    """Get the tags of a hyalus config, statically if possible. The config is only executed via
+    :py:class:`ConfigLoader` if its tags or required fields cannot be resolved without doing so. Within
+    :py:func:`cached_config_tags`, each config is only loaded once.
+
+    :param config_path: Path to the hyalus config file
+    :return: The tags of the config
+    :raises InvalidHyalusConfig: If the config is invalid
+    """
+    with _tags_cache_lock:
+        cache = _tags_cache
+
+    if cache is None:
+        return _load_config_tags(config_path)
+
+    key = Path(config_path).absolute()
+
+    if (cached := cache.get(key)) is None:
+        try:
+            cached = _load_config_tags(config_path)
+        except InvalidHyalusConfig as exc:
+            cached = exc
+
+        cache[key] = cached
+
+    if isinstance(cached, InvalidHyalusConfig):
+        raise cached
+
+    return list(cached)
+
+
+def _load_config_tags(config_path: str | Path) -> list[TagBase]:
+    """:return: The tags of a hyalus config, see :py:func:`load_config_tags`"""
+    try:
+        return StaticConfigLoader(config_path).run().TAGS
+    except DynamicConfig as exc:
+        _logger.debug(f"Falling back to loading {config_path}: {exc}")
+
+    return ConfigLoader(config_path).run().TAGS
+
+
+@contextmanager
+def cached_config_tags() -> Iterator[None]:
+    """Load the tags of each config at most once while in the context, e.g. while a suite of tests runs and tags of
+    each test are needed to find, order and run it. The configs must not change while in the context. Nested contexts
+    share the outermost cache.
+    """
+    global _tags_cache  # pylint: disable=global-statement
+
+    with _tags_cache_lock:
+        if _tags_cache is not None:
+            outermost = False
+        else:
+            outermost = True
+            _tags_cache = {}
+
+    try:
+        yield
+    finally:
+        if outermost:
+            with _tags_cache_lock:
+                _tags_cache = None
@@ -12,6 +12,7 @@ INPUT_PATH = Path("input")
 OUTPUT_PATH = Path("output")
 TMP_PATH = Path("tmp")
 HYALUS_PATH = Path("hyalus")
+FIXTURES_PATH = Path("fixtures")
 TEST_SUBDIRS = (OUTPUT_PATH, TMP_PATH, HYALUS_PATH)
 
 CONFIG_PY = Path("config.py")
@@ -40,6 +41,8 @@ class InvalidHyalusConfig(Exception):
         msg = failure.value if not additional_info else f"{failure.value}\n\n{additional_info}"
         super().__init__(msg, *args)
 
+        self.failure = failure
+
 
 class Failure(Exception):
     """Parent class for Exceptions that result in a message logged but do not halt processing"""
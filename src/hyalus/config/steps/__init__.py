@@ -1,6 +1,6 @@
 """Steps for use in hyalus tests"""
 
-from .run import SubprocessStep, RunFunctionStep
+from .run import SubprocessStep, AsyncSubprocessStep, RunFunctionStep
 from .assertions import (
     AssertEQ,
     AssertNE,
@@ -48,7 +48,7 @@ class AssertionStep(StepBase):
 
     def _pre_process(self) -> list[Any]:
         """This method is responsible for converting anything path-/index-/key-like into a corresponding data structure
-        for use in comparison functions.
+        for use in comparison functions. Relative paths are relative to the run directory.
 
         :return: The processed arguments to pass to the assertion function
         """
@@ -57,11 +57,11 @@ class AssertionStep(StepBase):
         for arg in self.args:
             if isinstance(arg, tuple):
                 if len(arg) == 2 and isinstance(arg[0], (str, Path)):
-                    if (parser := get_parser(arg[0])) is not None:
+                    if (parser := get_parser(self.resolve_path(arg[0]))) is not None:
                         arg = parser.search(arg[1])
 
             if isinstance(arg, (str, Path)):
-                if (parser := get_parser(arg)) is not None:
+                if (parser := get_parser(self.resolve_path(arg))) is not None:
                     arg = parser.parse()
 
             processed_args.append(arg)
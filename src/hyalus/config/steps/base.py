@@ -5,16 +5,61 @@ __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
 import abc
+from contextvars import ContextVar
 from enum import IntEnum, unique
 import logging
 from pathlib import Path
+import threading
+import time
 from typing import final, Any, NamedTuple, Type
 
+from typing_extensions import Self
+
 from hyalus.config.common import HYALUS_PATH, HYALUS_LOG, INPUT_PATH, OUTPUT_PATH, TMP_PATH, STEP_LOG
 from hyalus.utils import logging_utils
+from hyalus.utils.memory_utils import PeakMemory
+from hyalus.utils.thread_utils import to_daemon_thread
 
 _logger = logging.getLogger("hyalus.config.steps.base")
 
+# The Steps currently running. The Step running in the current thread or asyncio task is tracked in a context variable,
+# as many Steps may run at once on threads, or on one thread when tests are run on an event loop.
+_running_steps: list["StepBase"] = []
+_running_lock = threading.Lock()
+_current_step: ContextVar[object] = ContextVar("hyalus_current_step", default=None)
+_LOADING = object()
+
+
+def _route_to_step(record: logging.LogRecord) -> logging.Logger | None:
+    """Pick the logger of the Step that a message was logged within, so that messages logged by anything a Step runs
+    (e.g. a function run by a RunFunctionStep) go to the Step's log files. The Step is the one running in the calling
+    thread or asyncio task, or the only one running if the message comes from a thread that is not running any Step
+    itself (e.g. a thread started by the Step). Messages from hyalus' own loggers are left alone, as are messages logged
+    while a Step is still loading.
+
+    :param record: The record of the message
+    :return: The Step's logger, or None if the message is not to be sent to any Step's log files
+    """
+    if record.name == "hyalus" or record.name.startswith("hyalus."):
+        return None
+
+    if (step := _current_step.get()) is None:
+        # Another thread may start or stop a Step at any time, so only a snapshot of the running Steps is looked at
+        with _running_lock:
+            running = list(_running_steps)
+
+        if len(running) == 1 and running[0].thread_id != threading.get_ident():
+            step = running[0]
+
+    if step is None or step is _LOADING:
+        return None
+
+    # Messages logged by the Step's own logger already reach its log files
+    return logger if (logger := step.get_logger(record.name)).name != record.name else None
+
+
+_step_router = logging_utils.RoutingHandler(_route_to_step)
+
 
 @unique
 class StepStatus(IntEnum):
@@ -60,6 +105,63 @@ class StepError(Exception):
 class StepBase(abc.ABC):
     """Base class for Steps"""
 
+    # Declared via depends_on/produces - set per instance as subclasses do not call a common Ctor.
+    _dependencies: tuple["StepBase | Path", ...] | None = None
+    _outputs: tuple[Path, ...] = ()
+
+    # Timings of the most recent run of the Step: when it started, and the wall and CPU seconds it took. CPU time is
+    # that of the thread the Step ran in, so excludes any processes it ran, and is not measured on an event loop.
+    start_time: float | None = None
+    wall_time: float | None = None
+    cpu_time: float | None = None
+
+    # Peak resident memory in bytes of the process running the Step and its child processes during the most recent run
+    # of the Step, see PeakMemory. Not measured on an event loop.
+    peak_memory: int | None = None
+
+    # The run directory the Step is running in, set when it is loaded
+    run_dir: Path | None = None
+
+    def depends_on(self, *dependencies: "StepBase | str | Path") -> Self:
+        """Declare the earlier Steps and files this Step depends on, e.g. ``AssertEQ(...).depends_on(pipeline)``. A Step
+        that declares its dependencies may run concurrently with any Steps it does not depend on, up to the number of
+        CPUs in the test's Resources tag. Steps that do not declare dependencies depend on every Step before them.
+
+        :param dependencies: Steps, and paths relative to the run directory of files/directories, this Step depends on.
+            A path depends on any earlier Step that produces it, and must exist before this Step runs.
+        :return: This Step
+        """
+        self._dependencies = tuple(dep if isinstance(dep, StepBase) else Path(dep) for dep in dependencies)
+        return self
+
+    def produces(self, *outputs: str | Path) -> Self:
+        """Declare the files this Step produces, so that Steps depending on them depend on this Step
+
+        :param outputs: Paths relative to the run directory of files/directories this Step creates
+        :return: This Step
+        """
+        self._outputs = tuple(Path(output) for output in outputs)
+        return self
+
+    @property
+    def dependencies(self) -> tuple["StepBase | Path", ...] | None:
+        """:return: The Steps and paths this Step depends on, or None if not declared"""
+        return self._dependencies
+
+    @property
+    def outputs(self) -> tuple[Path, ...]:
+        """:return: The paths this Step produces"""
+        return self._outputs
+
+    def resolve_path(self, path: str | Path) -> Path:
+        """Resolve a path given relative to the run directory, as Steps must not depend on the working directory being
+        the run directory, e.g. when tests run on threads or on an event loop
+
+        :param path: The path, relative to the run directory or absolute
+        :return: The absolute path, or the path as given if the Step has not been loaded into a run directory
+        """
+        return self.run_dir / path if self.run_dir is not None else Path(path)
+
     # pylint: disable=attribute-defined-outside-init
     def _load(self, step_number: int, run_dir: str | Path) -> None:
         """Convenience method for hyalus runner to load info needed by each step
@@ -77,7 +179,10 @@ class StepBase(abc.ABC):
         self.hyalus_dir: Path = run_dir / HYALUS_PATH
         self.hyalus_log: Path = run_dir / HYALUS_LOG
 
-        self._logger = logging.getLogger(f"{self.__class__.__module__}.{self.__class__.__name__}_{self.step_number}")
+        # Each run gets a logger of its own, as the Steps of tests running at once share names but not log files
+        self._logger = logging_utils.unregistered_logger(
+            f"{self.__class__.__module__}.{self.__class__.__name__}_{self.step_number}"
+        )
 
     @abc.abstractmethod
     def __str__(self) -> str:
@@ -100,8 +205,9 @@ class StepBase(abc.ABC):
         return True
 
     def get_logger(self, name: str = None) -> logging.Logger:  # pylint: disable=unused-argument
-        """Used to override logger retrieval during step execution
+        """Used to pick the logger whose handlers messages logged by anything else while the Step runs are sent to
 
+        :param name: Name of the logger the message was logged with
         :return: self._logger
         """
         return self._logger
@@ -112,26 +218,81 @@ class StepBase(abc.ABC):
 
         :return: Output from running the Step
         """
-        self._load(*args)
+        self._start(*args)
+        start_cpu = time.thread_time()
+        memory = PeakMemory()
 
-        logging_utils.add_file_handler(self.hyalus_log, self._logger)
-        logging_utils.add_file_handler(self.step_log, self._logger)
+        try:
+            with memory:
+                pre_process_output = self._pre_process()  # pylint: disable=assignment-from-none
+                run_workflow_output = self._run_workflow(pre_process_output)
+                return self._post_process(run_workflow_output)
+        except Exception as exc:
+            self._logger.error(exc)
+            raise
+        finally:
+            self.cpu_time = time.thread_time() - start_cpu
+            self.peak_memory = memory.peak
+            self._stop()
 
-        # Whenever something in this Step tries to log a message, send it through the Step's logger instead
-        old_get_logger = logging.getLogger
-        logging.getLogger = self.get_logger
+    @final
+    async def run_async(self, *args) -> Any:
+        """Run the Step from start to finish on the running event loop and capture results, see
+        :py:meth:`_run_workflow_async`
+
+        :return: Output from running the Step
+        """
+        self._start(*args)
 
         try:
             pre_process_output = self._pre_process()  # pylint: disable=assignment-from-none
-            run_workflow_output = self._run_workflow(pre_process_output)
+            run_workflow_output = await self._run_workflow_async(pre_process_output)
             return self._post_process(run_workflow_output)
         except Exception as exc:
             self._logger.error(exc)
             raise
         finally:
-            logging_utils.remove_file_handler(self.hyalus_log, self._logger)
-            logging_utils.remove_file_handler(self.step_log, self._logger)
-            logging.getLogger = old_get_logger
+            self._stop()
+
+    def _start(self, *args) -> None:
+        """Load the Step and start sending everything logged while it runs to its log files
+
+        :param args: Positional arguments to pass to the _load method
+        """
+        _current_step.set(_LOADING)
+        self._load(*args)
+
+        logging_utils.add_file_handler(self.hyalus_log, self._logger)
+        logging_utils.add_file_handler(self.step_log, self._logger)
+
+        self.thread_id = threading.get_ident()  # pylint: disable=attribute-defined-outside-init
+        self.start_time = time.time()
+        self.wall_time = None
+        self.cpu_time = None
+        self.peak_memory = None
+        self.__start = time.perf_counter()  # pylint: disable=attribute-defined-outside-init
+
+        # Whenever something in this Step logs a message, also send it to the Step's log files
+        with _running_lock:
+            if not _running_steps:
+                logging.getLogger().addHandler(_step_router)
+            _running_steps.append(self)
+
+        _current_step.set(self)
+
+    def _stop(self) -> None:
+        """Stop sending messages logged to the Step's log files, once it has finished running"""
+        self.wall_time = time.perf_counter() - self.__start
+
+        logging_utils.remove_file_handler(self.hyalus_log, self._logger)
+        logging_utils.remove_file_handler(self.step_log, self._logger)
+
+        _current_step.set(None)
+
+        with _running_lock:
+            _running_steps.remove(self)
+            if not _running_steps:
+                logging.getLogger().removeHandler(_step_router)
 
     def _pre_process(self) -> Any:
         """Pre-processing for running the Step's workflow
@@ -148,6 +309,17 @@ class StepBase(abc.ABC):
         :return: Output from running the workflow to pass to _post_process
         """
 
+    async def _run_workflow_async(self, pre_process_output: Any = None) -> StepOutput:
+        """Run the Step's workflow on the running event loop. Steps whose workflow waits on I/O (e.g. external
+        processes) can override this to await it natively, so that many can wait at once. By default the synchronous
+        workflow is run on a daemon thread of its own so that it does not block the event loop. It cannot be
+        interrupted if the Step is cancelled, but carries on in the background without keeping the process alive.
+
+        :param pre_process_output: Output from pre-processing
+        :return: Output from running the workflow to pass to _post_process
+        """
+        return await to_daemon_thread(self._run_workflow, pre_process_output)
+
     def _post_process(self, workflow_output: StepOutput = None) -> StepOutput:
         """Post-processing for running the Step's workflow prior to capturing results
 
@@ -4,6 +4,7 @@ __author__ = "David McConnell"
 __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
+import asyncio
 from pathlib import Path
 import subprocess
 import traceback
@@ -14,13 +15,15 @@ from hyalus.config.steps.base import StepBase, StepStatus, StepOutput
 
 
 class SubprocessStep(StepBase):
-    """Step for running arbitrary shell processes/scripts"""
+    """Step for running arbitrary shell processes/scripts. The command is run in the run directory unless a cwd is
+    given, which is relative to the run directory.
+    """
 
     def __init__(self, cmd: list[str], **kwargs: Any) -> None:
         """Ctor.
 
         :param cmd: The command to execute
-        :param kwargs: Keyword arguments to pass to the subprocess call
+        :param kwargs: Keyword arguments to pass to the subprocess call, e.g. cwd or env
         """
         self.cmd = cmd
         self.kwargs = kwargs
@@ -36,22 +39,78 @@ class SubprocessStep(StepBase):
     def needs(self) -> None:  # pragma: no cover
         return None
 
+    def _subprocess_kwargs(self) -> dict[str, Any]:
+        """:return: Keyword arguments to run the command with, with its working directory resolved"""
+        return {**self.kwargs, "cwd": self.resolve_path(self.kwargs.get("cwd", "."))}
+
     def _run_workflow(self, pre_process_output: Any = None) -> StepOutput:
         self._logger.debug(f"Executing command {self.cmd} with **kwargs {self.kwargs}")
 
-        result = subprocess.run(self.cmd, **self.kwargs)  # pylint: disable=subprocess-run-check
-        self.returncode = result.returncode
+        result = subprocess.run(self.cmd, **self._subprocess_kwargs())  # pylint: disable=subprocess-run-check
+
+        return self._output(result.returncode, result.stdout, result.stderr)
 
-        if (status := StepStatus(result.returncode)) is StepStatus.PASS:
-            decoded = result.stdout.decode("utf-8")
+    def _output(self, returncode: int, stdout: bytes, stderr: bytes) -> StepOutput:
+        """Log the outcome of the command and get the Step output from it
+
+        :param returncode: Exit code of the command
+        :param stdout: What the command wrote to stdout
+        :param stderr: What the command wrote to stderr
+        :return: Output from running the workflow - stdout if the command succeeded, else stderr
+        """
+        self.returncode = returncode
+
+        if (status := StepStatus(returncode)) is StepStatus.PASS:
+            decoded = stdout.decode("utf-8")
             self._logger.info(f"Command {self.cmd} executed successfully")
         else:
-            decoded = result.stderr.decode("utf-8")
+            decoded = stderr.decode("utf-8")
             self._logger.error(f"Command {self.cmd} failed with the following traceback:\n{decoded}")
 
         return StepOutput(decoded, status)
 
 
+class AsyncSubprocessStep(SubprocessStep):
+    """Step for running arbitrary processes with asyncio, so that when tests are run on an event loop many of them can
+    wait on their processes at once without a thread or process each. As for SubprocessStep, the command is run in the
+    run directory unless a cwd is given. Run synchronously, the command is run on an event loop of its own.
+    """
+
+    def __init__(self, cmd: list[str], **kwargs: Any) -> None:
+        """Ctor.
+
+        :param cmd: The command to execute
+        :param kwargs: Keyword arguments to pass to asyncio.create_subprocess_exec, e.g. cwd or env
+        """
+        self.cmd = cmd
+        self.kwargs = kwargs
+
+        self.returncode: int = None
+
+    def _run_workflow(self, pre_process_output: Any = None) -> StepOutput:
+        return asyncio.run(self._run_workflow_async(pre_process_output))
+
+    async def _run_workflow_async(self, pre_process_output: Any = None) -> StepOutput:
+        self._logger.debug(f"Executing command {self.cmd} with **kwargs {self.kwargs}")
+
+        process = await asyncio.create_subprocess_exec(
+            *self.cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **self._subprocess_kwargs(),
+        )
+
+        try:
+            stdout, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            # The test was stopped, e.g. because it timed out, so make sure the command does not outlive it
+            process.kill()
+            await process.wait()
+            raise
+
+        return self._output(process.returncode, stdout, stderr)
+
+
 class RunFunctionStep(StepBase):
     """Step for running an arbitrary python function. Any imported functionality MUST be imported within the function"""
 
@@ -111,6 +170,9 @@ class RunFunctionStep(StepBase):
             result = self.func(*self.args, **self.kwargs)
             output = StepOutput(result, StepStatus.PASS)
             self._logger.info(f"Function {self.func.__name__} executed successfully")
+        except MemoryError:
+            # Reported by the test runner, as the function may only have run out because of the test's memory limit
+            raise
         except AssertionError:
             exc = traceback.format_exc()
             output = StepOutput(exc, StepStatus.FAIL)
@@ -1,6 +1,9 @@
 """Tags for use in hyalus tests"""
 
-from .runtime import Short, Medium, Long, ExtraLong, AbsoluteUnit
+from .fixtures import SharedSetup, SuiteFixture, UsesFixture
+from .resources import Dataset, Resources
+from .runtime import Short, Medium, Long, ExtraLong, AbsoluteUnit, Timeout
+from .selection import Priority
 from .types import (
     UnitTest,
     FunctionalTest,
@@ -16,6 +16,7 @@ class TagType(str, Enum):
     RUNTIME = "Runtime"
     TEST_TYPE = "Test Type"
     ANALYSIS = "Analysis"
+    RESOURCES = "Resources"
     MISC = "Misc"
 
     def __lt__(self, other):
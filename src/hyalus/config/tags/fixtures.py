@@ -0,0 +1,72 @@
+"""Tags associated with fixtures, which prepare data or in-memory state shared by other tests"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from hyalus.config.tags.base import TagBase, TagType
+
+
+class SuiteFixture(TagBase):
+    """Tag marking a test as a suite fixture, whose Steps prepare data (e.g. build an index) for other tests rather than
+    test anything. A suite fixture is not run as a test of a suite itself, but once per suite before the tests declaring
+    it with a UsesFixture tag, which share its output directory read-only.
+    """
+
+    @property
+    def _types(self) -> TagType:
+        return TagType.MISC
+
+
+class UsesFixture(TagBase):
+    """Tag declaring that a test reads the output of a suite fixture, found under fixtures/<name> in the test's run
+    directory
+    """
+
+    def __init__(self, name: str, info: str = "") -> None:
+        """Ctor.
+
+        :param name: Name of the suite fixture's test directory
+        :param info: Any info to store with the Tag
+        """
+        super().__init__(info=info)
+
+        self.name = name
+
+    def __str__(self) -> str:
+        return self.__class__.__name__ + f": {self.name}"
+
+    @property
+    def _types(self) -> TagType:
+        return TagType.MISC
+
+
+class SharedSetup(TagBase):
+    """Tag declaring a setup function whose result a test shares with other tests, e.g. a large model loaded into
+    memory. The test's Steps get the result with :py:func:`hyalus.run.shared.shared_state`. When a suite is run with
+    fork_after_setup, the function is called once in the suite's process before any test starts, and every test
+    declaring it runs in a forked worker inheriting the result copy-on-write.
+    """
+
+    def __init__(self, setup: str, info: str = "") -> None:
+        """Ctor.
+
+        :param setup: Import path of the setup function, as "package.module:function"
+        :param info: Any info to store with the Tag
+        :raises ValueError: If the import path is not of the form "package.module:function"
+        """
+        super().__init__(info=info)
+
+        module, _, function = setup.partition(":")
+
+        if not module or not function.isidentifier():
+            raise ValueError(f"Setup {setup} is not of the form package.module:function")
+
+        self.setup = setup
+
+    def __str__(self) -> str:
+        return self.__class__.__name__ + f": {self.setup}"
+
+    @property
+    def _types(self) -> TagType:
+        return TagType.MISC
@@ -0,0 +1,60 @@
+"""Tags associated with the machine resources a test needs"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from hyalus.config.tags.base import TagBase, TagType
+
+
+class Resources(TagBase):
+    """Tag declaring the CPUs and memory a test needs while it runs, e.g. for a multi-threaded pipeline run via a
+    SubprocessStep. Suites are packed so that the declared resources of concurrently running tests never exceed the
+    machine's configured capacity. Tests without this tag are assumed to need 1 CPU and no significant memory.
+    """
+
+    def __init__(self, cpus: float = 1, memory: float = 0, info: str = "") -> None:
+        """Ctor.
+
+        :param cpus: Number of CPUs the test keeps busy
+        :param memory: Peak memory the test uses, in GiB
+        :param info: Any info to store with the Tag
+        """
+        super().__init__(info=info)
+
+        if cpus < 0 or memory < 0:
+            raise ValueError(f"Resources cannot be negative: cpus={cpus}, memory={memory}")
+
+        self.cpus = cpus
+        self.memory = memory
+
+    def __str__(self) -> str:
+        return self.__class__.__name__ + f": {self.cpus} CPUs, {self.memory} GiB"
+
+    @property
+    def _types(self) -> TagType:
+        return TagType.RESOURCES
+
+
+class Dataset(TagBase):
+    """Tag declaring a named set of input data that a test reads, e.g. a multi-GB reference shared by many tests. Tests
+    declaring the same dataset are run back to back in a suite, so that each one reads the data while it is still in
+    the OS page cache.
+    """
+
+    def __init__(self, name: str, info: str = "") -> None:
+        """Ctor.
+
+        :param name: Name of the dataset, the same in every test reading it
+        :param info: Any info to store with the Tag
+        """
+        super().__init__(info=info)
+
+        self.name = name
+
+    def __str__(self) -> str:
+        return self.__class__.__name__ + f": {self.name}"
+
+    @property
+    def _types(self) -> TagType:
+        return TagType.RESOURCES
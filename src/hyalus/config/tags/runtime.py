@@ -25,6 +25,11 @@ class RuntimeTag(TagBase):
     def expected_range(self) -> tuple[float, float]:
         """:return: The expected range of time, in minutes, for the test to run in"""
 
+    def within(self, minutes: float) -> bool:
+        """:return: True if the given number of minutes is within the expected range, else False"""
+        low, high = self.expected_range
+        return low <= minutes <= high
+
 
 class Short(RuntimeTag):
     """Tag for tests that run in under 5 minutes"""
@@ -72,3 +77,47 @@ class AbsoluteUnit(RuntimeTag):
     def expected_range(self) -> tuple[float, float]:
         """:return: > 1440 minutes"""
         return (1440, inf)
+
+
+#: The built-in RuntimeTags, shortest first
+RUNTIME_TAGS: tuple[type[RuntimeTag], ...] = (Short, Medium, Long, ExtraLong, AbsoluteUnit)
+
+
+def runtime_tag_for(minutes: float) -> RuntimeTag:
+    """Pick the built-in RuntimeTag a test taking the given time should have
+
+    :param minutes: How long the test takes, in minutes
+    :return: The shortest built-in RuntimeTag whose expected range includes the given time
+    """
+    for tag_type in RUNTIME_TAGS:
+        if (tag := tag_type()).within(minutes):
+            return tag
+
+    return AbsoluteUnit()
+
+
+class Timeout(TagBase):
+    """Tag overriding how long the test may run for before it is stopped when run as part of a suite. Without this tag,
+    a test may run for a multiple of the upper end of its RuntimeTag's expected range (see the timeout_multiplier
+    setting).
+    """
+
+    def __init__(self, minutes: float, info: str = "") -> None:
+        """Ctor.
+
+        :param minutes: Minutes the test may run for, ``math.inf`` for no limit
+        :param info: Any info to store with the Tag
+        """
+        super().__init__(info=info)
+
+        if minutes <= 0:
+            raise ValueError(f"Timeout must be positive: minutes={minutes}")
+
+        self.minutes = minutes
+
+    def __str__(self) -> str:
+        return self.__class__.__name__ + f": {self.minutes} minutes"
+
+    @property
+    def _types(self) -> TagType:
+        return TagType.MISC
@@ -0,0 +1,34 @@
+"""Tags associated with choosing which tests to run"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from hyalus.config.tags.base import TagBase, TagType
+
+
+class Priority(TagBase):
+    """Tag weighting how much running a test is worth when a suite is run within a time budget and has to choose which
+    of its tests to run. Tests without this tag have a weight of 1.
+    """
+
+    def __init__(self, weight: float, info: str = "") -> None:
+        """Ctor.
+
+        :param weight: How much running the test is worth relative to a test without a Priority tag
+        :param info: Any info to store with the Tag
+        :raises ValueError: If the weight is not positive
+        """
+        super().__init__(info=info)
+
+        if weight <= 0:
+            raise ValueError(f"Priority weight must be positive: weight={weight}")
+
+        self.weight = weight
+
+    def __str__(self) -> str:
+        return self.__class__.__name__ + f": {self.weight}"
+
+    @property
+    def _types(self) -> TagType:
+        return TagType.MISC
@@ -1,8 +1,10 @@
 """Modules with underlying functionality for running hyalus commands"""
 
 from .clean import HyalusCleanRunner
+from .distributed import HyalusCoordinator, HyalusWorker
 from .list import HyalusListRunner
 from .runsuite import HyalusSuiteRunner
 from .runtest import HyalusTestRunner
 from .settings import HyalusSettingsRunner
+from .stats import HyalusStatsRunner
 from .template import HyalusTemplateRunner
@@ -0,0 +1,202 @@
+"""Choice of which hyalus tests to run when a suite has to finish within a time budget"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import logging
+from math import ceil
+from pathlib import Path
+import sqlite3
+from typing import Mapping, NamedTuple, Sequence
+
+from hyalus.config.analyzer import load_config_tags
+from hyalus.config.common import InvalidHyalusConfig
+from hyalus.config.tags.selection import Priority
+from hyalus.run.common import HyalusTest, RunStatus
+from hyalus.run.schedule import DEFAULT_NEEDS, Capacity, predict_starts
+from hyalus.run.stats import RuntimeHistory
+
+#: Number of most recent completed runs of a test its failure rate is taken over
+FAILURE_RUNS = 10
+
+#: How much more running a test that failed all of its recent runs is worth than running one that passed them all
+FAILURE_WEIGHT = 2
+
+#: Seconds since a test last ran from which running it is worth the most for having not run in a while
+STALE_AFTER = 7 * 24 * 60 * 60
+
+#: Number of parts the budget is split into when choosing tests - each test takes up a whole number of parts
+BUDGET_RESOLUTION = 1000
+
+_logger = logging.getLogger("hyalus.run.budget")
+
+
+class RecentOutcomes(NamedTuple):
+    """How a test fared in its recent runs"""
+
+    failure_rate: float
+    last_finished: float | None
+
+
+def test_priority(test: HyalusTest) -> float:
+    """Get how much running a test is worth from the Priority tag in its config
+
+    :param test: The test
+    :return: The tag's weight, or 1 if the test has no Priority tag
+    """
+    try:
+        tags = load_config_tags(test.config)
+    except InvalidHyalusConfig:
+        return 1
+
+    for tag in tags:
+        if isinstance(tag, Priority):
+            return tag.weight
+
+    return 1
+
+
+def recent_outcomes(runs_dir: str | Path, tests: Sequence[HyalusTest]) -> dict[str, RecentOutcomes]:
+    """Get how the given tests fared in their recent runs from the runtime history of a runs directory, see
+    :py:class:`hyalus.run.stats.RuntimeHistory`
+
+    :param runs_dir: The runs directory
+    :param tests: The tests
+    :return: Mapping of test name to its recent outcomes, for tests with recorded runs
+    """
+    names = [test.name for test in tests]
+    history = RuntimeHistory(runs_dir)
+
+    try:
+        recent = history.recent(names, FAILURE_RUNS)
+        last_finished = history.last_finished(names)
+    except (sqlite3.Error, OSError) as exc:
+        _logger.debug(f"Could not read runtime history from {runs_dir}: {exc}")
+        return {}
+
+    return {
+        name: RecentOutcomes(
+            sum(run.status is not RunStatus.SUCCESS for run in runs) / len(runs), last_finished.get(name)
+        )
+        for name, runs in recent.items()
+        if runs
+    }
+
+
+def test_value(test: HyalusTest, outcomes: RecentOutcomes | None, now: float) -> float:
+    """Work out how much running a test is worth: its Priority weight, scaled up the more of its recent runs failed and
+    the longer it has been since it last ran. A test that has never run is worth as much as one that has not run in
+    :py:data:`STALE_AFTER` seconds.
+
+    :param test: The test
+    :param outcomes: How the test fared in its recent runs, None if it has no recorded runs
+    :param now: The current time, as seconds since the epoch
+    :return: The value of running the test
+    """
+    failure_rate = outcomes.failure_rate if outcomes is not None else 0
+
+    if outcomes is None or outcomes.last_finished is None:
+        staleness = 1.0
+    else:
+        staleness = min(max(now - outcomes.last_finished, 0) / STALE_AFTER, 1)
+
+    return test_priority(test) * (1 + FAILURE_WEIGHT * failure_rate + staleness)
+
+
+def machine_share(need: Capacity, capacity: Capacity, jobs: int) -> float:
+    """Work out how much of the machine a running test takes up: the larger of its share of the CPUs, its share of the
+    memory and its share of the tests that may run at once
+
+    :param need: The resources the test needs
+    :param capacity: The capacity tests are packed into
+    :param jobs: Maximum number of tests to run at once
+    :return: The share of the machine, at most 1
+    """
+    return min(max(need.cpus / capacity.cpus, need.memory / capacity.memory if capacity.memory else 0, 1 / jobs), 1)
+
+
+def knapsack(weights: Mapping[HyalusTest, float], values: Mapping[HyalusTest, float], limit: float) -> set[HyalusTest]:
+    """Choose the tests of the greatest total value whose total weight is within a limit, solving the 0/1 knapsack
+    problem by dynamic programming. Weights are rounded up to whole parts of the limit, see
+    :py:data:`BUDGET_RESOLUTION`, so the chosen tests never weigh more than the limit.
+
+    :param weights: Mapping of test to its weight
+    :param values: Mapping of test to its value
+    :param limit: The limit on the total weight
+    :return: The chosen tests
+    """
+    if limit <= 0:
+        return {test for test, weight in weights.items() if weight <= 0}
+
+    parts = {test: ceil(max(weight, 0) / limit * BUDGET_RESOLUTION) for test, weight in weights.items()}
+    items = [test for test, part in parts.items() if part <= BUDGET_RESOLUTION]
+
+    # best[c] is the greatest value of the items so far within c parts, kept[i][c] whether item i is part of it
+    best = [0.0] * (BUDGET_RESOLUTION + 1)
+    kept = []
+
+    for test in items:
+        part, value = parts[test], values[test]
+        keep = bytearray(BUDGET_RESOLUTION + 1)
+
+        for size in range(BUDGET_RESOLUTION, part - 1, -1):
+            if (with_test := best[size - part] + value) > best[size]:
+                best[size] = with_test
+                keep[size] = 1
+
+        kept.append(keep)
+
+    chosen = set()
+    size = BUDGET_RESOLUTION
+
+    for test, keep in zip(reversed(items), reversed(kept)):
+        if keep[size]:
+            chosen.add(test)
+            size -= parts[test]
+
+    return chosen
+
+
+# pylint: disable=too-many-arguments
+def select_within_budget(
+    tests: Sequence[HyalusTest],
+    budget: float,
+    durations: Mapping[HyalusTest, float],
+    values: Mapping[HyalusTest, float],
+    needs: Mapping[HyalusTest, Capacity],
+    capacity: Capacity,
+    jobs: int,
+) -> list[HyalusTest]:
+    """Choose the tests of the greatest total value that are expected to finish within a time budget. Each test takes
+    up its share of the machine for its expected duration (see :py:func:`machine_share`), and the tests chosen by
+    :py:func:`knapsack` fill at most the whole machine for the length of the budget. As tests cannot always be packed
+    that tightly, the least valuable test for the machine time it takes is then dropped until the tests are predicted
+    to finish within the budget when started in the given order, see :py:func:`hyalus.run.schedule.predict_starts`.
+
+    :param tests: The tests, in the order they should be started in
+    :param budget: Seconds the tests should finish within
+    :param durations: Mapping of test to its expected duration in seconds
+    :param values: Mapping of test to the value of running it, see :py:func:`test_value`
+    :param needs: Mapping of test to the resources it needs
+    :param capacity: The capacity tests are packed into
+    :param jobs: Maximum number of tests to run at once
+    :return: The chosen tests, in the given order
+    """
+    weights = {
+        test: durations[test] * machine_share(needs.get(test, DEFAULT_NEEDS), capacity, jobs)
+        for test in tests
+        if durations[test] <= budget
+    }
+    chosen = knapsack(weights, values, budget)
+    selected = [test for test in tests if test in chosen]
+
+    while selected:
+        starts = predict_starts(selected, durations, needs, capacity, jobs)
+
+        if max(starts[test] + durations[test] for test in selected) <= budget:
+            break
+
+        selected.remove(min(selected, key=lambda test: (values[test] / max(weights[test], 1e-9), -weights[test])))
+
+    return selected
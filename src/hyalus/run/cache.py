@@ -0,0 +1,241 @@
+"""Content-addressed cache of passing hyalus test results"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import hashlib
+from importlib import metadata
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import sys
+import time
+from typing import ContextManager, Sequence
+
+from hyalus import __version__
+from hyalus.run.common import HyalusTest
+from hyalus.run.index import INDEX_FILE
+from hyalus.utils import sqlite_utils
+from hyalus.utils.file_utils import file_sha256
+
+CACHE_FILE = ".hyalus_cache.sqlite"
+CACHE_VERSION = 1
+
+#: Default maximum number of passing results kept in the cache before the least recently used are evicted
+DEFAULT_MAX_ENTRIES = 10000
+
+#: Directory names never included in fingerprints, as their contents change without the test itself changing
+IGNORED_DIRS = frozenset({"__pycache__"})
+
+_logger = logging.getLogger("hyalus.run.cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    fingerprint TEXT PRIMARY KEY,
+    test TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_digests (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used);
+CREATE INDEX IF NOT EXISTS file_digests_last_used ON file_digests(last_used);
+"""
+
+
+def walk_files(root: Path) -> list[Path]:
+    """List all files making up a path in a stable order, following symlinks and skipping ignored directories
+
+    :param root: A file or directory
+    :return: The files, or an empty list if the path does not exist
+    """
+    if not root.is_dir():
+        return [root] if root.exists() else []
+
+    files = []
+    visited = set()
+
+    for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+        if (real_dirpath := os.path.realpath(dirpath)) in visited:
+            dirnames.clear()
+            continue
+
+        visited.add(real_dirpath)
+
+        dirnames[:] = sorted(dirname for dirname in dirnames if dirname not in IGNORED_DIRS)
+        files.extend(Path(dirpath) / filename for filename in sorted(filenames) if filename != INDEX_FILE)
+
+    return files
+
+
+def _package_version(package: str) -> str:
+    """Get the installed version of a distribution package
+
+    :param package: Name of the package
+    :return: The installed version, or a marker if the package is not installed
+    """
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return "<not installed>"
+
+
+class ResultCache:
+    """Cache of passing test results keyed on a fingerprint of everything the result depends on: the contents of the
+    test directory (config.py, input/, ...), the contents of any given dependency paths (e.g. code under test), the
+    versions of any given installed packages, and the versions of hyalus and Python.
+
+    The cache is stored as a SQLite database at the top level of the runs directory. Content hashes of individual files
+    are kept alongside results and reused while a file's size and mtime are unchanged, so unchanged inputs are not
+    re-read on every run. Once the cache holds more than its maximum number of results, the least recently used are
+    evicted.
+    """
+
+    def __init__(
+        self,
+        runs_dir: str | Path,
+        dependencies: Sequence[str | Path] = None,
+        packages: Sequence[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        """Ctor.
+
+        :param runs_dir: The runs directory to store the cache in
+        :param dependencies: Files/directories whose contents test results depend on, e.g. code under test. Relative
+            paths are relative to the current working directory.
+        :param packages: Names of installed packages whose versions test results depend on
+        :param max_entries: Maximum number of passing results to keep
+        """
+        self.runs_dir = Path(runs_dir).absolute()
+        self.cache_file = self.runs_dir / CACHE_FILE
+        self.dependencies = [Path(dependency).absolute() for dependency in dependencies] if dependencies else []
+        self.packages = sorted(packages) if packages else []
+        self.max_entries = max_entries
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """:return: Context manager for a connection to the cache, creating the cache if need be"""
+        return sqlite_utils.connect(self.cache_file, _SCHEMA, CACHE_VERSION)
+
+    def _file_digests(self, connection: sqlite3.Connection, files: list[Path]) -> list[str]:
+        """Get content hashes of files, only hashing files whose size or mtime changed since they were last hashed.
+        Hashes are all written back at the end, so the cache is not locked while files are being read.
+
+        :param connection: Connection to the cache
+        :param files: The files to hash
+        :return: The content hashes, in the same order as the given files
+        """
+        now = time.time()
+        digests = []
+        updates = []
+
+        for file in files:
+            path = os.path.realpath(file)
+            stat = os.stat(path)
+
+            row = connection.execute(
+                "SELECT sha256 FROM file_digests WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+
+            digest = row[0] if row else file_sha256(path)
+
+            digests.append(digest)
+            updates.append((path, stat.st_size, stat.st_mtime_ns, digest, now))
+
+        connection.executemany("INSERT OR REPLACE INTO file_digests VALUES (?, ?, ?, ?, ?)", updates)
+
+        return digests
+
+    def file_digests(self, files: Sequence[Path]) -> list[str]:
+        """Get content hashes of files, reusing those kept in the cache for files whose size and mtime are unchanged
+
+        :param files: The files to hash
+        :return: The content hashes, in the same order as the given files
+        :raises sqlite3.Error: If the cache cannot be read or written
+        """
+        with self._connect() as connection:
+            return self._file_digests(connection, list(files))
+
+    def fingerprint(self, test: HyalusTest, extra: Sequence[str] = ()) -> str:
+        """Fingerprint everything a test's result depends on
+
+        :param test: The test
+        :param extra: Anything else the result depends on, e.g. the fingerprints of the suite fixtures the test uses
+        :return: The fingerprint, as a hex digest
+        :raises sqlite3.Error: If the cache cannot be read or written
+        :raises OSError: If a file changes while it is being fingerprinted
+        """
+        fingerprint = hashlib.sha256(f"hyalus {__version__}\npython {sys.version}\n".encode())
+
+        for package in self.packages:
+            fingerprint.update(f"package {package} {_package_version(package)}\n".encode())
+
+        for item in extra:
+            fingerprint.update(f"extra {item}\n".encode())
+
+        # The test directory is labeled generically rather than by its path so that copies of a test share results
+        roots = [("test", Path(test).absolute())] + [(str(dependency), dependency) for dependency in self.dependencies]
+        root_files = [walk_files(root) for _, root in roots]
+
+        with self._connect() as connection:
+            digests = iter(self._file_digests(connection, [file for files in root_files for file in files]))
+
+        for (label, root), files in zip(roots, root_files):
+            fingerprint.update(f"path {label} {len(files)}\n".encode())
+
+            for file in files:
+                fingerprint.update(f"{file.relative_to(root) if file != root else ''} {next(digests)}\n".encode())
+
+        return fingerprint.hexdigest()
+
+    def is_cached_pass(self, fingerprint: str) -> bool:
+        """Has a test with the given fingerprint passed before? Failing to read the cache is treated as a miss.
+
+        :param fingerprint: The test's fingerprint
+        :return: True if a passing result is cached, else False
+        """
+        try:
+            with self._connect() as connection:
+                hit = connection.execute(
+                    "UPDATE results SET last_used = ? WHERE fingerprint = ?", (time.time(), fingerprint)
+                ).rowcount
+        except sqlite3.Error as exc:
+            _logger.debug(f"Could not read result cache {self.cache_file}: {exc}")
+            return False
+
+        return hit > 0
+
+    def record_pass(self, fingerprint: str, test: HyalusTest) -> None:
+        """Record a passing result, evicting the least recently used results if the cache is full. Failing to write to
+        the cache is not an error.
+
+        :param fingerprint: The test's fingerprint
+        :param test: The test
+        """
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (fingerprint, str(test), time.time())
+                )
+                self._evict(connection)
+        except sqlite3.Error as exc:
+            _logger.debug(f"Could not write result cache {self.cache_file}: {exc}")
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Evict the least recently used results beyond the maximum number of results, along with the hashes of any
+        files not used since the oldest remaining result
+
+        :param connection: Connection to the cache
+        """
+        connection.execute(
+            "DELETE FROM results WHERE fingerprint IN "
+            "(SELECT fingerprint FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        connection.execute("DELETE FROM file_digests WHERE last_used < (SELECT MIN(last_used) FROM results)")
@@ -0,0 +1,329 @@
+"""SQLite catalog of the hyalus test runs within a runs directory"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from datetime import date, datetime, MINYEAR, MAXYEAR
+import json
+import logging
+import os
+from pathlib import Path
+import sqlite3
+from typing import Callable, ContextManager, NamedTuple, Sequence
+
+from hyalus.config.common import InvalidHyalusConfig
+from hyalus.config.analyzer import load_config_tags
+from hyalus.run.common import DATE_FMT, TIME_FMT, HyalusRun, HyalusTest, RunStatus, tags_match
+from hyalus.utils import sqlite_utils
+
+CATALOG_FILE = ".hyalus_catalog.sqlite"
+CATALOG_VERSION = 1
+
+#: How much of the end of a run's hyalus.log to read when recovering its status during a rebuild
+LOG_TAIL_BYTES = 4096
+
+_logger = logging.getLogger("hyalus.run.catalog")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    name TEXT PRIMARY KEY,
+    test_name TEXT NOT NULL,
+    test_date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    start REAL,
+    duration REAL,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS run_tags (
+    name TEXT NOT NULL REFERENCES runs(name) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (name, tag)
+);
+CREATE INDEX IF NOT EXISTS runs_test_name ON runs(test_name);
+CREATE INDEX IF NOT EXISTS runs_test_date ON runs(test_date);
+CREATE INDEX IF NOT EXISTS run_tags_tag ON run_tags(tag);
+"""
+
+
+class CatalogEntry(NamedTuple):
+    """Catalog record of a single test run"""
+
+    name: str
+    test_name: str
+    test_date: date
+    status: RunStatus
+    start: float | None
+    duration: float | None
+    size: int | None
+    tags: list[str]
+
+
+def dir_size(path: Path) -> int:
+    """Total size of all files within a directory, not following symlinks
+
+    :param path: The directory
+    :return: Size in bytes
+    """
+    size = 0
+
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                size += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                continue
+
+    return size
+
+
+def run_tags(test_run: HyalusTest) -> list[str]:
+    """Get the tags of a test run, or of the test it is a run of
+
+    :param test_run: The test run, or its test
+    :return: Lowercase names of the tags in the config.py, or no tags if the config is invalid
+    """
+    try:
+        return sorted({tag.__class__.__name__.lower() for tag in load_config_tags(test_run.config)})
+    except InvalidHyalusConfig:
+        return []
+
+
+def _run_status(test_run: HyalusRun) -> RunStatus:
+    """Recover the status of a test run from the final status line of its hyalus.log
+
+    :param test_run: The test run
+    :return: The status of the test run, RUNNING if no final status was logged
+    """
+    try:
+        with open(test_run.hyalus_log, 'rb') as fh:
+            fh.seek(max(0, fh.seek(0, os.SEEK_END) - LOG_TAIL_BYTES))
+            lines = fh.read().decode("utf-8", errors="replace").splitlines()
+    except OSError:
+        return RunStatus.RUNNING
+
+    for line in reversed(lines):
+        for status in (RunStatus.SUCCESS, RunStatus.FAILURE, RunStatus.ERROR):
+            if line.endswith(f": {status.value}"):
+                return status
+
+    return RunStatus.RUNNING
+
+
+def _run_start(test_run: HyalusRun) -> float | None:
+    """Recover the start time of a test run from its run metadata
+
+    :param test_run: The test run
+    :return: The start time as a timestamp, or None if it is not available
+    """
+    try:
+        with open(test_run.run_metadata, 'r', encoding="utf-8") as fh:
+            return datetime.strptime(json.load(fh)["run_start"], f"{DATE_FMT} {TIME_FMT}").timestamp()
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class RunCatalog:
+    """Catalog of the test runs within a runs directory, stored as a SQLite database at the top level of the runs
+    directory. Runs are recorded by :py:class:`hyalus.run.runtest.HyalusTestRunner` when they are created and when they
+    complete, so queries over the runs directory do not need to inspect each run directory.
+
+    Run directories added or removed behind hyalus' back are picked up by :py:meth:`sync`, and the whole catalog can be
+    reconstructed from the runs directory with :py:meth:`rebuild`.
+    """
+
+    def __init__(self, runs_dir: str | Path) -> None:
+        """Ctor.
+
+        :param runs_dir: The runs directory the catalog covers
+        """
+        self.runs_dir = Path(runs_dir).absolute()
+        self.catalog_file = self.runs_dir / CATALOG_FILE
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """:return: Context manager for a connection to the catalog, creating the catalog if need be"""
+        return sqlite_utils.connect(self.catalog_file, _SCHEMA, CATALOG_VERSION)
+
+    # pylint: disable=too-many-arguments
+    def record(
+        self,
+        test_run: HyalusRun,
+        status: RunStatus,
+        tags: Sequence[str] = None,
+        start: float = None,
+        duration: float = None,
+        size: int = None,
+    ) -> None:
+        """Create or update the catalog entry for a test run. Fields that are not given keep their cataloged values.
+        Failing to write to the catalog is not an error - the run will be picked up by the next :py:meth:`sync`.
+
+        :param test_run: The test run
+        :param status: The current status of the test run
+        :param tags: Lowercase names of the test run's tags, only needed when the run is first recorded
+        :param start: Start time of the test run as a timestamp
+        :param duration: Wall time of the test run in seconds
+        :param size: Size of the test run directory in bytes
+        """
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT INTO runs (name, test_name, test_date, status, start, duration, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET status = excluded.status, "
+                    "start = COALESCE(excluded.start, start), "
+                    "duration = COALESCE(excluded.duration, duration), "
+                    "size = COALESCE(excluded.size, size)",
+                    (
+                        test_run.name,
+                        test_run.test_name,
+                        test_run.test_date.strftime(DATE_FMT),
+                        status.value,
+                        start,
+                        duration,
+                        size,
+                    ),
+                )
+
+                if tags is not None:
+                    connection.execute("DELETE FROM run_tags WHERE name = ?", (test_run.name,))
+                    connection.executemany(
+                        "INSERT INTO run_tags (name, tag) VALUES (?, ?)", [(test_run.name, tag) for tag in tags]
+                    )
+        except sqlite3.Error as exc:
+            _logger.debug(f"Could not record {test_run} in run catalog {self.catalog_file}: {exc}")
+
+    def remove(self, test_run: HyalusRun) -> None:
+        """Remove the catalog entry for a test run, e.g. after the run directory was removed
+
+        :param test_run: The test run
+        """
+        try:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM runs WHERE name = ?", (test_run.name,))
+        except sqlite3.Error as exc:
+            _logger.debug(f"Could not remove {test_run} from run catalog {self.catalog_file}: {exc}")
+
+    def _add_from_dir(self, connection: sqlite3.Connection, test_run: HyalusRun) -> None:
+        """Catalog an existing run directory, recovering what is known about the run from its contents
+
+        :param connection: Connection to the catalog
+        :param test_run: The test run
+        """
+        if not test_run.is_valid:
+            return
+
+        start = _run_start(test_run)
+
+        try:
+            duration = test_run.hyalus_log.stat().st_mtime - start if start is not None else None
+        except OSError:
+            duration = None
+
+        connection.execute(
+            "INSERT OR REPLACE INTO runs (name, test_name, test_date, status, start, duration, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                test_run.name,
+                test_run.test_name,
+                test_run.test_date.strftime(DATE_FMT),
+                _run_status(test_run).value,
+                start,
+                duration,
+                dir_size(test_run),
+            ),
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO run_tags (name, tag) VALUES (?, ?)",
+            [(test_run.name, tag) for tag in run_tags(test_run)],
+        )
+
+    def sync(self) -> None:
+        """Bring the catalog in line with the runs directory. Only the runs directory itself is listed - run directories
+        already in the catalog are not inspected, run directories missing from the catalog are added, and entries whose
+        run directory no longer exists are removed.
+        """
+        with os.scandir(self.runs_dir) as entries:
+            on_disk = {entry.name for entry in entries if entry.is_dir()}
+
+        with self._connect() as connection:
+            cataloged = {name for (name,) in connection.execute("SELECT name FROM runs")}
+
+            connection.executemany("DELETE FROM runs WHERE name = ?", [(name,) for name in cataloged - on_disk])
+
+            for name in on_disk - cataloged:
+                self._add_from_dir(connection, HyalusRun(self.runs_dir / name))
+
+    def rebuild(self) -> None:
+        """Reconstruct the catalog from scratch from the contents of the runs directory"""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM runs")
+
+        self.sync()
+
+    # pylint: disable=too-many-arguments
+    def find(
+        self,
+        test_names: Sequence[str] = None,
+        match_tags: Sequence[str] = None,
+        tag_op: Callable[[Sequence], bool] = all,
+        oldest: date = date(MINYEAR, 1, 1),
+        newest: date = date(MAXYEAR, 12, 31),
+    ) -> list[CatalogEntry]:
+        """Select cataloged test runs matching the given criteria, after syncing the catalog with the runs directory
+
+        :param test_names: The names of any tests to filter down to. If none given, all tests are let through.
+        :param match_tags: The tags to match
+        :param tag_op: The operator to apply for tag matching (any, all)
+        :param oldest: Oldest allowed date for a test run, defaults to oldest possible date
+        :param newest: Newest allowed date for a test run, defaults to newest possible date
+        :return: The catalog entries of the matching test runs
+        """
+        self.sync()
+
+        match_tags = sorted({tag.lower() for tag in match_tags}) if match_tags else []
+
+        query = ["SELECT name FROM runs WHERE test_date BETWEEN ? AND ?"]
+        params: list = [oldest.strftime(DATE_FMT), newest.strftime(DATE_FMT)]
+
+        if test_names:
+            query.append(f"AND test_name IN ({', '.join('?' * len(test_names))})")
+            params.extend(test_names)
+
+        # Other tag operators are applied to each run's tags after the query
+        if match_tags and tag_op in (all, any):
+            query.append(
+                f"AND name IN (SELECT name FROM run_tags WHERE tag IN ({', '.join('?' * len(match_tags))}) "
+                "GROUP BY name HAVING COUNT(*) >= ?)"
+            )
+            params.extend(match_tags)
+            params.append(len(match_tags) if tag_op is all else 1)
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT runs.*, GROUP_CONCAT(run_tags.tag) FROM runs LEFT JOIN run_tags ON runs.name = run_tags.name "
+                f"WHERE runs.name IN ({' '.join(query)}) GROUP BY runs.name",
+                params,
+            ).fetchall()
+
+        entries = [
+            CatalogEntry(
+                name=name,
+                test_name=test_name,
+                test_date=datetime.strptime(test_date, DATE_FMT).date(),
+                status=RunStatus(status),
+                start=start,
+                duration=duration,
+                size=size,
+                tags=sorted(tags.split(',')) if tags else [],
+            )
+            for name, test_name, test_date, status, start, duration, size, tags in rows
+        ]
+
+        return [entry for entry in entries if tag_op in (all, any) or tags_match(entry.tags, match_tags, tag_op)]
+
+    def find_test_runs(self, *args, **kwargs) -> set[HyalusRun]:
+        """Select cataloged test runs matching the given criteria. Takes the same arguments as :py:meth:`find`.
+
+        :return: The matching test runs
+        """
+        return {HyalusRun(self.runs_dir / entry.name) for entry in self.find(*args, **kwargs)}
@@ -5,12 +5,17 @@ __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
 from datetime import date, MINYEAR, MAXYEAR
+import logging
 from pathlib import Path
 import shutil
+import sqlite3
 from typing import Sequence, Callable
 
+from hyalus.run.catalog import RunCatalog
 from hyalus.run.common import HyalusRun, find_relevant_test_runs
 
+_logger = logging.getLogger("hyalus.run.clean")
+
 
 # pylint: disable=too-many-arguments
 class HyalusCleanRunner:
@@ -25,6 +30,8 @@ class HyalusCleanRunner:
         oldest: date = None,
         newest: date = None,
         force: bool = False,
+        use_catalog: bool = True,
+        rebuild_catalog: bool = False,
     ) -> None:
         """Ctor.
 
@@ -40,6 +47,9 @@ class HyalusCleanRunner:
             tests newer than this date will be removed. If none given, the newest/latest possible date is used.
         :param force: If set to True, will force remove test runs matching criteria. If set to False, will prompt user
             confirmation prior to actual removal of tests
+        :param use_catalog: Select test runs from the run catalog of the runs directory rather than inspecting every run
+            directory
+        :param rebuild_catalog: Reconstruct the run catalog from the runs directory before selecting test runs
         """
         self.runs_dir = Path(runs_dir)
         self.to_clean = to_clean if to_clean else []
@@ -48,6 +58,8 @@ class HyalusCleanRunner:
         self.oldest = oldest if oldest else date(MINYEAR, 1, 1)
         self.newest = newest if newest else date(MAXYEAR, 12, 31)
         self.force = force
+        self.use_catalog = use_catalog
+        self.rebuild_catalog = rebuild_catalog
 
     def confirm_test_run_removal(self, test_runs: Sequence[HyalusRun]) -> bool:
         """Ask the user to confirm given test runs for removal
@@ -62,18 +74,34 @@ class HyalusCleanRunner:
 
         return remove_tests.lower() in {"y", "yes"}
 
+    def find_test_runs(self) -> list[HyalusRun]:
+        """Find test runs matching the given criteria, from the run catalog if possible
+
+        :return: The matching test runs
+        """
+        criteria = {
+            "test_names": self.to_clean,
+            "match_tags": self.tags,
+            "tag_op": self.tag_op,
+            "oldest": self.oldest,
+            "newest": self.newest,
+        }
+
+        if self.use_catalog:
+            catalog = RunCatalog(self.runs_dir)
+
+            try:
+                if self.rebuild_catalog:
+                    catalog.rebuild()
+                return list(catalog.find_test_runs(**criteria))
+            except sqlite3.Error as exc:
+                _logger.debug(f"Could not use run catalog {catalog.catalog_file}, searching runs directory: {exc}")
+
+        return list(find_relevant_test_runs(self.runs_dir, **criteria))
+
     def run(self) -> None:
         """Find relevant test runs to remove, confirm with the user that it's ok, and then remove them"""
-        test_runs = list(
-            find_relevant_test_runs(
-                self.runs_dir,
-                test_names=self.to_clean,
-                match_tags=self.tags,
-                tag_op=self.tag_op,
-                oldest=self.oldest,
-                newest=self.newest,
-            )
-        )
+        test_runs = self.find_test_runs()
 
         if not test_runs:
             print(f"Couldn't find any test runs to remove in {self.runs_dir} based on given criteria")
@@ -82,6 +110,12 @@ class HyalusCleanRunner:
         if self.confirm_test_run_removal(test_runs):
             for test_run in test_runs:
                 shutil.rmtree(test_run)
+
+            if self.use_catalog:
+                try:
+                    RunCatalog(self.runs_dir).sync()
+                except sqlite3.Error as exc:
+                    _logger.debug(f"Could not remove cleaned test runs from the run catalog: {exc}")
             print(f"{len(test_runs)} old test runs have been removed")
         else:
             print("Test run removal canceled")
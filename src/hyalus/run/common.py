@@ -4,22 +4,39 @@ __author__ = "David McConnell"
 __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import date, datetime, MINYEAR, MAXYEAR
+from enum import Enum
 from functools import wraps
 import json
 import os
 from pathlib import Path
-from typing import Callable, Any, Sequence
+from typing import Callable, Any, NamedTuple, Sequence
 
 from hyalus import HYALUS_METADATA
 import hyalus.config.common as config_common
-from hyalus.config.loader import ConfigLoader
+from hyalus.config.analyzer import load_config_tags
+from hyalus.run.index import DiscoveryIndex, IndexEntry
 
 SUITE_EXT = ".ste"
 DATE_FMT = "%Y-%m-%d"
 TIME_FMT = "%H:%M:%S"
 RUN_DIR_DELIM = "_"
 
+#: Subdirectories of tests that are never descended into when searching for tests
+PRUNED_DIRS = frozenset(
+    path.name for path in (config_common.INPUT_PATH, config_common.OUTPUT_PATH, config_common.TMP_PATH)
+)
+
+
+class RunStatus(str, Enum):
+    """Status of a hyalus test run"""
+
+    RUNNING = "RUNNING"
+    SUCCESS = "SUCCESS"
+    FAILURE = "FAILURE"
+    ERROR = "ERROR"
+
 
 class Duplicate(Exception):
     """To be raised when more than one filesystem object with the given name is found"""
@@ -33,6 +50,20 @@ class InvalidTestSuite(Exception):
     """To be raised when given a test suite that is invalid"""
 
 
+def tags_match(config_tags: Sequence[str], match_tags: Sequence[str], tag_op: Callable[[Sequence], bool]) -> bool:
+    """Do the given config tags match the given tags and tag operator?
+
+    :param config_tags: Lowercase names of the tags defined in a config
+    :param match_tags: The tags to match
+    :param tag_op: The operator to apply to resulting matches (any, all)
+    :return: True if the config tags match, else False
+    """
+    if not match_tags:
+        return True
+
+    return tag_op([match_tag.lower() in config_tags for match_tag in match_tags])
+
+
 # Subclass WindowsPath / PosixPath based on whatever Path determines the OS to be
 class HyalusTest(Path().__class__):  # type: ignore
     """Class representing a hyalus test Path"""
@@ -63,14 +94,11 @@ class HyalusTest(Path().__class__):  # type: ignore
         :return: True if the test matches the given tags, else False
         """
         try:
-            config_tags = [tag.__class__.__name__.lower() for tag in ConfigLoader(self.config).run().TAGS]
+            config_tags = [tag.__class__.__name__.lower() for tag in load_config_tags(self.config)]
         except config_common.InvalidHyalusConfig:
             return False
 
-        if not match_tags:
-            return True
-
-        return tag_op([match_tag.lower() in config_tags for match_tag in match_tags])
+        return tags_match(config_tags, match_tags, tag_op)
 
 
 class HyalusRun(HyalusTest):
@@ -180,6 +208,19 @@ class HyalusRun(HyalusTest):
         with open(self.run_metadata, 'w', encoding="utf-8") as run_metadata_fh:
             json.dump(run_metadata, run_metadata_fh, indent=4, sort_keys=True)
 
+    def update_run_metadata(self, **values: Any) -> None:
+        """Add information about the run to its metadata JSON file, e.g. once the run has finished
+
+        :param values: The information to add, replacing any already there under the same keys
+        """
+        with open(self.run_metadata, 'r', encoding="utf-8") as run_metadata_fh:
+            run_metadata = json.load(run_metadata_fh)
+
+        run_metadata.update(values)
+
+        with open(self.run_metadata, 'w', encoding="utf-8") as run_metadata_fh:
+            json.dump(run_metadata, run_metadata_fh, indent=4, sort_keys=True)
+
     def within_date_range(self, oldest: date, newest: date) -> bool:
         """Is this test run within the given date range?
 
@@ -246,6 +287,27 @@ def _parse_test_suite(test_suite: str | Path) -> list[str]:
     return lines
 
 
+def _single_fs_obj(to_find: str | Path, fs_objs: list[Path], search_dirs: list[Path]) -> Path:
+    """Check that exactly one filesystem object was found for the given path
+
+    :param to_find: The path that was searched for
+    :param fs_objs: The matching filesystem objects found
+    :param search_dirs: The directories that were searched
+    :return: The absolute Path to the filesystem object, if a single instance was found
+    :raises NotFound: If no filesystem objects were found
+    :raises Duplicate: If more than one filesystem object was found
+    """
+    if not fs_objs:
+        msg = f"Could not find item {to_find} in directories: {', '.join([str(sd) for sd in search_dirs])}"
+        raise NotFound(msg)
+
+    if len(fs_objs) > 1:
+        msg = f"Found multiple items with name {to_find}: {', '.join([str(fs_obj) for fs_obj in fs_objs])}"
+        raise Duplicate(msg)
+
+    return fs_objs[0].absolute()
+
+
 def find_fs_obj(to_find: str | Path, search_dirs: list[Path] = None) -> Path:
     """Given a path, attempt to find a match in from the current the given search directories
 
@@ -267,73 +329,331 @@ def find_fs_obj(to_find: str | Path, search_dirs: list[Path] = None) -> Path:
             if search_path not in fs_objs:
                 fs_objs.append(search_path)
 
-    if not fs_objs:
-        msg = f"Could not find item {to_find} in directories: {', '.join([str(sd) for sd in search_dirs])}"
-        raise NotFound(msg)
+    return _single_fs_obj(to_find, fs_objs, search_dirs)
 
-    if len(fs_objs) > 1:
-        msg = f"Found multiple items with name {to_find}: {', '.join([str(fs_obj) for fs_obj in fs_objs])}"
-        raise Duplicate(msg)
 
-    return fs_objs[0].absolute()
+class SuiteResolver:
+    """Resolves test names and (possibly nested) test suites into hyalus tests.
+
+    The top level of every search directory is listed once up front, so plain names are looked up in memory rather
+    than by stat'ing each search directory. Each test suite is parsed and expanded only once, no matter how many other
+    suites include it, and suites that include themselves are reported rather than recursed into forever.
+    """
 
+    def __init__(self, search_dirs: Sequence[Path] = None) -> None:
+        """Ctor.
 
-def find_all_tests(search_dirs: Sequence[Path]) -> set[HyalusTest]:
-    """Given a list of directories to search, find all hyalus tests within them. Note this does not check test validity.
+        :param search_dirs: Directories to search for tests/test suites. The current working directory is always
+            searched as well.
+        """
+        self.search_dirs = list(search_dirs) if search_dirs else []
+
+        if (cwd := Path.cwd()) not in self.search_dirs:
+            self.search_dirs.append(cwd)
+
+        self.__names: dict[str, list[Path]] = None
+        self.__found: dict[str, frozenset[HyalusTest]] = {}
+        self.__suites: dict[Path, frozenset[HyalusTest]] = {}
+
+    @property
+    def names(self) -> dict[str, list[Path]]:
+        """Mapping of every name at the top level of the search directories to the paths with that name, built on
+        first access
+
+        :return: The name index
+        """
+        if self.__names is None:
+            self.__names = {}
+
+            for search_dir in self.search_dirs:
+                try:
+                    with os.scandir(search_dir) as entries:
+                        for entry in entries:
+                            paths = self.__names.setdefault(entry.name, [])
+                            if (path := search_dir / entry.name) not in paths:
+                                paths.append(path)
+                except OSError:
+                    continue
+
+        return self.__names
+
+    def find(self, to_find: str | Path) -> Path:
+        """Find a filesystem object in the search directories, as :py:func:`find_fs_obj` does
+
+        :param to_find: Name or path of the filesystem object to find
+        :return: The absolute Path to the filesystem object, if a single instance was found
+        :raises NotFound: If the given filesystem object could not be found in any of the search directories
+        :raises Duplicate: If the given filesystem object was found more than once in the search directories
+        """
+        path = Path(to_find)
+
+        # Only plain names can be served from the name index
+        if path.is_absolute() or len(path.parts) != 1 or path.name in (os.curdir, os.pardir):
+            return find_fs_obj(path, search_dirs=list(self.search_dirs))
+
+        return _single_fs_obj(to_find, self.names.get(path.name, []), self.search_dirs)
+
+    def resolve(self, test_names: Sequence[str | Path]) -> set[HyalusTest]:
+        """Resolve the given test names and/or test suites into tests
+
+        :param test_names: Names of tests/test suites to resolve
+        :return: Absolute paths to all tests, with any found duplicates ignored
+        :raises InvalidTestSuite: If a given file is not a test suite, cannot be parsed, or includes itself
+        """
+        return set().union(*(self.__resolve_name(test_name, ()) for test_name in test_names))
+
+    def __resolve_name(self, test_name: str | Path, chain: tuple[Path, ...]) -> frozenset[HyalusTest]:
+        """Resolve a single test name or test suite into tests
+
+        :param test_name: Name of the test/test suite
+        :param chain: The test suites currently being expanded, outermost first
+        :return: The tests
+        """
+        if (tests := self.__found.get(str(test_name))) is not None:
+            return tests
+
+        path = self.find(test_name)
+
+        # Any file that is given is meant to be a test suite
+        if path.is_file():
+            if path.suffix != SUITE_EXT:
+                raise InvalidTestSuite(f"Given file {test_name} did not conform to test suite naming convention")
+            tests = self.__resolve_suite(path, chain)
+        elif (test := HyalusTest(path)).is_valid:
+            tests = frozenset([test])
+        else:
+            tests = frozenset()
+
+        self.__found[str(test_name)] = tests
+
+        return tests
+
+    def __resolve_suite(self, test_suite: Path, chain: tuple[Path, ...]) -> frozenset[HyalusTest]:
+        """Expand a test suite, including any test suites nested within it, into tests
+
+        :param test_suite: Absolute path to the test suite
+        :param chain: The test suites currently being expanded, outermost first
+        :return: The tests
+        :raises InvalidTestSuite: If the test suite includes itself, directly or through other test suites
+        """
+        if test_suite in chain:
+            cycle = ' -> '.join(str(suite) for suite in chain[chain.index(test_suite):] + (test_suite,))
+            raise InvalidTestSuite(f"Test suite {test_suite} includes itself: {cycle}")
+
+        if (tests := self.__suites.get(test_suite)) is None:
+            chain += (test_suite,)
+            tests = frozenset().union(*(self.__resolve_name(name, chain) for name in _parse_test_suite(test_suite)))
+            self.__suites[test_suite] = tests
+
+        return tests
+
+
+def _index_test(test: HyalusTest, index: DiscoveryIndex) -> IndexEntry | None:
+    """Get the discovery index entry for a potential hyalus test, loading its config.py only if the entry is stale
+
+    :param test: The potential hyalus test
+    :param index: The discovery index for the search directory containing the test
+    :return: The up-to-date index entry, or None if the directory has no config.py
+    """
+    try:
+        stat = test.config.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    if (entry := index.get(test.config, stat)) is not None:
+        return entry
+
+    is_valid = not HyalusRun(test).is_valid
+    status = config_common.ConfigStatus.VALID
+    tags = []
+
+    # Previous test runs are never run or matched, so there is no need to load their configs
+    if is_valid:
+        try:
+            tags = [tag.__class__.__name__.lower() for tag in load_config_tags(test.config)]
+        except config_common.InvalidHyalusConfig as exc:
+            status = exc.failure
+
+    return index.update(test.config, stat, is_valid, status, tags)
+
+
+class _ScanResult(NamedTuple):
+    """Result of scanning a single directory while searching for tests"""
+
+    test: HyalusTest | None
+    subdirs: list[tuple[Path, str | None]]
+
+
+def _scan_dir(path: Path, depth: int, max_depth: int) -> _ScanResult:
+    """List a single directory with ``os.scandir`` to determine whether it is a hyalus test and which of its
+    subdirectories should be searched next. Previous test runs and the input/output/tmp subdirectories of tests are
+    not descended into.
+
+    :param path: The directory to scan
+    :param depth: The depth of the directory relative to its search directory, which has a depth of 0
+    :param max_depth: The maximum depth to search to, 0 for no limit
+    :return: The test, if the directory is one, and subdirectories to scan along with their real paths if symlinked
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return _ScanResult(None, [])
+
+    test = None
+
+    # Search directories themselves are never tests
+    if depth > 0 and any(entry.name == config_common.CONFIG_PY.name for entry in entries):
+        if HyalusRun(path).is_valid:
+            return _ScanResult(None, [])
+
+        test = HyalusTest(path)
+
+    if max_depth and depth >= max_depth:
+        return _ScanResult(test, [])
+
+    subdirs = []
+
+    for entry in entries:
+        if entry.name in PRUNED_DIRS or not entry.is_dir():
+            continue
+
+        subdirs.append((Path(entry.path), os.path.realpath(entry.path) if entry.is_symlink() else None))
+
+    return _ScanResult(test, subdirs)
+
+
+def scan_tests(search_dirs: Sequence[Path], max_depth: int = 1, workers: int = None) -> dict[Path, set[HyalusTest]]:
+    """Recursively search the given directories for hyalus tests, scanning directories concurrently over a thread pool.
+    Each directory is listed once with ``os.scandir``, which keeps the number of stat calls down on network filesystems.
 
     :param search_dirs: The directories to search
-    :return: Absolute paths to hyalus tests found
+    :param max_depth: How many levels below each search directory to look for tests, 0 for no limit. The default of 1
+        only considers direct subdirectories of each search directory.
+    :param workers: Number of threads used to scan directories, defaults to the ``ThreadPoolExecutor`` default
+    :return: Mapping of each search directory to the absolute paths of the hyalus tests found within it
     """
-    tests = set()
+    tests: dict[Path, set[HyalusTest]] = {search_dir: set() for search_dir in search_dirs}
+    visited: set[str] = set()
 
-    for search_dir in search_dirs:
-        for test_dir in search_dir.iterdir():
-            if (test := HyalusTest(test_dir)).is_valid:
-                tests.add(test.absolute())
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: dict[Future, tuple[Path, int]] = {
+            executor.submit(_scan_dir, search_dir, 0, max_depth): (search_dir, 0) for search_dir in search_dirs
+        }
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                search_dir, depth = pending.pop(future)
+                test, subdirs = future.result()
+
+                if test is not None:
+                    tests[search_dir].add(test.absolute())
+
+                for subdir, real_path in subdirs:
+                    # Guard against symlink cycles when descending without a depth limit
+                    if real_path is not None:
+                        if real_path in visited:
+                            continue
+                        visited.add(real_path)
+
+                    pending[executor.submit(_scan_dir, subdir, depth + 1, max_depth)] = (search_dir, depth + 1)
 
     return tests
 
 
-def find_tests_by_name(test_names: Sequence[str | Path], search_dirs: list[Path]) -> set[HyalusTest]:
-    """Given a list of test names and/or test suites and search directories, get absolute paths to the tests
+def find_indexed_tests(
+    search_dirs: Sequence[Path], max_depth: int = 1, workers: int = None
+) -> dict[HyalusTest, IndexEntry]:
+    """Given a list of directories to search, find all hyalus tests within them along with their discovery index
+    entries. Only configs that changed since they were last indexed are loaded.
 
-    :param test_names: Names of tests/test suites to find/parse
-    :param search_dirs: Directories to search for tests/test suites
-    :return: Absolute paths to all tests to run, with any found duplicates ignored
+    :param search_dirs: The directories to search
+    :param max_depth: How many levels below each search directory to look for tests, 0 for no limit
+    :param workers: Number of threads used to scan directories
+    :return: Mapping of absolute paths to hyalus tests found to their index entries
     """
-    tests = set()
+    tests = {}
+
+    for search_dir, found in scan_tests(search_dirs, max_depth=max_depth, workers=workers).items():
+        index = DiscoveryIndex(search_dir)
+        seen = set()
+
+        for test in found:
+            if (entry := _index_test(test, index)) is None:
+                continue
 
-    for test_path in (Path(t) for t in test_names):
-        absolute_test_path = find_fs_obj(test_path, search_dirs=search_dirs)
+            seen.add(test.config)
 
-        if (test := HyalusTest(absolute_test_path)).is_valid:
-            tests.add(test)
+            if entry.is_valid:
+                tests[test] = entry
 
-        # ... And that any file that is given is meant to be a test suite[str(tag) for tag in
-        if absolute_test_path.is_file():
-            if absolute_test_path.suffix != SUITE_EXT:
-                raise InvalidTestSuite(f"Given file {test_path} did not conform to test suite naming convention")
-            tests |= find_tests_by_name(_parse_test_suite(absolute_test_path), search_dirs)
+        index.prune(seen)
+        index.save()
 
     return tests
 
 
+def find_all_tests(
+    search_dirs: Sequence[Path], use_index: bool = True, max_depth: int = 1, workers: int = None
+) -> set[HyalusTest]:
+    """Given a list of directories to search, find all hyalus tests within them. Note this does not check test validity.
+
+    :param search_dirs: The directories to search
+    :param use_index: Serve results from the on-disk discovery index of each search directory
+    :param max_depth: How many levels below each search directory to look for tests, 0 for no limit
+    :param workers: Number of threads used to scan directories
+    :return: Absolute paths to hyalus tests found
+    """
+    if use_index:
+        return set(find_indexed_tests(search_dirs, max_depth=max_depth, workers=workers))
+
+    return set().union(*scan_tests(search_dirs, max_depth=max_depth, workers=workers).values())
+
+
+def find_tests_by_name(test_names: Sequence[str | Path], search_dirs: list[Path]) -> set[HyalusTest]:
+    """Given a list of test names and/or test suites and search directories, get absolute paths to the tests
+
+    :param test_names: Names of tests/test suites to find/parse
+    :param search_dirs: Directories to search for tests/test suites
+    :return: Absolute paths to all tests to run, with any found duplicates ignored
+    """
+    return SuiteResolver(search_dirs).resolve(test_names)
+
+
+# pylint: disable=too-many-arguments
 def find_tests_by_tag(
-    match_tags: Sequence[str], tag_op: Callable[[Sequence], bool], search_dirs: Sequence[Path]
+    match_tags: Sequence[str],
+    tag_op: Callable[[Sequence], bool],
+    search_dirs: Sequence[Path],
+    use_index: bool = True,
+    max_depth: int = 1,
+    workers: int = None,
 ) -> set[HyalusTest]:
     """Search the given search directories for hyalus tests matching the given tags
 
     :param match_tags: List of tag names for tests to match
     :param tag_op: Function to apply to the resulting list of bools coming from match checking, e.g. any/all
     :param search_dirs: The directories to search through for hyalus tests
+    :param use_index: Serve tags from the on-disk discovery index of each search directory
+    :param max_depth: How many levels below each search directory to look for tests, 0 for no limit
+    :param workers: Number of threads used to scan directories
     :return: List of absolute paths corresponding to tests matching the given tags
     """
     if not match_tags:
         return set()
 
+    if use_index:
+        return {
+            test
+            for test, entry in find_indexed_tests(search_dirs, max_depth=max_depth, workers=workers).items()
+            if entry.status is config_common.ConfigStatus.VALID and tags_match(entry.tags, match_tags, tag_op)
+        }
+
     tests = set()
 
-    for test in find_all_tests(search_dirs):
+    for test in find_all_tests(search_dirs, use_index=False, max_depth=max_depth, workers=workers):
         if test.matches_tags(match_tags, tag_op):
             tests.add(test.absolute())
 
@@ -0,0 +1,524 @@
+"""Running a hyalus test suite across several hosts, with a coordinator handing out tests to workers over TCP"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from collections import Counter, deque
+import json
+import logging
+import os
+from pathlib import Path
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Mapping, Sequence
+
+from hyalus.run.common import Duplicate, HyalusTest, InvalidTestSuite, NotFound, find_tests_by_name
+from hyalus.run.pool import WorkerPool
+from hyalus.run.progress import SuiteProgress
+from hyalus.run.report import SuiteReport, TestReport
+from hyalus.run.runsuite import HyalusSuiteRunner, NoTestsFound, _task_outcome
+from hyalus.run.schedule import expected_durations, test_memory_limit, test_runtime_tag, test_timeout
+
+#: Port the coordinator listens on when none is given
+DEFAULT_PORT = 7770
+
+#: Seconds between heartbeats sent by a worker while it runs a test
+HEARTBEAT_INTERVAL = 5
+
+#: Seconds the coordinator waits to hear from a worker before considering it gone and requeuing its test
+HEARTBEAT_TIMEOUT = 30
+
+#: Seconds an idle worker waits before asking for a test again while the last tests are still running elsewhere
+WAIT_INTERVAL = 1
+
+#: Number of times a test is handed out before it is reported as an error, if every worker running it disappears
+MAX_ATTEMPTS = 3
+
+_logger = logging.getLogger("hyalus.run.distributed")
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """Split an address into its host and port
+
+    :param address: The address, as ``host:port``, ``host`` for the default port, or ``:port`` for localhost
+    :return: The host and port
+    :raises ValueError: If the port is not an integer
+    """
+    host, _, port = address.rpartition(":") if ":" in address else (address, ":", "")
+
+    return host or "localhost", int(port) if port else DEFAULT_PORT
+
+
+def _send(sock: socket.socket, message: dict[str, Any]) -> None:
+    """Send a message as a single line of JSON
+
+    :param sock: The connection
+    :param message: The message
+    """
+    sock.sendall((json.dumps(message) + "\n").encode())
+
+
+def _receive(reader: BinaryIO) -> dict[str, Any] | None:
+    """Receive a message sent with _send
+
+    :param reader: Stream reading from the connection
+    :return: The message, or None if the connection was closed
+    :raises ValueError: If the message is not valid JSON
+    """
+    line = reader.readline()
+
+    return json.loads(line) if line else None
+
+
+class _TestQueue:
+    """Tests of a distributed suite that are yet to be handed out, are running on a worker, or have finished. All
+    access must hold the queue's condition, which is notified once the suite has finished.
+    """
+
+    def __init__(
+        self,
+        tests: Sequence[HyalusTest],
+        progress: SuiteProgress,
+        report: SuiteReport,
+        maxfail: int,
+        groups: Mapping[HyalusTest, int] = None,
+    ) -> None:
+        """Ctor.
+
+        :param tests: The tests to run, in the order they should be started in
+        :param progress: Progress reporter for the suite
+        :param report: Report of the suite
+        :param maxfail: Stop handing out tests once this many tests have failed, 0 to always run every test
+        :param groups: Mapping of each test sharing input data with other tests to its group, see
+            :py:func:`hyalus.run.schedule.affinity_groups`
+        """
+        self.pending = deque(tests)
+        self.groups = groups if groups else {}
+        self.last_group: dict[str, int] = {}
+        self.running: dict[HyalusTest, str] = {}
+        self.results: dict[HyalusTest, bool] = {}
+        self.reports: dict[HyalusTest, TestReport] = {}
+        self.attempts: Counter[HyalusTest] = Counter()
+        self.workers: set[str] = set()
+        self.progress = progress
+        self.report = report
+        self.maxfail = maxfail
+        self.aborted = False
+        self.condition = threading.Condition()
+
+        self.__total = len(tests)
+
+    @property
+    def finished(self) -> bool:
+        """:return: True if every test has a result or the suite was stopped early, else False"""
+        return self.aborted or len(self.results) == self.__total
+
+    def connected(self, worker: str) -> None:
+        """Record that a worker connected
+
+        :param worker: Name of the worker
+        """
+        self.workers.add(worker)
+        self.progress.jobs = len(self.workers)
+
+    def disconnected(self, worker: str, test: HyalusTest | None) -> None:
+        """Record that a worker disconnected, requeuing the test it was running if any, and notify the queue's
+        condition
+
+        :param worker: Name of the worker
+        :param test: The test the worker was running, None if it was idle
+        """
+        self.workers.discard(worker)
+        self.progress.jobs = max(len(self.workers), 1)
+        self.condition.notify_all()
+
+        if test is None or test in self.results or self.aborted:
+            return
+
+        del self.running[test]
+
+        if self.attempts[test] >= MAX_ATTEMPTS:
+            msg = f"Lost {self.attempts[test]} workers while running the test"
+            self.finish(test, False, f"{test}: ERROR\n{msg}\n", TestReport.lost(test, msg))
+            return
+
+        self.pending.appendleft(test)
+        self.progress.requeued(test, f"Lost worker {worker} while running {test}, requeued")
+
+    def _next_index(self, worker: str) -> int:
+        """Pick the pending test to hand out to a worker next, so that tests sharing input data run one after another on
+        the same worker, reading the data while it is in that host's page cache. The worker gets the next test of the
+        group it last ran a test of if there is one left, otherwise the first test not in a group that another worker
+        is running tests of, otherwise the first test.
+
+        :param worker: Name of the worker
+        :return: Index of the test in the pending tests
+        """
+        if not self.groups:
+            return 0
+
+        if (last_group := self.last_group.get(worker)) is not None:
+            for i, test in enumerate(self.pending):
+                if self.groups.get(test) == last_group:
+                    return i
+
+        claimed = {self.groups.get(test) for test, running_on in self.running.items() if running_on != worker}
+
+        for i, test in enumerate(self.pending):
+            if (group := self.groups.get(test)) is None or group not in claimed:
+                return i
+
+        return 0
+
+    def next_test(self, worker: str) -> HyalusTest | None:
+        """Hand out the next test to a worker, see :py:meth:`_next_index`
+
+        :param worker: Name of the worker
+        :return: The test, or None if no tests are waiting to be run
+        """
+        if self.aborted or not self.pending:
+            return None
+
+        index = self._next_index(worker)
+        test = self.pending[index]
+        del self.pending[index]
+
+        self.last_group[worker] = self.groups.get(test)
+
+        self.running[test] = worker
+        self.attempts[test] += 1
+        self.progress.started(test)
+
+        return test
+
+    def finish(self, test: HyalusTest, result: bool, output: str, report: TestReport) -> None:
+        """Record the result of a test, stopping the suite if maxfail tests have failed. Results of tests that were
+        still running when the suite was stopped are ignored.
+
+        :param test: The test
+        :param result: True if the test passed, else False
+        :param output: What the test printed
+        :param report: Report of the test's run
+        """
+        if self.aborted:
+            return
+
+        self.running.pop(test, None)
+        self.results[test] = result
+        self.reports[test] = report
+        self.progress.finished(test, result, output)
+        self.report.add(report)
+
+        if self.maxfail and self.progress.failed >= self.maxfail:
+            self.aborted = True
+            self.pending.clear()
+            self.progress.abort(f"Stopping after {self.progress.failed} failed test(s), remaining tests were not run")
+
+        if self.finished:
+            self.condition.notify_all()
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """Serves a single worker connection, handing out tests on request and collecting their results"""
+
+    server: "_CoordinatorServer"
+
+    def setup(self) -> None:
+        super().setup()
+        self.request.settimeout(self.server.heartbeat_timeout)
+
+    def handle(self) -> None:
+        queue = self.server.queue
+        worker = f"{self.client_address[0]}:{self.client_address[1]}"
+        test = None
+
+        with queue.condition:
+            queue.connected(worker)
+
+        try:
+            while (message := _receive(self.rfile)) is not None:
+                with queue.condition:
+                    match message.get("type"):
+                        case "hello":
+                            queue.workers.discard(worker)
+                            worker = str(message.get("worker", worker))
+                            queue.connected(worker)
+                        case "request" if queue.finished:
+                            _send(self.request, {"type": "done"})
+                            return
+                        case "request":
+                            if (test := queue.next_test(worker)) is None:
+                                _send(self.request, {"type": "wait", "seconds": WAIT_INTERVAL})
+                            else:
+                                _send(self.request, {"type": "test", "path": str(test), "name": test.name})
+                        case "result" if test is not None:
+                            output = str(message.get("output", ""))
+
+                            try:
+                                report = TestReport.from_dict(message.get("report"))
+                            except ValueError as exc:
+                                report = TestReport.lost(test, f"Worker {worker} sent an invalid report: {exc}")
+
+                            queue.finish(test, bool(message.get("passed")), output, report)
+                            test = None
+        except (OSError, ValueError) as exc:
+            _logger.warning(f"Lost connection to worker {worker}: {exc}")
+        finally:
+            with queue.condition:
+                queue.disconnected(worker, test)
+
+
+class _CoordinatorServer(socketserver.ThreadingTCPServer):
+    """TCP server handing out the tests of a queue to the workers connecting to it"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], queue: _TestQueue, heartbeat_timeout: float) -> None:
+        """Ctor.
+
+        :param address: Host and port to listen on
+        :param queue: The tests to hand out
+        :param heartbeat_timeout: Seconds to wait to hear from a worker before considering it gone
+        """
+        self.queue = queue
+        self.heartbeat_timeout = heartbeat_timeout
+
+        super().__init__(address, _WorkerHandler)
+
+
+class HyalusCoordinator(HyalusSuiteRunner):
+    """Find relevant tests to run and hand them out to workers that connect over TCP, see
+    :py:class:`HyalusWorker`, so that a suite can be spread over several hosts. Results are reported as workers send
+    them back. A test whose worker disconnects or stops sending heartbeats is put back at the front of the queue for
+    the next worker to pick up.
+    """
+
+    def __init__(
+        self, *args, address: str = f"localhost:{DEFAULT_PORT}", heartbeat_timeout: float = HEARTBEAT_TIMEOUT, **kwargs
+    ) -> None:
+        """Ctor.
+
+        :param address: Address to listen for workers on, as ``host:port``. Port 0 picks a free port.
+        :param heartbeat_timeout: Seconds to wait to hear from a worker before requeuing its test
+        :param args: Arguments for :py:class:`hyalus.run.runsuite.HyalusSuiteRunner`
+        :param kwargs: Keyword arguments for :py:class:`hyalus.run.runsuite.HyalusSuiteRunner`
+        """
+        super().__init__(*args, **kwargs)
+
+        self.address = parse_address(address)
+        self.heartbeat_timeout = heartbeat_timeout
+        self.listening = threading.Event()
+
+    def run(self) -> bool:
+        """Find tests to run and serve them to workers until every test has a result
+
+        :return: True if all tests passed, False if one or more tests failed or the suite was stopped early because
+            maxfail tests failed
+        :raises NoTestsFound: If no tests were found
+        """
+        tests = self.get_tests()
+
+        if not tests:
+            raise NoTestsFound("No tests were run - check test configuration")
+
+        if not (tests := self.select_last_failed(tests)):
+            print("No tests failed last time")
+            return True
+
+        history = self.run_history(tests)
+        progress = SuiteProgress(expected_durations(tests, history), 1)
+        report = SuiteReport(self.jsonl_report, self.junit_report)
+        groups = self.affinity_groups(tests)
+        queue = _TestQueue(self.schedule(tests, history, groups), progress, report, self.maxfail, groups)
+
+        try:
+            with report, _CoordinatorServer(self.address, queue, self.heartbeat_timeout) as server:
+                self.address = server.server_address[:2]
+                print(f"Waiting for workers on {self.address[0]}:{self.address[1]}", file=sys.stderr)
+                self.listening.set()
+
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+
+                with queue.condition:
+                    queue.condition.wait_for(lambda: queue.finished)
+
+                    # Give idle workers the chance to ask for another test and be told that the suite has finished
+                    queue.condition.wait_for(lambda: not queue.workers, timeout=2 * WAIT_INTERVAL)
+
+                server.shutdown()
+        finally:
+            with queue.condition:
+                # Workers record the runs of their tests in runs directories of their own
+                self.history.record_runs(
+                    [
+                        (test, run.status, None if run.cached else run.wall_time, test_runtime_tag(test))
+                        for test, run in queue.reports.items()
+                    ]
+                )
+
+        progress.close()
+
+        return not queue.aborted and all(queue.results.values())
+
+
+class HyalusWorker(HyalusSuiteRunner):
+    """Connect to a :py:class:`HyalusCoordinator` and run the tests it hands out into this worker's runs directory,
+    sending back each test's result and output. Tests are looked up by path first, so hosts sharing a filesystem run
+    the coordinator's copy of a test, and by name in the worker's search directories otherwise. Each test runs in its
+    own process with the same timeouts as under :py:class:`hyalus.run.runsuite.HyalusSuiteRunner`.
+    """
+
+    def __init__(self, address: str, *args, connect_timeout: float = 30, **kwargs) -> None:
+        """Ctor.
+
+        :param address: Address of the coordinator, as ``host:port``
+        :param connect_timeout: Seconds to keep retrying to connect to the coordinator, e.g. while it starts up
+        :param args: Arguments for :py:class:`hyalus.run.runsuite.HyalusSuiteRunner`
+        :param kwargs: Keyword arguments for :py:class:`hyalus.run.runsuite.HyalusSuiteRunner`, where jobs is the
+            number of tests this worker runs at once
+        """
+        super().__init__(*args, **kwargs)
+
+        self.address = parse_address(address)
+        self.connect_timeout = connect_timeout
+
+    def run(self) -> bool:
+        """Run tests handed out by the coordinator until it reports that the suite has finished
+
+        :return: True if the suite finished, False if the coordinator could not be reached or went away
+        """
+        results = [False] * self.jobs
+
+        def work(slot: int) -> None:
+            results[slot] = self._work(f"{socket.gethostname()}:{os.getpid()}:{slot}")
+
+        threads = [threading.Thread(target=work, args=(slot,)) for slot in range(self.jobs)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        return all(results)
+
+    def _connect(self) -> socket.socket:
+        """Connect to the coordinator, retrying until the connect timeout passes
+
+        :return: The connection
+        :raises OSError: If the coordinator could not be reached in time
+        """
+        deadline = time.monotonic() + self.connect_timeout
+
+        while True:
+            try:
+                return socket.create_connection(self.address)
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise
+
+            time.sleep(WAIT_INTERVAL)
+
+    def _work(self, name: str) -> bool:
+        """Pull tests from the coordinator and run them one at a time until it reports that the suite has finished
+
+        :param name: Name identifying this connection to the coordinator
+        :return: True if the suite finished, False if the coordinator could not be reached or went away
+        """
+        try:
+            sock = self._connect()
+        except OSError as exc:
+            _logger.error(f"Could not connect to coordinator {self.address[0]}:{self.address[1]}: {exc}")
+            return False
+
+        lock = threading.Lock()
+
+        def send(message: dict[str, Any]) -> None:
+            with lock:
+                _send(sock, message)
+
+        with sock, sock.makefile("rb") as reader, WorkerPool(preload_modules=self.preload_modules) as pool:
+            try:
+                send({"type": "hello", "worker": name})
+
+                while True:
+                    send({"type": "request"})
+
+                    match _receive(reader):
+                        case {"type": "done"}:
+                            return True
+                        case {"type": "wait", **wait}:
+                            time.sleep(wait.get("seconds", WAIT_INTERVAL))
+                        case {"type": "test", "path": path, "name": test_name}:
+                            result, output, report = self._run_handed_out(Path(path), test_name, pool, send)
+                            send({"type": "result", "passed": result, "output": output, "report": report.to_dict()})
+                        case None:
+                            _logger.error("Coordinator closed the connection before the suite finished")
+                            return False
+            except (OSError, ValueError) as exc:
+                _logger.error(f"Lost connection to coordinator: {exc}")
+                return False
+
+    def _resolve(self, path: Path, test_name: str) -> HyalusTest | None:
+        """Find a test handed out by the coordinator
+
+        :param path: Path to the test on the coordinator
+        :param test_name: Name of the test
+        :return: The test, or None if it could not be found
+        """
+        if (test := HyalusTest(path)).is_valid:
+            return test
+
+        try:
+            tests = find_tests_by_name([test_name], self.search_dirs)
+        except (NotFound, Duplicate, InvalidTestSuite) as exc:
+            _logger.error(f"Could not find test {test_name} handed out by the coordinator: {exc}")
+            return None
+
+        return next(iter(tests), None)
+
+    def _run_handed_out(
+        self, path: Path, test_name: str, pool: WorkerPool, send: Callable[[dict[str, Any]], None]
+    ) -> tuple[bool, str, TestReport]:
+        """Run a test handed out by the coordinator in a worker process, sending heartbeats while it runs
+
+        :param path: Path to the test on the coordinator
+        :param test_name: Name of the test
+        :param pool: Worker pool to run the test in
+        :param send: Function sending a message to the coordinator
+        :return: The result from running the test, what it printed, and its report
+        """
+        if (test := self._resolve(path, test_name)) is None:
+            msg = f"Test {test_name} not found on worker {socket.gethostname()}"
+            return False, f"{path}: ERROR\n{msg}\n", TestReport.lost(path, msg)
+
+        timeout = test_timeout(test, self.timeout_multiplier)
+        stop = threading.Event()
+
+        def heartbeat() -> None:
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                try:
+                    send({"type": "heartbeat"})
+                except OSError:
+                    return
+
+        heartbeats = threading.Thread(target=heartbeat, daemon=True)
+        heartbeats.start()
+
+        try:
+            memory_limit = test_memory_limit(test, self.memory_limit_multiplier)
+            pool.submit(test, self._run_test_captured, (test, timeout, memory_limit), timeout=timeout)
+            result, output, report = _task_outcome(pool.wait(), timeout)
+        finally:
+            stop.set()
+            heartbeats.join()
+
+        sys.stdout.write(output)
+        sys.stdout.flush()
+
+        return result, output, report
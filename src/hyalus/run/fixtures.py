@@ -0,0 +1,199 @@
+"""Suite fixtures: tests whose Steps run once per suite to prepare data shared read-only by the tests using them"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import stat
+import time
+from typing import ContextManager, Iterable, NamedTuple, Sequence
+
+from hyalus.config.analyzer import load_config_tags
+from hyalus.config.common import FIXTURES_PATH, InvalidHyalusConfig
+from hyalus.config.tags.fixtures import SuiteFixture, UsesFixture
+from hyalus.run.cache import ResultCache
+from hyalus.run.common import Duplicate, HyalusRun, HyalusTest, NotFound, find_fs_obj
+from hyalus.utils import sqlite_utils
+
+FIXTURES_FILE = ".hyalus_fixtures.sqlite"
+FIXTURES_VERSION = 1
+
+_logger = logging.getLogger("hyalus.run.fixtures")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fixtures (
+    fingerprint TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    run_dir TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+
+class FixtureNotPrepared(Exception):
+    """To be raised when a test uses a suite fixture that has no passing run to share"""
+
+
+class PreparedFixture(NamedTuple):
+    """A passing run of a suite fixture, whose output is shared with the tests using the fixture"""
+
+    name: str
+    fingerprint: str | None
+    run_dir: HyalusRun
+
+
+def is_suite_fixture(test: HyalusTest) -> bool:
+    """:return: True if the test is tagged as a suite fixture, else False"""
+    try:
+        return any(isinstance(tag, SuiteFixture) for tag in load_config_tags(test.config))
+    except InvalidHyalusConfig:
+        return False
+
+
+def fixture_names(test: HyalusTest) -> list[str]:
+    """Get the suite fixtures a test uses from the UsesFixture tags in its config
+
+    :param test: The test
+    :return: Names of the fixtures in the order declared, none if the test's config cannot be loaded
+    """
+    try:
+        tags = load_config_tags(test.config)
+    except InvalidHyalusConfig:
+        return []
+
+    return list(dict.fromkeys(tag.name for tag in tags if isinstance(tag, UsesFixture)))
+
+
+def find_fixture(name: str, search_dirs: Sequence[Path]) -> HyalusTest:
+    """Find a suite fixture by name
+
+    :param name: Name of the fixture's test directory
+    :param search_dirs: Directories to search for the fixture
+    :return: Absolute path to the fixture
+    :raises FixtureNotPrepared: If no single suite fixture of that name is found
+    """
+    try:
+        fixture = HyalusTest(find_fs_obj(name, list(search_dirs)))
+    except (NotFound, Duplicate) as exc:
+        raise FixtureNotPrepared(f"Suite fixture {name}: {exc}") from exc
+
+    if not is_suite_fixture(fixture):
+        raise FixtureNotPrepared(f"{fixture} is not tagged as a SuiteFixture")
+
+    return fixture
+
+
+def make_read_only(path: Path) -> None:
+    """Remove write permission from every file below a directory, so that tests sharing them cannot change them.
+    Directories are left writable so that the run can still be cleaned up.
+
+    :param path: The directory
+    """
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            file = Path(dirpath) / filename
+
+            if not file.is_symlink():
+                file.chmod(stat.S_IMODE(file.stat().st_mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def expose_fixtures(run_dir: HyalusRun, fixtures: Iterable[PreparedFixture]) -> None:
+    """Link the output directory of each suite fixture a test uses into its run directory, as fixtures/<name>
+
+    :param run_dir: The run directory of the test
+    :param fixtures: The fixtures
+    """
+    for fixture in fixtures:
+        link = Path(run_dir) / FIXTURES_PATH / fixture.name
+        link.parent.mkdir(exist_ok=True)
+        link.symlink_to(fixture.run_dir.output_dir, target_is_directory=True)
+
+
+class FixtureStore:
+    """Passing runs of suite fixtures keyed on the fixture's fingerprint, see :py:meth:`ResultCache.fingerprint`,
+    stored as a SQLite database at the top level of the runs directory. A fixture that has not changed since it last
+    passed is not run again while its run directory is still there, across suites.
+    """
+
+    def __init__(self, runs_dir: str | Path) -> None:
+        """Ctor.
+
+        :param runs_dir: The runs directory to store fixture runs in
+        """
+        self.runs_dir = Path(runs_dir).absolute()
+        self.fixtures_file = self.runs_dir / FIXTURES_FILE
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """:return: Context manager for a connection to the store, creating it if need be"""
+        return sqlite_utils.connect(self.fixtures_file, _SCHEMA, FIXTURES_VERSION)
+
+    def find(self, fingerprint: str) -> HyalusRun | None:
+        """Find a passing run of a fixture with the given fingerprint, forgetting it if its run directory is gone.
+        Failing to read the store is treated as there being no run.
+
+        :param fingerprint: The fixture's fingerprint
+        :return: The run directory, or None if there is none
+        """
+        try:
+            with self._connect() as connection:
+                row = connection.execute(
+                    "SELECT run_dir FROM fixtures WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone()
+
+                if row is None:
+                    return None
+
+                if not (run_dir := HyalusRun(row[0])).output_dir.is_dir():
+                    connection.execute("DELETE FROM fixtures WHERE fingerprint = ?", (fingerprint,))
+                    return None
+
+                connection.execute(
+                    "UPDATE fixtures SET last_used = ? WHERE fingerprint = ?", (time.time(), fingerprint)
+                )
+        except sqlite3.Error as exc:
+            _logger.debug(f"Could not read suite fixtures {self.fixtures_file}: {exc}")
+            return None
+
+        return run_dir
+
+    def record(self, fixture: PreparedFixture) -> None:
+        """Record a passing run of a fixture. Failing to write the store is not an error.
+
+        :param fixture: The fixture run
+        """
+        if fixture.fingerprint is None:
+            return
+
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO fixtures VALUES (?, ?, ?, ?)",
+                    (fixture.fingerprint, fixture.name, str(fixture.run_dir), time.time()),
+                )
+        except sqlite3.Error as exc:
+            _logger.debug(f"Could not write suite fixtures {self.fixtures_file}: {exc}")
+
+    def lookup(self, name: str, search_dirs: Sequence[Path], cache: ResultCache) -> PreparedFixture:
+        """Find the passing run of the current version of a fixture, e.g. to run a test using it on its own
+
+        :param name: Name of the fixture's test directory
+        :param search_dirs: Directories to search for the fixture
+        :param cache: Cache to fingerprint the fixture with
+        :return: The fixture run
+        :raises FixtureNotPrepared: If the fixture cannot be found or has no passing run of its current version
+        """
+        fixture = find_fixture(name, search_dirs)
+
+        try:
+            fingerprint = cache.fingerprint(fixture)
+        except (sqlite3.Error, OSError) as exc:
+            raise FixtureNotPrepared(f"Could not fingerprint suite fixture {fixture}: {exc}") from exc
+
+        if (run_dir := self.find(fingerprint)) is None:
+            raise FixtureNotPrepared(f"Suite fixture {name} has not passed since it last changed - run with runsuite")
+
+        return PreparedFixture(name, fingerprint, run_dir)
@@ -0,0 +1,65 @@
+"""Dependency graphs of the Steps within a hyalus test"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from pathlib import Path
+from typing import Sequence
+
+from hyalus.config.steps.base import StepBase
+from hyalus.config.tags.base import TagBase
+from hyalus.config.tags.resources import Resources
+
+
+class InvalidStepGraph(Exception):
+    """To be raised when Steps declare dependencies that cannot be satisfied"""
+
+
+def _produces(step: StepBase, path: Path) -> bool:
+    """:return: True if the Step produces the given path or a directory containing it, else False"""
+    return any(output == path or output in path.parents for output in step.outputs)
+
+
+def step_dependencies(steps: Sequence[StepBase]) -> list[set[int]]:
+    """Work out which Steps each Step has to wait for. Steps that do not declare their dependencies wait for every Step
+    before them, so that tests not declaring any dependencies run their Steps strictly in order.
+
+    :param steps: The Steps of a test, in order
+    :return: For each Step, the indexes of the Steps it has to wait for
+    :raises InvalidStepGraph: If a Step depends on a Step that does not come before it
+    """
+    dependencies = []
+
+    for i, step in enumerate(steps):
+        if step.dependencies is None:
+            dependencies.append(set(range(i)))
+            continue
+
+        waits_for = set()
+
+        for dependency in step.dependencies:
+            if isinstance(dependency, StepBase):
+                earlier = [j for j in range(i) if steps[j] is dependency]
+                if not earlier:
+                    raise InvalidStepGraph(f"Step {i + 1} {step} depends on {dependency}, which is not an earlier step")
+                waits_for.update(earlier)
+            else:
+                waits_for.update(j for j in range(i) if _produces(steps[j], dependency))
+
+        dependencies.append(waits_for)
+
+    return dependencies
+
+
+def step_parallelism(tags: Sequence[TagBase]) -> int:
+    """Get how many of a test's Steps may run at once, from the CPUs in its Resources tag
+
+    :param tags: The test's tags
+    :return: The number of Steps that may run at once, at least 1
+    """
+    for tag in tags:
+        if isinstance(tag, Resources):
+            return max(int(tag.cpus), 1)
+
+    return 1
@@ -0,0 +1,239 @@
+"""Test impact analysis: which source files each hyalus test depends on, and which tests are affected by changes"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+from typing import ContextManager, Iterable, Sequence
+
+from hyalus.run.common import HyalusTest
+from hyalus.utils import sqlite_utils
+
+IMPACT_FILE = ".hyalus_impact.sqlite"
+IMPACT_VERSION = 1
+
+_logger = logging.getLogger("hyalus.run.impact")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recorded (
+    test TEXT PRIMARY KEY,
+    recorded REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dependencies (
+    test TEXT NOT NULL REFERENCES recorded(test) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    PRIMARY KEY (test, path)
+);
+"""
+
+# Recorders collecting the files opened in this process. Audit hooks cannot be removed once added, so a single hook is
+# added the first time a recorder starts and does nothing while no recorders are active.
+_active: set["DependencyRecorder"] = set()
+_active_lock = threading.Lock()
+_hook_added = False
+
+
+def _audit(event: str, args: tuple) -> None:
+    """Audit hook passing the paths of opened files on to any active recorders"""
+    if event != "open" or not _active or not isinstance(path := args[0], (str, bytes, os.PathLike)):
+        return
+
+    path = os.path.abspath(os.fsdecode(path))
+
+    for recorder in list(_active):
+        recorder.opened.add(path)
+
+
+def _library_dirs() -> list[str]:
+    """:return: Directories of the standard library and installed packages, which are never recorded"""
+    paths = sysconfig.get_paths()
+
+    return sorted({os.path.realpath(paths[key]) for key in ("stdlib", "platstdlib", "purelib", "platlib")})
+
+
+def _within(path: str, dirs: Iterable[str]) -> bool:
+    """:return: True if the path is, or is within, any of the given directories, else False"""
+    return any(path == dir_ or path.startswith(dir_.rstrip(os.sep) + os.sep) for dir_ in dirs)
+
+
+class DependencyRecorder:
+    """Context manager recording the source files of the Python modules imported by, and the files opened by, a test
+    while it runs: its config is loaded and its Steps run in this process, so Steps like RunFunctionStep are covered,
+    but files used by commands a Step runs in another process are not.
+
+    Every module imported in the process once the test finishes is recorded, not only those imported while it ran, as
+    a module imported earlier (e.g. preloaded before workers were started) is just as much a dependency. Files within
+    the standard library, installed packages, and the given directories are left out.
+    """
+
+    def __init__(self, exclude: Sequence[str | Path] = ()) -> None:
+        """Ctor.
+
+        :param exclude: Directories whose files are not recorded, e.g. the test and run directories
+        """
+        self.exclude = [os.path.realpath(path) for path in exclude] + _library_dirs()
+        self.opened: set[str] = set()
+        self.paths: set[str] = set()
+
+    def __enter__(self) -> "DependencyRecorder":
+        global _hook_added  # pylint: disable=global-statement
+
+        with _active_lock:
+            if not _hook_added:
+                sys.addaudithook(_audit)
+                _hook_added = True
+
+            _active.add(self)
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        with _active_lock:
+            _active.discard(self)
+
+        modules = {getattr(module, "__file__", None) for module in list(sys.modules.values())}
+        candidates = {os.path.realpath(path) for path in (modules | self.opened) - {None}}
+
+        self.paths = {path for path in candidates if not _within(path, self.exclude) and os.path.isfile(path)}
+
+
+class ImpactMap:
+    """Map of each test to the files it depended on the last time it was run, stored as a SQLite database at the top
+    level of the runs directory, see :py:class:`DependencyRecorder`. A test is affected by a change if the change is
+    within the test directory or touches one of its recorded dependencies. Tests with nothing recorded are always
+    considered affected, so that new tests are never skipped.
+    """
+
+    def __init__(self, runs_dir: str | Path) -> None:
+        """Ctor.
+
+        :param runs_dir: The runs directory to store the map in
+        """
+        self.runs_dir = Path(runs_dir).absolute()
+        self.impact_file = self.runs_dir / IMPACT_FILE
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """:return: Context manager for a connection to the map, creating it if need be"""
+        return sqlite_utils.connect(self.impact_file, _SCHEMA, IMPACT_VERSION)
+
+    def record(self, test: HyalusTest, paths: Iterable[str]) -> None:
+        """Replace the recorded dependencies of a test. Failing to write the map is not an error.
+
+        :param test: The test
+        :param paths: Absolute paths of the files the test depended on
+        """
+        key = os.path.realpath(test)
+
+        try:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM dependencies WHERE test = ?", (key,))
+                connection.execute("INSERT OR REPLACE INTO recorded VALUES (?, ?)", (key, time.time()))
+                connection.executemany(
+                    "INSERT OR IGNORE INTO dependencies VALUES (?, ?)", [(key, path) for path in sorted(paths)]
+                )
+        except sqlite3.Error as exc:
+            _logger.debug(f"Could not write test impact map {self.impact_file}: {exc}")
+
+    def dependencies(self, tests: Sequence[HyalusTest]) -> dict[HyalusTest, set[str] | None]:
+        """Get the recorded dependencies of tests
+
+        :param tests: The tests
+        :return: Mapping of test to the absolute paths of the files it depended on, or to None if nothing is recorded
+            for the test
+        :raises sqlite3.Error: If the map cannot be read
+        """
+        with self._connect() as connection:
+            recorded = {test for (test,) in connection.execute("SELECT test FROM recorded")}
+            paths: dict[str, set[str]] = {}
+
+            for test, path in connection.execute("SELECT test, path FROM dependencies"):
+                paths.setdefault(test, set()).add(path)
+
+        keys = {test: os.path.realpath(test) for test in tests}
+
+        return {test: paths.get(key, set()) if key in recorded else None for test, key in keys.items()}
+
+    def affected(self, tests: Sequence[HyalusTest], changed: Iterable[str | Path]) -> list[HyalusTest]:
+        """Pick out the tests affected by changes to the given paths. If the map cannot be read, every test is.
+
+        :param tests: The tests
+        :param changed: Paths of changed files or directories
+        :return: The affected tests, in the given order
+        """
+        changed = {os.path.realpath(path) for path in changed}
+
+        try:
+            dependencies = self.dependencies(tests)
+        except sqlite3.Error as exc:
+            _logger.warning(f"Could not read test impact map {self.impact_file}, running all tests: {exc}")
+            return list(tests)
+
+        def is_affected(test: HyalusTest) -> bool:
+            if (paths := dependencies[test]) is None:
+                return True
+
+            test_dir = os.path.realpath(test)
+
+            # Changes to the test itself, or to a directory containing it, always affect it
+            if _within(test_dir, changed) or any(_within(path, [test_dir]) for path in changed):
+                return True
+
+            return bool(paths & changed) or any(_within(path, changed) for path in paths)
+
+        return [test for test in tests if is_affected(test)]
+
+
+def changed_paths(since: Sequence[str]) -> set[Path]:
+    """Get the paths that changed, either since a git revision or as given
+
+    :param since: A single git revision, in which case every file that differs between it and the working tree of the
+        git repository in the current working directory (including untracked files) changed, or else the changed
+        files/directories themselves, relative to the current working directory
+    :return: Absolute paths of the changed files/directories
+    :raises ValueError: If the changes since a git revision cannot be listed
+    """
+    if len(since) != 1 or not _is_git_revision(since[0]):
+        return {Path(path).absolute() for path in since}
+
+    top = _git("rev-parse", "--show-toplevel").strip()
+    names = _git("diff", "--name-only", "--no-renames", since[0], "--").splitlines()
+    names += _git("ls-files", "--others", "--exclude-standard", "--full-name").splitlines()
+
+    return {Path(top) / name for name in names if name}
+
+
+def _is_git_revision(rev: str) -> bool:
+    """:return: True if the given revision names a commit in the git repository of the current working directory"""
+    try:
+        _git("rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}")
+    except ValueError:
+        return False
+
+    return True
+
+
+def _git(*args: str) -> str:
+    """Run a git command in the current working directory
+
+    :param args: Arguments to git
+    :return: What the command printed
+    :raises ValueError: If git is not installed or the command fails
+    """
+    try:
+        process = subprocess.run(["git", *args], capture_output=True, text=True, check=False)
+    except OSError as exc:
+        raise ValueError(f"Could not run git: {exc}") from exc
+
+    if process.returncode:
+        raise ValueError(f"git {' '.join(args)} failed: {process.stderr.strip()}")
+
+    return process.stdout
@@ -0,0 +1,168 @@
+"""Persistent, per-search-directory index of hyalus test discovery results"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import NamedTuple
+
+from hyalus.config.common import ConfigStatus
+from hyalus.utils.file_utils import file_sha256
+
+INDEX_FILE = ".hyalus_index.json"
+INDEX_VERSION = 2
+
+_logger = logging.getLogger("hyalus.run.index")
+
+
+class IndexEntry(NamedTuple):
+    """Cached discovery information for a single config.py, along with the file attributes used to detect staleness"""
+
+    mtime_ns: int
+    size: int
+    sha256: str
+    is_valid: bool
+    status: ConfigStatus
+    tags: list[str]
+
+    def to_json(self) -> dict:
+        """:return: JSON-serializable representation of the entry"""
+        return {**self._asdict(), "status": self.status.name}
+
+    @classmethod
+    def from_json(cls, entry: dict) -> "IndexEntry":
+        """Create an entry from its JSON representation
+
+        :param entry: The JSON representation of the entry
+        :return: The corresponding IndexEntry
+        """
+        return cls(**{**entry, "status": ConfigStatus[entry["status"]]})
+
+
+class DiscoveryIndex:
+    """On-disk index of config.py files found within a search directory, keyed on each config's path. Entries are
+    considered fresh while the config's mtime and size are unchanged, or if its content hash still matches.
+    """
+
+    def __init__(self, search_dir: str | Path) -> None:
+        """Ctor.
+
+        :param search_dir: The search directory the index covers. The index file is stored at its top level.
+        """
+        self.search_dir = Path(search_dir).absolute()
+        self.index_file = self.search_dir / INDEX_FILE
+
+        self._modified = False
+        self.__entries: dict[str, IndexEntry] = None
+
+    @property
+    def entries(self) -> dict[str, IndexEntry]:
+        """Mapping of absolute config.py path to its index entry, loaded from the index file on first access
+
+        :return: The index entries
+        """
+        if self.__entries is None:
+            self.__entries = self.__load()
+
+        return self.__entries
+
+    def __load(self) -> dict[str, IndexEntry]:
+        """Load entries from the index file. A missing, unreadable, or outdated index file results in an empty index.
+
+        :return: The loaded index entries
+        """
+        try:
+            with open(self.index_file, 'r', encoding="utf-8") as fh:
+                index = json.load(fh)
+
+            if index["version"] != INDEX_VERSION:
+                return {}
+
+            return {config: IndexEntry.from_json(entry) for config, entry in index["entries"].items()}
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            _logger.debug(f"Could not load discovery index {self.index_file}: {exc}")
+            return {}
+
+    def get(self, config: Path, stat: os.stat_result) -> IndexEntry | None:
+        """Get the entry for a config.py if it is still fresh
+
+        :param config: Path to the config.py
+        :param stat: Result of stat'ing the config.py
+        :return: The index entry, or None if there is no entry or the entry is stale
+        """
+        key = str(config.absolute())
+
+        if (entry := self.entries.get(key)) is None or entry.size != stat.st_size:
+            return None
+
+        if entry.mtime_ns == stat.st_mtime_ns:
+            return entry
+
+        # File was touched - only consider it stale if the content actually changed
+        if entry.sha256 != file_sha256(config):
+            return None
+
+        self.entries[key] = entry = entry._replace(mtime_ns=stat.st_mtime_ns)
+        self._modified = True
+
+        return entry
+
+    def update(
+        self, config: Path, stat: os.stat_result, is_valid: bool, status: ConfigStatus, tags: list[str]
+    ) -> IndexEntry:
+        """Create or replace the entry for a config.py
+
+        :param config: Path to the config.py
+        :param stat: Result of stat'ing the config.py
+        :param is_valid: Whether the config.py belongs to a valid hyalus test
+        :param status: The status of loading the config.py
+        :param tags: Lowercase names of the tags found in the config.py
+        :return: The new index entry
+        """
+        entry = IndexEntry(stat.st_mtime_ns, stat.st_size, file_sha256(config), is_valid, status, tags)
+
+        self.entries[str(config.absolute())] = entry
+        self._modified = True
+
+        return entry
+
+    def prune(self, configs: set[Path]) -> None:
+        """Remove entries for any config.py files not in the given set, e.g. tests that were deleted
+
+        :param configs: The config.py paths to keep
+        """
+        keep = {str(config.absolute()) for config in configs}
+
+        for key in set(self.entries) - keep:
+            del self.entries[key]
+            self._modified = True
+
+    def save(self) -> None:
+        """Atomically write the index file if any entries changed. Failing to write (e.g. a read-only search directory)
+        is not an error - the index will simply be rebuilt next time.
+        """
+        if not self._modified:
+            return
+
+        index = {
+            "version": INDEX_VERSION,
+            "entries": {config: entry.to_json() for config, entry in self.entries.items()},
+        }
+
+        try:
+            with tempfile.NamedTemporaryFile(
+                'w', encoding="utf-8", dir=self.search_dir, prefix=INDEX_FILE, delete=False
+            ) as fh:
+                json.dump(index, fh)
+
+            os.replace(fh.name, self.index_file)
+        except OSError as exc:
+            _logger.debug(f"Could not write discovery index {self.index_file}: {exc}")
+            return
+
+        self._modified = False
@@ -15,7 +15,12 @@ class HyalusListRunner:
     """Class that finds and outputs test names based on tags"""
 
     def __init__(
-        self, search_dirs: Sequence[str | Path] = None, tags: Sequence[str] = None, tag_op: Callable[..., bool] = all
+        self,
+        search_dirs: Sequence[str | Path] = None,
+        tags: Sequence[str] = None,
+        tag_op: Callable[..., bool] = all,
+        use_index: bool = True,
+        search_depth: int = 1,
     ) -> None:
         """Ctor.
 
@@ -23,10 +28,14 @@ class HyalusListRunner:
         :param tags: List of tags to find
         :param tag_op: Operator to apply to tag matching - ``all`` if test must have all given tags, ``any`` if the test
             must have any of the given tags
+        :param use_index: Serve test discovery from the on-disk discovery index of each search directory
+        :param search_depth: How many levels below each search directory to look for tests, 0 for no limit
         """
         self.search_dirs = [Path(search_dir) for search_dir in search_dirs] if search_dirs else [Path('.')]
         self.tags = tags if tags else []
         self.tag_op = tag_op
+        self.use_index = use_index
+        self.search_depth = search_depth
 
         # Print all tests if no tag filters given
         self.print_all: bool = not bool(tags)
@@ -34,9 +43,11 @@ class HyalusListRunner:
     def run(self) -> None:
         """Find relevant tests and print them to stdout"""
         if self.print_all:
-            test_paths = find_all_tests(self.search_dirs)
+            test_paths = find_all_tests(self.search_dirs, use_index=self.use_index, max_depth=self.search_depth)
         else:
-            test_paths = find_tests_by_tag(self.tags, self.tag_op, self.search_dirs)
+            test_paths = find_tests_by_tag(
+                self.tags, self.tag_op, self.search_dirs, use_index=self.use_index, max_depth=self.search_depth
+            )
 
         for test in sorted({test_path.name for test_path in test_paths}):
             print(test)
@@ -0,0 +1,218 @@
+"""Worker processes for running hyalus tests with deadlines"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import importlib
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+from multiprocessing.context import BaseContext
+import os
+import signal
+import time
+import traceback
+from typing import Any, Callable, Hashable, NamedTuple, Sequence
+
+#: Seconds a timed out worker is given to clean up after being asked to terminate, before it is killed
+KILL_GRACE = 10
+
+_logger = logging.getLogger("hyalus.run.pool")
+
+
+class TaskResult(NamedTuple):
+    """Outcome of a task run by a WorkerPool"""
+
+    key: Hashable
+    value: Any = None
+    error: str | None = None
+    timed_out: bool = False
+
+
+class _Task(NamedTuple):
+    """A task running in a worker process"""
+
+    key: Hashable
+    process: multiprocessing.process.BaseProcess
+    conn: Connection
+    deadline: float
+
+
+def _worker(conn: Connection, fn: Callable, args: Sequence) -> None:
+    """Entry point of a worker process. The worker leads a new process group, so that it can be killed along with any
+    subprocesses it started, and sends the outcome of the task back over the given connection.
+
+    :param conn: Connection to send the outcome over
+    :param fn: The task
+    :param args: Arguments for the task
+    """
+    os.setsid()
+
+    try:
+        outcome = (fn(*args), None)
+    except BaseException:  # pylint: disable=broad-except
+        outcome = (None, traceback.format_exc())
+
+    conn.send(outcome)
+    conn.close()
+
+
+def preload(modules: Sequence[str], context: BaseContext) -> list[str]:
+    """Make modules already imported in the workers started by a multiprocessing context, so that tasks importing them
+    do not each pay for the import again. Forked workers inherit modules imported by this process, and workers started
+    by a forkserver are forked from a server that imports the modules once. Workers that are spawned start from scratch,
+    so nothing can be preloaded for them.
+
+    :param modules: Names of the modules to preload
+    :param context: The multiprocessing context workers are started with
+    :return: Names of the modules that were preloaded, leaving out any that could not be imported
+    """
+    match context.get_start_method():
+        case "fork":
+            loaded = []
+
+            for module in modules:
+                try:
+                    importlib.import_module(module)
+                except Exception as exc:  # pylint: disable=broad-except
+                    _logger.warning(f"Could not preload module {module}: {exc}")
+                else:
+                    loaded.append(module)
+
+            return loaded
+        case "forkserver":
+            # The forkserver imports preloaded modules itself and ignores any that fail to import
+            context.set_forkserver_preload(list(modules))
+            return list(modules)
+        case method:
+            _logger.warning(f"Modules cannot be preloaded for workers started with the {method} start method")
+            return []
+
+
+def _signal_group(pid: int, sig: signal.Signals) -> None:
+    """Send a signal to a worker's process group, ignoring workers that already exited
+
+    :param pid: Process ID of the worker, which is also its process group ID
+    :param sig: The signal
+    """
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+class WorkerPool:
+    """Runs each task in a fresh worker process, enforcing a deadline per task. A task that misses its deadline has its
+    worker's whole process group sent SIGTERM, so that the task can record why it stopped, and then SIGKILL if it has
+    not exited within the grace period. As every task gets its own worker, the next task started after a timeout runs
+    at full parallelism without waiting on the pool to notice the lost worker.
+    """
+
+    def __init__(
+        self, context: BaseContext = None, kill_grace: float = KILL_GRACE, preload_modules: Sequence[str] = ()
+    ) -> None:
+        """Ctor.
+
+        :param context: The multiprocessing context to start workers with, default the default context
+        :param kill_grace: Seconds a timed out worker is given to exit after SIGTERM before it is sent SIGKILL
+        :param preload_modules: Names of modules for workers to start with already imported, see :py:func:`preload`
+        """
+        self.context = context if context is not None else multiprocessing.get_context()
+        self.kill_grace = kill_grace
+
+        if preload_modules:
+            preload(preload_modules, self.context)
+
+        self.__tasks: dict[Connection, _Task] = {}
+        self.__terminating: dict[Connection, float] = {}
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.terminate()
+
+    def __len__(self) -> int:
+        return len(self.__tasks)
+
+    def submit(self, key: Hashable, fn: Callable, args: Sequence = (), timeout: float = None) -> None:
+        """Start a task in a new worker
+
+        :param key: Key identifying the task in its result
+        :param fn: The task, which must be picklable if the context does not fork
+        :param args: Arguments for the task
+        :param timeout: Seconds the task may run for, None for no limit
+        """
+        receiver, sender = self.context.Pipe(duplex=False)
+
+        process = self.context.Process(target=_worker, args=(sender, fn, args), daemon=True)
+        process.start()
+        sender.close()
+
+        deadline = time.monotonic() + timeout if timeout is not None else float("inf")
+
+        self.__tasks[receiver] = _Task(key, process, receiver, deadline)
+
+    def _finish(self, task: _Task) -> None:
+        """Reap a task's worker, killing anything the task left running in its process group, and stop tracking it
+
+        :param task: The task
+        """
+        task.conn.close()
+        task.process.join(timeout=self.kill_grace)
+
+        _signal_group(task.process.pid, signal.SIGKILL)
+        task.process.join()
+
+        self.__tasks.pop(task.conn, None)
+        self.__terminating.pop(task.conn, None)
+
+    def wait(self) -> TaskResult:
+        """Wait for the next task to finish, time out, or crash, killing any workers that missed their deadlines
+
+        :return: The outcome of the task
+        :raises ValueError: If no tasks are running
+        """
+        if not self.__tasks:
+            raise ValueError("No tasks are running")
+
+        while True:
+            now = time.monotonic()
+
+            for conn, task in list(self.__tasks.items()):
+                if conn in self.__terminating:
+                    if now >= self.__terminating[conn]:
+                        _logger.warning(f"{task.key} did not exit after SIGTERM, killing its process group")
+                        _signal_group(task.process.pid, signal.SIGKILL)
+                        self._finish(task)
+
+                        return TaskResult(task.key, timed_out=True)
+                elif now >= task.deadline:
+                    _signal_group(task.process.pid, signal.SIGTERM)
+                    self.__terminating[conn] = now + self.kill_grace
+
+            deadline = min(self.__terminating.get(conn, task.deadline) for conn, task in self.__tasks.items())
+            timeout = max(deadline - now, 0) if deadline != float("inf") else None
+
+            for conn in wait(list(self.__tasks), timeout=timeout):
+                task = self.__tasks[conn]
+                timed_out = conn in self.__terminating
+
+                try:
+                    value, error = conn.recv()
+                except EOFError:
+                    value, error = None, "Worker exited unexpectedly"
+
+                self._finish(task)
+
+                if error is not None and task.process.exitcode:
+                    error += f" (exit code {task.process.exitcode})"
+
+                return TaskResult(task.key, value, error, timed_out)
+
+    def terminate(self) -> None:
+        """Kill every running task along with its process group"""
+        for task in list(self.__tasks.values()):
+            _signal_group(task.process.pid, signal.SIGKILL)
+            self._finish(task)
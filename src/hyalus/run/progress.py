@@ -0,0 +1,161 @@
+"""Live progress reporting for hyalus test suites"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from datetime import timedelta
+import sys
+import time
+from typing import Mapping, TextIO
+
+from hyalus.run.common import HyalusTest
+
+#: ANSI sequence returning the cursor to the start of the line and clearing it
+_CLEAR_LINE = "\r\033[K"
+
+
+class SuiteProgress:
+    """Tracks the tests of a running suite and keeps a single progress line of passed, failed, running, and remaining
+    counts plus an ETA at the bottom of the terminal. Test output is written above the progress line so the two never
+    interleave. The progress line is only drawn when the progress stream is a terminal, so piped or logged output is
+    left as-is.
+
+    The ETA assumes the remaining work (expected durations of queued tests plus what is left of the expected durations
+    of running tests) is spread evenly over the workers, but is never less than the longest single remaining test.
+    """
+
+    def __init__(
+        self,
+        durations: Mapping[HyalusTest, float],
+        jobs: int,
+        out: TextIO = None,
+        progress: TextIO = None,
+        live: bool = None,
+    ) -> None:
+        """Ctor.
+
+        :param durations: Mapping of every test in the suite to its expected duration in seconds
+        :param jobs: Maximum number of tests run at once
+        :param out: Stream test output is written to, default stdout
+        :param progress: Stream the progress line is written to, default stderr
+        :param live: Whether to draw the progress line, default only if the progress stream is a terminal
+        """
+        self.durations = durations
+        self.jobs = max(jobs, 1)
+        self.out = out if out is not None else sys.stdout
+        self.progress = progress if progress is not None else sys.stderr
+        self.live = live if live is not None else self.progress.isatty()
+
+        self.passed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.running: dict[HyalusTest, float] = {}
+        self.done: set[HyalusTest] = set()
+        self.results: dict[HyalusTest, bool] = {}
+
+        self.__start = time.monotonic()
+
+    @property
+    def remaining(self) -> int:
+        """:return: Number of tests not yet started"""
+        return len(self.durations) - len(self.done) - self.cancelled - len(self.running)
+
+    def eta(self) -> float:
+        """Estimate how long until the suite finishes
+
+        :return: Estimated seconds until every test has finished
+        """
+        now = time.monotonic()
+
+        left = [max(self.durations[test] - (now - start), 0) for test, start in self.running.items()]
+        left.extend(
+            duration for test, duration in self.durations.items() if test not in self.running and test not in self.done
+        )
+
+        if not left:
+            return 0
+
+        return max(sum(left) / self.jobs, max(left))
+
+    def line(self) -> str:
+        """:return: The progress line"""
+        counts = f"{self.passed} passed, {self.failed} failed, {len(self.running)} running, {self.remaining} remaining"
+        elapsed = timedelta(seconds=round(time.monotonic() - self.__start))
+
+        if self.running or self.remaining:
+            return f"{counts} | {elapsed} elapsed, ETA {timedelta(seconds=round(self.eta()))}"
+
+        return f"{counts} | {elapsed} elapsed"
+
+    def _redraw(self) -> None:
+        """Replace the progress line with the current progress"""
+        if self.live:
+            self.progress.write(_CLEAR_LINE + self.line())
+            self.progress.flush()
+
+    def write(self, text: str) -> None:
+        """Write test output above the progress line
+
+        :param text: The output
+        """
+        if self.live:
+            self.progress.write(_CLEAR_LINE)
+            self.progress.flush()
+
+        self.out.write(text)
+        self.out.flush()
+
+        self._redraw()
+
+    def started(self, test: HyalusTest) -> None:
+        """Record that a test started running
+
+        :param test: The test
+        """
+        self.running[test] = time.monotonic()
+        self._redraw()
+
+    def finished(self, test: HyalusTest, result: bool, output: str = "") -> None:
+        """Record that a test finished running, writing its output
+
+        :param test: The test
+        :param result: True if the test passed, else False
+        :param output: Anything the test wrote to stdout
+        """
+        self.running.pop(test, None)
+        self.done.add(test)
+        self.results[test] = result
+
+        if result:
+            self.passed += 1
+        else:
+            self.failed += 1
+
+        self.write(output)
+
+    def requeued(self, test: HyalusTest, msg: str) -> None:
+        """Record that a running test was put back in the queue without finishing
+
+        :param test: The test
+        :param msg: Why the test was requeued
+        """
+        self.running.pop(test, None)
+
+        self.write(f"{msg}\n")
+
+    def abort(self, msg: str) -> None:
+        """Record that the rest of the suite was cancelled
+
+        :param msg: Why the suite was cancelled
+        """
+        self.cancelled += len(self.running) + self.remaining
+        self.running.clear()
+
+        self.write(f"{msg}\n")
+
+    def close(self) -> None:
+        """Leave the final progress line in place as a summary of the suite"""
+        if self.live:
+            self.progress.write(_CLEAR_LINE + self.line() + "\n")
+            self.progress.flush()
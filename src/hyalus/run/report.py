@@ -0,0 +1,199 @@
+"""Machine-readable reports of the results of hyalus test suites"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import socket
+import time
+from typing import Any, NamedTuple, TextIO
+from xml.etree import ElementTree
+
+from hyalus.run.common import HyalusTest, RunStatus
+
+#: Minimum seconds between rewrites of a JUnit XML report while a suite runs
+JUNIT_INTERVAL = 10
+
+
+class StepReport(NamedTuple):
+    """Result and timings of a single Step of a test run"""
+
+    number: int
+    step: str
+    status: str | None
+    start: float | None
+    wall_time: float | None
+    cpu_time: float | None
+    peak_memory: int | None = None
+
+
+class TestReport(NamedTuple):
+    """Result and timings of a single test run as part of a suite"""
+
+    test: str
+    name: str
+    status: RunStatus
+    cached: bool = False
+    run_dir: str | None = None
+    start: float | None = None
+    wall_time: float | None = None
+    cpu_time: float | None = None
+    peak_memory: int | None = None
+    failed_step: str | None = None
+    message: str | None = None
+    steps: tuple[StepReport, ...] = ()
+
+    @classmethod
+    def lost(cls, test: HyalusTest, message: str) -> "TestReport":
+        """Report on a test that errored without reporting on itself, e.g. because its worker was killed
+
+        :param test: The test
+        :param message: What happened to the test
+        :return: The report
+        """
+        return cls(str(test), os.path.basename(str(test)), RunStatus.ERROR, message=message)
+
+    def to_dict(self) -> dict[str, Any]:
+        """:return: The report as JSON-serializable data"""
+        return {
+            **self._asdict(),
+            "status": self.status.value,
+            "steps": [step._asdict() for step in self.steps],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TestReport":
+        """Load a report from data as returned by :py:meth:`to_dict`
+
+        :param data: The data
+        :return: The report
+        :raises ValueError: If the data is not a valid report
+        """
+        try:
+            return cls(
+                **{
+                    **data,
+                    "status": RunStatus(data["status"]),
+                    "steps": tuple(StepReport(**step) for step in data.get("steps", ())),
+                }
+            )
+        except (KeyError, TypeError) as exc:
+            raise ValueError(f"Invalid test report: {exc}") from exc
+
+
+def _seconds(value: float | None) -> str:
+    """:return: Seconds formatted for a JUnit XML time attribute"""
+    return f"{value or 0:.3f}"
+
+
+class SuiteReport:
+    """Writes the results of a suite's tests as they finish, to a JSON-lines file with one
+    :py:meth:`TestReport.to_dict` object per line and/or to a JUnit XML file. JSON lines are written as soon as each
+    test finishes. As an XML document cannot be appended to, the JUnit XML file is rewritten at most every
+    :py:data:`JUNIT_INTERVAL` seconds while the suite runs, and once more when the report is closed.
+    """
+
+    def __init__(self, jsonl: str | Path = None, junit: str | Path = None, name: str = "hyalus") -> None:
+        """Ctor.
+
+        :param jsonl: Path of the JSON-lines file to write, None to not write one
+        :param junit: Path of the JUnit XML file to write, None to not write one
+        :param name: Name of the suite in the JUnit XML file
+        """
+        self.jsonl = Path(jsonl) if jsonl else None
+        self.junit = Path(junit) if junit else None
+        self.name = name
+        self.reports: list[TestReport] = []
+
+        self._jsonl_fh: TextIO = None
+        self._start = time.time()
+        self._junit_written = float("-inf")
+
+    def __enter__(self) -> "SuiteReport":
+        if self.jsonl is not None:
+            self._jsonl_fh = open(self.jsonl, 'w', encoding="utf-8")  # pylint: disable=consider-using-with
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def add(self, report: TestReport) -> None:
+        """Write out the report of a test that finished
+
+        :param report: The report
+        """
+        self.reports.append(report)
+
+        if self._jsonl_fh is not None:
+            self._jsonl_fh.write(json.dumps(report.to_dict()) + "\n")
+            self._jsonl_fh.flush()
+
+        if self.junit is not None and time.monotonic() - self._junit_written >= JUNIT_INTERVAL:
+            self.write_junit()
+
+    def close(self) -> None:
+        """Finish writing the report"""
+        if self._jsonl_fh is not None:
+            self._jsonl_fh.close()
+            self._jsonl_fh = None
+
+        if self.junit is not None:
+            self.write_junit()
+
+    def write_junit(self) -> None:
+        """(Re)write the JUnit XML file with the reports of every test that finished so far"""
+        suite = ElementTree.Element(
+            "testsuite",
+            name=self.name,
+            tests=str(len(self.reports)),
+            failures=str(sum(report.status is RunStatus.FAILURE for report in self.reports)),
+            errors=str(sum(report.status is RunStatus.ERROR for report in self.reports)),
+            skipped="0",
+            time=_seconds(time.time() - self._start),
+            timestamp=datetime.fromtimestamp(self._start).isoformat(timespec="seconds"),
+            hostname=socket.gethostname(),
+        )
+
+        for report in self.reports:
+            case = ElementTree.SubElement(
+                suite,
+                "testcase",
+                classname=Path(report.test).parent.name or self.name,
+                name=report.name,
+                time=_seconds(report.wall_time),
+                file=report.test,
+            )
+
+            if report.status is RunStatus.FAILURE:
+                message = f"Step {report.failed_step} failed" if report.failed_step else "Failed"
+                failure = ElementTree.SubElement(case, "failure", message=message)
+                failure.text = report.message
+            elif report.status is RunStatus.ERROR:
+                lines = report.message.strip().splitlines() if report.message else []
+                error = ElementTree.SubElement(case, "error", message=lines[-1] if lines else "Error")
+                error.text = report.message
+
+            lines = [f"Run directory: {report.run_dir}"] if report.run_dir else []
+            lines.extend(
+                f"Step {step.number} {step.step}: {step.status or 'STOPPED'} in {_seconds(step.wall_time)}s"
+                for step in report.steps
+            )
+
+            if lines:
+                ElementTree.SubElement(case, "system-out").text = "\n".join(lines)
+
+        tree = ElementTree.ElementTree(ElementTree.Element("testsuites"))
+        tree.getroot().append(suite)
+        ElementTree.indent(tree)
+
+        # Written to a temporary file first so that readers never see a partly written report
+        tmp_file = self.junit.with_name(f".{self.junit.name}.tmp")
+        tree.write(tmp_file, encoding="utf-8", xml_declaration=True)
+        os.replace(tmp_file, self.junit)
+
+        self._junit_written = time.monotonic()
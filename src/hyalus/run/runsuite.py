@@ -4,13 +4,62 @@ __author__ = "David McConnell"
 __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import redirect_stdout
+from datetime import timedelta
+from functools import partial
+import io
 import logging
-from multiprocessing import Pool
+from math import inf
+import multiprocessing
+from multiprocessing.context import BaseContext
+import os
 from pathlib import Path
-from typing import Callable, Sequence
+import signal
+import sqlite3
+import time
+import traceback
+from typing import Callable, Iterator, NoReturn, Sequence, TextIO
 
-from hyalus.run.common import HyalusTest, find_tests_by_name, find_tests_by_tag
-from hyalus.run.runtest import HyalusTestRunner
+from hyalus.config.analyzer import cached_config_tags
+from hyalus.run.budget import recent_outcomes, select_within_budget, test_value
+from hyalus.run.cache import DEFAULT_MAX_ENTRIES, ResultCache
+from hyalus.run.common import HyalusRun, HyalusTest, find_tests_by_name, find_tests_by_tag
+from hyalus.run.fixtures import (
+    FixtureNotPrepared,
+    FixtureStore,
+    PreparedFixture,
+    find_fixture,
+    fixture_names,
+    is_suite_fixture,
+    make_read_only,
+)
+from hyalus.run.impact import ImpactMap, changed_paths
+from hyalus.run.pool import TaskResult, WorkerPool
+from hyalus.run.progress import SuiteProgress
+from hyalus.run.report import SuiteReport, TestReport
+from hyalus.run.runtest import HyalusTestRunner, RunTimedOut, timed_out_msg
+from hyalus.run.schedule import (
+    DEFAULT_TIMEOUT_MULTIPLIER,
+    Capacity,
+    ResourcePacker,
+    affinity_groups,
+    expected_durations,
+    group_shared_inputs,
+    longest_first,
+    machine_capacity,
+    predict_starts,
+    run_history,
+    split_shards,
+    test_needs,
+    test_memory_limit,
+    test_timeout,
+)
+from hyalus.run.shared import run_setups, setup_names
+from hyalus.run.stats import RuntimeHistory
+from hyalus.utils.memory_utils import limit_memory
+from hyalus.utils.thread_utils import DaemonThreadExecutor
 
 _logger = logging.getLogger("hyalus.run.runsuite")
 
@@ -19,6 +68,30 @@ class NoTestsFound(Exception):
     """To be raised when the combination of inputs does not correspond to any tests to run"""
 
 
+def _timed_out(timeout: float | None, *_) -> NoReturn:
+    """SIGTERM handler for suite workers, stopping the test being run
+
+    :param timeout: The test's timeout in seconds
+    :raises RunTimedOut: Always
+    """
+    raise RunTimedOut(timed_out_msg(timeout))
+
+
+def _task_outcome(task: TaskResult, timeout: float | None) -> tuple[bool, str, TestReport]:
+    """Get the result, output, and report of a test run by a worker, describing workers that were killed or crashed
+
+    :param task: The outcome of the worker's task
+    :param timeout: The test's timeout in seconds
+    :return: The result from running the test, its output, and its report
+    """
+    if task.value is not None:
+        return task.value
+
+    msg = f"{timed_out_msg(timeout)}, killed" if task.timed_out else task.error
+
+    return False, f"{task.key}: ERROR\n{msg}\n", TestReport.lost(task.key, msg)
+
+
 # pylint: disable=too-many-instance-attributes, too-many-arguments
 class HyalusSuiteRunner:
     """Find relevant tests to run and spin off a process for each one"""
@@ -32,6 +105,33 @@ class HyalusSuiteRunner:
         tag_op: Callable[..., bool] = all,
         cleanup_on_pass: bool = False,
         debug: bool = False,
+        use_index: bool = True,
+        search_depth: int = 1,
+        use_catalog: bool = True,
+        use_cache: bool = False,
+        cache_dependencies: Sequence[str | Path] = None,
+        cache_packages: Sequence[str] = None,
+        cache_size: int = DEFAULT_MAX_ENTRIES,
+        jobs: int = 0,
+        cpu_capacity: float = 0,
+        memory_capacity: float = 0,
+        maxfail: int = 0,
+        timeout_multiplier: float = DEFAULT_TIMEOUT_MULTIPLIER,
+        memory_limit_multiplier: float = 0,
+        input_affinity: bool = False,
+        fork_after_setup: bool = False,
+        shard: tuple[int, int] = None,
+        preload_modules: Sequence[str] = None,
+        event_loop: bool = False,
+        threads: bool = False,
+        last_failed: bool = False,
+        failed_first: bool = False,
+        record_impact: bool = True,
+        changed_since: Sequence[str] = None,
+        time_budget: float = 0,
+        plan: bool = False,
+        jsonl_report: str | Path = None,
+        junit_report: str | Path = None,
     ) -> None:
         """Ctor.
 
@@ -44,7 +144,63 @@ class HyalusSuiteRunner:
             must have any of the given tags
         :param cleanup_on_pass: Flag to remove test run directories if the test passes, default False
         :param debug: Debug logging flag
+        :param use_index: Serve tag-based test discovery from the on-disk discovery index of each search directory
+        :param search_depth: How many levels below each search directory to look for tests by tag, 0 for no limit
+        :param use_catalog: Record test runs in the run catalog of the runs directory
+        :param use_cache: Skip running tests that passed before with the same fingerprint, see
+            :py:class:`hyalus.run.cache.ResultCache`
+        :param cache_dependencies: Files/directories outside of the tests that their results depend on
+        :param cache_packages: Names of installed packages that the tests' results depend on
+        :param cache_size: Maximum number of passing results to keep in the result cache
+        :param jobs: Maximum number of tests to run at once, 0 for the number of CPUs on the machine
+        :param cpu_capacity: Number of CPUs the tests' Resources tags are packed into, 0 for the number of CPUs on the
+            machine
+        :param memory_capacity: Memory in GiB the tests' Resources tags are packed into, 0 for the physical memory of
+            the machine
+        :param maxfail: Stop the suite once this many tests have failed, cancelling queued tests and terminating
+            running ones, 0 to always run every test
+        :param timeout_multiplier: Multiple of the upper end of each test's RuntimeTag range that it may run for before
+            it is stopped, 0 for no limit. Overridden by a test's Timeout tag.
+        :param memory_limit_multiplier: Multiple of the memory in each test's Resources tag that each of its processes
+            may allocate before allocations fail, 0 for no limit, see :py:func:`hyalus.utils.memory_utils.limit_memory`.
+            Not applied when running tests on an event loop.
+        :param input_affinity: Also start tests whose input directories hold identical large files back to back, not
+            only tests declaring the same Dataset tag, see :py:func:`hyalus.run.schedule.affinity_groups`
+        :param fork_after_setup: Call the shared setup functions declared by the tests' SharedSetup tags once before
+            starting workers, and fork each worker from this process so that it inherits their results, see
+            :py:func:`hyalus.run.shared.shared_state`
+        :param shard: Only run shard i of N, as (i, N) with i counted from 1, see
+            :py:func:`hyalus.run.schedule.split_shards`
+        :param preload_modules: Names of modules to import once before starting workers, so that each test starts with
+            them already imported
+        :param event_loop: Run tests at once on an event loop in this process rather than each in its own worker
+            process, up to jobs at a time, see :py:meth:`hyalus.run.runtest.HyalusTestRunner.run_async`
+        :param threads: Run tests at once on a pool of threads in this process rather than each in its own worker
+            process, up to jobs at a time, see :py:meth:`hyalus.run.runtest.HyalusTestRunner.run_threaded`
+        :param last_failed: Only run the tests that failed or errored the last time they were run into the runs
+            directory, see :py:meth:`hyalus.run.stats.RuntimeHistory.failed`. If no tests or tags are given, every test
+            that failed last time is run.
+        :param failed_first: Start the tests that failed or errored last time before all other tests
+        :param record_impact: Record the files each test depends on in the test impact map of the runs directory, see
+            :py:class:`hyalus.run.impact.ImpactMap`
+        :param changed_since: Only run the tests affected by changes, given as a single git revision or as the changed
+            files/directories, see :py:func:`hyalus.run.impact.changed_paths`
+        :param time_budget: Seconds the suite should finish within, 0 for no budget. Only the most valuable tests
+            expected to finish within the budget are run, see :py:func:`hyalus.run.budget.select_within_budget`.
+        :param plan: Print the tests that would be run, when each is expected to start and how long the suite is
+            expected to take, rather than running them
+        :param jsonl_report: Path of a JSON-lines file to write the report of each test to as it finishes, see
+            :py:class:`hyalus.run.report.SuiteReport`
+        :param junit_report: Path of a JUnit XML file to write the results of the suite to
+        :raises ValueError: If the shard is not one of N shards, or if tests are to be run both on an event loop and on
+            threads
         """
+        if shard is not None and not 1 <= shard[0] <= shard[1]:
+            raise ValueError(f"Shard {shard[0]}/{shard[1]} is not between 1 and {shard[1]}")
+
+        if event_loop and threads:
+            raise ValueError("Tests cannot be run both on an event loop and on threads")
+
         self.to_run = [Path(item) for item in to_run] if to_run else []
         self.runs_dir = Path(runs_dir) if runs_dir else Path('.')
         self.search_dirs = [Path(search_dir) for search_dir in search_dirs] if search_dirs else [Path('.')]
@@ -52,6 +208,35 @@ class HyalusSuiteRunner:
         self.tag_op = tag_op
         self.cleanup_on_pass = cleanup_on_pass
         self.debug = debug
+        self.use_index = use_index
+        self.search_depth = search_depth
+        self.use_catalog = use_catalog
+        self.use_cache = use_cache
+        self.cache_dependencies = [Path(dependency).absolute() for dependency in cache_dependencies or []]
+        self.cache_packages = cache_packages if cache_packages else []
+        self.cache_size = cache_size
+        self.jobs = jobs if jobs > 0 else os.cpu_count() or 1
+        self.cpu_capacity = float(cpu_capacity)
+        self.memory_capacity = float(memory_capacity)
+        self.maxfail = maxfail
+        self.timeout_multiplier = float(timeout_multiplier)
+        self.memory_limit_multiplier = float(memory_limit_multiplier)
+        self.input_affinity = input_affinity
+        self.fork_after_setup = fork_after_setup
+        self.shard = shard
+        self.preload_modules = preload_modules if preload_modules else []
+        self.event_loop = event_loop
+        self.threads = threads
+        self.last_failed = last_failed
+        self.failed_first = failed_first
+        self.history = RuntimeHistory(self.runs_dir)
+        self.record_impact = record_impact
+        self.changed_since = changed_since
+        self.time_budget = float(time_budget)
+        self.plan = plan
+        self.jsonl_report = jsonl_report
+        self.junit_report = junit_report
+        self.fixtures: dict[str, PreparedFixture] = {}
 
     def _find_tests_by_name(self) -> set[HyalusTest]:
         """Convenience wrapper for hyalus.run.common.find_tests_by_name
@@ -65,32 +250,564 @@ class HyalusSuiteRunner:
 
         :return: Set of Paths to tests matching given tags
         """
-        return find_tests_by_tag(self.tags, self.tag_op, self.search_dirs)
+        return find_tests_by_tag(
+            self.tags, self.tag_op, self.search_dirs, use_index=self.use_index, max_depth=self.search_depth
+        )
 
     def get_tests(self) -> list[HyalusTest]:
-        """Based on inputs, find the relevant tests to run
+        """Based on inputs, find the relevant tests to run. Suite fixtures are not run as tests, only for the tests
+        using them, see :py:meth:`prepare_fixtures`.
 
         :return: List of uniquified Paths to the tests to run
         """
-        return list(self._find_tests_by_name() | self._find_tests_by_tag())
+        if self.last_failed and not self.to_run and not self.tags:
+            return self.history.failed()
+
+        tests = self._find_tests_by_name() | self._find_tests_by_tag()
+
+        return [test for test in tests if not is_suite_fixture(test)]
+
+    def select_last_failed(self, tests: Sequence[HyalusTest]) -> list[HyalusTest]:
+        """Pick out the tests that failed or errored last time, if only those are to be run
+
+        :param tests: All tests to run
+        :return: The tests that failed last time, or all tests if not only those are to be run
+        """
+        if not self.last_failed:
+            return list(tests)
+
+        return self.history.failed(tests)
+
+    def select_changed(self, tests: Sequence[HyalusTest]) -> list[HyalusTest]:
+        """Pick out the tests affected by changes, if only those are to be run
+
+        :param tests: All tests to run
+        :return: The tests affected by changes, or all tests if not only those are to be run
+        :raises ValueError: If the changes since a git revision cannot be listed
+        """
+        if not self.changed_since:
+            return list(tests)
+
+        changed = changed_paths(self.changed_since)
+
+        return ImpactMap(self.runs_dir).affected(tests, changed)
+
+    def select_shard(self, tests: Sequence[HyalusTest]) -> list[HyalusTest]:
+        """Pick out this runner's shard of the tests, if it runs one
+
+        :param tests: All tests to run
+        :return: The tests in this runner's shard, or all tests if it does not run a shard
+        """
+        if self.shard is None:
+            return list(tests)
+
+        index, count = self.shard
+
+        return split_shards(tests, count)[index - 1]
+
+    def run_history(self, tests: Sequence[HyalusTest]) -> dict[str, float]:
+        """Get the average duration of the recent passing runs of the given tests from the runtime history
+
+        :param tests: The tests to run
+        :return: Mapping of test name to its average duration in seconds, for tests with recorded durations
+        """
+        return run_history(self.runs_dir, tests)
+
+    def affinity_groups(self, tests: Sequence[HyalusTest]) -> dict[HyalusTest, int]:
+        """Work out which tests share input data, comparing the contents of their input files if input_affinity is set,
+        with content hashes kept in the result cache of the runs directory
+
+        :param tests: The tests to run
+        :return: Mapping of each test sharing input data with another test to its group, see
+            :py:func:`hyalus.run.schedule.affinity_groups`
+        """
+        return affinity_groups(tests, ResultCache(self.runs_dir) if self.input_affinity else None)
+
+    def capacity(self) -> Capacity:
+        """:return: The capacity tests are packed into - unlimited on an event loop, where only jobs limits them"""
+        return Capacity(inf, inf) if self.event_loop else machine_capacity(self.cpu_capacity, self.memory_capacity)
+
+    def test_values(self, tests: Sequence[HyalusTest]) -> dict[HyalusTest, float]:
+        """Work out how much running each test is worth, going by its Priority tag and by its recent runs in the
+        runtime history of the runs directory, see :py:func:`hyalus.run.budget.test_value`
+
+        :param tests: The tests to run
+        :return: Mapping of test to the value of running it
+        """
+        outcomes = recent_outcomes(self.runs_dir, tests)
+        now = time.time()
+
+        return {test: test_value(test, outcomes.get(test.name), now) for test in tests}
+
+    def select_within_budget(self, tests: Sequence[HyalusTest], history: dict[str, float]) -> list[HyalusTest]:
+        """Pick out the most valuable tests expected to finish within the time budget, if there is one
+
+        :param tests: All tests to run
+        :param history: Recent run durations as returned by run_history
+        :return: The chosen tests, or all tests if there is no time budget
+        """
+        if not self.time_budget:
+            return list(tests)
+
+        chosen = set(
+            select_within_budget(
+                self.schedule(tests, history),
+                self.time_budget,
+                expected_durations(tests, history),
+                self.test_values(tests),
+                {test: test_needs(test) for test in tests},
+                self.capacity(),
+                self.jobs,
+            )
+        )
+
+        return [test for test in tests if test in chosen]
+
+    def print_plan(
+        self, selected: Sequence[HyalusTest], tests: Sequence[HyalusTest], history: dict[str, float]
+    ) -> None:
+        """Print the tests chosen to run in the order they would be started in, when each is expected to start and how
+        long the suite is expected to take
+
+        :param selected: The tests chosen to run
+        :param tests: All tests that could have been run
+        :param history: Recent run durations as returned by run_history
+        """
+        ordered = self.schedule(selected, history)
+        durations = expected_durations(ordered, history)
+        values = self.test_values(ordered)
+        needs = {test: test_needs(test) for test in ordered}
+        starts = predict_starts(ordered, durations, needs, self.capacity(), self.jobs)
+        makespan = max((starts[test] + durations[test] for test in ordered), default=0)
+
+        header = ["START", "DURATION", "VALUE", "TEST"]
+        rows = [
+            [
+                str(timedelta(seconds=round(starts[test]))),
+                str(timedelta(seconds=round(durations[test]))),
+                f"{values[test]:.2f}",
+                str(test),
+            ]
+            for test in ordered
+        ]
+
+        widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+
+        for row in [header, *rows]:
+            print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+        budget = f" of a {timedelta(seconds=round(self.time_budget))} budget" if self.time_budget else ""
+        print(
+            f"Planned {len(ordered)} of {len(tests)} test(s), predicted to take {timedelta(seconds=round(makespan))}"
+            f"{budget}"
+        )
+
+    def schedule(
+        self, tests: Sequence[HyalusTest], history: dict[str, float] = None, groups: dict[HyalusTest, int] = None
+    ) -> list[HyalusTest]:
+        """Order tests longest-processing-time-first, based on the durations of recent passing runs recorded in the
+        runtime history where available and on each test's RuntimeTag otherwise. Tests sharing input data are started
+        back to back.
+
+        :param tests: The tests to run
+        :param history: Recent run durations as returned by run_history, looked up if not given
+        :param groups: Tests sharing input data as returned by affinity_groups, looked up if not given
+        :return: The tests in the order they should be started in
+        """
+        if history is None:
+            history = self.run_history(tests)
+
+        if groups is None:
+            groups = self.affinity_groups(tests)
+
+        if not self.failed_first:
+            return group_shared_inputs(longest_first(tests, history), groups)
+
+        failed = set(self.history.failed(tests))
+
+        return group_shared_inputs(longest_first([test for test in tests if test in failed], history), groups) + (
+            group_shared_inputs(longest_first([test for test in tests if test not in failed], history), groups)
+        )
 
     def run(self) -> bool:
-        """Find tests to run and spin off a process for each run, aggregating the results of each test
+        """Find tests to run and spin off a process for each run, reporting the results of each test as it finishes.
+        The tags of each test are only loaded once while the suite runs, see
+        :py:func:`hyalus.config.analyzer.cached_config_tags`.
 
-        :return: Pass if all tests passed, False if no tests were found or if one or more tests failed
+        :return: Pass if all tests passed, False if no tests were found, if one or more tests failed, or if the suite
+            was stopped early because maxfail tests failed
         """
-        tests = self.get_tests()
+        with cached_config_tags():
+            tests = self.get_tests()
 
-        if not tests:
-            raise NoTestsFound("No tests were run - check test configuration")
+            if not tests:
+                raise NoTestsFound("No tests were run - check test configuration")
 
-        with Pool() as pool:
-            results = pool.map(self.run_test, tests)
+            if not (tests := self.select_shard(tests)):
+                print(f"No tests in shard {self.shard[0]}/{self.shard[1]}")
+                return True
+
+            if not (tests := self.select_last_failed(tests)):
+                print("No tests failed last time")
+                return True
+
+            if not (tests := self.select_changed(tests)):
+                print("No tests affected by changes")
+                return True
+
+            history = self.run_history(tests)
+            selected = self.select_within_budget(tests, history)
+
+            if self.plan:
+                self.print_plan(selected, tests, history)
+                return True
+
+            if not selected:
+                print(f"No tests fit within the time budget of {timedelta(seconds=round(self.time_budget))}")
+                return True
+
+            if len(selected) < len(tests):
+                print(
+                    f"Running {len(selected)} of {len(tests)} test(s) within the time budget of "
+                    f"{timedelta(seconds=round(self.time_budget))}"
+                )
+
+            tests = selected
+            progress = SuiteProgress(expected_durations(tests, history), self.jobs)
+
+            report = SuiteReport(self.jsonl_report, self.junit_report)
+
+            try:
+                with report:
+                    self.fixtures, errors = self.prepare_fixtures(tests, progress)
+                    runnable = self._skip_unprepared(tests, errors, progress, report)
+                    passed = len(runnable) == len(tests)
+
+                    if self.event_loop:
+                        passed &= asyncio.run(self._run_event_loop(self.schedule(runnable, history), progress, report))
+                    elif self.threads:
+                        passed &= self._run_threads(self.schedule(runnable, history), progress, report)
+                    else:
+                        passed &= self._run_pool(self.schedule(runnable, history), progress, report)
+            finally:
+                # Outcomes of tests that finished are kept even if the suite is interrupted
+                self.record_unrun(report.reports)
+
+            progress.close()
+
+            return passed
+
+    def record_unrun(self, reports: Sequence[TestReport]) -> None:
+        """Record how tests that finished without running ended in the runtime history, e.g. passes taken from the
+        result cache or tests whose worker was killed. Tests that ran record themselves, see
+        :py:class:`hyalus.run.runtest.HyalusTestRunner`.
+
+        :param reports: Reports of the tests that finished
+        """
+        self.history.record_outcomes(
+            {HyalusTest(report.test): report.status for report in reports if report.cached or report.wall_time is None}
+        )
+
+    def prepare_fixtures(
+        self, tests: Sequence[HyalusTest], progress: SuiteProgress
+    ) -> tuple[dict[str, PreparedFixture], dict[str, str]]:
+        """Run the suite fixtures the tests use, once each and all at once in worker processes, before any of the tests.
+        A fixture that passed before and has not changed since is not run again, see
+        :py:class:`hyalus.run.fixtures.FixtureStore`. Files in the output directory of each fixture run are made
+        read-only, as every test using the fixture shares them.
+
+        :param tests: The tests to run
+        :param progress: Progress reporter for the suite, which the output of the fixtures is written out through
+        :return: Mapping of name to passing run of each fixture, and mapping of name to why each other fixture failed
+        """
+        prepared: dict[str, PreparedFixture] = {}
+        errors: dict[str, str] = {}
+        to_run: dict[HyalusTest, tuple[str, str | None]] = {}
+        store = FixtureStore(self.runs_dir)
+        fingerprinter = ResultCache(self.runs_dir, self.cache_dependencies, self.cache_packages, self.cache_size)
 
-            pool.close()
-            pool.join()
+        for name in sorted({name for test in tests for name in fixture_names(test)}):
+            try:
+                fixture = find_fixture(name, self.search_dirs)
+            except FixtureNotPrepared as exc:
+                errors[name] = str(exc)
+                continue
 
-        return all(results)
+            try:
+                fingerprint = fingerprinter.fingerprint(fixture)
+            except (sqlite3.Error, OSError) as exc:
+                _logger.warning(f"Could not fingerprint suite fixture {fixture}, running it regardless: {exc}")
+                fingerprint = None
+
+            if fingerprint is not None and (run_dir := store.find(fingerprint)) is not None:
+                prepared[name] = PreparedFixture(name, fingerprint, run_dir)
+                progress.write(f"{run_dir}: SUCCESS (CACHED)\n")
+            else:
+                to_run[fixture] = (name, fingerprint)
+
+        if not to_run:
+            return prepared, errors
+
+        timeouts = {fixture: test_timeout(fixture, self.timeout_multiplier) for fixture in to_run}
+
+        with WorkerPool(preload_modules=self.preload_modules) as pool:
+            for fixture in to_run:
+                memory_limit = test_memory_limit(fixture, self.memory_limit_multiplier)
+                pool.submit(
+                    fixture,
+                    self._run_test_captured,
+                    (fixture, timeouts[fixture], memory_limit, True),
+                    timeout=timeouts[fixture],
+                )
+
+            for _ in to_run:
+                task = pool.wait()
+                result, output, fixture_report = _task_outcome(task, timeouts[task.key])
+                name, fingerprint = to_run[task.key]
+
+                progress.write(output)
+
+                if result and fixture_report.run_dir is not None:
+                    prepared[name] = PreparedFixture(name, fingerprint, HyalusRun(fixture_report.run_dir))
+                    make_read_only(prepared[name].run_dir.output_dir)
+                    store.record(prepared[name])
+                else:
+                    errors[name] = f"Suite fixture {name} did not pass"
+
+        return prepared, errors
+
+    @staticmethod
+    def _skip_unprepared(
+        tests: Sequence[HyalusTest], errors: dict[str, str], progress: SuiteProgress, report: SuiteReport
+    ) -> list[HyalusTest]:
+        """Report tests using suite fixtures that did not pass as errors without running them
+
+        :param tests: The tests to run
+        :param errors: Mapping of name to why each fixture that did not pass failed
+        :param progress: Progress reporter for the suite
+        :param report: Report of the suite
+        :return: The tests whose fixtures all passed
+        """
+        runnable = []
+
+        for test in tests:
+            if not (failed := [errors[name] for name in fixture_names(test) if name in errors]):
+                runnable.append(test)
+                continue
+
+            msg = "\n".join(failed)
+            progress.finished(test, False, f"{test}: ERROR\n{msg}\n")
+            report.add(TestReport.lost(test, msg))
+
+        return runnable
+
+    def _run_pool(self, tests: Sequence[HyalusTest], progress: SuiteProgress, report: SuiteReport) -> bool:
+        """Run tests in a pool of worker processes, see :py:meth:`_dispatch`
+
+        :param tests: The tests to run, in the order they should be started in
+        :param progress: Progress reporter for the suite
+        :param report: Report of the suite
+        :return: True if all tests passed, False if one or more tests failed or maxfail tests failed
+        """
+        passed = True
+
+        with WorkerPool(self.setup_shared_state(tests), preload_modules=self.preload_modules) as pool:
+            dispatch = self._dispatch(pool, tests, progress, report)
+
+            for result in dispatch:
+                passed &= result
+
+                if self.maxfail and progress.failed >= self.maxfail:
+                    dispatch.close()
+                    pool.terminate()
+                    progress.abort(f"Stopping after {progress.failed} failed test(s), remaining tests were not run")
+                    break
+
+        return passed
+
+    def setup_shared_state(self, tests: Sequence[HyalusTest]) -> BaseContext | None:
+        """Call the shared setup functions the tests use in this process, if fork_after_setup is set, so that workers
+        forked from it inherit their results copy-on-write rather than each calling them again
+
+        :param tests: The tests to run
+        :return: Context forking workers if the setup functions were called, else None for the default context
+        """
+        if not self.fork_after_setup:
+            return None
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            _logger.warning("Workers cannot be forked on this platform, each test calls its setup functions itself")
+            return None
+
+        run_setups(dict.fromkeys(setup for test in tests for setup in setup_names(test)))
+
+        return multiprocessing.get_context("fork")
+
+    def _dispatch(
+        self, pool: WorkerPool, tests: Sequence[HyalusTest], progress: SuiteProgress, report: SuiteReport
+    ) -> Iterator[bool]:
+        """Start each test in a worker once the resources declared in its Resources tag are free, see
+        :py:class:`hyalus.run.schedule.ResourcePacker`. Tests running past their timeout are stopped and reported as
+        errors. Each test's output is captured by its worker and written out by the progress reporter as the test
+        finishes, along with its report.
+
+        :param pool: The worker pool
+        :param tests: The tests to run, in the order they should be started in
+        :param progress: Progress reporter for the suite
+        :param report: Report of the suite
+        :return: The result of each test, as tests finish
+        """
+        packer = ResourcePacker(
+            tests,
+            {test: test_needs(test) for test in tests},
+            machine_capacity(self.cpu_capacity, self.memory_capacity),
+            self.jobs,
+        )
+        timeouts = {test: test_timeout(test, self.timeout_multiplier) for test in tests}
+
+        while not packer.done:
+            for test in packer.ready():
+                progress.started(test)
+                pool.submit(
+                    test,
+                    self._run_test_captured,
+                    (test, timeouts[test], test_memory_limit(test, self.memory_limit_multiplier)),
+                    timeout=timeouts[test],
+                )
+
+            task = pool.wait()
+            result, output, test_report = _task_outcome(task, timeouts[task.key])
+
+            packer.finished(task.key)
+            progress.finished(task.key, result, output)
+            report.add(test_report)
+
+            yield result
+
+    async def _run_event_loop(self, tests: Sequence[HyalusTest], progress: SuiteProgress, report: SuiteReport) -> bool:
+        """Run tests at once on the running event loop, starting at most jobs at a time in the given order. Tests
+        running past their timeout are reported as errors. Their asynchronous Steps are cancelled, but synchronous Steps
+        cannot be interrupted and carry on in the background on daemon threads, which do not keep the process alive.
+        Each test's output is written out by the progress reporter as the test finishes, along with its report.
+
+        :param tests: The tests to run, in the order they should be started in
+        :param progress: Progress reporter for the suite
+        :param report: Report of the suite
+        :return: True if all tests passed, False if one or more tests failed or maxfail tests failed
+        """
+        semaphore = asyncio.Semaphore(self.jobs)
+
+        async def run_one(test: HyalusTest) -> bool:
+            async with semaphore:
+                progress.started(test)
+                output = io.StringIO()
+                timeout = test_timeout(test, self.timeout_multiplier)
+                runner = self._test_runner(test, output)
+
+                try:
+                    result = await runner.run_async(timeout)
+                except Exception:  # pylint: disable=broad-except
+                    result = False
+                    output.write(f"{test}: ERROR\n{traceback.format_exc()}")
+
+                progress.finished(test, result, output.getvalue())
+                report.add(runner.report if runner.report is not None else TestReport.lost(test, output.getvalue()))
+
+                return result
+
+        tasks = [asyncio.create_task(run_one(test)) for test in tests]
+        passed = True
+
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                passed &= await next_result
+
+                if self.maxfail and progress.failed >= self.maxfail:
+                    progress.abort(f"Stopping after {progress.failed} failed test(s), remaining tests were not run")
+                    return False
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return passed
+
+    def _run_threads(self, tests: Sequence[HyalusTest], progress: SuiteProgress, report: SuiteReport) -> bool:
+        """Run tests at once on daemon threads in this process, starting each test once the resources declared in its
+        Resources tag are free, as for worker processes. Tests running past their timeout are reported as errors, but
+        their running Steps carry on in the background without keeping the process alive. Each test's output is written
+        out by the progress reporter as the test finishes, along with its report. Once maxfail tests have failed no more
+        tests are started, and the tests already running are left to finish.
+
+        :param tests: The tests to run, in the order they should be started in
+        :param progress: Progress reporter for the suite
+        :param report: Report of the suite
+        :return: True if all tests passed, False if one or more tests failed or maxfail tests failed
+        """
+        packer = ResourcePacker(
+            tests,
+            {test: test_needs(test) for test in tests},
+            machine_capacity(self.cpu_capacity, self.memory_capacity),
+            self.jobs,
+        )
+        running: dict[Future, tuple[HyalusTest, HyalusTestRunner, io.StringIO]] = {}
+        passed = True
+
+        with DaemonThreadExecutor(thread_name_prefix="hyalus-test") as executor:
+            while not packer.done:
+                for test in packer.ready():
+                    progress.started(test)
+                    output = io.StringIO()
+                    runner = self._test_runner(test, output)
+                    timeout = test_timeout(test, self.timeout_multiplier)
+                    running[executor.submit(runner.run_threaded, timeout)] = (test, runner, output)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    test, runner, output = running.pop(future)
+
+                    try:
+                        result = future.result()
+                    except Exception:  # pylint: disable=broad-except
+                        result = False
+                        output.write(f"{test}: ERROR\n{traceback.format_exc()}")
+
+                    packer.finished(test)
+                    progress.finished(test, result, output.getvalue())
+                    report.add(runner.report if runner.report is not None else TestReport.lost(test, output.getvalue()))
+                    passed &= result
+
+                if self.maxfail and progress.failed >= self.maxfail:
+                    progress.abort(f"Stopping after {progress.failed} failed test(s), remaining tests were not run")
+                    return False
+
+        return passed
+
+    def _run_test_captured(
+        self, test: HyalusTest, timeout: float | None = None, memory_limit: int | None = None, fixture: bool = False
+    ) -> tuple[bool, str, TestReport]:
+        """Run a single test in a worker, capturing what it prints so that the suite can write it out in one piece. The
+        worker stops the test and marks its run as an error when it is sent SIGTERM for running past its timeout.
+
+        :param test: The absolute Path to the test to run
+        :param timeout: The test's timeout in seconds
+        :param memory_limit: Bytes each process of the test may allocate, None for no limit
+        :param fixture: The test is a suite fixture, see :py:meth:`_test_runner`
+        :return: The result from running the test, what it printed, and its report
+        """
+        signal.signal(signal.SIGTERM, partial(_timed_out, timeout))
+
+        if memory_limit is not None:
+            limit_memory(memory_limit)
+
+        output = io.StringIO()
+
+        with redirect_stdout(output):
+            result, report = self._run_reported(test, fixture)
+
+        return result, output.getvalue(), report
 
     def run_test(self, test: HyalusTest) -> bool:
         """Run a single test. The test path is expected to be an absolute path to the test
@@ -98,7 +815,44 @@ class HyalusSuiteRunner:
         :param test: The absolute Path to the test to run
         :return: The result from running the test
         """
+        return self._run_reported(test)[0]
+
+    def _run_reported(self, test: HyalusTest, fixture: bool = False) -> tuple[bool, TestReport]:
+        """Run a single test, reporting on it even if it could not be run
+
+        :param test: The absolute Path to the test to run
+        :param fixture: The test is a suite fixture, see :py:meth:`_test_runner`
+        :return: The result from running the test, and its report
+        """
         try:
-            return HyalusTestRunner(test, self.runs_dir, cleanup_on_pass=self.cleanup_on_pass, debug=self.debug).run()
+            runner = self._test_runner(test, fixture=fixture)
+            result = runner.run()
         except:  # pylint: disable=bare-except
-            return False
+            return False, TestReport.lost(test, traceback.format_exc())
+
+        return result, runner.report if runner.report is not None else TestReport.lost(test, "Test was not run")
+
+    def _test_runner(self, test: HyalusTest, out: TextIO = None, fixture: bool = False) -> HyalusTestRunner:
+        """Create the runner for a single test
+
+        :param test: The absolute Path to the test to run
+        :param out: Stream the result of the test is printed to, default stdout
+        :param fixture: The test is a suite fixture, so its run is kept and it is not skipped by the result cache, as
+            other tests read its output
+        :return: The runner
+        """
+        return HyalusTestRunner(
+            test,
+            self.runs_dir,
+            search_dirs=self.search_dirs,
+            cleanup_on_pass=self.cleanup_on_pass and not fixture,
+            debug=self.debug,
+            use_catalog=self.use_catalog,
+            use_cache=self.use_cache and not fixture,
+            cache_dependencies=self.cache_dependencies,
+            cache_packages=self.cache_packages,
+            cache_size=self.cache_size,
+            out=out,
+            record_impact=self.record_impact,
+            fixtures=self.fixtures,
+        )
@@ -5,20 +5,139 @@ __author__ = "David McConnell"
 __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
-from datetime import datetime
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import logging
 import os
 from pathlib import Path
 import random
 import shutil
+import sqlite3
 import string
-from typing import Sequence, Literal
+import time
+from typing import Iterator, Mapping, Sequence, Literal, TextIO
 
 from hyalus.config.common import HYALUS_LOG, InvalidHyalusConfig
 from hyalus.config.loader import ConfigLoader
-from hyalus.config.steps.base import StepStatus
-from hyalus.run.common import DATE_FMT, RUN_DIR_DELIM, HyalusTest, HyalusRun, make_run_dir, find_fs_obj, cwd_reset
+from hyalus.config.steps.base import StepBase, StepError, StepOutput, StepStatus
+from hyalus.config.tags.runtime import RuntimeTag
+from hyalus.run.cache import DEFAULT_MAX_ENTRIES, ResultCache
+from hyalus.run.catalog import RunCatalog, dir_size, run_tags
+from hyalus.run.fixtures import FixtureNotPrepared, FixtureStore, PreparedFixture, expose_fixtures, fixture_names
+from hyalus.run.graph import InvalidStepGraph, step_dependencies, step_parallelism
+from hyalus.run.impact import DependencyRecorder, ImpactMap
+from hyalus.run.report import StepReport, TestReport
+from hyalus.run.stats import RuntimeHistory
+from hyalus.run.common import (
+    DATE_FMT,
+    RUN_DIR_DELIM,
+    HyalusTest,
+    HyalusRun,
+    RunStatus,
+    make_run_dir,
+    find_fs_obj,
+    cwd_reset,
+)
 from hyalus.utils import logging_utils
+from hyalus.utils.memory_utils import PeakMemory
+from hyalus.utils.thread_utils import DaemonThreadExecutor
+
+
+class RunTimedOut(BaseException):
+    """To be raised in a test run that is being stopped because it took too long. Like KeyboardInterrupt, this is not
+    an Exception so that Steps handling their own errors do not swallow it.
+    """
+
+
+def _process_cpu_time() -> float:
+    """:return: CPU seconds used by this process and the child processes it has waited on"""
+    times = os.times()
+
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def timed_out_msg(timeout: float | None) -> str:
+    """:return: Message explaining that a test with the given timeout in seconds was stopped"""
+    return "Terminated" if timeout is None else f"Timed out after {timedelta(seconds=round(timeout))}"
+
+
+class _StepSchedule:
+    """Tracks which Steps of a test run can be started, based on the Steps they depend on and on how the Steps that
+    already finished went. Steps stop being started once a Step errors, or fails and halts on failure.
+    """
+
+    def __init__(
+        self, steps: Sequence[StepBase], dependencies: list[set[int]], parallelism: int, logger: logging.Logger
+    ) -> None:
+        """Ctor.
+
+        :param steps: The Steps of the test
+        :param dependencies: Indexes of the Steps each Step depends on, see
+            :py:func:`hyalus.run.graph.step_dependencies`
+        :param parallelism: Maximum number of Steps to run at once
+        :param logger: Logger of the test run
+        """
+        self.steps = steps
+        self.dependencies = dependencies
+        self.parallelism = parallelism
+        self.pending = list(range(len(steps)))
+        self.statuses: dict[int, StepStatus] = {}
+        self.error: str = None
+        self.halted = False
+
+        self._logger = logger
+
+    def describe(self, i: int) -> str:
+        """:return: Description of the Step with the given index for messages about the test run"""
+        return f"{i + 1} {self.steps[i]} ({i + 1}/{len(self.steps)})"
+
+    def active(self, running: int) -> bool:
+        """:return: True if the given number of Steps are running or more Steps can still be started, else False"""
+        return bool(running) or (bool(self.pending) and self.error is None and not self.halted)
+
+    def ready(self, running: int) -> list[int]:
+        """Take the Steps that can be started now, while the given number of Steps are running
+
+        :param running: Number of Steps running
+        :return: Indexes of the Steps to start
+        """
+        if self.error is not None or self.halted:
+            return []
+
+        ready = [i for i in self.pending if self.dependencies[i] <= self.statuses.keys()][: self.parallelism - running]
+
+        for i in ready:
+            self.pending.remove(i)
+
+        return ready
+
+    def finished(self, i: int, future: Future | asyncio.Future) -> None:
+        """Record how a Step went once it finished
+
+        :param i: Index of the Step
+        :param future: Future for the output of the Step
+        """
+        error = f"Step {self.describe(i)}"
+
+        try:
+            self.statuses[i] = future.result().status
+        except MemoryError:
+            self.statuses[i] = StepStatus.ERROR
+            error = f"Step {self.describe(i)} ran out of memory"
+        except BaseException:  # pylint: disable=broad-except
+            self.statuses[i] = StepStatus.ERROR
+
+        if self.statuses[i] is StepStatus.ERROR:
+            self.error = self.error or error
+        elif self.statuses[i] is StepStatus.FAIL and self.steps[i].halt_on_failure and not self.halted:
+            self._logger.error(f"Step {self.steps[i]} ({i + 1}/{len(self.steps)}) failed - stopping test execution")
+            self.halted = True
+
+    def timed_out(self, exc: BaseException, running: Sequence[int]) -> RunTimedOut:
+        """:return: Error for a test run that timed out while the Steps with the given indexes were running"""
+        return RunTimedOut(f"{exc} during {', '.join(f'step {self.describe(i)}' for i in sorted(running))}")
 
 
 class HyalusTestRunner:
@@ -32,6 +151,14 @@ class HyalusTestRunner:
         cleanup_on_pass: bool = False,
         stdout: bool = False,
         debug: bool = False,
+        use_catalog: bool = True,
+        use_cache: bool = False,
+        cache_dependencies: Sequence[str | Path] = None,
+        cache_packages: Sequence[str] = None,
+        cache_size: int = DEFAULT_MAX_ENTRIES,
+        out: TextIO = None,
+        record_impact: bool = True,
+        fixtures: Mapping[str, PreparedFixture] = None,
     ) -> None:
         """Ctor.
 
@@ -40,6 +167,18 @@ class HyalusTestRunner:
         :param runs_dir: The directory to output test results to
         :param search_dirs: List of directories containing to be searched for tests
         :param cleanup_on_pass: Flag to remove test run directory if the test passes, default False
+        :param use_catalog: Record the test run in the run catalog of the runs directory
+        :param use_cache: Skip running the test if it passed before with the same fingerprint, see
+            :py:class:`hyalus.run.cache.ResultCache`
+        :param cache_dependencies: Files/directories outside of the test that its result depends on
+        :param cache_packages: Names of installed packages that the test's result depends on
+        :param cache_size: Maximum number of passing results to keep in the result cache
+        :param out: Stream the result of the test is printed to, default stdout
+        :param record_impact: Record the files the test depends on in the test impact map of the runs directory, see
+            :py:class:`hyalus.run.impact.ImpactMap`
+        :param fixtures: Mapping of name to passing run of the suite fixtures prepared by the suite running the test.
+            Fixtures the test uses that are not given are looked up in the runs directory, see
+            :py:meth:`hyalus.run.fixtures.FixtureStore.lookup`.
         """
         self.to_run = Path(to_run)
         self.runs_dir = Path(runs_dir).absolute() if runs_dir else Path.cwd()
@@ -47,8 +186,23 @@ class HyalusTestRunner:
         self.cleanup_on_pass = cleanup_on_pass
         self.stdout = stdout
         self.debug = debug
+        self.use_catalog = use_catalog
+        self.fingerprinter = ResultCache(self.runs_dir, cache_dependencies, cache_packages, cache_size)
+        self.cache = self.fingerprinter if use_cache else None
+        self.out = out
+        self.record_impact = record_impact
+        self.fixtures = dict(fixtures) if fixtures else {}
+
+        self.report: TestReport = None
 
         self._logger: logging.Logger = None
+        self._start_time: float = None
+        self._start_cpu: float = None
+        self._schedule: _StepSchedule = None
+        self._runtime_tag: RuntimeTag = None
+        self._memory: PeakMemory = None
+        self._fingerprint: str = None
+        self._fixtures: list[PreparedFixture] = []
         self.__test: HyalusTest = None
 
     @property
@@ -82,6 +236,105 @@ class HyalusTestRunner:
 
         return make_run_dir(run_dir)
 
+    def _catalog_run(self, run_dir: Path, status: RunStatus) -> None:
+        """Record the final status, duration, and size of the test run in the run catalog, if enabled
+
+        :param run_dir: The run directory
+        :param status: The final status of the test run
+        """
+        if not self.use_catalog or self._start_time is None:
+            return
+
+        RunCatalog(self.runs_dir).record(
+            HyalusRun(run_dir), status, duration=time.time() - self._start_time, size=dir_size(run_dir)
+        )
+
+    def _make_report(self, status: RunStatus, run_dir: Path = None, message: str = None) -> None:
+        """Put together the report of the test run, see :py:attr:`report`. The CPU time of the test is that of its
+        process and the processes it waited on if the test has the process to itself, otherwise that of its Steps.
+
+        :param status: The final status of the test run
+        :param run_dir: The run directory, None if there is none
+        :param message: What went wrong, if anything
+        """
+        test = self.__test if self.__test is not None else self.to_run
+        steps = self._schedule.steps if self._schedule is not None else []
+        statuses = self._schedule.statuses if self._schedule is not None else {}
+
+        step_reports = tuple(
+            StepReport(
+                i + 1,
+                str(step),
+                statuses[i].name if i in statuses else None,
+                step.start_time,
+                step.wall_time,
+                step.cpu_time,
+                step.peak_memory,
+            )
+            for i, step in enumerate(steps)
+            if i in statuses or step.start_time is not None
+        )
+
+        failed = [i for i in sorted(statuses) if statuses[i] is not StepStatus.PASS]
+
+        if self._start_cpu is not None:
+            cpu_time = _process_cpu_time() - self._start_cpu
+        elif step_cpu := [step.cpu_time for step in step_reports if step.cpu_time is not None]:
+            cpu_time = sum(step_cpu)
+        else:
+            cpu_time = None
+
+        self.report = TestReport(
+            test=str(test),
+            name=test.name,
+            status=status,
+            cached=False,
+            run_dir=str(run_dir) if run_dir is not None and self._start_time is not None else None,
+            start=self._start_time,
+            wall_time=time.time() - self._start_time if self._start_time is not None else None,
+            cpu_time=cpu_time,
+            peak_memory=self._memory.peak if self._memory is not None else None,
+            failed_step=self._schedule.describe(failed[0]) if failed else None,
+            message=message,
+            steps=step_reports,
+        )
+
+    def _record_usage(self, run_dir: Path, status: RunStatus) -> None:
+        """Record the peak memory of the test run and its Steps in its run metadata, and how it ended and how long it
+        took in the runtime history of the runs directory. Warn if the run took a time outside the expected
+        range of the test's RuntimeTag - runs that did not pass are only warned about when they took too long, as
+        failing early is no sign of the tag being wrong.
+
+        :param run_dir: The run directory
+        :param status: The final status of the test run
+        """
+        if self.report is None or self.report.wall_time is None:
+            return
+
+        try:
+            HyalusRun(run_dir).update_run_metadata(
+                peak_memory=self.report.peak_memory,
+                step_peak_memory=[{"step": step.number, "peak_memory": step.peak_memory} for step in self.report.steps],
+            )
+        except (OSError, ValueError) as exc:
+            self._logger.warning(f"Could not write peak memory to the run metadata: {exc}")
+
+        RuntimeHistory(self.runs_dir).record(self.test, status, self.report.wall_time, self._runtime_tag)
+
+        if self._runtime_tag is None:
+            return
+
+        minutes = self.report.wall_time / 60
+        low, high = self._runtime_tag.expected_range
+
+        if minutes > high or (status is RunStatus.SUCCESS and minutes < low):
+            msg = f"Took {minutes:.1f} minutes, outside the expected range of {self._runtime_tag}"
+
+            if not self.stdout:
+                print(f"{run_dir}: WARNING: {msg}", file=self.out)
+
+            self._logger.warning(msg)
+
     def test_success(self, run_dir: Path) -> Literal[True]:
         """Note test success via print/log messages, clean up logging and optionally run dir
 
@@ -89,14 +342,38 @@ class HyalusTestRunner:
         :return: ``True``
         """
         if not self.stdout:
-            print(f"{run_dir}: SUCCESS")
+            print(f"{run_dir}: SUCCESS", file=self.out)
+
+        self._make_report(RunStatus.SUCCESS, None if self.cleanup_on_pass else run_dir)
+        self._record_usage(run_dir, RunStatus.SUCCESS)
 
         self._logger.info(f"{run_dir}: SUCCESS")
 
         logging_utils.remove_file_handler(run_dir / HYALUS_LOG, logger=self._logger)
 
+        if self._fingerprint is not None:
+            self.cache.record_pass(self._fingerprint, self.test)
+
         if self.cleanup_on_pass:
             shutil.rmtree(run_dir)
+            if self.use_catalog and self._start_time is not None:
+                RunCatalog(self.runs_dir).remove(HyalusRun(run_dir))
+        else:
+            self._catalog_run(run_dir, RunStatus.SUCCESS)
+
+        return True
+
+    def test_cached(self) -> Literal[True]:
+        """Note that the test was skipped because it passed before with the same fingerprint via print/log messages
+
+        :return: ``True``
+        """
+        if not self.stdout:
+            print(f"{self.test}: SUCCESS (CACHED)", file=self.out)
+
+        self.report = TestReport(str(self.test), self.test.name, RunStatus.SUCCESS, cached=True, wall_time=0)
+
+        self._logger.info(f"{self.test}: SUCCESS (CACHED)")
 
         return True
 
@@ -107,12 +384,17 @@ class HyalusTestRunner:
         :return: ``False``
         """
         if not self.stdout:
-            print(f"{run_dir}: FAILURE")
+            print(f"{run_dir}: FAILURE", file=self.out)
+
+        self._make_report(RunStatus.FAILURE, run_dir)
+        self._record_usage(run_dir, RunStatus.FAILURE)
 
         self._logger.error(f"{run_dir}: FAILURE")
 
         logging_utils.remove_file_handler(run_dir / HYALUS_LOG, logger=self._logger)
 
+        self._catalog_run(run_dir, RunStatus.FAILURE)
+
         return False
 
     def test_error(self, run_dir: Path, msg: str) -> Literal[False]:
@@ -122,21 +404,25 @@ class HyalusTestRunner:
         :return: ``False``
         """
         if not self.stdout:
-            print(f"{run_dir}: ERROR")
-            print(msg)
+            print(f"{run_dir}: ERROR", file=self.out)
+            print(msg, file=self.out)
+
+        self._make_report(RunStatus.ERROR, run_dir, msg)
+        self._record_usage(run_dir, RunStatus.ERROR)
 
         self._logger.error(f"{run_dir}: ERROR")
         self._logger.error(msg)
 
         logging_utils.remove_file_handler(run_dir / HYALUS_LOG, logger=self._logger)
 
+        self._catalog_run(run_dir, RunStatus.ERROR)
+
         return False
 
-    @cwd_reset
-    def run(self) -> bool:
-        """Create the test run directory and then run the test
+    def _start_run(self) -> HyalusRun | bool:
+        """Create the test run directory, unless the test cannot or need not be run
 
-        :return: True/False based on whether the test passed or not
+        :return: The run directory, or the result of the test if it finished without being run (e.g. a cached pass)
         """
         logging_utils.configure_logging(log_stdout=self.stdout, debug=self.debug)
 
@@ -146,39 +432,315 @@ class HyalusTestRunner:
             self._logger.disabled = True
             return self.test_error(self.to_run, "Test does not exist, is a previous run, or is missing config.py")
 
+        try:
+            self._fixtures = self._find_fixtures()
+        except FixtureNotPrepared as exc:
+            return self.test_error(self.to_run, str(exc))
+
+        if self.cache is not None:
+            try:
+                extra = [f"fixture {fixture.name} {fixture.fingerprint}" for fixture in self._fixtures]
+                self._fingerprint = self.cache.fingerprint(self.test, extra)
+            except (sqlite3.Error, OSError) as exc:
+                self._logger.warning(f"Could not fingerprint {self.test}, running without the result cache: {exc}")
+            else:
+                if self.cache.is_cached_pass(self._fingerprint):
+                    return self.test_cached()
+
         run_dir = self._make_run_dir(self.test)
         run_dir.write_run_metadata()
+        expose_fixtures(run_dir, self._fixtures)
 
-        os.chdir(run_dir)
+        self._start_time = time.time()
+
+        # The run directory's config.py is a copy of the test's, whose tags may already be loaded
+        if self.use_catalog:
+            catalog = RunCatalog(self.runs_dir)
+            catalog.record(run_dir, RunStatus.RUNNING, tags=run_tags(self.test), start=self._start_time)
 
         logging_utils.add_file_handler(run_dir / HYALUS_LOG, logger=self._logger)
 
+        return run_dir
+
+    def _find_fixtures(self) -> list[PreparedFixture]:
+        """Find the passing runs of the suite fixtures the test uses, prepared by the suite running the test or, when
+        the test is run on its own, by an earlier suite
+
+        :return: The fixture runs
+        :raises FixtureNotPrepared: If a fixture has no passing run of its current version
+        """
+        store = FixtureStore(self.runs_dir)
+
+        return [
+            self.fixtures[name] if name in self.fixtures else store.lookup(name, self.search_dirs, self.fingerprinter)
+            for name in fixture_names(self.test)
+        ]
+
+    @cwd_reset
+    def run(self) -> bool:
+        """Create the test run directory and then run the test
+
+        :return: True/False based on whether the test passed or not
+        """
+        if isinstance(run_dir := self._start_run(), bool):
+            return run_dir
+
+        # The test has this process to itself, so all CPU time it uses from here on is the test's
+        self._start_cpu = _process_cpu_time()
+
+        os.chdir(run_dir)
+
+        try:
+            with self._recording_impact(run_dir), PeakMemory() as self._memory:
+                return self._run_steps(run_dir)
+        except RunTimedOut as exc:
+            return self.test_error(run_dir, str(exc))
+
+    def run_threaded(self, timeout: float = None) -> bool:
+        """Create the test run directory and then run the test in the calling thread, so that many tests can run at once
+        on threads of one process. The working directory is left as-is, so Steps must not depend on it being the run
+        directory. With a timeout, Steps are always run on threads of their own so that the test can be stopped once it
+        passes, but a Step still running then cannot be interrupted and carries on in the background on a daemon thread,
+        which does not keep the process from exiting.
+
+        :param timeout: Seconds the test's Steps may run for before the run is marked as an error, None for no limit
+        :return: True/False based on whether the test passed or not
+        """
+        if isinstance(run_dir := self._start_run(), bool):
+            return run_dir
+
+        try:
+            with self._recording_impact(run_dir):
+                return self._run_steps(run_dir, timeout)
+        except RunTimedOut as exc:
+            return self.test_error(run_dir, str(exc))
+
+    async def run_async(self, timeout: float = None) -> bool:
+        """Create the test run directory and then run the test on the running event loop, so that many tests can run
+        at once in one process. Steps are run with :py:meth:`hyalus.config.steps.base.StepBase.run_async`. The working
+        directory is left as-is, so Steps must not depend on it being the run directory.
+
+        :param timeout: Seconds the test's Steps may run for before they are cancelled and the run is marked as an
+            error, None for no limit. Synchronous Steps cannot be interrupted and carry on in the background.
+        :return: True/False based on whether the test passed or not
+        """
+        if isinstance(run_dir := await asyncio.to_thread(self._start_run), bool):
+            return run_dir
+
+        try:
+            with self._recording_impact(run_dir):
+                return await self._run_steps_async(run_dir, timeout)
+        except RunTimedOut as exc:
+            return self.test_error(run_dir, str(exc))
+
+    @contextmanager
+    def _recording_impact(self, run_dir: HyalusRun) -> Iterator[None]:
+        """Record the files the test depends on while its config is loaded and its Steps run, if enabled. Nothing is
+        recorded if the test is stopped before it finishes.
+
+        :param run_dir: The run directory
+        """
+        if not self.record_impact:
+            yield
+            return
+
+        with DependencyRecorder(exclude=[self.test, run_dir, self.runs_dir]) as recorder:
+            yield
+
+        ImpactMap(self.runs_dir).record(self.test, recorder.paths)
+
+    def _schedule_steps(self, run_dir: HyalusRun) -> _StepSchedule | None:
+        """Load the config of the test run and work out the order its Steps can run in
+
+        :param run_dir: The run directory
+        :return: The schedule of the Steps, or None if the test errored as its config or Steps are invalid
+        """
         self._logger.info(f"Running {self.test}")
 
         try:
             config = ConfigLoader(run_dir.config).run()
         except InvalidHyalusConfig:
-            return self.test_error(run_dir, "Config file could not be loaded")
+            self.test_error(run_dir, "Config file could not be loaded")
+            return None
 
-        step_results = []
+        try:
+            dependencies = step_dependencies(config.STEPS)
+        except InvalidStepGraph as exc:
+            self.test_error(run_dir, str(exc))
+            return None
 
-        for i, step in enumerate(config.STEPS, start=1):
-            # Here we are checking for a step error - if it failed to finish, bail after logging which step it was
-            try:
-                step_output = step.run(i, run_dir)
-            except:  # pylint: disable=bare-except
-                return self.test_error(run_dir, f"Step {i} {step} ({i}/{len(config.STEPS)})")
+        self._schedule = _StepSchedule(config.STEPS, dependencies, step_parallelism(config.TAGS), self._logger)
+        self._runtime_tag = next((tag for tag in config.TAGS if isinstance(tag, RuntimeTag)), None)
 
-            step_results.append(step_output.status)
+        return self._schedule
 
-            if step_output.status is StepStatus.ERROR:
-                return self.test_error(run_dir, f"Step {i} {step} ({i}/{len(config.STEPS)})")
+    def _finish_run(self, run_dir: HyalusRun, schedule: _StepSchedule) -> bool:
+        """Note the result of the test once no more Steps are running
 
-            if step_output.status is StepStatus.FAIL and step.halt_on_failure:
-                self._logger.error(f"Step {step} ({i}/{len(config.STEPS)}) failed - stopping test execution")
-                break
+        :param run_dir: The run directory
+        :param schedule: The schedule of the Steps
+        :return: True/False based on whether the test passed or not
+        """
+        if schedule.error is not None:
+            return self.test_error(run_dir, schedule.error)
 
-        if all(step_results):
+        if all(schedule.statuses.values()):
             return self.test_success(run_dir)
 
         return self.test_failure(run_dir)
+
+    def _run_steps(self, run_dir: HyalusRun, timeout: float = None) -> bool:
+        """Load the config of the test run and run its steps. Steps run in order unless they declare their
+        dependencies, in which case independent steps run concurrently, up to the number of CPUs in the test's
+        Resources tag.
+
+        :param run_dir: The run directory
+        :param timeout: Seconds the steps may run for, None for no limit. Steps are run on daemon threads of their own
+            if given, so that they can be waited on with a deadline, and a Step still running then does not keep the
+            process alive.
+        :return: True/False based on whether the test passed or not
+        :raises RunTimedOut: If the steps did not finish within the timeout
+        """
+        if (schedule := self._schedule_steps(run_dir)) is None:
+            return False
+
+        steps = schedule.steps
+        executor = (
+            DaemonThreadExecutor(thread_name_prefix="hyalus-step")
+            if schedule.parallelism > 1 or timeout is not None
+            else None
+        )
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        running: dict[Future, int] = {}
+
+        try:
+            while schedule.active(len(running)):
+                for i in schedule.ready(len(running)):
+                    running[self._submit_step(executor, steps[i], i + 1, run_dir, running)] = i
+
+                remaining = max(deadline - time.monotonic(), 0) if deadline is not None else None
+                done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    raise RunTimedOut(timed_out_msg(timeout))
+
+                for future in done:
+                    schedule.finished(running.pop(future), future)
+        except RunTimedOut as exc:
+            raise schedule.timed_out(exc, list(running.values()))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        return self._finish_run(run_dir, schedule)
+
+    async def _run_steps_async(self, run_dir: HyalusRun, timeout: float = None) -> bool:
+        """Load the config of the test run and run its steps on the running event loop, in the same order as
+        _run_steps. Steps still running once the timeout passes are cancelled, though synchronous Steps carry on in the
+        background, see :py:meth:`hyalus.config.steps.base.StepBase._run_workflow_async`.
+
+        :param run_dir: The run directory
+        :param timeout: Seconds the steps may run for, None for no limit
+        :return: True/False based on whether the test passed or not
+        :raises RunTimedOut: If the steps did not finish within the timeout
+        """
+        if (schedule := self._schedule_steps(run_dir)) is None:
+            return False
+
+        steps = schedule.steps
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        running: dict[asyncio.Task, int] = {}
+
+        try:
+            while schedule.active(len(running)):
+                for i in schedule.ready(len(running)):
+                    running[asyncio.create_task(self._run_step_async(steps[i], i + 1, run_dir))] = i
+
+                remaining = max(deadline - time.monotonic(), 0) if deadline is not None else None
+                done, _ = await asyncio.wait(running, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    raise schedule.timed_out(RunTimedOut(timed_out_msg(timeout)), list(running.values()))
+
+                for task in done:
+                    schedule.finished(running.pop(task), task)
+        finally:
+            for task in running:
+                task.cancel()
+
+            await asyncio.gather(*running, return_exceptions=True)
+
+        return self._finish_run(run_dir, schedule)
+
+    def _submit_step(
+        self,
+        executor: DaemonThreadExecutor | None,
+        step: StepBase,
+        step_number: int,
+        run_dir: HyalusRun,
+        running: dict[Future, int],
+    ) -> Future:
+        """Run a step on the executor, or right away if steps are run one at a time
+
+        :param executor: Executor to run concurrent steps on, or None if steps are run one at a time
+        :param step: The step
+        :param step_number: The number of the step
+        :param run_dir: The run directory
+        :param running: The steps currently running, which a step run right away is part of while it runs
+        :return: Future for the output of the step
+        """
+        if executor is not None:
+            return executor.submit(self._run_step, step, step_number, run_dir)
+
+        future: Future = Future()
+        running[future] = step_number - 1
+
+        try:
+            future.set_result(self._run_step(step, step_number, run_dir))
+        except RunTimedOut:
+            raise
+        except BaseException as exc:  # pylint: disable=broad-except
+            future.set_exception(exc)
+
+        return future
+
+    def _run_step(self, step: StepBase, step_number: int, run_dir: HyalusRun) -> StepOutput:
+        """Run a step, once any files it depends on exist
+
+        :param step: The step
+        :param step_number: The number of the step
+        :param run_dir: The run directory
+        :return: Output from running the step
+        :raises StepError: If files the step depends on do not exist
+        """
+        self._check_dependencies(step, step_number, run_dir)
+
+        return step.run(step_number, run_dir)
+
+    def _check_dependencies(self, step: StepBase, step_number: int, run_dir: HyalusRun) -> None:
+        """Check that the files a step depends on exist
+
+        :param step: The step
+        :param step_number: The number of the step
+        :param run_dir: The run directory
+        :raises StepError: If files the step depends on do not exist
+        """
+        files = [dependency for dependency in step.dependencies or () if isinstance(dependency, Path)]
+
+        if missing := [str(file) for file in files if not (run_dir / file).exists()]:
+            msg = f"Step {step_number} {step} is missing dependencies: {', '.join(missing)}"
+            self._logger.error(msg)
+            raise StepError(msg)
+
+    async def _run_step_async(self, step: StepBase, step_number: int, run_dir: HyalusRun) -> StepOutput:
+        """Run a step on the running event loop, once any files it depends on exist
+
+        :param step: The step
+        :param step_number: The number of the step
+        :param run_dir: The run directory
+        :return: Output from running the step
+        :raises StepError: If files the step depends on do not exist
+        """
+        self._check_dependencies(step, step_number, run_dir)
+
+        return await step.run_async(step_number, run_dir)
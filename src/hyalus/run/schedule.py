@@ -0,0 +1,458 @@
+"""Ordering of hyalus tests for parallel execution"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from collections import Counter, defaultdict
+import heapq
+import logging
+from math import inf
+import os
+from pathlib import Path
+import sqlite3
+from statistics import median
+from typing import Mapping, NamedTuple, Sequence
+
+from hyalus.config.analyzer import load_config_tags
+from hyalus.config.common import INPUT_PATH, InvalidHyalusConfig
+from hyalus.config.tags.resources import Dataset, Resources
+from hyalus.config.tags.runtime import RuntimeTag, Timeout
+from hyalus.run.cache import ResultCache, walk_files
+from hyalus.run.common import HyalusTest
+from hyalus.run.stats import RuntimeHistory
+
+#: Number of most recent passing runs of a test averaged to estimate its duration
+HISTORY_RUNS = 5
+
+#: Default multiple of the upper end of a test's RuntimeTag range that it may run for when run as part of a suite
+DEFAULT_TIMEOUT_MULTIPLIER = 2
+
+#: Size in bytes from which identical input files of different tests are worth running the tests back to back for
+AFFINITY_MIN_SIZE = 64 * 1024**2
+
+_logger = logging.getLogger("hyalus.run.schedule")
+
+
+class Capacity(NamedTuple):
+    """CPUs and memory (in GiB), either needed by a test or available to a suite"""
+
+    cpus: float
+    memory: float
+
+    def fits(self, available: "Capacity") -> bool:
+        """:return: True if this much fits within the given available capacity, else False"""
+        return self.cpus <= available.cpus and self.memory <= available.memory
+
+
+#: What a test without a Resources tag is assumed to need
+DEFAULT_NEEDS = Capacity(1, 0)
+
+
+def test_runtime_tag(test: HyalusTest) -> RuntimeTag | None:
+    """Get the RuntimeTag in a test's config
+
+    :param test: The test
+    :return: The RuntimeTag, or None if the test has none or its config is invalid
+    """
+    try:
+        tags = load_config_tags(test.config)
+    except InvalidHyalusConfig:
+        return None
+
+    return next((tag for tag in tags if isinstance(tag, RuntimeTag)), None)
+
+
+def tag_duration(test: HyalusTest) -> float | None:
+    """Estimate how long a test takes from the RuntimeTag in its config
+
+    :param test: The test
+    :return: The midpoint of the tag's expected range in seconds (or its lower bound if the range is unbounded), or None
+        if the test has no RuntimeTag
+    """
+    if (tag := test_runtime_tag(test)) is None:
+        return None
+
+    low, high = tag.expected_range
+
+    return 60 * (low if high == inf else (low + high) / 2)
+
+
+def test_needs(test: HyalusTest) -> Capacity:
+    """Get the resources a test needs from the Resources tag in its config
+
+    :param test: The test
+    :return: The declared resources, or DEFAULT_NEEDS if the test has no Resources tag
+    """
+    try:
+        tags = load_config_tags(test.config)
+    except InvalidHyalusConfig:
+        return DEFAULT_NEEDS
+
+    for tag in tags:
+        if isinstance(tag, Resources):
+            return Capacity(tag.cpus, tag.memory)
+
+    return DEFAULT_NEEDS
+
+
+def test_timeout(test: HyalusTest, multiplier: float = DEFAULT_TIMEOUT_MULTIPLIER) -> float | None:
+    """Get how long a test may run for before it is stopped, from the Timeout tag in its config if it has one and as a
+    multiple of the upper end of its RuntimeTag's expected range otherwise
+
+    :param test: The test
+    :param multiplier: Multiple of the upper end of the RuntimeTag's expected range the test may run for, 0 for no limit
+    :return: The timeout in seconds, or None if the test may run indefinitely
+    """
+    try:
+        tags = load_config_tags(test.config)
+    except InvalidHyalusConfig:
+        return None
+
+    for tag in tags:
+        if isinstance(tag, Timeout):
+            return None if tag.minutes == inf else 60 * tag.minutes
+
+    if not multiplier:
+        return None
+
+    for tag in tags:
+        if isinstance(tag, RuntimeTag) and (high := tag.expected_range[1]) != inf:
+            return 60 * high * multiplier
+
+    return None
+
+
+def test_memory_limit(test: HyalusTest, multiplier: float) -> int | None:
+    """Get how much memory each process of a test may allocate, as a multiple of the memory in its Resources tag
+
+    :param test: The test
+    :param multiplier: Multiple of the memory in the Resources tag the test may allocate, 0 for no limit
+    :return: The limit in bytes, or None if the test is not limited, including if it declares no memory
+    """
+    if not multiplier or not (memory := test_needs(test).memory):
+        return None
+
+    return int(memory * multiplier * 1024**3)
+
+
+def test_datasets(test: HyalusTest) -> set[str]:
+    """Get the datasets a test reads from the Dataset tags in its config
+
+    :param test: The test
+    :return: Names of the datasets, none if the test's config cannot be loaded
+    """
+    try:
+        tags = load_config_tags(test.config)
+    except InvalidHyalusConfig:
+        return set()
+
+    return {tag.name for tag in tags if isinstance(tag, Dataset)}
+
+
+def _large_inputs(tests: Sequence[HyalusTest], min_size: int) -> list[tuple[HyalusTest, Path]]:
+    """Find the files in the input directories of tests that are at least min_size bytes, and the same size as a file
+    of another test, so could be identical to it
+
+    :param tests: The tests
+    :param min_size: Minimum size of the files in bytes
+    :return: Each test and file found
+    """
+    by_size: dict[int, list[tuple[HyalusTest, Path]]] = defaultdict(list)
+
+    for test in tests:
+        for file in walk_files(test / INPUT_PATH):
+            try:
+                size = os.stat(file).st_size
+            except OSError:
+                continue
+
+            if size >= min_size:
+                by_size[size].append((test, file))
+
+    return [entry for entries in by_size.values() if len({test for test, _ in entries}) > 1 for entry in entries]
+
+
+def _group_leader(leaders: dict[HyalusTest, HyalusTest], test: HyalusTest) -> HyalusTest:
+    """:return: The test standing for the group of tests a test is in, see :py:func:`affinity_groups`"""
+    while leaders[test] != test:
+        leaders[test] = leaders[leaders[test]]
+        test = leaders[test]
+
+    return test
+
+
+def affinity_groups(
+    tests: Sequence[HyalusTest], cache: ResultCache = None, min_size: int = AFFINITY_MIN_SIZE
+) -> dict[HyalusTest, int]:
+    """Work out which tests share input data, so that they can be run back to back while the data is still in the OS
+    page cache: tests declaring the same Dataset tag, and given a cache to keep content hashes in, tests whose input
+    directories hold identical files of at least min_size bytes. Only files the same size as a file of another test are
+    hashed, and their hashes are reused until they change, see :py:meth:`hyalus.run.cache.ResultCache.file_digests`.
+    Tests sharing data with a test that shares other data with a third test are all grouped together.
+
+    :param tests: The tests
+    :param cache: Cache to keep content hashes of input files in, None to only group tests on their Dataset tags
+    :param min_size: Minimum size in bytes of the input files to compare
+    :return: Mapping of each test sharing input data with another test to its group, numbered in order of the first
+        test in each group
+    """
+    shared: dict[str, list[HyalusTest]] = defaultdict(list)
+
+    for test in tests:
+        for name in test_datasets(test):
+            shared[f"dataset:{name}"].append(test)
+
+    if cache is not None and (inputs := _large_inputs(tests, min_size)):
+        try:
+            digests = cache.file_digests([file for _, file in inputs])
+        except (sqlite3.Error, OSError) as exc:
+            _logger.warning(f"Could not hash input files to find the tests sharing them: {exc}")
+            digests = []
+
+        for (test, _), digest in zip(inputs, digests):
+            shared[f"sha256:{digest}"].append(test)
+
+    leaders = {test: test for test in tests}
+
+    for members in shared.values():
+        for member in members[1:]:
+            leaders[_group_leader(leaders, member)] = _group_leader(leaders, members[0])
+
+    sizes = Counter(_group_leader(leaders, test) for test in tests)
+    numbers: dict[HyalusTest, int] = {}
+
+    return {
+        test: numbers.setdefault(leader, len(numbers))
+        for test in tests
+        if sizes[leader := _group_leader(leaders, test)] > 1
+    }
+
+
+def group_shared_inputs(tests: Sequence[HyalusTest], groups: Mapping[HyalusTest, int]) -> list[HyalusTest]:
+    """Reorder tests so that those sharing input data are started back to back, each group taking the place of its
+    first test. Later tests of a group are moved forward to join it, so may start before tests they were behind.
+
+    :param tests: The tests, in priority order
+    :param groups: Mapping of test to its group as returned by :py:func:`affinity_groups`
+    :return: The reordered tests
+    """
+    members: dict[int, list[HyalusTest]] = defaultdict(list)
+
+    for test in tests:
+        if test in groups:
+            members[groups[test]].append(test)
+
+    ordered = []
+    started = set()
+
+    for test in tests:
+        if (group := groups.get(test)) is None:
+            ordered.append(test)
+        elif group not in started:
+            started.add(group)
+            ordered.extend(members[group])
+
+    return ordered
+
+
+def machine_capacity(cpus: float = 0, memory: float = 0) -> Capacity:
+    """Get the capacity tests can be packed into, detecting anything not configured from the machine
+
+    :param cpus: Number of CPUs available to tests, 0 for the number of CPUs on the machine
+    :param memory: Memory available to tests in GiB, 0 for the physical memory of the machine
+    :return: The capacity
+    """
+    if not cpus:
+        cpus = os.cpu_count() or 1
+
+    if not memory:
+        try:
+            memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**3
+        except (AttributeError, ValueError, OSError):
+            # Physical memory cannot be determined on this platform, so memory is not limited
+            memory = inf
+
+    return Capacity(cpus, memory)
+
+
+class ResourcePacker:
+    """Decides which tests can be started as workers and resources free up, so that the declared resources of
+    concurrently running tests never exceed capacity. Tests are started in the given priority order, but a test that
+    does not fit yet does not stop smaller tests behind it from filling the remaining capacity.
+    """
+
+    def __init__(
+        self, tests: Sequence[HyalusTest], needs: Mapping[HyalusTest, Capacity], capacity: Capacity, jobs: int
+    ) -> None:
+        """Ctor.
+
+        :param tests: The tests to run, in priority order
+        :param needs: Mapping of test to the resources it needs
+        :param capacity: The capacity to pack tests into
+        :param jobs: Maximum number of tests to run at once
+        """
+        self.pending = list(tests)
+        self.running: set[HyalusTest] = set()
+        self.capacity = capacity
+        self.jobs = jobs
+        self.free = capacity
+
+        # A test needing more than the total capacity could never start, so it is given all of it and runs alone
+        self.needs = {}
+
+        for test in tests:
+            need = needs.get(test, DEFAULT_NEEDS)
+            if not need.fits(capacity):
+                _logger.warning(f"{test} needs {need}, more than the capacity of {capacity} - it will be run alone")
+                need = Capacity(min(need.cpus, capacity.cpus), min(need.memory, capacity.memory))
+            self.needs[test] = need
+
+    @property
+    def done(self) -> bool:
+        """:return: True if every test has been started and has finished, else False"""
+        return not self.pending and not self.running
+
+    def ready(self) -> list[HyalusTest]:
+        """Reserve resources for, and return, every pending test that can be started now
+
+        :return: The tests to start, in priority order
+        """
+        ready = []
+
+        for test in list(self.pending):
+            if len(self.running) >= self.jobs:
+                break
+
+            if (need := self.needs[test]).fits(self.free):
+                self.pending.remove(test)
+                self.running.add(test)
+                self.free = Capacity(self.free.cpus - need.cpus, self.free.memory - need.memory)
+                ready.append(test)
+
+        return ready
+
+    def finished(self, test: HyalusTest) -> None:
+        """Release the resources reserved for a test that finished running
+
+        :param test: The test
+        """
+        self.running.remove(test)
+
+        need = self.needs[test]
+        self.free = Capacity(self.free.cpus + need.cpus, self.free.memory + need.memory)
+
+
+def expected_durations(tests: Sequence[HyalusTest], history: Mapping[str, float] = None) -> dict[HyalusTest, float]:
+    """Estimate how long each test takes. Recorded durations of previous runs of a test take precedence over its
+    RuntimeTag. Tests with neither are assumed to take the median of the other estimates.
+
+    :param tests: The tests
+    :param history: Mapping of test name to its average duration in seconds over recent runs
+    :return: Mapping of test to its expected duration in seconds
+    """
+    if history is None:
+        history = {}
+
+    durations = {}
+
+    for test in tests:
+        if (duration := history.get(test.name)) is None:
+            duration = tag_duration(test)
+        durations[test] = duration
+
+    known = [duration for duration in durations.values() if duration is not None]
+    default = median(known) if known else 0
+
+    return {test: default if duration is None else duration for test, duration in durations.items()}
+
+
+def longest_first(tests: Sequence[HyalusTest], history: Mapping[str, float] = None) -> list[HyalusTest]:
+    """Order tests longest-processing-time-first, so that long tests are not left to start last and hold up the whole
+    suite. Ties are broken by path so that the order is deterministic.
+
+    :param tests: The tests
+    :param history: Mapping of test name to its average duration in seconds over recent runs
+    :return: The tests, longest expected duration first
+    """
+    durations = expected_durations(tests, history)
+
+    return sorted(tests, key=lambda test: (-durations[test], str(test)))
+
+
+def predict_starts(
+    tests: Sequence[HyalusTest],
+    durations: Mapping[HyalusTest, float],
+    needs: Mapping[HyalusTest, Capacity],
+    capacity: Capacity,
+    jobs: int,
+) -> dict[HyalusTest, float]:
+    """Predict when each test starts if tests are started as resources free up, see :py:class:`ResourcePacker`, and
+    each takes its expected duration
+
+    :param tests: The tests to run, in the order they should be started in
+    :param durations: Mapping of test to its expected duration in seconds
+    :param needs: Mapping of test to the resources it needs
+    :param capacity: The capacity to pack tests into
+    :param jobs: Maximum number of tests to run at once
+    :return: Mapping of test to the seconds after the start of the suite it is expected to start at
+    """
+    # Clipped to the capacity as the packer would, without it warning about it on every prediction
+    needs = {
+        test: Capacity(min(need.cpus, capacity.cpus), min(need.memory, capacity.memory))
+        for test, need in ((test, needs.get(test, DEFAULT_NEEDS)) for test in tests)
+    }
+    packer = ResourcePacker(tests, needs, capacity, jobs)
+    order = {test: index for index, test in enumerate(tests)}
+    starts = {}
+    finishing: list[tuple[float, int, HyalusTest]] = []
+    now = 0.0
+
+    while not packer.done:
+        for test in packer.ready():
+            starts[test] = now
+            heapq.heappush(finishing, (now + durations[test], order[test], test))
+
+        now, _, test = heapq.heappop(finishing)
+        packer.finished(test)
+
+    return starts
+
+
+def run_history(runs_dir: str | Path, tests: Sequence[HyalusTest]) -> dict[str, float]:
+    """Get the average duration of the recent passing runs of the given tests from the runtime history of a runs
+    directory, see :py:meth:`hyalus.run.stats.RuntimeHistory.mean_durations`. Unlike the run catalog, the history keeps
+    passing runs removed by cleanup_on_pass, and it is what the time budget is worked out from too.
+
+    :param runs_dir: The runs directory
+    :param tests: The tests
+    :return: Mapping of test name to its average duration in seconds, for tests with recorded passing runs
+    """
+    try:
+        return RuntimeHistory(runs_dir).mean_durations([test.name for test in tests], last=HISTORY_RUNS)
+    except (sqlite3.Error, OSError) as exc:
+        _logger.debug(f"Could not read run history from {runs_dir}: {exc}")
+        return {}
+
+
+def split_shards(tests: Sequence[HyalusTest], count: int) -> list[list[HyalusTest]]:
+    """Split tests into shards of roughly equal expected duration, so that a suite can be spread over several machines
+    that each run one shard. Tests are dealt out longest first, each to the shard with the least expected duration so
+    far. Durations are estimated from RuntimeTags only, not from run history, as every machine must arrive at the same
+    split from its own copy of the tests: the split only changes when tests or their tags do.
+
+    :param tests: The tests
+    :param count: Number of shards
+    :return: The shards, each a list of tests
+    """
+    durations = expected_durations(tests)
+    shards: list[list[HyalusTest]] = [[] for _ in range(count)]
+    loads = [0.0] * count
+
+    # Ties are broken by name before path so that checkouts at different locations split tests the same way
+    for test in sorted(tests, key=lambda test: (-durations[test], test.name, str(test))):
+        index = min(range(count), key=lambda index: (loads[index], index))
+        shards[index].append(test)
+        loads[index] += durations[test]
+
+    return shards
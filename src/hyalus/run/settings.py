@@ -148,6 +148,161 @@ FORCE_CLEAN = HyalusSetting(
     False,
 )
 
+DISCOVERY_INDEX = HyalusSetting(
+    "discovery_index",
+    "Cache test discovery results (validity, tags) in an index file in each search directory so that only changed "
+    "config files are reloaded when using the list and runsuite commands",
+    bool,
+    True,
+)
+
+SEARCH_DEPTH = HyalusSetting(
+    "search_depth",
+    "How many directory levels below each search directory to look for tests when using the list and runsuite "
+    "commands, 0 for no limit. Input, output, and tmp directories of tests and previous test runs are never searched",
+    int,
+    1,
+)
+
+RUN_CATALOG = HyalusSetting(
+    "run_catalog",
+    "Record test runs in a catalog file in the runs directory so that hyalus clean can select test runs without "
+    "inspecting every run directory",
+    bool,
+    True,
+)
+
+IMPACT_ANALYSIS = HyalusSetting(
+    "impact_analysis",
+    "Record the Python modules and files each test depends on in an impact map in the runs directory so that "
+    "runsuite --changed-since can select only the tests affected by changes",
+    bool,
+    True,
+)
+
+RESULT_CACHE = HyalusSetting(
+    "result_cache",
+    "Skip running tests that passed before when neither the test directory, the paths in cache_dependencies, nor the "
+    "versions of the packages in cache_packages have changed when using the runsuite command",
+    bool,
+    False,
+)
+
+CACHE_DEPENDENCIES = HyalusSetting(
+    "cache_dependencies",
+    "Comma-delimited list of files/directories (e.g. code under test) whose contents test results depend on when "
+    "using the result cache. Note if given a relative path, it will be relative to where hyalus is run from",
+    list,
+    [],
+)
+
+CACHE_PACKAGES = HyalusSetting(
+    "cache_packages",
+    "Comma-delimited list of installed packages whose versions test results depend on when using the result cache",
+    list,
+    [],
+)
+
+CACHE_SIZE = HyalusSetting(
+    "cache_size",
+    "Maximum number of passing test results to keep in the result cache before the least recently used are evicted",
+    int,
+    10000,
+)
+
+JOBS = HyalusSetting(
+    "jobs",
+    "Maximum number of tests to run at once when using the runsuite command, 0 for the number of CPUs on the machine",
+    int,
+    0,
+)
+
+CPU_CAPACITY = HyalusSetting(
+    "cpu_capacity",
+    "Number of CPUs that the CPUs declared in tests' Resources tags are packed into when using the runsuite command, 0 "
+    "for the number of CPUs on the machine",
+    re.compile(r"^\d+(\.\d+)?$"),
+    0,
+)
+
+MEMORY_CAPACITY = HyalusSetting(
+    "memory_capacity",
+    "Memory in GiB that the memory declared in tests' Resources tags is packed into when using the runsuite command, 0 "
+    "for the physical memory of the machine",
+    re.compile(r"^\d+(\.\d+)?$"),
+    0,
+)
+
+TIMEOUT_MULTIPLIER = HyalusSetting(
+    "timeout_multiplier",
+    "Multiple of the upper end of the expected range of a test's runtime tag that it may run for before it is stopped "
+    "and marked as an error when using the runsuite command, 0 for no limit. Overridden by a test's Timeout tag",
+    re.compile(r"^\d+(\.\d+)?$"),
+    2,
+)
+
+MEMORY_LIMIT_MULTIPLIER = HyalusSetting(
+    "memory_limit_multiplier",
+    "Multiple of the memory in a test's Resources tag that each of its processes may allocate before allocations fail "
+    "and the test is marked as an error when using the runsuite and worker commands, 0 for no limit. Tests declaring "
+    "no memory are not limited",
+    re.compile(r"^\d+(\.\d+)?$"),
+    0,
+)
+
+INPUT_AFFINITY = HyalusSetting(
+    "input_affinity",
+    "Start tests whose input directories hold identical large files back to back, as for tests declaring the same "
+    "Dataset tag, when using the runsuite and coordinator commands. Input files are hashed the first time they are "
+    "seen",
+    bool,
+    False,
+)
+
+FORK_AFTER_SETUP = HyalusSetting(
+    "fork_after_setup",
+    "Call the setup functions declared by tests' SharedSetup tags once before starting test workers, and fork each "
+    "worker so that it inherits their results (e.g. a large model loaded into memory) copy-on-write, when using the "
+    "runsuite command",
+    bool,
+    False,
+)
+
+PRELOAD_MODULES = HyalusSetting(
+    "preload_modules",
+    "Comma-delimited list of modules (e.g. slow to import dependencies of tests' config files) to import once before "
+    "starting test workers, so that each test starts with them already imported, when using the runsuite and worker "
+    "commands",
+    list,
+    [],
+)
+
+EVENT_LOOP = HyalusSetting(
+    "event_loop",
+    "Run tests at once on an event loop in a single process rather than each in its own process when using the "
+    "runsuite command, up to jobs at a time. Suits suites of I/O-bound tests whose steps do not depend on the working "
+    "directory",
+    bool,
+    False,
+)
+
+THREADS = HyalusSetting(
+    "threads",
+    "Run tests at once on threads of a single process rather than each in its own process when using the runsuite "
+    "command, up to jobs at a time. Suits suites of tests that mostly wait on commands run by SubprocessSteps, whose "
+    "steps do not depend on the working directory",
+    bool,
+    False,
+)
+
+COORDINATOR_ADDRESS = HyalusSetting(
+    "coordinator_address",
+    "Address in the format host:port that the coordinator command listens for workers on and that the worker command "
+    "connects to",
+    re.compile(r"^[^\s:]*(:\d+)?$"),
+    "localhost:7770",
+)
+
 
 HYALUS_SETTINGS: dict[str, HyalusSetting] = {
     DEBUG.name: DEBUG,
@@ -161,6 +316,25 @@ HYALUS_SETTINGS: dict[str, HyalusSetting] = {
     OLDEST_TEST_RUN.name: OLDEST_TEST_RUN,
     NEWEST_TEST_RUN.name: NEWEST_TEST_RUN,
     FORCE_CLEAN.name: FORCE_CLEAN,
+    DISCOVERY_INDEX.name: DISCOVERY_INDEX,
+    SEARCH_DEPTH.name: SEARCH_DEPTH,
+    RUN_CATALOG.name: RUN_CATALOG,
+    IMPACT_ANALYSIS.name: IMPACT_ANALYSIS,
+    RESULT_CACHE.name: RESULT_CACHE,
+    CACHE_DEPENDENCIES.name: CACHE_DEPENDENCIES,
+    CACHE_PACKAGES.name: CACHE_PACKAGES,
+    CACHE_SIZE.name: CACHE_SIZE,
+    JOBS.name: JOBS,
+    CPU_CAPACITY.name: CPU_CAPACITY,
+    MEMORY_CAPACITY.name: MEMORY_CAPACITY,
+    TIMEOUT_MULTIPLIER.name: TIMEOUT_MULTIPLIER,
+    MEMORY_LIMIT_MULTIPLIER.name: MEMORY_LIMIT_MULTIPLIER,
+    INPUT_AFFINITY.name: INPUT_AFFINITY,
+    FORK_AFTER_SETUP.name: FORK_AFTER_SETUP,
+    PRELOAD_MODULES.name: PRELOAD_MODULES,
+    EVENT_LOOP.name: EVENT_LOOP,
+    THREADS.name: THREADS,
+    COORDINATOR_ADDRESS.name: COORDINATOR_ADDRESS,
 }
 
 
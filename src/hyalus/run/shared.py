@@ -0,0 +1,100 @@
+"""Setup functions whose results, e.g. large models loaded into memory, are shared by the tests declaring them"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import importlib
+import logging
+import threading
+import time
+import traceback
+from typing import Any, Callable, Iterable
+
+from hyalus.config.analyzer import load_config_tags
+from hyalus.config.common import InvalidHyalusConfig
+from hyalus.config.tags.fixtures import SharedSetup
+from hyalus.run.common import HyalusTest
+
+_logger = logging.getLogger("hyalus.run.shared")
+
+# Results of the setup functions called in this process, and why any that failed did. Worker processes forked after
+# the setup functions were called inherit both, so do not call them again.
+_results: dict[str, Any] = {}
+_errors: dict[str, str] = {}
+_lock = threading.Lock()
+
+
+class SetupFailed(Exception):
+    """To be raised when a test uses the result of a shared setup function that failed"""
+
+
+def setup_names(test: HyalusTest) -> list[str]:
+    """Get the shared setup functions a test uses from the SharedSetup tags in its config
+
+    :param test: The test
+    :return: Import paths of the setup functions in the order declared, none if the test's config cannot be loaded
+    """
+    try:
+        tags = load_config_tags(test.config)
+    except InvalidHyalusConfig:
+        return []
+
+    return list(dict.fromkeys(tag.setup for tag in tags if isinstance(tag, SharedSetup)))
+
+
+def load_setup(setup: str) -> Callable[[], Any]:
+    """Import a setup function
+
+    :param setup: Import path of the setup function, as "package.module:function"
+    :return: The setup function
+    :raises SetupFailed: If the function cannot be imported
+    """
+    module_name, _, function_name = setup.partition(":")
+
+    try:
+        return getattr(importlib.import_module(module_name), function_name)
+    except (ImportError, AttributeError, ValueError) as exc:
+        raise SetupFailed(f"Could not import setup function {setup}: {exc}") from exc
+
+
+def shared_state(setup: str) -> Any:
+    """Get the result of a shared setup function, for use within a test's Steps. The function is only called the first
+    time its result is asked for in a process, or by a process it was forked from, so the result must be treated as
+    read-only - tests run on an event loop share the very same object.
+
+    :param setup: Import path of the setup function, as "package.module:function"
+    :return: What the setup function returned
+    :raises SetupFailed: If the setup function cannot be imported or raised an Exception, now or when first called
+    """
+    with _lock:
+        if setup not in _results and setup not in _errors:
+            start = time.monotonic()
+
+            try:
+                _results[setup] = load_setup(setup)()
+            except SetupFailed as exc:
+                _errors[setup] = str(exc)
+            except Exception:  # pylint: disable=broad-except
+                exc = traceback.format_exc()
+                _errors[setup] = f"Setup function {setup} failed with the following traceback:\n{exc}"
+            else:
+                _logger.info(f"Ran setup function {setup} in {time.monotonic() - start:.1f}s")
+
+        if setup in _errors:
+            raise SetupFailed(_errors[setup])
+
+        return _results[setup]
+
+
+def run_setups(setups: Iterable[str]) -> None:
+    """Call setup functions ahead of the tests using them, e.g. before forking the workers that run the tests. Setup
+    functions that fail are not called again, the tests using them get the error from :py:func:`shared_state`.
+
+    :param setups: Import paths of the setup functions
+    """
+    for setup in setups:
+        try:
+            shared_state(setup)
+        except SetupFailed as exc:
+            _logger.warning(str(exc))
@@ -0,0 +1,358 @@
+"""Statistics of recent hyalus test runs, and detection of tests whose durations no longer match their RuntimeTags"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import logging
+from pathlib import Path
+import sqlite3
+from statistics import quantiles
+import time
+from typing import ContextManager, Mapping, NamedTuple, Sequence
+
+from hyalus.config.tags.runtime import RUNTIME_TAGS, RuntimeTag, runtime_tag_for
+from hyalus.run.common import HyalusTest, RunStatus
+from hyalus.utils import sqlite_utils
+
+RUNTIMES_FILE = ".hyalus_runtimes.sqlite"
+RUNTIMES_VERSION = 2
+
+#: Number of most recent completed runs of each test that statistics are taken over by default
+STATS_RUNS = 20
+
+#: Number of most recent completed runs of each test kept in the runtime history
+HISTORY_KEEP = 100
+
+_logger = logging.getLogger("hyalus.run.stats")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runtimes (
+    test_name TEXT NOT NULL,
+    test_path TEXT NOT NULL,
+    finished REAL NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL,
+    runtime_tag TEXT
+);
+CREATE INDEX IF NOT EXISTS runtimes_test_name ON runtimes(test_name, finished);
+CREATE INDEX IF NOT EXISTS runtimes_test_path ON runtimes(test_path, finished);
+"""
+
+
+class RuntimeEntry(NamedTuple):
+    """How a single completed test run ended and how long it took"""
+
+    status: RunStatus
+    duration: float | None
+    runtime_tag: str | None
+
+
+class RuntimeHistory:
+    """How the most recent completed runs of each test ended, how long they took, and the RuntimeTag the test had at the
+    time, stored as a SQLite database at the top level of the runs directory. This is the one record of past outcomes
+    and durations of tests: suites order tests, pick those that failed last time, and fit tests into a time budget from
+    it. Unlike the run catalog, the history is kept when run directories are cleaned up, so that passing runs removed
+    by cleanup_on_pass still count.
+
+    Tests that finish without running, e.g. passes taken from the result cache or tests whose worker was killed, are
+    recorded with no duration, so that they count towards how tests fared but not towards how long they take.
+    """
+
+    def __init__(self, runs_dir: str | Path) -> None:
+        """Ctor.
+
+        :param runs_dir: The runs directory to store the history in
+        """
+        self.runs_dir = Path(runs_dir).absolute()
+        self.runtimes_file = self.runs_dir / RUNTIMES_FILE
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """:return: Context manager for a connection to the history, creating it if need be"""
+        return sqlite_utils.connect(self.runtimes_file, _SCHEMA, RUNTIMES_VERSION)
+
+    def record(
+        self, test: str | Path, status: RunStatus, duration: float | None, runtime_tag: RuntimeTag | None
+    ) -> None:
+        """Record how a test run ended and how long it took, forgetting all but the most recent
+        :py:data:`HISTORY_KEEP` runs of the test. Failing to write the history is not an error.
+
+        :param test: Path to the test
+        :param status: The final status of the test run
+        :param duration: Wall time of the test run in seconds, None if the test finished without running
+        :param runtime_tag: The RuntimeTag of the test, None if it has none
+        """
+        self.record_runs([(test, status, duration, runtime_tag)])
+
+    def record_outcomes(self, outcomes: Mapping[HyalusTest, RunStatus]) -> None:
+        """Record how tests that finished without running ended, with no duration. Failing to write the history is not
+        an error.
+
+        :param outcomes: Mapping of test to its final status
+        """
+        if outcomes:
+            self.record_runs([(test, status, None, None) for test, status in outcomes.items()])
+
+    def record_runs(self, runs: Sequence[tuple[str | Path, RunStatus, float | None, RuntimeTag | None]]) -> None:
+        """Record how several test runs ended and how long they took at once, as for :py:meth:`record`. Failing to
+        write the history is not an error.
+
+        :param runs: Path to the test, final status, duration and RuntimeTag of each run
+        """
+        now = time.time()
+        rows = [
+            (
+                Path(test).name,
+                str(Path(test).absolute()),
+                now,
+                status.value,
+                duration,
+                runtime_tag.__class__.__name__ if runtime_tag is not None else None,
+            )
+            for test, status, duration, runtime_tag in runs
+        ]
+
+        try:
+            with self._connect() as connection:
+                connection.executemany("INSERT INTO runtimes VALUES (?, ?, ?, ?, ?, ?)", rows)
+                connection.executemany(
+                    "DELETE FROM runtimes WHERE test_name = ? AND rowid NOT IN "
+                    "(SELECT rowid FROM runtimes WHERE test_name = ? ORDER BY finished DESC, rowid DESC LIMIT ?)",
+                    [(name, name, HISTORY_KEEP) for name in dict.fromkeys(row[0] for row in rows)],
+                )
+        except sqlite3.Error as exc:
+            _logger.debug(f"Could not write runtime history {self.runtimes_file}: {exc}")
+
+    def recent(self, test_names: Sequence[str] = None, last: int = STATS_RUNS) -> dict[str, list[RuntimeEntry]]:
+        """Get the most recent completed runs of tests
+
+        :param test_names: Names of the tests, default every test with recorded runs
+        :param last: How many of the most recent runs of each test to get
+        :return: Mapping of test name to its runs, most recent first
+        :raises sqlite3.Error: If the history cannot be read
+        """
+        query = "SELECT test_name, status, duration, runtime_tag FROM runtimes"
+        params: list = []
+
+        if test_names:
+            query += f" WHERE test_name IN ({', '.join('?' * len(test_names))})"
+            params.extend(test_names)
+
+        runs: dict[str, list[RuntimeEntry]] = {}
+
+        with self._connect() as connection:
+            rows = connection.execute(f"{query} ORDER BY finished DESC, rowid DESC", params).fetchall()
+
+        for test_name, status, duration, tag_name in rows:
+            if len(test_runs := runs.setdefault(test_name, [])) < last:
+                test_runs.append(RuntimeEntry(RunStatus(status), duration, tag_name))
+
+        return runs
+
+    def mean_durations(self, test_names: Sequence[str], last: int) -> dict[str, float]:
+        """Average the durations of the most recent passing runs of the given tests. Runs that did not pass are left
+        out, as failing runs can stop at any point and runs that errored or timed out say little about how long the
+        test takes.
+
+        :param test_names: Names of the tests
+        :param last: How many of the most recent passing runs of each test to average
+        :return: Mapping of test name to its average duration in seconds, for tests with recorded passing runs
+        :raises sqlite3.Error: If the history cannot be read
+        """
+        if not test_names:
+            return {}
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT test_name, AVG(duration) FROM ("
+                "SELECT test_name, duration, "
+                "ROW_NUMBER() OVER (PARTITION BY test_name ORDER BY finished DESC, rowid DESC) AS recency "
+                "FROM runtimes WHERE status = ? AND duration IS NOT NULL "
+                f"AND test_name IN ({', '.join('?' * len(test_names))})"
+                ") WHERE recency <= ? GROUP BY test_name",
+                [RunStatus.SUCCESS.value, *test_names, last],
+            ).fetchall()
+
+        return dict(rows)
+
+    def last_finished(self, test_names: Sequence[str]) -> dict[str, float]:
+        """Get when each of the given tests last finished running
+
+        :param test_names: Names of the tests
+        :return: Mapping of test name to the time its most recent completed run finished, as seconds since the epoch,
+            for tests with recorded runs
+        :raises sqlite3.Error: If the history cannot be read
+        """
+        if not test_names:
+            return {}
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT test_name, MAX(finished) FROM runtimes "
+                f"WHERE test_name IN ({', '.join('?' * len(test_names))}) GROUP BY test_name",
+                list(test_names),
+            ).fetchall()
+
+        return dict(rows)
+
+    def failed(self, tests: Sequence[HyalusTest] = None) -> list[HyalusTest]:
+        """Find tests that did not pass the last time they finished, whether they ran or not. Failing to read the
+        history is treated as no tests having failed.
+
+        :param tests: The tests to look for, default every test that last failed and still exists
+        :return: The tests that failed last time, in the given order if tests were given
+        """
+        try:
+            with self._connect() as connection:
+                rows = connection.execute(
+                    "SELECT test_path, status FROM runtimes AS runs WHERE rowid = ("
+                    "SELECT rowid FROM runtimes WHERE test_path = runs.test_path "
+                    "ORDER BY finished DESC, rowid DESC LIMIT 1)"
+                ).fetchall()
+        except sqlite3.Error as exc:
+            _logger.debug(f"Could not read runtime history {self.runtimes_file}: {exc}")
+            return []
+
+        failed = {test_path for test_path, status in rows if status != RunStatus.SUCCESS.value}
+
+        if tests is None:
+            return [test for test in map(HyalusTest, sorted(failed)) if test.is_dir()]
+
+        return [test for test in tests if str(Path(test).absolute()) in failed]
+
+
+def percentile(values: Sequence[float], pct: int) -> float:
+    """Get a percentile of some values, interpolating between the closest values
+
+    :param values: The values, at least one
+    :param pct: The percentile, from 1 to 99
+    :return: The percentile
+    """
+    if len(values) == 1:
+        return values[0]
+
+    return quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def _runtime_tag(tag_name: str | None) -> RuntimeTag | None:
+    """:return: The built-in RuntimeTag with the given name, None if there is none"""
+    for tag_type in RUNTIME_TAGS:
+        if tag_type.__name__ == tag_name:
+            return tag_type()
+
+    return None
+
+
+class RunStats(NamedTuple):
+    """Statistics of the most recent completed runs of a test"""
+
+    test_name: str
+    runs: int
+    passed: int
+    p50: float | None
+    p95: float | None
+    runtime_tag: RuntimeTag | None
+
+    @classmethod
+    def from_runs(cls, test_name: str, runs: Sequence[RuntimeEntry]) -> "RunStats":
+        """Work out the statistics of a test from its runs. The test's RuntimeTag is that of its most recent run, and
+        durations are those of its passing runs, as failing runs can stop at any point. Runs recorded without a
+        duration, i.e. tests that finished without running, are left out.
+
+        :param test_name: Name of the test
+        :param runs: The runs, most recent first
+        :return: The statistics
+        """
+        runs = [run for run in runs if run.duration is not None]
+        durations = [run.duration for run in runs if run.status is RunStatus.SUCCESS]
+
+        return cls(
+            test_name=test_name,
+            runs=len(runs),
+            passed=len(durations),
+            p50=percentile(durations, 50) if durations else None,
+            p95=percentile(durations, 95) if durations else None,
+            runtime_tag=_runtime_tag(runs[0].runtime_tag) if runs else None,
+        )
+
+    @property
+    def suggested_tag(self) -> RuntimeTag | None:
+        """:return: The RuntimeTag whose expected range includes the p95 duration of passing runs, None if no runs
+        passed
+        """
+        return runtime_tag_for(self.p95 / 60) if self.p95 is not None else None
+
+    @property
+    def drifted(self) -> bool:
+        """:return: True if the p95 duration of passing runs is outside the expected range of the test's RuntimeTag,
+        including if the test has none, else False. Tests with no passing runs have not drifted.
+        """
+        if self.p95 is None:
+            return False
+
+        return self.runtime_tag is None or not self.runtime_tag.within(self.p95 / 60)
+
+
+def _minutes(seconds: float | None) -> str:
+    """:return: Seconds formatted as minutes for display"""
+    return "-" if seconds is None else f"{seconds / 60:.1f}m"
+
+
+def _tag_name(tag: RuntimeTag | None) -> str:
+    """:return: Name of a RuntimeTag for display"""
+    return "-" if tag is None else tag.__class__.__name__
+
+
+# pylint: disable=too-few-public-methods
+class HyalusStatsRunner:
+    """Reports statistics of the most recent completed runs of tests from the runtime history of a runs directory, or
+    with drift set, only the tests whose passing runs no longer take as long as their RuntimeTag says, along with the
+    tag they should have
+    """
+
+    def __init__(
+        self, runs_dir: str | Path, test_names: Sequence[str] = None, last: int = STATS_RUNS, drift: bool = False
+    ) -> None:
+        """Ctor.
+
+        :param runs_dir: The runs directory to take statistics of
+        :param test_names: Names of the tests to report on. If none given, all tests with runs are reported on.
+        :param last: How many of the most recent completed runs of each test to take statistics over
+        :param drift: Only report on tests whose RuntimeTag no longer matches how long they take
+        """
+        self.runs_dir = Path(runs_dir)
+        self.test_names = test_names if test_names else []
+        self.last = last
+        self.drift = drift
+
+    def stats(self) -> list[RunStats]:
+        """:return: Statistics of each matching test, by test name"""
+        runs = RuntimeHistory(self.runs_dir).recent(self.test_names, self.last)
+        stats = [RunStats.from_runs(test_name, test_runs) for test_name, test_runs in sorted(runs.items())]
+
+        return [test for test in stats if test.drifted] if self.drift else stats
+
+    def run(self) -> None:
+        """Print the statistics of the matching tests as a table"""
+        if not (stats := self.stats()):
+            print("No drifted tests found" if self.drift else f"No completed test runs found in {self.runs_dir}")
+            return
+
+        header = ["TEST", "RUNS", "PASSED", "P50", "P95", "TAG"] + (["SUGGESTED"] if self.drift else [])
+        rows = [
+            [
+                test.test_name,
+                str(test.runs),
+                str(test.passed),
+                _minutes(test.p50),
+                _minutes(test.p95),
+                _tag_name(test.runtime_tag),
+            ]
+            + ([_tag_name(test.suggested_tag)] if self.drift else [])
+            for test in stats
+        ]
+
+        widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+
+        for row in [header, *rows]:
+            print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
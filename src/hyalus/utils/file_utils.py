@@ -5,8 +5,11 @@ __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
 from glob import glob
+import hashlib
 from pathlib import Path
 
+HASH_CHUNK_SIZE = 1024 * 1024
+
 
 class InvalidWildcard(Exception):
     """Exception used to represent a wildcard that could not be used to find a single file"""
@@ -29,3 +32,18 @@ def glob_file(wildcard: str | Path) -> Path:
         raise InvalidWildcard(f"Wildcard {wildcard} expanded into more than one result:\n\n{', '.join(result)}")
 
     return Path(result[0])
+
+
+def file_sha256(path: str | Path) -> str:
+    """Compute the SHA-256 hex digest of a file's contents, reading it in chunks to bound memory usage
+
+    :param path: The path to the file to hash
+    :return: The hex digest of the file's contents
+    """
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as fh:
+        while chunk := fh.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+
+    return digest.hexdigest()
@@ -9,7 +9,7 @@ import logging
 import os.path
 from pathlib import Path
 import sys
-from typing import TextIO
+from typing import Callable, TextIO
 
 
 class HyalusLogRecord(logging.LogRecord):
@@ -75,6 +75,48 @@ class HyalusStreamHandler(logging.StreamHandler):
         self.set_name(stream.name)
 
 
+class RoutingHandler(logging.Handler):
+    """Handler passing each record on to the handlers of whichever logger a function picks for it, e.g. the logger of
+    the work being done in the current thread or asyncio task. Added to the root logger, it routes records from every
+    logger without having to replace the loggers themselves.
+    """
+
+    def __init__(self, route: Callable[[logging.LogRecord], logging.Logger | None]) -> None:
+        """Ctor.
+
+        :param route: Function picking the logger for a record, returning None to not pass the record on
+        """
+        super().__init__()
+        self.route = route
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """Pass the record on to the handlers of the logger picked for it. Unlike most handlers, no lock is taken, so
+        that records logged in different threads are routed at the same time. Errors while routing are reported through
+        :py:meth:`handleError` rather than raised to the code logging the message.
+
+        :param record: The record
+        :return: True if the record was passed on, else False
+        """
+        if not self.filter(record):
+            return False
+
+        try:
+            if (logger := self.route(record)) is None:
+                return False
+
+            for handler in logger.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+            return False
+
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
 def configure_logging(log_stdout: bool = False, debug: bool = False) -> None:
     """Configure logging for hyalus - should only be called once per interpreter session. Will short circuit otherwise.
 
@@ -87,7 +129,8 @@ def configure_logging(log_stdout: bool = False, debug: bool = False) -> None:
 
     root_logger = logging.getLogger()
 
-    if root_logger.hasHandlers():
+    # Handlers routing records elsewhere do not count, as they may be added before logging is configured
+    if any(not isinstance(handler, RoutingHandler) for handler in root_logger.handlers):
         return
 
     root_logger.setLevel(logging.DEBUG if debug else logging.INFO)
@@ -96,6 +139,20 @@ def configure_logging(log_stdout: bool = False, debug: bool = False) -> None:
         root_logger.addHandler(HyalusStreamHandler(sys.stdout))
 
 
+def unregistered_logger(name: str) -> logging.Logger:
+    """Create a logger that is not registered under its name, unlike those from logging.getLogger, so that work running
+    at once (e.g. the same Step of tests run at once on threads) can log under the same name to handlers of its own.
+    Messages still propagate to the registered logger of the same name, and from there on up to the root logger.
+
+    :param name: Name of the logger
+    :return: The logger
+    """
+    logger = logging.Logger(name)
+    logger.parent = logging.getLogger(name)
+
+    return logger
+
+
 def find_handler(name: str, logger: logging.Logger = None) -> logging.Handler | None:
     """Finds the first instance of a Handler with the given name. Returns None if one cannot be found.
 
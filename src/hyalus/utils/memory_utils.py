@@ -0,0 +1,141 @@
+"""Utilities for measuring and limiting the memory used by hyalus test runs"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import os
+from pathlib import Path
+import resource
+import sys
+import threading
+
+#: Seconds between samples of the resident memory of a process and its child processes
+SAMPLE_INTERVAL = 0.1
+
+_PROC = Path("/proc")
+
+# ru_maxrss is in bytes on macOS and in KiB elsewhere
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def _maxrss(who: int) -> int:
+    """:return: Peak resident memory in bytes of this process (RUSAGE_SELF), or of the largest child process it has
+    waited on (RUSAGE_CHILDREN)
+    """
+    return resource.getrusage(who).ru_maxrss * _MAXRSS_UNIT
+
+
+def _rss(pid: int) -> int:
+    """:return: Current resident memory in bytes of a process, 0 if it cannot be read (e.g. it already exited)"""
+    try:
+        return int((_PROC / str(pid) / "statm").read_text(encoding="utf-8").split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _children(pid: int) -> list[int]:
+    """:return: IDs of the child processes of a process, none if they cannot be read"""
+    children = []
+
+    try:
+        for task in (_PROC / str(pid) / "task").iterdir():
+            children.extend(int(child) for child in (task / "children").read_text(encoding="utf-8").split())
+    except (OSError, ValueError):
+        pass
+
+    return children
+
+
+def tree_rss(pid: int = None) -> int:
+    """Get the current resident memory of a process and all of its descendants, from /proc
+
+    :param pid: ID of the process, default this process
+    :return: The resident memory in bytes, 0 if /proc is not available
+    """
+    pending = [os.getpid() if pid is None else pid]
+    seen = set()
+    total = 0
+
+    while pending:
+        if (pid := pending.pop()) in seen:
+            continue
+
+        seen.add(pid)
+        total += _rss(pid)
+        pending.extend(_children(pid))
+
+    return total
+
+
+class PeakMemory:
+    """Context manager measuring the peak resident memory (RSS) of this process and its child processes while it is
+    active. The memory of the process tree is sampled from /proc every :py:data:`SAMPLE_INTERVAL` seconds where
+    available. Peaks between samples are caught through getrusage whenever they set a new high for this process, or for
+    a child process that has been waited on (e.g. a command run by a SubprocessStep).
+
+    Everything running in the process at the same time (e.g. concurrently running Steps) counts towards the peak.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        """Ctor.
+
+        :param interval: Seconds between samples of the process tree
+        """
+        self.interval = interval
+
+        self._sampled = 0
+        self._self_start = 0
+        self._children_start = 0
+        self._stop = threading.Event()
+        self._sampler: threading.Thread = None
+
+    def __enter__(self) -> "PeakMemory":
+        self._self_start = _maxrss(resource.RUSAGE_SELF)
+        self._children_start = _maxrss(resource.RUSAGE_CHILDREN)
+        self._sampled = tree_rss()
+
+        if _PROC.is_dir():
+            self._sampler = threading.Thread(target=self._sample, name="hyalus-memory", daemon=True)
+            self._sampler.start()
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._stop.set()
+
+        if self._sampler is not None:
+            self._sampler.join()
+
+        self._sampled = max(self._sampled, tree_rss())
+
+    def _sample(self) -> None:
+        """Sample the memory of the process tree until stopped"""
+        while not self._stop.wait(self.interval):
+            self._sampled = max(self._sampled, tree_rss())
+
+    @property
+    def peak(self) -> int:
+        """:return: The peak resident memory in bytes so far"""
+        peak = self._sampled
+
+        # A new high-water mark must have been reached while measuring, so is the exact peak of that process
+        if (self_peak := _maxrss(resource.RUSAGE_SELF)) > self._self_start:
+            peak = max(peak, self_peak)
+
+        if (children_peak := _maxrss(resource.RUSAGE_CHILDREN)) > self._children_start:
+            peak = max(peak, children_peak)
+
+        return peak
+
+
+def limit_memory(limit: int) -> None:
+    """Limit how much memory this process, and any processes it starts, may allocate from here on. Allocations beyond
+    the limit fail (raising MemoryError in Python) rather than running the machine out of memory. The limit is on the
+    data segment (RLIMIT_DATA) rather than on resident memory, which Linux does not enforce.
+
+    :param limit: The limit in bytes, for each process separately
+    """
+    _, hard = resource.getrlimit(resource.RLIMIT_DATA)
+
+    resource.setrlimit(resource.RLIMIT_DATA, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
@@ -0,0 +1,43 @@
+"""Utilities for the SQLite databases hyalus keeps alongside tests and test runs"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from contextlib import contextmanager
+from pathlib import Path
+import sqlite3
+from typing import Iterator
+
+#: Seconds to wait on other processes (e.g. parallel suite workers) holding a database lock
+DEFAULT_TIMEOUT = 60
+
+
+@contextmanager
+def connect(
+    db_file: str | Path, schema: str, version: int, timeout: float = DEFAULT_TIMEOUT
+) -> Iterator[sqlite3.Connection]:
+    """Open a connection to a database for the duration of a single transaction, creating the database if need be. A
+    database written with a different schema version is discarded and recreated.
+
+    :param db_file: Path to the database file
+    :param schema: Script creating the database's tables and indexes if they do not already exist
+    :param version: Version of the schema, stored as the database's ``user_version``
+    :param timeout: Seconds to wait for other connections to release their locks
+    :return: The connection
+    """
+    connection = sqlite3.connect(db_file, timeout=timeout)
+
+    try:
+        connection.execute("PRAGMA foreign_keys = ON")
+
+        if connection.execute("PRAGMA user_version").fetchone()[0] not in (0, version):
+            tables = [name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            connection.executescript(''.join(f'DROP TABLE IF EXISTS "{table}";' for table in tables))
+
+        connection.executescript(f"{schema}\nPRAGMA user_version = {int(version)};")
+
+        with connection:
+            yield connection
+    finally:
+        connection.close()
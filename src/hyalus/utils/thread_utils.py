@@ -0,0 +1,113 @@
+"""Utilities for running hyalus tests and Steps on threads"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import asyncio
+from concurrent.futures import Executor, Future
+import contextvars
+from functools import partial
+import itertools
+import threading
+from typing import Any, Callable
+
+
+class DaemonThreadExecutor(Executor):
+    """Executor running each call on a daemon thread of its own. Unlike the threads of a ThreadPoolExecutor, which the
+    interpreter waits on when it exits, a call that never returns (e.g. a Step stuck past its test's timeout) does not
+    keep the process alive. Callers limit how many calls run at once themselves.
+    """
+
+    def __init__(self, thread_name_prefix: str = "") -> None:
+        """Ctor.
+
+        :param thread_name_prefix: Prefix for the names of the threads, for debugging
+        """
+        self._thread_name_prefix = thread_name_prefix or f"DaemonThreadExecutor-{id(self)}"
+        self._counter = itertools.count()
+        self._threads: set[threading.Thread] = set()
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        """Start running a call on a new daemon thread
+
+        :param fn: The callable to run
+        :param args: Positional arguments to call it with
+        :param kwargs: Keyword arguments to call it with
+        :return: Future for the result of the call
+        :raises RuntimeError: If the executor has been shut down
+        """
+        future: Future = Future()
+
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+
+            thread = threading.Thread(
+                target=self._run,
+                args=(future, fn, args, kwargs),
+                name=f"{self._thread_name_prefix}_{next(self._counter)}",
+                daemon=True,
+            )
+            self._threads.add(thread)
+
+        thread.start()
+
+        return future
+
+    def _run(self, future: Future, fn: Callable, args: tuple, kwargs: dict[str, Any]) -> None:
+        """Run a call on the current thread, setting the result of its future
+
+        :param future: Future for the result of the call
+        :param fn: The callable to run
+        :param args: Positional arguments to call it with
+        :param kwargs: Keyword arguments to call it with
+        """
+        try:
+            if not future.set_running_or_notify_cancel():
+                return
+
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as exc:  # pylint: disable=broad-except
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+        finally:
+            with self._lock:
+                self._threads.discard(threading.current_thread())
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:  # pylint: disable=unused-argument
+        """Stop accepting new calls. Calls already started cannot be cancelled, so cancel_futures has no effect.
+
+        :param wait: Wait for the calls already started to return
+        :param cancel_futures: Unused, as calls start running as soon as they are submitted
+        """
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+# Runs the calls of to_daemon_thread. Being made of daemon threads, it never needs to be shut down.
+_daemon_executor = DaemonThreadExecutor(thread_name_prefix="hyalus-daemon")
+
+
+async def to_daemon_thread(func: Callable, /, *args, **kwargs) -> Any:
+    """Run a function on a daemon thread of its own and wait for it without blocking the running event loop, as for
+    asyncio.to_thread. Unlike the loop's default executor, which asyncio.run waits on once the loop is done, a call that
+    never returns does not keep asyncio.run or the process from finishing. Cancelling the wait does not stop the call.
+
+    :param func: The function to run
+    :param args: Positional arguments to call it with
+    :param kwargs: Keyword arguments to call it with
+    :return: The result of the call
+    """
+    call = partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+    return await asyncio.get_running_loop().run_in_executor(_daemon_executor, call)
@@ -0,0 +1,24 @@
+"""Example valid config file referring to tags through module aliases and attribute access"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__created_on__ = "2023-03-01"
+
+import hyalus.config.tags as hyalus_tags
+from hyalus.config.steps.run import RunFunctionStep
+from hyalus.config.tags import types as test_types
+
+TEST_DESCRIPTION = "Runs a function and calls it a day"
+INPUT_DATA = "N/A, no input data"
+
+
+def custom_func(value):
+    if not value:
+        raise Exception("value was false or empty")
+
+
+STEPS = [
+    RunFunctionStep(custom_func, True),
+]
+
+TAGS = [hyalus_tags.Medium(info="Takes a bit"), test_types.RegressionTest("Until <issue> is fixed")]
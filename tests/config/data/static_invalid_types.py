@@ -0,0 +1,21 @@
+"""Example config file with non-literal fields whose types are still known to be invalid without executing it"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__created_on__ = "2023-03-01"
+
+from hyalus.config.steps.run import RunFunctionStep
+from hyalus.config.tags import Short
+
+TEST_DESCRIPTION = f"Runs a function {'and calls it a day'}"
+INPUT_DATA = "N/A, no input data"
+
+
+def custom_func(value):
+    if not value:
+        raise Exception("value was false or empty")
+
+
+STEPS = {RunFunctionStep(custom_func, True)}
+
+TAGS = [Short()]
@@ -60,6 +60,13 @@ class TestAssertionStep:
         assert output[0] == {}
         assert output[1].equals(pd.DataFrame([["key1", "4", 1]], columns=["col1", "col2", "col3"]))
 
+    def test_run_relative_path(self, run_dir):
+        """Tests that relative paths are read from the run directory rather than the working directory"""
+        shutil.copy2(DATA_PATH / "verify.json", run_dir / "output")
+        step = assertions.AssertEQ(("output/verify.json", ["values", 0, "1"]), 1)
+
+        assert step.run(3, run_dir) == base.StepOutput(str(step), base.StepStatus.PASS)
+
     def test_run_workflow_pass(self, json_file, run_dir):
         """Tests that a passing function output is handled accordingly"""
         step = assertions.AssertEQ((json_file, ["values", 0, "1"]), (json_file, ["values", 1, "2"]))
@@ -5,9 +5,15 @@ __author__ = "David McConnell"
 __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
+import asyncio
+import logging
+from pathlib import Path
 from typing import Any
 
 from hyalus.config.steps import base
+from hyalus.utils import logging_utils
+
+LOGGING_GET_LOGGER = logging.getLogger
 
 
 class MyStep(base.StepBase):
@@ -37,3 +43,57 @@ def test_load(run_dir):
     assert step.hyalus_dir == run_dir / "hyalus"
     assert step.hyalus_log == step.hyalus_dir / "hyalus.log"
     assert step.step_log == step.hyalus_dir / "5_MyStep_log.txt"
+
+
+def test_run_async(run_dir):
+    """Ensure a Step with only a synchronous workflow can be run on an event loop"""
+    step = MyStep()
+    result = asyncio.run(step.run_async(1, run_dir))
+
+    assert result.status is base.StepStatus.PASS
+    assert step.step_log.exists()
+
+
+def test_run_peak_memory(run_dir):
+    """Ensure running a Step records its peak memory"""
+    step = MyStep()
+    step.run(1, run_dir)
+
+    assert step.peak_memory > 0
+
+
+class LoggingStep(MyStep):
+    """Logs a message through a logger of its own choosing while it runs"""
+
+    def _run_workflow(self, pre_process_output: Any = None) -> base.StepOutput:
+        assert logging.getLogger is LOGGING_GET_LOGGER
+        logging.getLogger("my_app.pipeline").warning("Message from the application")
+
+        return super()._run_workflow(pre_process_output)
+
+
+def test_run_log_routing(run_dir):
+    """Ensure messages logged by other loggers while a Step runs reach its log, without logging being patched"""
+    factory = logging.getLogRecordFactory()
+    logging.setLogRecordFactory(logging_utils.HyalusLogRecord)
+
+    try:
+        step = LoggingStep()
+        step.run(1, run_dir)
+    finally:
+        logging.setLogRecordFactory(factory)
+
+    assert "Message from the application" in step.step_log.read_text(encoding="utf-8")
+    assert base._step_router not in logging.getLogger().handlers
+
+
+def test_resolve_path(run_dir):
+    """Ensure relative paths are resolved against the run directory once the Step is loaded"""
+    step = MyStep()
+
+    assert step.resolve_path("output/a.json") == Path("output/a.json")
+
+    step._load(1, run_dir)
+
+    assert step.resolve_path("output/a.json") == run_dir / "output" / "a.json"
+    assert step.resolve_path("/abs/a.json") == Path("/abs/a.json")
@@ -5,6 +5,9 @@ __author__ = "David McConnell"
 __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
+import asyncio
+import time
+
 from hyalus.config.common import HYALUS_PATH
 from hyalus.config.steps import base, run
 
@@ -28,6 +31,11 @@ class TestSubprocessStep:
         assert result.output.endswith("No such file or directory\n")
         assert result.status is base.StepStatus.ERROR
 
+    def test_run_cwd(self, run_dir):
+        """Test that the command is run in the run directory by default, and in a cwd relative to it if given"""
+        assert run.SubprocessStep(["pwd"]).run(1, run_dir).output == f"{run_dir}\n"
+        assert run.SubprocessStep(["pwd"], cwd="output").run(2, run_dir).output == f"{run_dir / 'output'}\n"
+
     def test_str(self, run_dir):
         """Test __str__ method"""
         step = run.SubprocessStep(["ls", str(run_dir)], timeout=1.0)
@@ -38,6 +46,54 @@ class TestSubprocessStep:
         assert str(step) == f"SubprocessStep({cmd_str}, {kwarg_str})"
 
 
+class TestAsyncSubprocessStep:
+    """Unit tests for the AsyncSubprocessStep class"""
+
+    def test_run_pass(self, run_dir):
+        """Test running a command that should be successful, in the run directory by default"""
+        step = run.AsyncSubprocessStep(["ls"])
+        result = step.run(5, run_dir)
+
+        assert result.output == "hyalus\noutput\ntmp\n"
+        assert result.status is base.StepStatus.PASS
+
+    def test_run_fail(self, run_dir):
+        """Test running a command that should fail"""
+        step = run.AsyncSubprocessStep(["ls", "not_a_dir"])
+        result = step.run(5, run_dir)
+
+        assert result.output.endswith("No such file or directory\n")
+        assert result.status is base.StepStatus.ERROR
+
+    def test_run_async(self, run_dir):
+        """Test running commands concurrently on an event loop"""
+
+        async def run_all():
+            steps = [run.AsyncSubprocessStep(["sleep", "1"]) for _ in range(5)]
+            return await asyncio.gather(*(step.run_async(number, run_dir) for number, step in enumerate(steps, 1)))
+
+        start = time.monotonic()
+        results = asyncio.run(run_all())
+
+        assert time.monotonic() - start < 4
+        assert all(result.status is base.StepStatus.PASS for result in results)
+
+    def test_cancel(self, run_dir):
+        """Test that the command is killed when the step is cancelled"""
+        step = run.AsyncSubprocessStep(["sleep", "60"])
+
+        async def run_and_cancel():
+            task = asyncio.create_task(step.run_async(1, run_dir))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        start = time.monotonic()
+        asyncio.run(run_and_cancel())
+
+        assert time.monotonic() - start < 10
+
+
 def func_to_run(arg1, arg2, kwarg1=None, kwarg2=None, recurse_flip_flopped=False):
     """For testing functions with both positional and keyword args"""
     if arg1 and arg2 and kwarg1 and kwarg2:
@@ -0,0 +1,169 @@
+"""Tests for the hyalus.config.analyzer module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from pathlib import Path
+
+import pytest
+
+from hyalus.config import analyzer, common, loader
+from hyalus.config.tags import Medium, RegressionTest, Short
+
+DATA_PATH = Path(__file__).parent / "data"
+
+
+def _changed_config(change: str) -> str:
+    """:return: The contents of the pass.py config, with Medium imported and the given statement appended"""
+    config = (DATA_PATH / "pass.py").read_text(encoding="utf-8")
+
+    return config.replace("import Short", "import Medium, Short") + f"\n{change}\n"
+
+
+@pytest.fixture(name="no_exec")
+def fixture_no_exec(monkeypatch):
+    """Make any attempt to execute a config fail the test"""
+
+    def fail_load(*_):
+        raise AssertionError("Config should not have been executed")
+
+    monkeypatch.setattr(loader.ConfigLoader, "load_module", fail_load)
+
+
+class TestStaticConfigLoader:
+    """Tests for the StaticConfigLoader class"""
+
+    def test_pass(self, no_exec):  # pylint: disable=unused-argument
+        """Test that a valid config's tags are resolved without executing it"""
+        assert analyzer.StaticConfigLoader(DATA_PATH / "pass.py").run().TAGS == [Short()]
+
+    def test_aliased_tags(self, no_exec):  # pylint: disable=unused-argument
+        """Test resolution of tags referred to through module aliases and attribute access, including arguments"""
+        tags = analyzer.StaticConfigLoader(DATA_PATH / "aliased_tags.py").run().TAGS
+
+        assert tags == [Medium(), RegressionTest("")]
+        assert tags[1].info == "Until <issue> is fixed"
+
+    def test_invalid_path(self):
+        """Test handling of a config path that does not exist"""
+        with pytest.raises(common.InvalidHyalusConfig) as exc:
+            analyzer.StaticConfigLoader(DATA_PATH / "not_a_file.py").run()
+
+        assert exc.value.failure is common.ConfigStatus.NOT_FOUND
+
+    def test_invalid_syntax(self):
+        """Test handling of a config that is not valid python"""
+        with pytest.raises(common.InvalidHyalusConfig) as exc:
+            analyzer.StaticConfigLoader(DATA_PATH / "invalid_syntax.py").run()
+
+        assert exc.value.failure is common.ConfigStatus.COULD_NOT_BE_LOADED
+
+    def test_missing_fields(self):
+        """Test that missing fields are reported the same way as when executing the config"""
+        with pytest.raises(common.InvalidHyalusConfig) as exc:
+            analyzer.StaticConfigLoader(DATA_PATH / "missing_fields.py").run()
+
+        expected = (
+            common.ConfigStatus.MISSING_FIELDS.value
+            + f"\n\nMissing: {', '.join(sorted([loader.DESCRIPTION.name, loader.INPUT_DATA.name]))}"
+        )
+
+        assert str(exc.value) == expected
+
+    def test_invalid_types_without_literals(self):
+        """Test that a field whose container type is wrong is caught even though its contents are not literals"""
+        with pytest.raises(common.InvalidHyalusConfig) as exc:
+            analyzer.StaticConfigLoader(DATA_PATH / "static_invalid_types.py").run()
+
+        expected = f"{common.ConfigStatus.INVALID_FIELDS.value}\n\ntype({loader.STEPS.name}) != {loader.STEPS.type}"
+
+        assert str(exc.value) == expected
+
+    @pytest.mark.parametrize("config", ["dynamic_tags.py", "missing_tags.py", "invalid_types.py"])
+    def test_dynamic(self, config):
+        """Test that configs whose tags cannot be resolved statically are reported as dynamic"""
+        with pytest.raises(analyzer.DynamicConfig):
+            analyzer.StaticConfigLoader(DATA_PATH / config).run()
+
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            "TAGS.append(Medium())",
+            "TAGS.extend([Medium()])",
+            "TAGS[0] = Medium()",
+            "TAGS += [Medium()]",
+            "del TAGS[0]",
+            "del TAGS",
+            "STEPS.clear()",
+            "def add_tag():\n    TAGS.append(Medium())",
+        ],
+    )
+    def test_changed_after_assignment(self, tmp_path, change):
+        """Test that configs changing a required field after assigning it are reported as dynamic"""
+        config = tmp_path / "config.py"
+        config.write_text(_changed_config(change), encoding="utf-8")
+
+        with pytest.raises(analyzer.DynamicConfig):
+            analyzer.StaticConfigLoader(config).run()
+
+
+class TestLoadConfigTags:
+    """Tests for the load_config_tags function"""
+
+    def test_static(self, no_exec):  # pylint: disable=unused-argument
+        """Test that tags are loaded statically when possible"""
+        assert analyzer.load_config_tags(DATA_PATH / "pass.py") == [Short()]
+
+    def test_fallback(self):
+        """Test that the config is executed when tags are built dynamically"""
+        assert analyzer.load_config_tags(DATA_PATH / "dynamic_tags.py") == [Short()]
+
+    def test_fallback_changed(self, tmp_path):
+        """Test that the config is executed when its tags are changed after being assigned"""
+        config = tmp_path / "config.py"
+        config.write_text(_changed_config("TAGS.append(Medium())"), encoding="utf-8")
+
+        assert analyzer.load_config_tags(config) == [Short(), Medium()]
+
+    def test_fallback_invalid(self):
+        """Test that invalid configs that must be executed are still reported as invalid"""
+        with pytest.raises(common.InvalidHyalusConfig) as exc:
+            analyzer.load_config_tags(DATA_PATH / "missing_tags.py")
+
+        assert exc.value.failure is common.ConfigStatus.INVALID_FIELDS
+
+
+class TestCachedConfigTags:
+    """Tests for the cached_config_tags function"""
+
+    def test_cached(self, tmp_path):
+        """Test that each config is only loaded once while in the context, and loaded again afterwards"""
+        config = tmp_path / "config.py"
+        config.write_text(_changed_config(""), encoding="utf-8")
+
+        with analyzer.cached_config_tags():
+            assert analyzer.load_config_tags(config) == [Short()]
+
+            config.write_text(_changed_config("TAGS = [Medium()]"), encoding="utf-8")
+
+            with analyzer.cached_config_tags():
+                assert analyzer.load_config_tags(config) == [Short()]
+
+            assert analyzer.load_config_tags(config) == [Short()]
+
+        assert analyzer.load_config_tags(config) == [Medium()]
+
+    def test_cached_invalid(self, monkeypatch):
+        """Test that a config found to be invalid is reported as invalid each time without being loaded again"""
+        with analyzer.cached_config_tags():
+            with pytest.raises(common.InvalidHyalusConfig):
+                analyzer.load_config_tags(DATA_PATH / "missing_tags.py")
+
+            monkeypatch.setattr(analyzer, "_load_config_tags", lambda _: pytest.fail("Config loaded again"))
+
+            with pytest.raises(common.InvalidHyalusConfig) as exc:
+                analyzer.load_config_tags(DATA_PATH / "missing_tags.py")
+
+        assert exc.value.failure is common.ConfigStatus.INVALID_FIELDS
@@ -0,0 +1,123 @@
+"""Tests for the hyalus.run.budget module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from math import inf
+from pathlib import Path
+import shutil
+import time
+
+import pytest
+
+from hyalus.run import budget
+from hyalus.run.budget import RecentOutcomes
+from hyalus.run.common import HyalusTest, RunStatus
+from hyalus.run.schedule import Capacity
+from hyalus.run.stats import RuntimeHistory
+
+# pylint: disable=duplicate-code
+OUTER_DIR = Path(__file__).parent
+RUNTEST_1 = HyalusTest(OUTER_DIR / "test_dir_1" / "runtest_1")
+RUNTEST_7 = HyalusTest(OUTER_DIR / "test_dir_1" / "runtest_7")
+
+
+def test_test_priority(tmp_path):
+    """Test that the weight of a test's Priority tag is used, and that tests without one have a weight of 1"""
+    test = HyalusTest(tmp_path / "runtest_1")
+    shutil.copytree(RUNTEST_1, test)
+
+    config = test.config.read_text(encoding="utf-8")
+    config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, Priority")
+    config = config.replace("FunctionalTest()]", "FunctionalTest(), Priority(3)]")
+    test.config.write_text(config, encoding="utf-8")
+
+    assert budget.test_priority(test) == 3
+    assert budget.test_priority(RUNTEST_1) == 1
+
+
+def test_recent_outcomes(tmp_path):
+    """Test that the failure rate over recent runs and when each test last finished are taken from the runtime
+    history, for tests with runs
+    """
+    history = RuntimeHistory(tmp_path)
+    start = time.time()
+
+    for status in (RunStatus.SUCCESS, RunStatus.FAILURE, RunStatus.ERROR, RunStatus.SUCCESS):
+        history.record(RUNTEST_1.name, status, 1.0, None)
+
+    outcomes = budget.recent_outcomes(tmp_path, [RUNTEST_1, RUNTEST_7])
+
+    assert list(outcomes) == [RUNTEST_1.name]
+    assert outcomes[RUNTEST_1.name].failure_rate == 0.5
+    assert start <= outcomes[RUNTEST_1.name].last_finished <= time.time()
+
+
+def test_recent_outcomes_no_runs_dir(tmp_path):
+    """Test that failing to read the runtime history is treated as no tests having runs"""
+    assert not budget.recent_outcomes(tmp_path / "missing", [RUNTEST_1])
+
+
+@pytest.mark.parametrize(
+    "outcomes, expected",
+    [
+        (None, 2),
+        (RecentOutcomes(0, None), 2),
+        (RecentOutcomes(0, 1000), 1),
+        (RecentOutcomes(0.5, 1000 - budget.STALE_AFTER / 2), 2.5),
+        (RecentOutcomes(1, 1000 - 2 * budget.STALE_AFTER), 4),
+    ],
+)
+def test_test_value(outcomes, expected):
+    """Test that tests are worth more the more of their recent runs failed and the longer since they last ran"""
+    assert budget.test_value(RUNTEST_1, outcomes, now=1000) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "need, expected",
+    [(Capacity(1, 0), 0.25), (Capacity(4, 0), 0.5), (Capacity(1, 12), 0.75), (Capacity(16, 0), 1)],
+)
+def test_machine_share(need, expected):
+    """Test that a test takes up the largest of its shares of the CPUs, memory and jobs"""
+    assert budget.machine_share(need, Capacity(8, 16), jobs=4) == expected
+
+
+class TestKnapsack:
+    """Tests for the knapsack function"""
+
+    def test_best_value(self):
+        """Test that the tests of the greatest total value are chosen, not those worth the most for their weight"""
+        chosen = budget.knapsack({"a": 6, "b": 5, "c": 5}, {"a": 7, "b": 5, "c": 5}, limit=10)
+
+        assert chosen == {"b", "c"}
+
+    def test_too_heavy(self):
+        """Test that tests weighing more than the limit are never chosen, and that weightless tests always are"""
+        chosen = budget.knapsack({"a": 11, "b": 0, "c": 10}, {"a": 100, "b": 1, "c": 1}, limit=10)
+
+        assert chosen == {"b", "c"}
+
+
+class TestSelectWithinBudget:
+    """Tests for the select_within_budget function"""
+
+    def test_makespan(self):
+        """Test that the least valuable tests are dropped until the rest are predicted to finish within the budget"""
+        durations = {"a": 60, "b": 60, "c": 60, "d": 200}
+        values = {"a": 3, "b": 2, "c": 1, "d": 100}
+
+        selected = budget.select_within_budget(
+            ["a", "b", "c", "d"], 100, durations, values, {}, Capacity(inf, inf), jobs=2
+        )
+
+        assert selected == ["a", "b"]
+
+    def test_order(self):
+        """Test that the chosen tests are kept in the given order"""
+        durations = {"a": 10, "b": 20, "c": 30}
+        values = {"a": 1, "b": 2, "c": 3}
+
+        selected = budget.select_within_budget(["c", "a", "b"], 100, durations, values, {}, Capacity(4, inf), jobs=4)
+
+        assert selected == ["c", "a", "b"]
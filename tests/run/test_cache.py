@@ -0,0 +1,146 @@
+"""Tests for the hyalus.run.cache module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import os
+from pathlib import Path
+import shutil
+import sqlite3
+
+import pytest
+
+from hyalus.run import cache
+from hyalus.run.common import HyalusTest
+
+# pylint: disable=duplicate-code
+OUTER_DIR = Path(__file__).parent
+RUNTEST_1 = OUTER_DIR / "test_dir_1" / "runtest_1"
+
+
+@pytest.fixture(name="test_dir")
+def fixture_test_dir(tmp_path):
+    """Writable copy of a test with an input directory"""
+    test_dir = HyalusTest(tmp_path / "tests" / "runtest_1")
+    shutil.copytree(RUNTEST_1, test_dir)
+
+    (test_dir / "input").mkdir(exist_ok=True)
+    (test_dir / "input" / "data.txt").write_text("data\n", encoding="utf-8")
+
+    return test_dir
+
+
+@pytest.fixture(name="result_cache")
+def fixture_result_cache(tmp_path):
+    """Result cache in a temporary runs directory"""
+    runs_dir = tmp_path / "runs"
+    runs_dir.mkdir()
+
+    return cache.ResultCache(runs_dir)
+
+
+class TestResultCache:
+    """Tests for the ResultCache class"""
+
+    def test_fingerprint_stable(self, result_cache, test_dir):
+        """Test that fingerprinting an unchanged test gives the same fingerprint"""
+        assert result_cache.fingerprint(test_dir) == result_cache.fingerprint(test_dir)
+
+    def test_fingerprint_copy(self, result_cache, test_dir, tmp_path):
+        """Test that an identical copy of a test has the same fingerprint"""
+        copy = HyalusTest(tmp_path / "copy")
+        shutil.copytree(test_dir, copy)
+
+        assert result_cache.fingerprint(test_dir) == result_cache.fingerprint(copy)
+
+    def test_fingerprint_input_changed(self, result_cache, test_dir):
+        """Test that changing an input file changes the fingerprint"""
+        before = result_cache.fingerprint(test_dir)
+
+        (test_dir / "input" / "data.txt").write_text("other data\n", encoding="utf-8")
+
+        assert result_cache.fingerprint(test_dir) != before
+
+    def test_fingerprint_ignores_pycache(self, result_cache, test_dir):
+        """Test that byte-compiled files are not part of the fingerprint"""
+        before = result_cache.fingerprint(test_dir)
+
+        (test_dir / "__pycache__").mkdir(exist_ok=True)
+        (test_dir / "__pycache__" / "config.cpython.pyc").write_bytes(b"\0")
+
+        assert result_cache.fingerprint(test_dir) == before
+
+    def test_fingerprint_dependency_changed(self, tmp_path, test_dir):
+        """Test that changing a dependency path changes the fingerprint"""
+        dependency = tmp_path / "src"
+        dependency.mkdir()
+        (dependency / "app.py").write_text("VERSION = 1\n", encoding="utf-8")
+
+        result_cache = cache.ResultCache(tmp_path, dependencies=[dependency])
+        before = result_cache.fingerprint(test_dir)
+
+        (dependency / "app.py").write_text("VERSION = 2\n", encoding="utf-8")
+
+        assert result_cache.fingerprint(test_dir) != before
+
+    def test_fingerprint_packages(self, tmp_path, test_dir):
+        """Test that fingerprints depend on the given packages"""
+        without_packages = cache.ResultCache(tmp_path).fingerprint(test_dir)
+        with_packages = cache.ResultCache(tmp_path, packages=["pytest"]).fingerprint(test_dir)
+
+        assert without_packages != with_packages
+
+    def test_fingerprint_reuses_digests(self, result_cache, test_dir, monkeypatch):
+        """Test that files whose size and mtime are unchanged are not hashed again"""
+        result_cache.fingerprint(test_dir)
+
+        monkeypatch.setattr(cache, "file_sha256", lambda _: pytest.fail("File should not have been hashed again"))
+
+        result_cache.fingerprint(test_dir)
+
+    def test_fingerprint_touched_file(self, result_cache, test_dir):
+        """Test that a touched file whose content did not change gives the same fingerprint"""
+        before = result_cache.fingerprint(test_dir)
+
+        data = test_dir / "input" / "data.txt"
+        stat = data.stat()
+        os.utime(data, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert result_cache.fingerprint(test_dir) == before
+
+    def test_record_pass(self, result_cache, test_dir):
+        """Test that a recorded passing result is found in the cache"""
+        fingerprint = result_cache.fingerprint(test_dir)
+
+        assert not result_cache.is_cached_pass(fingerprint)
+
+        result_cache.record_pass(fingerprint, test_dir)
+
+        assert result_cache.is_cached_pass(fingerprint)
+
+    def test_eviction(self, tmp_path):
+        """Test that the least recently used results are evicted once the cache is full"""
+        result_cache = cache.ResultCache(tmp_path, max_entries=2)
+
+        result_cache.record_pass("a", HyalusTest("a"))
+        result_cache.record_pass("b", HyalusTest("b"))
+        assert result_cache.is_cached_pass("a")
+
+        result_cache.record_pass("c", HyalusTest("c"))
+
+        assert result_cache.is_cached_pass("a")
+        assert not result_cache.is_cached_pass("b")
+        assert result_cache.is_cached_pass("c")
+
+    def test_unreadable_cache(self, tmp_path):
+        """Test that a corrupt cache file is treated as a cache miss"""
+        (tmp_path / cache.CACHE_FILE).write_text("not a database", encoding="utf-8")
+
+        result_cache = cache.ResultCache(tmp_path)
+        result_cache.record_pass("a", HyalusTest("a"))
+
+        assert not result_cache.is_cached_pass("a")
+
+        with pytest.raises(sqlite3.Error):
+            result_cache.fingerprint(HyalusTest(tmp_path))
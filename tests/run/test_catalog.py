@@ -0,0 +1,143 @@
+"""Tests for the hyalus.run.catalog module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from datetime import date
+from pathlib import Path
+import shutil
+import sqlite3
+
+import pytest
+
+from hyalus.run import catalog
+from hyalus.run.common import HyalusRun, RunStatus
+
+# pylint: disable=duplicate-code
+OUTER_DIR = Path(__file__).parent
+RUNS_DIR = OUTER_DIR / "runs_dir"
+
+TEST_RUN_1 = "runtest_1_2023-02-09_ey2S4AGY"
+TEST_RUN_2 = "runtest_2_2023-02-10_ndTVVsed"
+TEST_RUN_7 = "runtest_7_2023-02-11_5KUBAvgo"
+
+
+@pytest.fixture(name="runs_dir")
+def fixture_runs_dir(tmp_path):
+    """Copy contents of RUNS_DIR to tmp_path and then return it"""
+    shutil.copytree(RUNS_DIR, tmp_path, dirs_exist_ok=True)
+    return tmp_path
+
+
+def _names(entries: list[catalog.CatalogEntry]) -> set[str]:
+    """:return: The run directory names of the given catalog entries"""
+    return {entry.name for entry in entries}
+
+
+class TestRunCatalog:
+    """Tests for the RunCatalog class"""
+
+    def test_sync_from_dir(self, runs_dir):
+        """Test that existing run directories are cataloged from their contents, ignoring anything that is not a run"""
+        entries = {entry.name: entry for entry in catalog.RunCatalog(runs_dir).find()}
+
+        assert set(entries) == {TEST_RUN_1, TEST_RUN_2, TEST_RUN_7}
+
+        entry = entries[TEST_RUN_2]
+
+        assert entry.test_name == "runtest_2"
+        assert entry.test_date == date(2023, 2, 10)
+        assert entry.status is RunStatus.FAILURE
+        assert entry.tags == ["medium", "regressiontest"]
+        assert entry.start is not None
+        assert entry.size == catalog.dir_size(runs_dir / TEST_RUN_2)
+
+        assert entries[TEST_RUN_1].status is RunStatus.SUCCESS
+
+    def test_sync_removed_dir(self, runs_dir):
+        """Test that runs whose directories were removed are dropped from the catalog"""
+        run_catalog = catalog.RunCatalog(runs_dir)
+        run_catalog.sync()
+
+        shutil.rmtree(runs_dir / TEST_RUN_1)
+
+        assert _names(run_catalog.find()) == {TEST_RUN_2, TEST_RUN_7}
+
+    def test_sync_does_not_inspect_cataloged_runs(self, runs_dir, monkeypatch):
+        """Test that runs already in the catalog are not loaded again"""
+        run_catalog = catalog.RunCatalog(runs_dir)
+        run_catalog.sync()
+
+        monkeypatch.setattr(catalog, "run_tags", lambda _: pytest.fail("Cataloged run should not have been loaded"))
+
+        assert _names(run_catalog.find(match_tags=["Short"])) == {TEST_RUN_1}
+
+    def test_record(self, runs_dir):
+        """Test that recorded fields are kept when the run is recorded again with only some fields"""
+        run_catalog = catalog.RunCatalog(runs_dir)
+        test_run = HyalusRun(runs_dir / TEST_RUN_1)
+
+        run_catalog.record(test_run, RunStatus.RUNNING, tags=["long"], start=1.0)
+        run_catalog.record(test_run, RunStatus.ERROR, duration=2.0, size=3)
+
+        entry = next(entry for entry in run_catalog.find() if entry.name == TEST_RUN_1)
+
+        assert entry.status is RunStatus.ERROR
+        assert (entry.start, entry.duration, entry.size) == (1.0, 2.0, 3)
+        assert entry.tags == ["long"]
+
+    def test_remove(self, runs_dir):
+        """Test removal of a single catalog entry"""
+        run_catalog = catalog.RunCatalog(runs_dir)
+        run_catalog.sync()
+
+        run_catalog.remove(HyalusRun(runs_dir / TEST_RUN_1))
+
+        with sqlite3.connect(run_catalog.catalog_file) as connection:
+            assert {name for (name,) in connection.execute("SELECT name FROM runs")} == {TEST_RUN_2, TEST_RUN_7}
+
+    @pytest.mark.parametrize(
+        "criteria, expected",
+        [
+            ({"test_names": ["runtest_1", "runtest_7"]}, {TEST_RUN_1, TEST_RUN_7}),
+            ({"oldest": date(2023, 2, 10)}, {TEST_RUN_2, TEST_RUN_7}),
+            ({"oldest": date(2023, 2, 10), "newest": date(2023, 2, 10)}, {TEST_RUN_2}),
+            ({"match_tags": ["Short", "Long"], "tag_op": any}, {TEST_RUN_1, TEST_RUN_7}),
+            ({"match_tags": ["Short", "FunctionalTest"], "tag_op": all}, {TEST_RUN_1}),
+            ({"match_tags": ["Short", "Long"], "tag_op": all}, set()),
+            ({"match_tags": ["long"], "tag_op": lambda matches: not any(matches)}, {TEST_RUN_1, TEST_RUN_2}),
+        ],
+    )
+    def test_find(self, runs_dir, criteria, expected):
+        """Test selection of test runs by name, date, and tags"""
+        assert _names(catalog.RunCatalog(runs_dir).find(**criteria)) == expected
+
+    def test_find_test_runs(self, runs_dir):
+        """Test that matching runs are returned as test runs within the runs directory"""
+        expected = {HyalusRun(runs_dir / TEST_RUN_7)}
+
+        assert catalog.RunCatalog(runs_dir).find_test_runs(test_names=["runtest_7"]) == expected
+
+    def test_rebuild(self, runs_dir):
+        """Test that rebuilding discards recorded information in favor of what is in the runs directory"""
+        run_catalog = catalog.RunCatalog(runs_dir)
+        run_catalog.record(HyalusRun(runs_dir / TEST_RUN_1), RunStatus.ERROR, tags=["long"])
+
+        run_catalog.rebuild()
+
+        entry = next(entry for entry in run_catalog.find() if entry.name == TEST_RUN_1)
+
+        assert entry.status is RunStatus.SUCCESS
+        assert entry.tags == ["functionaltest", "short"]
+
+    def test_outdated_version(self, runs_dir):
+        """Test that a catalog written by a different catalog version is discarded"""
+        run_catalog = catalog.RunCatalog(runs_dir)
+
+        with sqlite3.connect(run_catalog.catalog_file) as connection:
+            connection.executescript(
+                f"CREATE TABLE runs (name TEXT); PRAGMA user_version = {catalog.CATALOG_VERSION + 1};"
+            )
+
+        assert _names(run_catalog.find()) == {TEST_RUN_1, TEST_RUN_2, TEST_RUN_7}
@@ -23,6 +23,11 @@ TEST_RUN_2 = HyalusRun(RUNS_DIR / "runtest_2_2023-02-10_ndTVVsed")
 TEST_RUN_7 = HyalusRun(RUNS_DIR / "runtest_7_2023-02-11_5KUBAvgo")
 
 
+def _count_run_dirs(runs_dir: Path) -> int:
+    """Count directories in the runs directory, ignoring files such as the run catalog"""
+    return len([path for path in runs_dir.iterdir() if path.is_dir()])
+
+
 @pytest.fixture(name="runs_dir")
 def fixture_runs_dir(tmp_path):
     """Copy contents of RUNS_DIR to tmp_path and then return it"""
@@ -61,47 +66,48 @@ class TestHyalusCleanRunner:
         """Test path for when no tests are found for removal"""
         runner = clean.HyalusCleanRunner(runs_dir, to_clean=["runtest_99"], force=True)
 
-        expected_fs_objs = len(list(runs_dir.iterdir()))
+        expected_fs_objs = _count_run_dirs(runs_dir)
         expected_msg = f"Couldn't find any test runs to remove in {runs_dir} based on given criteria"
 
         runner.run()
 
-        assert expected_fs_objs == len(list(runs_dir.iterdir()))
+        assert expected_fs_objs == _count_run_dirs(runs_dir)
         assert capsys.readouterr().out.strip('\n') == expected_msg
 
-    def test_run_tests_found_1(self, capsys, runs_dir):
+    @pytest.mark.parametrize("use_catalog", [True, False])
+    def test_run_tests_found_1(self, capsys, runs_dir, use_catalog):
         """Test path for when tests are found for removal, case one"""
-        runner = clean.HyalusCleanRunner(runs_dir, force=True)
+        runner = clean.HyalusCleanRunner(runs_dir, force=True, use_catalog=use_catalog)
 
-        expected_fs_objs = len(list(runs_dir.iterdir())) - 3
+        expected_fs_objs = _count_run_dirs(runs_dir) - 3
         expected_msg = "3 old test runs have been removed"
 
         runner.run()
 
-        assert expected_fs_objs == len(list(runs_dir.iterdir()))
+        assert expected_fs_objs == _count_run_dirs(runs_dir)
         assert capsys.readouterr().out.strip('\n') == expected_msg
 
     def test_run_tests_found_2(self, capsys, runs_dir):
         """Test path for when no tests are found for removal"""
         runner = clean.HyalusCleanRunner(runs_dir, oldest=date(2023, 2, 10), newest=date(2023, 2, 10), force=True)
 
-        expected_fs_objs = len(list(runs_dir.iterdir())) - 1
+        expected_fs_objs = _count_run_dirs(runs_dir) - 1
         expected_msg = "1 old test runs have been removed"
 
         runner.run()
 
-        assert expected_fs_objs == len(list(runs_dir.iterdir()))
+        assert expected_fs_objs == _count_run_dirs(runs_dir)
         assert capsys.readouterr().out.strip('\n') == expected_msg
 
     def test_run_removal_canceled(self, capsys, runs_dir):
         """Test that when test run removal is canceled by the user no tests get removed"""
         runner = clean.HyalusCleanRunner(runs_dir)
 
-        expected_fs_objs = len(list(runs_dir.iterdir()))
+        expected_fs_objs = _count_run_dirs(runs_dir)
         expected_msg = "Test run removal canceled"
 
         with patch("builtins.input", return_value="n"):
             runner.run()
 
-        assert expected_fs_objs == len(list(runs_dir.iterdir()))
+        assert expected_fs_objs == _count_run_dirs(runs_dir)
         assert capsys.readouterr().out.strip('\n') == expected_msg
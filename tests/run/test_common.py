@@ -9,6 +9,7 @@ from datetime import date, datetime, timedelta
 import json
 import os
 from pathlib import Path
+import shutil
 import tempfile
 
 import pytest
@@ -16,6 +17,7 @@ import pytest
 from hyalus import __version__
 from hyalus.config import common as config_common
 from hyalus.run import common as run_common
+from hyalus.run.index import INDEX_FILE
 
 # pylint: disable=duplicate-code
 OUTER_DIR = Path(__file__).parent
@@ -383,13 +385,123 @@ class TestFindFsObj:
             run_common.find_fs_obj(test_name, search_dirs=search_dirs)
 
 
-def test_find_all_tests():
+@pytest.fixture(name="search_dir")
+def fixture_search_dir(tmp_path):
+    """Writable copy of test_dir_1 to build discovery indexes in"""
+    return Path(shutil.copytree(TEST_DIR_1, tmp_path / "test_dir_1"))
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_find_all_tests(use_index):
     """Assert that find_all_tests returns absolute paths to all tests based on given search directories"""
     search_dirs = [TEST_DIR_1, TEST_DIR_2]
 
     expected = {RUNTEST_1, RUNTEST_2, RUNTEST_7, RUNTEST_2_DUPLICATE, RUNTEST_3, RUNTEST_4, RUNTEST_5}
 
-    assert run_common.find_all_tests(search_dirs) == expected
+    assert run_common.find_all_tests(search_dirs, use_index=use_index) == expected
+
+
+class TestScanTests:
+    """Tests for the scan_tests function"""
+
+    @pytest.fixture(name="nested_dir")
+    def fixture_nested_dir(self, tmp_path):
+        """Search directory with tests at different depths, a previous test run, and tests within input directories"""
+        for test_dir in ("test_a", "group/test_b", "group/subgroup/test_c", "test_a/input/test_d", "test_a/tmp/test_e"):
+            (tmp_path / test_dir).mkdir(parents=True)
+            (tmp_path / test_dir / config_common.CONFIG_PY).touch()
+
+        shutil.copytree(TEST_RUN_1, tmp_path / "group" / TEST_RUN_1.name)
+
+        return tmp_path
+
+    def test_default_depth(self, nested_dir):
+        """Test that by default only direct subdirectories of the search directory are considered"""
+        assert run_common.scan_tests([nested_dir]) == {nested_dir: {nested_dir / "test_a"}}
+
+    def test_depth_limit(self, nested_dir):
+        """Test that tests are found down to the given depth, skipping previous test runs"""
+        expected = {nested_dir / "test_a", nested_dir / "group" / "test_b"}
+
+        assert run_common.scan_tests([nested_dir], max_depth=2) == {nested_dir: expected}
+
+    def test_no_depth_limit(self, nested_dir):
+        """Test that all tests are found when not limiting depth, skipping input/output/tmp subdirectories"""
+        expected = {
+            nested_dir / "test_a",
+            nested_dir / "group" / "test_b",
+            nested_dir / "group" / "subgroup" / "test_c",
+        }
+
+        assert run_common.scan_tests([nested_dir], max_depth=0) == {nested_dir: expected}
+
+    def test_symlink_cycle(self, nested_dir):
+        """Test that a symlink pointing back up the tree does not cause infinite recursion"""
+        (nested_dir / "group" / "subgroup" / "loop").symlink_to(nested_dir / "group")
+
+        found = run_common.scan_tests([nested_dir], max_depth=0)[nested_dir]
+
+        assert nested_dir / "group" / "subgroup" / "test_c" in found
+
+    def test_multiple_search_dirs(self):
+        """Test that tests are reported per search directory"""
+        observed = run_common.scan_tests([TEST_DIR_1, TEST_DIR_2], workers=1)
+
+        assert observed == {
+            TEST_DIR_1: {RUNTEST_1, RUNTEST_2, RUNTEST_7},
+            TEST_DIR_2: {RUNTEST_2_DUPLICATE, RUNTEST_3, RUNTEST_4, RUNTEST_5},
+        }
+
+
+class TestFindIndexedTests:
+    """Tests for the find_indexed_tests function"""
+
+    def test_index_written(self, search_dir):
+        """Test that searching a directory writes its discovery index with statuses and tags of each test"""
+        entries = run_common.find_indexed_tests([search_dir])
+
+        assert (search_dir / INDEX_FILE).is_file()
+        assert set(entries) == {search_dir / "runtest_1", search_dir / "runtest_2", search_dir / "runtest_7"}
+        assert entries[search_dir / "runtest_1"].tags == ["short", "functionaltest"]
+        assert entries[search_dir / "runtest_1"].status is config_common.ConfigStatus.VALID
+
+    def test_fresh_configs_not_loaded(self, search_dir, monkeypatch):
+        """Test that configs are not loaded again when their index entries are fresh"""
+        run_common.find_indexed_tests([search_dir])
+
+        def fail_load(*_):
+            raise AssertionError("Config should have been served from the index")
+
+        monkeypatch.setattr(run_common, "load_config_tags", fail_load)
+
+        assert search_dir / "runtest_1" in run_common.find_indexed_tests([search_dir])
+
+    def test_stale_config_reloaded(self, search_dir):
+        """Test that changing a config causes it to be reloaded and its tags updated"""
+        run_common.find_indexed_tests([search_dir])
+
+        config = search_dir / "runtest_7" / config_common.CONFIG_PY
+        config.write_text(config.read_text(encoding="utf-8").replace("Long", "Short"), encoding="utf-8")
+
+        assert run_common.find_indexed_tests([search_dir])[search_dir / "runtest_7"].tags == ["short"]
+
+    def test_invalid_config_status(self, search_dir):
+        """Test that a config that cannot be loaded is indexed with the corresponding status"""
+        config = search_dir / "runtest_1" / config_common.CONFIG_PY
+        config.write_text("this is not python", encoding="utf-8")
+
+        entry = run_common.find_indexed_tests([search_dir])[search_dir / "runtest_1"]
+
+        assert entry.status is config_common.ConfigStatus.COULD_NOT_BE_LOADED
+        assert not entry.tags
+
+    def test_removed_test_pruned(self, search_dir):
+        """Test that tests removed from the search directory are no longer reported"""
+        run_common.find_indexed_tests([search_dir])
+
+        shutil.rmtree(search_dir / "runtest_2")
+
+        assert search_dir / "runtest_2" not in run_common.find_indexed_tests([search_dir])
 
 
 class TestFindTestsByName:
@@ -431,9 +543,98 @@ class TestFindTestsByName:
             run_common.find_tests_by_name(inputs, search_dirs)
 
 
+@pytest.fixture(name="suite_dir")
+def fixture_suite_dir(tmp_path):
+    """Search directory of tests and nested test suites"""
+    for test_name in ("test_a", "test_b"):
+        (tmp_path / test_name).mkdir()
+        (tmp_path / test_name / config_common.CONFIG_PY).write_text("TAGS = []\n", encoding="utf-8")
+
+    (tmp_path / "inner.ste").write_text("test_a\n", encoding="utf-8")
+    (tmp_path / "left.ste").write_text("inner.ste\n", encoding="utf-8")
+    (tmp_path / "right.ste").write_text("inner.ste\ntest_b\n", encoding="utf-8")
+    (tmp_path / "outer.ste").write_text("left.ste\nright.ste\n", encoding="utf-8")
+
+    return tmp_path
+
+
+class TestSuiteResolver:
+    """Tests for the SuiteResolver class"""
+
+    def test_resolve_nested(self, suite_dir, monkeypatch):
+        """Test that a suite included by several other suites is only parsed once"""
+        parsed = []
+        parse_test_suite = run_common._parse_test_suite
+
+        def counting_parse(test_suite):
+            parsed.append(test_suite)
+            return parse_test_suite(test_suite)
+
+        monkeypatch.setattr(run_common, "_parse_test_suite", counting_parse)
+
+        tests = run_common.SuiteResolver([suite_dir]).resolve(["outer.ste", "inner.ste"])
+        expected = sorted(suite_dir / suite for suite in ("inner.ste", "left.ste", "outer.ste", "right.ste"))
+
+        assert tests == {suite_dir / "test_a", suite_dir / "test_b"}
+        assert sorted(parsed) == expected
+
+    def test_resolve_cycle(self, suite_dir):
+        """Test that a suite including itself through another suite is reported as invalid"""
+        (suite_dir / "inner.ste").write_text("test_a\nouter.ste\n", encoding="utf-8")
+
+        with pytest.raises(run_common.InvalidTestSuite, match="includes itself"):
+            run_common.SuiteResolver([suite_dir]).resolve(["outer.ste"])
+
+    def test_resolve_self_include(self, suite_dir):
+        """Test that a suite directly including itself is reported as invalid"""
+        (suite_dir / "inner.ste").write_text("inner.ste\n", encoding="utf-8")
+
+        with pytest.raises(run_common.InvalidTestSuite, match="includes itself"):
+            run_common.SuiteResolver([suite_dir]).resolve(["inner.ste"])
+
+    def test_find_uses_index(self, monkeypatch):
+        """Test that plain names are looked up in the name index rather than on the filesystem"""
+        resolver = run_common.SuiteResolver([TEST_DIR_1, TEST_DIR_2])
+        assert resolver.names
+
+        monkeypatch.setattr(Path, "exists", lambda _: pytest.fail("Filesystem should not have been checked"))
+
+        assert resolver.find("runtest_1") == RUNTEST_1
+
+    def test_find_duplicate(self):
+        """Test that duplicates are reported the same way as by find_fs_obj"""
+        match = f"Found multiple items with name runtest_2: {RUNTEST_2}, {RUNTEST_2_DUPLICATE}"
+
+        with pytest.raises(run_common.Duplicate, match=match):
+            run_common.SuiteResolver([TEST_DIR_1, TEST_DIR_2]).find("runtest_2")
+
+    def test_find_not_found(self):
+        """Test that missing names are reported the same way as by find_fs_obj"""
+        match = f"Could not find item runtest_999 in directories: {TEST_DIR_1}, {TEST_DIR_2}"
+
+        with pytest.raises(run_common.NotFound, match=match):
+            run_common.SuiteResolver([TEST_DIR_1, TEST_DIR_2]).find("runtest_999")
+
+    @run_common.cwd_reset
+    def test_find_relative_path(self):
+        """Test that paths that are not plain names are still found relative to the search directories"""
+        os.chdir(OUTER_DIR)
+
+        assert run_common.SuiteResolver([TEST_DIR_2]).find("test_dir_1/runtest_1") == RUNTEST_1
+
+
 class TestFindTestsByTag:
     """Tests for the find_tests_by_tag function"""
 
+    @pytest.mark.parametrize("use_index", [True, False])
+    def test_index_or_no_index(self, use_index):
+        """Test that tag matching gives the same result whether or not the discovery index is used"""
+        tags = ["Short", "RegressionTest"]
+        search_dirs = [TEST_DIR_1, TEST_DIR_2]
+        expected = {RUNTEST_1, RUNTEST_2, RUNTEST_2_DUPLICATE, RUNTEST_3, RUNTEST_4}
+
+        assert run_common.find_tests_by_tag(tags, any, search_dirs, use_index=use_index) == expected
+
     def test_all_tag_op(self):
         """Test proper handling of matched tags when using all as the tag operator"""
         tags = ["Short", "FunctionalTest"]
@@ -0,0 +1,199 @@
+"""Tests for the hyalus.run.distributed module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import json
+from pathlib import Path
+import socket
+import threading
+
+import pytest
+
+from hyalus.run import distributed
+from hyalus.run.common import HyalusTest, RunStatus
+from hyalus.run.progress import SuiteProgress
+from hyalus.run.report import SuiteReport
+from hyalus.run.stats import RuntimeHistory
+
+# pylint: disable=duplicate-code
+OUTER_DIR = Path(__file__).parent
+TEST_DIR_1 = OUTER_DIR / "test_dir_1"
+
+
+class _Coordinator(threading.Thread):
+    """Runs a coordinator listening on a free localhost port in the background"""
+
+    def __init__(self, to_run, runs_dir, **kwargs):
+        super().__init__(daemon=True)
+        self.coordinator = distributed.HyalusCoordinator(
+            to_run=to_run, runs_dir=runs_dir, address="127.0.0.1:0", **kwargs
+        )
+        self.result = None
+
+    def run(self):
+        self.result = self.coordinator.run()
+
+    @property
+    def address(self):
+        """:return: Address workers can connect to once the coordinator is listening"""
+        assert self.coordinator.listening.wait(30)
+        host, port = self.coordinator.address
+        return f"{host}:{port}"
+
+
+def _run_workers(address, runs_dirs, **kwargs):
+    """Run a worker per runs directory at once, returning their results"""
+    results = {}
+
+    def work(runs_dir):
+        results[runs_dir] = distributed.HyalusWorker(address, runs_dir=runs_dir, jobs=1, **kwargs).run()
+
+    threads = [threading.Thread(target=work, args=(runs_dir,)) for runs_dir in runs_dirs]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join(60)
+
+    return results
+
+
+class TestParseAddress:
+    """Tests for the parse_address function"""
+
+    def test_host_and_port(self):
+        """Test parsing an address with a host and port"""
+        assert distributed.parse_address("build-1:8000") == ("build-1", 8000)
+
+    def test_defaults(self):
+        """Test that the host and port default to localhost and the default port"""
+        assert distributed.parse_address("build-1") == ("build-1", distributed.DEFAULT_PORT)
+        assert distributed.parse_address(":8000") == ("localhost", 8000)
+
+    def test_invalid_port(self):
+        """Test that a non-integer port is rejected"""
+        with pytest.raises(ValueError):
+            distributed.parse_address("build-1:port")
+
+
+class TestTestQueue:
+    """Tests for the _TestQueue class"""
+
+    def test_next_test_affinity(self, capsys):
+        """Test that tests sharing input data are handed out one after another to the same worker"""
+        tests = [HyalusTest(f"/tests/test_{i}") for i in range(4)]
+        groups = {tests[0]: 0, tests[1]: 0, tests[2]: 0}
+        progress = SuiteProgress({test: 1.0 for test in tests}, 2, live=False)
+        queue = distributed._TestQueue(tests, progress, SuiteReport(), 0, groups)  # pylint: disable=protected-access
+
+        assert queue.next_test("worker_1") == tests[0]
+        assert queue.next_test("worker_2") == tests[3]
+        assert queue.next_test("worker_1") == tests[1]
+        assert queue.next_test("worker_2") == tests[2]
+        assert queue.next_test("worker_2") is None
+        capsys.readouterr()
+
+
+class TestDistributedSuite:
+    """Tests for the HyalusCoordinator and HyalusWorker classes"""
+
+    def test_run_pass(self, tmp_path, capsys):
+        """Test that tests are spread over multiple workers, each running tests into its own runs directory, and that
+        the coordinator records how they went in its own runtime history
+        """
+        runs_dirs = [tmp_path / "worker_1", tmp_path / "worker_2"]
+        for runs_dir in runs_dirs:
+            runs_dir.mkdir()
+
+        coordinator = _Coordinator(["runtest_1", "runtest_7"], tmp_path, search_dirs=[TEST_DIR_1])
+        coordinator.start()
+
+        assert all(_run_workers(coordinator.address, runs_dirs).values())
+
+        coordinator.join(60)
+        assert coordinator.result
+
+        runs = [run.name for runs_dir in runs_dirs for run in runs_dir.iterdir() if run.is_dir()]
+        assert sorted(run.rsplit("_", 2)[0] for run in runs) == ["runtest_1", "runtest_7"]
+
+        out = capsys.readouterr().out
+        assert out.count("runtest_1_") >= 1 and out.count("runtest_7_") >= 1
+
+        history = RuntimeHistory(tmp_path).recent(["runtest_1", "runtest_7"])
+        assert sorted(history) == ["runtest_1", "runtest_7"]
+        assert history["runtest_1"][0].runtime_tag == "Short"
+        assert all(runs[0].status is RunStatus.SUCCESS and runs[0].duration is not None for runs in history.values())
+
+    def test_run_fail(self, tmp_path):
+        """Test that the coordinator reports failing tests run by workers, including in its JSON-lines report"""
+        jsonl = tmp_path / "report.jsonl"
+        coordinator = _Coordinator(["runtest_1", "runtest_2"], tmp_path, search_dirs=[TEST_DIR_1], jsonl_report=jsonl)
+        coordinator.start()
+
+        assert all(_run_workers(coordinator.address, [tmp_path]).values())
+
+        coordinator.join(60)
+        assert coordinator.result is False
+
+        reports = {report["name"]: report for report in map(json.loads, jsonl.read_text(encoding="utf-8").splitlines())}
+        assert reports["runtest_1"]["status"] == "SUCCESS" and reports["runtest_2"]["status"] != "SUCCESS"
+        assert reports["runtest_2"]["steps"]
+
+    def test_lost_worker(self, tmp_path, capsys):
+        """Test that the test of a worker that disconnects without sending a result is requeued"""
+        coordinator = _Coordinator(["runtest_1"], tmp_path, search_dirs=[TEST_DIR_1])
+        coordinator.start()
+
+        host, port = distributed.parse_address(coordinator.address)
+
+        with socket.create_connection((host, port)) as sock, sock.makefile("rb") as reader:
+            sock.sendall(b'{"type": "hello", "worker": "doomed"}\n{"type": "request"}\n')
+            assert json.loads(reader.readline())["type"] == "test"
+
+        assert all(_run_workers(coordinator.address, [tmp_path]).values())
+
+        coordinator.join(60)
+        assert coordinator.result
+
+        captured = capsys.readouterr()
+        assert f"Lost worker doomed while running {TEST_DIR_1 / 'runtest_1'}, requeued" in captured.out
+        assert "runtest_1_" in captured.out
+
+    def test_lost_worker_max_attempts(self, tmp_path, monkeypatch):
+        """Test that a test is reported as an error once every worker it was handed to disappeared"""
+        monkeypatch.setattr(distributed, "MAX_ATTEMPTS", 1)
+
+        coordinator = _Coordinator(["runtest_1"], tmp_path, search_dirs=[TEST_DIR_1])
+        coordinator.start()
+
+        host, port = distributed.parse_address(coordinator.address)
+
+        with socket.create_connection((host, port)) as sock, sock.makefile("rb") as reader:
+            sock.sendall(b'{"type": "request"}\n')
+            assert json.loads(reader.readline())["type"] == "test"
+
+        coordinator.join(60)
+        assert coordinator.result is False
+
+    def test_worker_no_coordinator(self, tmp_path):
+        """Test that a worker gives up when the coordinator cannot be reached"""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        worker = distributed.HyalusWorker(f"127.0.0.1:{port}", runs_dir=tmp_path, jobs=1, connect_timeout=0)
+
+        assert not worker.run()
+
+    def test_worker_resolve(self, tmp_path):
+        """Test that workers find tests by name when the coordinator's path to them does not exist on the worker"""
+        missing = tmp_path / "coordinator" / "runtest_1"
+
+        worker = distributed.HyalusWorker("localhost", runs_dir=tmp_path, search_dirs=[TEST_DIR_1])
+        assert worker._resolve(missing, "runtest_1") == TEST_DIR_1 / "runtest_1"  # pylint: disable=protected-access
+
+        worker = distributed.HyalusWorker("localhost", runs_dir=tmp_path, search_dirs=[tmp_path])
+        assert worker._resolve(missing, "runtest_1") is None  # pylint: disable=protected-access
@@ -0,0 +1,119 @@
+"""Tests for the hyalus.run.fixtures module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from pathlib import Path
+import shutil
+import stat
+
+import pytest
+
+from hyalus.run import fixtures
+from hyalus.run.cache import ResultCache
+from hyalus.run.common import HyalusRun, HyalusTest
+from hyalus.run.fixtures import FixtureNotPrepared, FixtureStore, PreparedFixture
+
+# pylint: disable=duplicate-code
+OUTER_DIR = Path(__file__).parent
+RUNTEST_1 = HyalusTest(OUTER_DIR / "test_dir_1" / "runtest_1")
+
+
+def _copy_test(tests_dir: Path, name: str, tags: str) -> HyalusTest:
+    """Copy runtest_1 into tests_dir under a new name, with extra tags
+
+    :return: The copied test
+    """
+    test = HyalusTest(tests_dir / name)
+    shutil.copytree(RUNTEST_1, test)
+
+    config = test.config.read_text(encoding="utf-8")
+    config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, SuiteFixture, UsesFixture")
+    config = config.replace("FunctionalTest()]", f"FunctionalTest(), {tags}]")
+    test.config.write_text(config, encoding="utf-8")
+
+    return test
+
+
+def _run_dir(runs_dir: Path, name: str) -> HyalusRun:
+    """:return: A passing-looking run directory of a fixture"""
+    run_dir = HyalusRun(runs_dir / f"{name}_2023-03-15_AB3K315d")
+    (run_dir / "output").mkdir(parents=True)
+
+    return run_dir
+
+
+def test_fixture_names(tmp_path):
+    """Test that the fixtures a test uses are listed once each, in the order declared"""
+    test = _copy_test(tmp_path, "test_1", 'UsesFixture("b"), UsesFixture("a"), UsesFixture("b")')
+
+    assert fixtures.fixture_names(test) == ["b", "a"]
+    assert not fixtures.fixture_names(RUNTEST_1)
+
+
+def test_find_fixture(tmp_path):
+    """Test that only tests tagged as suite fixtures are found as fixtures"""
+    fixture = _copy_test(tmp_path, "fixture", "SuiteFixture()")
+    _copy_test(tmp_path, "not_fixture", 'UsesFixture("fixture")')
+
+    assert fixtures.find_fixture("fixture", [tmp_path]) == fixture
+
+    with pytest.raises(FixtureNotPrepared, match="not tagged as a SuiteFixture"):
+        fixtures.find_fixture("not_fixture", [tmp_path])
+
+    with pytest.raises(FixtureNotPrepared, match="Could not find"):
+        fixtures.find_fixture("missing", [tmp_path])
+
+
+def test_make_read_only(tmp_path):
+    """Test that files are made read-only while directories stay writable"""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "index.txt").write_text("index", encoding="utf-8")
+
+    fixtures.make_read_only(tmp_path)
+
+    assert not (tmp_path / "sub" / "index.txt").stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    assert (tmp_path / "sub").stat().st_mode & stat.S_IWUSR
+
+
+def test_expose_fixtures(tmp_path):
+    """Test that the output directory of each fixture is linked into the run directory"""
+    fixture = PreparedFixture("fixture", "abc", _run_dir(tmp_path, "fixture"))
+    run_dir = HyalusRun(tmp_path / "test_1_2023-03-15_AB3K315d")
+    run_dir.mkdir()
+
+    fixtures.expose_fixtures(run_dir, [fixture])
+
+    assert (run_dir / "fixtures" / "fixture").resolve() == fixture.run_dir.output_dir.resolve()
+
+
+class TestFixtureStore:
+    """Tests for the FixtureStore class"""
+
+    def test_find(self, tmp_path):
+        """Test that recorded runs are found by fingerprint, and forgotten once their run directory is gone"""
+        store = FixtureStore(tmp_path)
+        run_dir = _run_dir(tmp_path, "fixture")
+        store.record(PreparedFixture("fixture", "abc", run_dir))
+
+        assert store.find("abc") == run_dir
+        assert store.find("def") is None
+
+        shutil.rmtree(run_dir)
+
+        assert store.find("abc") is None
+
+    def test_lookup(self, tmp_path):
+        """Test that the run of the current version of a fixture is looked up, and that changing it needs a new run"""
+        fixture = _copy_test(tmp_path / "tests", "fixture", "SuiteFixture()")
+        cache = ResultCache(tmp_path)
+        store = FixtureStore(tmp_path)
+        store.record(PreparedFixture("fixture", cache.fingerprint(fixture), _run_dir(tmp_path, "fixture")))
+
+        assert store.lookup("fixture", [tmp_path / "tests"], cache).name == "fixture"
+
+        fixture.config.write_text(fixture.config.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+
+        with pytest.raises(FixtureNotPrepared, match="has not passed since it last changed"):
+            store.lookup("fixture", [tmp_path / "tests"], cache)
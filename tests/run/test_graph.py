@@ -0,0 +1,63 @@
+"""Tests for the hyalus.run.graph module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import pytest
+
+from hyalus.config.steps import AssertEQ, SubprocessStep
+from hyalus.config.tags import Resources, Short
+from hyalus.run import graph
+
+
+class TestStepDependencies:
+    """Tests for the step_dependencies function"""
+
+    def test_undeclared(self):
+        """Test that steps that do not declare dependencies wait for every step before them"""
+        steps = [AssertEQ(1, 1), AssertEQ(1, 1), AssertEQ(1, 1)]
+
+        assert graph.step_dependencies(steps) == [set(), {0}, {0, 1}]
+
+    def test_declared(self):
+        """Test that steps that declare dependencies only wait for those steps"""
+        pipeline_a = SubprocessStep(["true"]).depends_on()
+        pipeline_b = SubprocessStep(["true"]).depends_on()
+        steps = [pipeline_a, pipeline_b, AssertEQ(1, 1).depends_on(pipeline_b), AssertEQ(1, 1)]
+
+        assert graph.step_dependencies(steps) == [set(), set(), {1}, {0, 1, 2}]
+
+    def test_files(self):
+        """Test that steps depending on files wait for the steps producing them"""
+        steps = [
+            SubprocessStep(["true"]).depends_on().produces("output/a"),
+            SubprocessStep(["true"]).depends_on().produces("output/b.json"),
+            AssertEQ(1, 1).depends_on("output/a/result.json", "input/data.json"),
+        ]
+
+        assert graph.step_dependencies(steps)[2] == {0}
+
+    def test_later_step(self):
+        """Test that depending on a step that does not come before is invalid"""
+        later = AssertEQ(1, 1)
+
+        with pytest.raises(graph.InvalidStepGraph):
+            graph.step_dependencies([AssertEQ(1, 1).depends_on(later), later])
+
+
+class TestStepParallelism:
+    """Tests for the step_parallelism function"""
+
+    @pytest.mark.parametrize(
+        "tags, expected",
+        [
+            ([Short()], 1),
+            ([Short(), Resources(cpus=4)], 4),
+            ([Short(), Resources(cpus=2.5)], 2),
+            ([Short(), Resources(cpus=0)], 1),
+        ],
+    )
+    def test_step_parallelism(self, tags, expected):
+        """Test that as many steps run at once as the test declares CPUs"""
+        assert graph.step_parallelism(tags) == expected
@@ -0,0 +1,121 @@
+"""Tests for the hyalus.run.impact module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from hyalus.run import impact
+from hyalus.run.common import HyalusTest
+
+
+@pytest.fixture(name="tests")
+def fixture_tests(tmp_path):
+    """Three tests, in directories of their own"""
+    tests = [HyalusTest(tmp_path / "tests" / name) for name in ("a", "b", "c")]
+
+    for test in tests:
+        test.mkdir(parents=True)
+
+    return tests
+
+
+class TestDependencyRecorder:
+    """Tests for the DependencyRecorder class"""
+
+    def test_record(self, tmp_path, monkeypatch):
+        """Test that imported modules and opened files are recorded, except within excluded directories"""
+        (tmp_path / "impact_helper.py").write_text("VALUE = 1\n", encoding="utf-8")
+        (tmp_path / "data.txt").write_text("data\n", encoding="utf-8")
+        (excluded := tmp_path / "excluded").mkdir()
+        (excluded / "output.txt").write_text("output\n", encoding="utf-8")
+
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, "impact_helper", raising=False)
+
+        with impact.DependencyRecorder(exclude=[excluded]) as recorder:
+            __import__("impact_helper")
+            (tmp_path / "data.txt").read_text(encoding="utf-8")
+            (excluded / "output.txt").read_text(encoding="utf-8")
+
+        assert str(tmp_path / "impact_helper.py") in recorder.paths
+        assert str(tmp_path / "data.txt") in recorder.paths
+        assert str(excluded / "output.txt") not in recorder.paths
+        assert os.path.realpath(json.__file__) not in recorder.paths
+
+    def test_inactive(self, tmp_path):
+        """Test that files opened once the recorder has stopped are not recorded"""
+        (tmp_path / "data.txt").write_text("data\n", encoding="utf-8")
+
+        with impact.DependencyRecorder() as recorder:
+            pass
+
+        (tmp_path / "data.txt").read_text(encoding="utf-8")
+
+        assert not recorder.opened
+
+
+class TestImpactMap:
+    """Tests for the ImpactMap class"""
+
+    def test_affected(self, tmp_path, tests):
+        """Test that tests are affected by changes to their recorded dependencies and to the tests themselves"""
+        impact_map = impact.ImpactMap(tmp_path)
+        impact_map.record(tests[0], [str(tmp_path / "src" / "module_a.py")])
+        impact_map.record(tests[1], [str(tmp_path / "src" / "module_b.py")])
+
+        assert impact_map.affected(tests[:2], [tmp_path / "src" / "module_a.py"]) == [tests[0]]
+        assert impact_map.affected(tests[:2], [tmp_path / "src"]) == tests[:2]
+        assert impact_map.affected(tests[:2], [tests[1] / "config.py"]) == [tests[1]]
+        assert impact_map.affected(tests[:2], [tmp_path / "tests"]) == tests[:2]
+        assert not impact_map.affected(tests[:2], [tmp_path / "README.md"])
+
+    def test_affected_not_recorded(self, tmp_path, tests):
+        """Test that tests with nothing recorded are always affected"""
+        impact_map = impact.ImpactMap(tmp_path)
+        impact_map.record(tests[0], [])
+
+        assert impact_map.affected(tests, [tmp_path / "README.md"]) == tests[1:]
+
+    def test_record_replaces(self, tmp_path, tests):
+        """Test that recording the dependencies of a test replaces those recorded before"""
+        impact_map = impact.ImpactMap(tmp_path)
+        impact_map.record(tests[0], ["/src/old.py"])
+        impact_map.record(tests[0], ["/src/new.py"])
+
+        assert impact_map.dependencies(tests) == {tests[0]: {"/src/new.py"}, tests[1]: None, tests[2]: None}
+
+
+class TestChangedPaths:
+    """Tests for the changed_paths function"""
+
+    def test_paths(self, tmp_path, monkeypatch):
+        """Test that paths that are not a git revision are taken as the changed paths themselves"""
+        monkeypatch.chdir(tmp_path)
+
+        assert impact.changed_paths(["a.py", "src"]) == {tmp_path / "a.py", tmp_path / "src"}
+
+    def test_git_revision(self, tmp_path, monkeypatch):
+        """Test that files changed since a git revision, including untracked files, are changed"""
+        monkeypatch.chdir(tmp_path)
+
+        def git(*args):
+            identity = ["-c", "user.name=hyalus", "-c", "user.email=hyalus@localhost"]
+            subprocess.run(["git", *identity, *args], check=True, capture_output=True)
+
+        (tmp_path / "kept.py").write_text("", encoding="utf-8")
+        (tmp_path / "changed.py").write_text("", encoding="utf-8")
+        git("init", "-q")
+        git("add", ".")
+        git("commit", "-q", "-m", "Initial")
+
+        (tmp_path / "changed.py").write_text("CHANGED = True\n", encoding="utf-8")
+        (tmp_path / "new.py").write_text("", encoding="utf-8")
+
+        assert impact.changed_paths(["HEAD"]) == {tmp_path / "changed.py", tmp_path / "new.py"}
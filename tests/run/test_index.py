@@ -0,0 +1,106 @@
+"""Tests for the hyalus.run.index module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import json
+import os
+
+import pytest
+
+from hyalus.config.common import ConfigStatus
+from hyalus.run import index
+
+
+@pytest.fixture(name="config")
+def fixture_config(tmp_path):
+    """A config.py within a test directory in a temporary search directory"""
+    test_dir = tmp_path / "test_1"
+    test_dir.mkdir()
+
+    config = test_dir / "config.py"
+    config.write_text("TAGS = []\n", encoding="utf-8")
+
+    return config
+
+
+class TestDiscoveryIndex:
+    """Tests for the DiscoveryIndex class"""
+
+    def test_get_missing(self, tmp_path, config):
+        """Test that a config that was never indexed has no entry"""
+        discovery_index = index.DiscoveryIndex(tmp_path)
+
+        assert discovery_index.get(config, config.stat()) is None
+
+    def test_set_and_get(self, tmp_path, config):
+        """Test that a freshly indexed config is served back from the index"""
+        discovery_index = index.DiscoveryIndex(tmp_path)
+
+        entry = discovery_index.update(config, config.stat(), True, ConfigStatus.VALID, ["short"])
+
+        assert discovery_index.get(config, config.stat()) == entry
+
+    def test_save_and_load(self, tmp_path, config):
+        """Test that entries persist across index instances"""
+        discovery_index = index.DiscoveryIndex(tmp_path)
+        entry = discovery_index.update(config, config.stat(), False, ConfigStatus.MISSING_FIELDS, [])
+        discovery_index.save()
+
+        assert (tmp_path / index.INDEX_FILE).is_file()
+        assert index.DiscoveryIndex(tmp_path).get(config, config.stat()) == entry
+
+    def test_get_stale_content(self, tmp_path, config):
+        """Test that an entry is stale once the config's content changes"""
+        discovery_index = index.DiscoveryIndex(tmp_path)
+        discovery_index.update(config, config.stat(), True, ConfigStatus.VALID, [])
+
+        config.write_text("TAGS = [Short()]\n", encoding="utf-8")
+
+        assert discovery_index.get(config, config.stat()) is None
+
+    def test_get_touched_same_content(self, tmp_path, config):
+        """Test that an entry stays fresh if the config's mtime changes but its content hash does not"""
+        discovery_index = index.DiscoveryIndex(tmp_path)
+        discovery_index.update(config, config.stat(), True, ConfigStatus.VALID, ["short"])
+
+        stat = config.stat()
+        os.utime(config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        entry = discovery_index.get(config, config.stat())
+
+        assert entry is not None
+        assert entry.tags == ["short"]
+        assert entry.mtime_ns == config.stat().st_mtime_ns
+
+    def test_prune(self, tmp_path, config):
+        """Test that entries for configs not in the given set are removed"""
+        discovery_index = index.DiscoveryIndex(tmp_path)
+        discovery_index.update(config, config.stat(), True, ConfigStatus.VALID, [])
+
+        discovery_index.prune(set())
+
+        assert not discovery_index.entries
+
+    def test_load_outdated_version(self, tmp_path, config):
+        """Test that an index file written by a different index version is ignored"""
+        with open(tmp_path / index.INDEX_FILE, 'w', encoding="utf-8") as fh:
+            json.dump({"version": index.INDEX_VERSION + 1, "entries": {str(config): {}}}, fh)
+
+        assert not index.DiscoveryIndex(tmp_path).entries
+
+    def test_load_corrupt(self, tmp_path):
+        """Test that an unparseable index file is treated as an empty index"""
+        (tmp_path / index.INDEX_FILE).write_text("{not json", encoding="utf-8")
+
+        assert not index.DiscoveryIndex(tmp_path).entries
+
+    def test_save_unwritable(self, tmp_path, config):
+        """Test that failing to write the index file is not an error"""
+        discovery_index = index.DiscoveryIndex(tmp_path / "does_not_exist")
+        discovery_index.update(config, config.stat(), True, ConfigStatus.VALID, [])
+
+        discovery_index.save()
+
+        assert not discovery_index.index_file.exists()
@@ -0,0 +1,136 @@
+"""Tests for the hyalus.run.pool module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import multiprocessing
+import os
+from pathlib import Path
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from hyalus.run.pool import WorkerPool, preload
+
+pytestmark = pytest.mark.skipif(sys.platform != "linux", reason="Process groups are checked via /proc")
+
+
+def _is_running(pid: int) -> bool:
+    """:return: True if the process exists and has not exited (zombies are not running), else False"""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return False
+
+    return "zombie" not in status
+
+
+def _hang(pid_file: Path) -> None:
+    """Start a subprocess that outlives the test, record its PID, and then hang"""
+    process = subprocess.Popen(["sleep", "60"])  # pylint: disable=consider-using-with
+    pid_file.write_text(str(process.pid), encoding="utf-8")
+    time.sleep(60)
+
+
+def _ignore_sigterm() -> None:
+    """Hang, ignoring requests to terminate"""
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    time.sleep(60)
+
+
+def _raise() -> None:
+    """Raise an error"""
+    raise ValueError("Bad value")
+
+
+def _imported(module: str) -> bool:
+    """:return: True if the module is imported in this process, else False"""
+    return module in sys.modules
+
+
+class TestPreload:
+    """Tests for the preload function"""
+
+    def test_fork(self, tmp_path, monkeypatch):
+        """Test that forked workers start with preloaded modules already imported"""
+        (tmp_path / "hyalus_preload_test.py").write_text("", encoding="utf-8")
+        monkeypatch.syspath_prepend(tmp_path)
+        monkeypatch.delitem(sys.modules, "hyalus_preload_test", raising=False)
+
+        with WorkerPool(multiprocessing.get_context("fork"), preload_modules=["hyalus_preload_test"]) as pool:
+            pool.submit("a", _imported, ("hyalus_preload_test",))
+
+            assert pool.wait().value
+
+    def test_missing_module(self):
+        """Test that modules that cannot be imported are left out"""
+        assert preload(["json", "hyalus_no_such_module"], multiprocessing.get_context("fork")) == ["json"]
+
+    def test_spawn(self):
+        """Test that nothing can be preloaded for spawned workers"""
+        assert not preload(["json"], multiprocessing.get_context("spawn"))
+
+
+class TestWorkerPool:
+    """Tests for the WorkerPool class"""
+
+    def test_results(self):
+        """Test that the result of each task is returned as it finishes"""
+        with WorkerPool() as pool:
+            pool.submit("slow", time.sleep, (0.5,))
+            pool.submit("fast", pow, (2, 3))
+
+            assert pool.wait() == ("fast", 8, None, False)
+            assert pool.wait() == ("slow", None, None, False)
+            assert not pool
+
+    def test_error(self):
+        """Test that errors raised by a task are returned with their traceback"""
+        with WorkerPool() as pool:
+            pool.submit("a", _raise)
+
+            result = pool.wait()
+
+        assert result.value is None
+        assert "ValueError: Bad value" in result.error
+
+    def test_crash(self):
+        """Test that a worker exiting without a result is reported as an error"""
+        with WorkerPool() as pool:
+            pool.submit("a", os._exit, (3,))
+
+            assert pool.wait().error == "Worker exited unexpectedly (exit code 3)"
+
+    def test_timeout(self, tmp_path):
+        """Test that a task missing its deadline is terminated along with the rest of its process group, while other
+        tasks keep running
+        """
+        pid_file = tmp_path / "pid"
+
+        with WorkerPool(kill_grace=5) as pool:
+            pool.submit("hung", _hang, (pid_file,), timeout=0.5)
+            pool.submit("ok", time.sleep, (1,))
+
+            result = pool.wait()
+
+            assert (result.key, result.timed_out) == ("hung", True)
+            assert pool.wait().key == "ok"
+
+        time.sleep(0.1)
+        assert not _is_running(int(pid_file.read_text(encoding="utf-8")))
+
+    def test_kill(self):
+        """Test that a task ignoring SIGTERM is killed after the grace period"""
+        start = time.monotonic()
+
+        with WorkerPool(kill_grace=0.5) as pool:
+            pool.submit("a", _ignore_sigterm, timeout=0.5)
+
+            result = pool.wait()
+
+        assert result == ("a", None, None, True)
+        assert time.monotonic() - start < 30
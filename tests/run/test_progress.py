@@ -0,0 +1,83 @@
+"""Tests for the hyalus.run.progress module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import io
+
+import pytest
+
+from hyalus.run.common import HyalusTest
+from hyalus.run.progress import SuiteProgress
+
+# pylint: disable=duplicate-code
+TEST_A = HyalusTest("a")
+TEST_B = HyalusTest("b")
+TEST_C = HyalusTest("c")
+
+
+@pytest.fixture(name="streams")
+def fixture_streams():
+    """Output and progress streams"""
+    return io.StringIO(), io.StringIO()
+
+
+class TestSuiteProgress:
+    """Tests for the SuiteProgress class"""
+
+    def test_counts(self, streams):
+        """Test counting of passed, failed, running, and remaining tests"""
+        progress = SuiteProgress({TEST_A: 10, TEST_B: 20, TEST_C: 30}, 2, *streams)
+
+        progress.started(TEST_C)
+        progress.started(TEST_B)
+        progress.finished(TEST_C, False)
+
+        assert (progress.passed, progress.failed, len(progress.running), progress.remaining) == (0, 1, 1, 1)
+        assert progress.results == {TEST_C: False}
+        assert progress.line().startswith("0 passed, 1 failed, 1 running, 1 remaining | ")
+
+        progress.abort("Stopping")
+
+        assert (len(progress.running), progress.remaining, progress.cancelled) == (0, 0, 2)
+
+    def test_requeued(self, streams):
+        """Test that a requeued test counts as remaining again"""
+        out, progress_stream = streams
+        progress = SuiteProgress({TEST_A: 10, TEST_B: 20}, 2, out, progress_stream)
+
+        progress.started(TEST_A)
+        progress.requeued(TEST_A, "a: requeued")
+
+        assert (len(progress.running), progress.remaining) == (0, 2)
+        assert out.getvalue() == "a: requeued\n"
+
+    def test_eta(self, streams):
+        """Test that the ETA spreads remaining work over the workers, but is at least the longest remaining test"""
+        assert SuiteProgress({TEST_A: 10, TEST_B: 20, TEST_C: 30}, 2, *streams).eta() == 30
+        assert SuiteProgress({TEST_A: 10, TEST_B: 10, TEST_C: 10}, 2, *streams).eta() == 15
+
+    def test_not_live(self, streams):
+        """Test that test output is written as-is when the progress line is not drawn"""
+        out, progress_stream = streams
+        progress = SuiteProgress({TEST_A: 10}, 1, out, progress_stream, live=False)
+
+        progress.started(TEST_A)
+        progress.finished(TEST_A, True, "a: SUCCESS\n")
+        progress.close()
+
+        assert out.getvalue() == "a: SUCCESS\n"
+        assert not progress_stream.getvalue()
+
+    def test_live(self, streams):
+        """Test that the progress line is cleared before test output is written and redrawn after"""
+        out, progress_stream = streams
+        progress = SuiteProgress({TEST_A: 10}, 1, out, progress_stream, live=True)
+
+        progress.started(TEST_A)
+        progress.finished(TEST_A, True, "a: SUCCESS\n")
+        progress.close()
+
+        assert out.getvalue() == "a: SUCCESS\n"
+        assert progress_stream.getvalue().endswith("1 passed, 0 failed, 0 running, 0 remaining | 0:00:00 elapsed\n")
@@ -0,0 +1,95 @@
+"""Tests for the hyalus.run.report module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import json
+from xml.etree import ElementTree
+
+import pytest
+
+from hyalus.run import report
+from hyalus.run.common import HyalusTest, RunStatus
+from hyalus.run.report import StepReport, SuiteReport
+
+
+def _report(tmp_path, name: str, status: RunStatus, **kwargs) -> report.TestReport:
+    """:return: Report of a test in a "suite" directory"""
+    return report.TestReport(str(tmp_path / "suite" / name), name, status, **kwargs)
+
+
+class TestTestReport:
+    """Tests for the TestReport class"""
+
+    def test_round_trip(self, tmp_path):
+        """Test that a report survives being converted to JSON and back"""
+        test_report = _report(
+            tmp_path,
+            "test_1",
+            RunStatus.FAILURE,
+            run_dir="/runs/test_1",
+            start=1.0,
+            wall_time=2.0,
+            cpu_time=0.5,
+            failed_step="2 (AssertEQ)",
+            steps=(
+                StepReport(1, "RunFunctionStep", "PASS", 1.0, 1.0, 0.5),
+                StepReport(2, "AssertEQ", "FAIL", 2.0, 1.0, 0),
+            ),
+        )
+
+        assert report.TestReport.from_dict(json.loads(json.dumps(test_report.to_dict()))) == test_report
+
+    @pytest.mark.parametrize("data", [None, {}, {"test": "a", "name": "a", "status": 9}, {"test": "a", "bad": 1}])
+    def test_from_dict_invalid(self, data):
+        """Test that invalid reports are rejected"""
+        with pytest.raises(ValueError):
+            report.TestReport.from_dict(data)
+
+    def test_lost(self, tmp_path):
+        """Test reporting on a test that could not report on itself"""
+        test_report = report.TestReport.lost(HyalusTest(tmp_path / "test_1"), "Worker crashed")
+
+        assert (test_report.name, test_report.status) == ("test_1", RunStatus.ERROR)
+        assert test_report.message == "Worker crashed"
+
+
+class TestSuiteReport:
+    """Tests for the SuiteReport class"""
+
+    def test_jsonl(self, tmp_path):
+        """Test that each report is written as a line of JSON as soon as it is added"""
+        jsonl = tmp_path / "report.jsonl"
+        reports = [_report(tmp_path, "test_1", RunStatus.SUCCESS), _report(tmp_path, "test_2", RunStatus.ERROR)]
+
+        with SuiteReport(jsonl=jsonl) as suite:
+            suite.add(reports[0])
+
+            assert jsonl.read_text(encoding="utf-8").count("\n") == 1
+
+            suite.add(reports[1])
+
+        lines = jsonl.read_text(encoding="utf-8").splitlines()
+
+        assert [report.TestReport.from_dict(json.loads(line)) for line in lines] == reports
+
+    def test_junit(self, tmp_path):
+        """Test that failures and errors are written as JUnit XML testcases"""
+        junit = tmp_path / "junit.xml"
+
+        with SuiteReport(junit=junit) as suite:
+            suite.add(_report(tmp_path, "test_1", RunStatus.SUCCESS, wall_time=1.5, run_dir="/runs/test_1"))
+            suite.add(_report(tmp_path, "test_2", RunStatus.FAILURE, failed_step="2 (AssertEQ)", message="x"))
+            suite.add(_report(tmp_path, "test_3", RunStatus.ERROR, message="Traceback\nRuntimeError: boom\n"))
+
+        suite = ElementTree.parse(junit).getroot().find("testsuite")
+        cases = {case.get("name"): case for case in suite.iter("testcase")}
+
+        assert (suite.get("tests"), suite.get("failures"), suite.get("errors")) == ("3", "1", "1")
+        assert cases["test_1"].get("classname") == "suite"
+        assert cases["test_1"].get("time") == "1.500"
+        assert cases["test_1"].find("system-out").text == "Run directory: /runs/test_1"
+        assert cases["test_2"].find("failure").get("message") == "Step 2 (AssertEQ) failed"
+        assert cases["test_3"].find("error").get("message") == "RuntimeError: boom"
+        assert not (tmp_path / ".junit.xml.tmp").exists()
@@ -4,17 +4,105 @@ __author__ = "David McConnell"
 __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
+import json
 from pathlib import Path
+import shutil
+import stat
+import subprocess
+import sys
+import time
+from xml.etree import ElementTree
 
 import pytest
 
+from hyalus.config import analyzer
+from hyalus.config.common import CONFIG_PY, HYALUS_LOG, HYALUS_PATH, STEP_LOG
+from hyalus.run.catalog import RunCatalog
+from hyalus.run.common import HyalusTest, RunStatus
+from hyalus.run import report, shared
 from hyalus.run.runsuite import HyalusSuiteRunner, NoTestsFound
+from hyalus.run.schedule import longest_first
+from hyalus.run.stats import RuntimeEntry, RuntimeHistory
 
 # pylint: disable=duplicate-code
 OUTER_DIR = Path(__file__).parent
 TEST_DIR_1 = OUTER_DIR / "test_dir_1"
 TEST_DIR_2 = OUTER_DIR / "test_dir_2"
 
+COMMAND_CONFIG = """
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__created_on__ = "2023-03-15"
+
+from hyalus.config.steps import {step}
+from hyalus.config.tags import Short
+
+TEST_DESCRIPTION = "Runs a command"
+INPUT_DATA = "N/A, no input data"
+
+STEPS = [{step}({cmd})]
+
+TAGS = [Short()]
+"""
+
+SHARED_SETUP_CONFIG = """
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__created_on__ = "2023-03-15"
+
+from hyalus.config.steps import RunFunctionStep
+from hyalus.config.tags import Short, SharedSetup
+
+TEST_DESCRIPTION = "Checks the result of a shared setup function"
+INPUT_DATA = "N/A, no input data"
+
+
+def check_model():
+    from hyalus.run.shared import shared_state
+
+    assert shared_state("hyalus_suite_setups:load_model") == {"weights": [1, 2, 3]}
+
+
+STEPS = [RunFunctionStep(check_model)]
+
+TAGS = [Short(), SharedSetup("hyalus_suite_setups:load_model")]
+"""
+
+SETUP_MODULE = """
+from pathlib import Path
+
+
+def load_model():
+    with open(Path(__file__).with_name("loads.txt"), "a", encoding="utf-8") as fh:
+        fh.write("load\\n")
+
+    return {"weights": [1, 2, 3]}
+"""
+
+# Runs a suite in a process of its own, exiting once the suite is done
+SUITE_RUN = (
+    "import sys; from hyalus.run.runsuite import HyalusSuiteRunner; "
+    "HyalusSuiteRunner(to_run=[sys.argv[1]], runs_dir=sys.argv[2], {mode}=True).run()"
+)
+
+
+def _make_stuck_test(tmp_path: Path) -> HyalusTest:
+    """Copy runtest_1 to tmp_path/tests, with a first Step sleeping well past the test's timeout of 0.6 seconds
+
+    :return: The test
+    """
+    test = HyalusTest(tmp_path / "tests" / "runtest_1")
+    shutil.copytree(TEST_DIR_1 / "runtest_1", test)
+
+    config = test.config.read_text(encoding="utf-8")
+    config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, Timeout")
+    config = config.replace("FunctionalTest()]", "FunctionalTest(), Timeout(0.01)]")
+    config = config.replace("from hyalus.config.steps", "import time\nfrom hyalus.config.steps")
+    config = config.replace("STEPS = [", "STEPS = [\n    RunFunctionStep(time.sleep, 60),")
+    test.config.write_text(config, encoding="utf-8")
+
+    return test
+
 
 @pytest.fixture(name="runs_dir", scope="module")
 def fixture_runs_dir(tmp_path_factory):
@@ -22,6 +110,48 @@ def fixture_runs_dir(tmp_path_factory):
     return tmp_path_factory.mktemp("runs_dir")
 
 
+def _make_fixture_tests(tests_dir: Path, fail: bool = False) -> list[HyalusTest]:
+    """Copy runtest_1 into tests_dir as a suite fixture writing output/food.json, and as two tests reading it
+
+    :param fail: Make the fixture fail
+    :return: The tests using the fixture
+    """
+    fixture = HyalusTest(tests_dir / "fixture")
+    shutil.copytree(TEST_DIR_1 / "runtest_1", fixture)
+
+    config = fixture.config.read_text(encoding="utf-8")
+    config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, SuiteFixture")
+    config = config.replace("FunctionalTest()]", "FunctionalTest(), SuiteFixture()]")
+    fixture.config.write_text(config.replace('"Ozo"),', '"Starbucks"),') if fail else config, encoding="utf-8")
+
+    tests = []
+
+    for name in ("uses_fixture_1", "uses_fixture_2"):
+        test = HyalusTest(tests_dir / name)
+        shutil.copytree(TEST_DIR_1 / "runtest_1", test)
+
+        config = test.config.read_text(encoding="utf-8")
+        config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, UsesFixture")
+        config = config.replace("FunctionalTest()]", 'FunctionalTest(), UsesFixture("fixture")]')
+        config = config.replace('AssertEQ(("output/food.json"', 'AssertEQ(("fixtures/fixture/food.json"')
+        test.config.write_text(config, encoding="utf-8")
+
+        tests.append(test)
+
+    return tests
+
+
+def _make_command_test(test: Path, cmd: str, step: str = "AsyncSubprocessStep") -> None:
+    """Write a test that runs the given command with an AsyncSubprocessStep, or the given Step
+
+    :param test: Path to the test
+    :param cmd: The command, as a python list literal
+    :param step: Name of the Step running the command
+    """
+    test.mkdir(parents=True)
+    (test / CONFIG_PY).write_text(COMMAND_CONFIG.format(cmd=cmd, step=step), encoding="utf-8")
+
+
 class TestHyalusSuiteRunner:
     """Tests for the HyalusSuiteRunner class"""
 
@@ -185,3 +315,474 @@ class TestHyalusSuiteRunner:
         runner = HyalusSuiteRunner(to_run=to_run, runs_dir=runs_dir, search_dirs=search_dirs)
 
         assert not runner.run_test(3)
+
+    def test_schedule(self, tmp_path):
+        """Test that tests are scheduled longest first, using recorded durations when available"""
+        RuntimeHistory(tmp_path).record("runtest_1", RunStatus.SUCCESS, 1e6, None)
+
+        runner = HyalusSuiteRunner(runs_dir=tmp_path)
+        tests = [HyalusTest(TEST_DIR_1 / name) for name in ("runtest_2", "runtest_1", "runtest_7")]
+
+        assert runner.schedule(tests) == [tests[1], tests[2], tests[0]]
+
+    def test_schedule_affinity(self, tmp_path):
+        """Test that tests declaring the same dataset are started back to back"""
+        tests = []
+
+        for name, tag in (("runtest_2", "Medium"), ("runtest_1", "Short"), ("runtest_7", "Long")):
+            test = HyalusTest(tmp_path / "tests" / name)
+            shutil.copytree(TEST_DIR_1 / name, test)
+
+            if name != "runtest_2":
+                config = test.config.read_text(encoding="utf-8")
+                config = config.replace(f"import {tag}", f"import {tag}, Dataset")
+                config = config.replace("TAGS = [", 'TAGS = [Dataset("genome"), ')
+                test.config.write_text(config, encoding="utf-8")
+
+            tests.append(test)
+
+        runner = HyalusSuiteRunner(runs_dir=tmp_path)
+
+        assert runner.schedule(tests) == [tests[2], tests[1], tests[0]]
+
+    def test_run_one_job(self, runs_dir):
+        """Test that every test is run when only one test may run at a time"""
+        runner = HyalusSuiteRunner(
+            to_run=["runtest_1", "runtest_7"], runs_dir=runs_dir, search_dirs=[TEST_DIR_1], jobs=1, cleanup_on_pass=True
+        )
+
+        assert runner.run()
+
+    def test_run_output(self, tmp_path, capsys):
+        """Test that the output of each test is written by the suite as the test finishes"""
+        runner = HyalusSuiteRunner(to_run=["runtest_1", "runtest_2"], runs_dir=tmp_path, search_dirs=[TEST_DIR_1])
+
+        assert not runner.run()
+
+        lines = capsys.readouterr().out.splitlines()
+
+        assert len(lines) == 2
+        assert any(line.endswith(": SUCCESS") and "runtest_1_" in line for line in lines)
+        assert any(line.endswith(": FAILURE") and "runtest_2_" in line for line in lines)
+
+    def test_run_maxfail(self, tmp_path, capsys):
+        """Test that the suite stops starting tests once maxfail tests have failed"""
+        to_run = ["runtest_1", "runtest_2", "runtest_7"]
+
+        runner = HyalusSuiteRunner(to_run=to_run, runs_dir=tmp_path, search_dirs=[TEST_DIR_1], jobs=1, maxfail=1)
+
+        assert not runner.run()
+
+        out = capsys.readouterr().out
+
+        assert "runtest_2_" in out
+        assert "Stopping after 1 failed test(s)" in out
+        assert not list(tmp_path.glob("runtest_1_*"))
+
+    def test_run_timeout(self, tmp_path, capsys):
+        """Test that a test running past its timeout is stopped and marked as an error while other tests still run"""
+        test = _make_stuck_test(tmp_path)
+
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        runner = HyalusSuiteRunner(to_run=[test, TEST_DIR_1 / "runtest_7"], runs_dir=runs_dir, cleanup_on_pass=True)
+
+        assert not runner.run()
+
+        out = capsys.readouterr().out
+        (run_dir,) = runs_dir.glob("runtest_1_*")
+
+        assert f"{run_dir}: ERROR\nTimed out after 0:00:01 during step 1" in out
+        assert "runtest_7_" in out
+        assert "Timed out after 0:00:01 during step 1" in (run_dir / HYALUS_LOG).read_text(encoding="utf-8")
+        assert RunCatalog(runs_dir).find(test_names=["runtest_1"])[0].status is RunStatus.ERROR
+
+    def test_run_memory_limit(self, tmp_path, capsys):
+        """Test that a test allocating more than its memory limit is marked as an error while other tests still run"""
+        test = HyalusTest(tmp_path / "tests" / "runtest_1")
+        shutil.copytree(TEST_DIR_1 / "runtest_1", test)
+
+        config = test.config.read_text(encoding="utf-8")
+        config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, Resources")
+        config = config.replace("FunctionalTest()]", "FunctionalTest(), Resources(memory=0.5)]")
+        config = config.replace("STEPS = [", "STEPS = [\n    RunFunctionStep(bytearray, 2 * 1024**3),")
+        test.config.write_text(config, encoding="utf-8")
+
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        runner = HyalusSuiteRunner(
+            to_run=[test, TEST_DIR_1 / "runtest_7"], runs_dir=runs_dir, cleanup_on_pass=True, memory_limit_multiplier=1
+        )
+
+        assert not runner.run()
+
+        out = capsys.readouterr().out
+        (run_dir,) = runs_dir.glob("runtest_1_*")
+
+        assert f"{run_dir}: ERROR" in out
+        assert "ran out of memory" in out
+        assert "runtest_7_" in out
+
+    @pytest.mark.parametrize("fork_after_setup, loads", [(False, 2), (True, 1)])
+    def test_run_fork_after_setup(self, tmp_path, monkeypatch, fork_after_setup, loads):
+        """Test that tests sharing a setup function each call it, unless they are forked after it is called once"""
+        (tmp_path / "hyalus_suite_setups.py").write_text(SETUP_MODULE, encoding="utf-8")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(shared, "_results", {})
+        monkeypatch.setattr(shared, "_errors", {})
+
+        for name in ("shared_1", "shared_2"):
+            (tmp_path / "tests" / name).mkdir(parents=True)
+            (tmp_path / "tests" / name / CONFIG_PY).write_text(SHARED_SETUP_CONFIG, encoding="utf-8")
+
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        runner = HyalusSuiteRunner(
+            to_run=["shared_1", "shared_2"],
+            runs_dir=runs_dir,
+            search_dirs=[tmp_path / "tests"],
+            fork_after_setup=fork_after_setup,
+        )
+
+        try:
+            assert runner.run()
+        finally:
+            sys.modules.pop("hyalus_suite_setups", None)
+
+        assert (tmp_path / "loads.txt").read_text(encoding="utf-8").count("load") == loads
+
+    def test_run_fixtures(self, tmp_path, capsys):
+        """Test that a suite fixture is run once before the tests using it, and not again while it is unchanged"""
+        tests = _make_fixture_tests(tmp_path / "tests")
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        runner = HyalusSuiteRunner(to_run=tests, runs_dir=runs_dir, search_dirs=[tmp_path / "tests"])
+
+        assert runner.run()
+
+        (fixture_run,) = runs_dir.glob("fixture_*")
+        (uses_fixture_run, _) = runs_dir.glob("uses_fixture_*")
+
+        assert not (fixture_run / "output" / "food.json").stat().st_mode & stat.S_IWUSR
+        assert (uses_fixture_run / "fixtures" / "fixture").resolve() == (fixture_run / "output").resolve()
+
+        capsys.readouterr()
+
+        assert runner.run()
+        assert f"{fixture_run}: SUCCESS (CACHED)" in capsys.readouterr().out
+        assert len(list(runs_dir.glob("fixture_*"))) == 1
+
+    def test_run_fixture_failed(self, tmp_path, capsys):
+        """Test that tests using a suite fixture that failed are reported as errors without being run"""
+        tests = _make_fixture_tests(tmp_path / "tests", fail=True)
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        runner = HyalusSuiteRunner(to_run=tests, runs_dir=runs_dir, search_dirs=[tmp_path / "tests"])
+
+        assert not runner.run()
+
+        out = capsys.readouterr().out
+
+        assert f"{tests[0]}: ERROR\nSuite fixture fixture did not pass" in out
+        assert not list(runs_dir.glob("uses_fixture_*"))
+
+    def test_get_tests_skips_fixtures(self, tmp_path):
+        """Test that suite fixtures are not run as tests of a suite"""
+        tests = _make_fixture_tests(tmp_path)
+        runner = HyalusSuiteRunner(tags=["Short"], runs_dir=tmp_path, search_dirs=[tmp_path], use_index=False)
+
+        assert sorted(runner.get_tests()) == tests
+
+    def test_run_shard(self, tmp_path, capsys):
+        """Test that running every shard of a suite runs every test exactly once"""
+        for index in (1, 2, 3):
+            runner = HyalusSuiteRunner(
+                to_run=["runtest_1", "runtest_7"], runs_dir=tmp_path, search_dirs=[TEST_DIR_1], shard=(index, 3)
+            )
+            assert runner.run()
+
+        runs = sorted(run.name.rsplit("_", 2)[0] for run in tmp_path.iterdir() if run.is_dir())
+
+        assert runs == ["runtest_1", "runtest_7"]
+        assert "No tests in shard 3/3" in capsys.readouterr().out
+
+    def test_invalid_shard(self):
+        """Test that a shard index outside of the number of shards is rejected"""
+        with pytest.raises(ValueError):
+            HyalusSuiteRunner(to_run=["runtest_1"], shard=(3, 2))
+
+    def test_run_last_failed(self, tmp_path, capsys):
+        """Test that only the tests that failed last time are rerun"""
+        to_run = ["runtest_1", "runtest_2", "runtest_7"]
+
+        assert not HyalusSuiteRunner(to_run=to_run, runs_dir=tmp_path, search_dirs=[TEST_DIR_1]).run()
+        capsys.readouterr()
+
+        runner = HyalusSuiteRunner(to_run=to_run, runs_dir=tmp_path, search_dirs=[TEST_DIR_1], last_failed=True)
+
+        assert not runner.run()
+
+        lines = capsys.readouterr().out.splitlines()
+
+        assert len(lines) == 1 and "runtest_2_" in lines[0]
+
+    def test_run_last_failed_no_tests_given(self, tmp_path, capsys):
+        """Test that every test that failed last time is rerun when no tests are given"""
+        runner = HyalusSuiteRunner(to_run=["runtest_1", "runtest_2"], runs_dir=tmp_path, search_dirs=[TEST_DIR_1])
+
+        assert not runner.run()
+        capsys.readouterr()
+
+        assert not HyalusSuiteRunner(runs_dir=tmp_path, last_failed=True).run()
+        assert "runtest_2_" in capsys.readouterr().out
+
+    def test_record_unrun(self, tmp_path):
+        """Test that only tests that finished without running are recorded in the runtime history, without a duration"""
+        tests = [HyalusTest(TEST_DIR_1 / name) for name in ("runtest_1", "runtest_2", "runtest_7")]
+        runner = HyalusSuiteRunner(runs_dir=tmp_path)
+
+        runner.record_unrun(
+            [
+                report.TestReport(str(tests[0]), tests[0].name, RunStatus.SUCCESS, cached=True, wall_time=0),
+                report.TestReport.lost(tests[1], "Worker was killed"),
+                report.TestReport(str(tests[2]), tests[2].name, RunStatus.FAILURE, wall_time=1.0),
+            ]
+        )
+
+        assert runner.history.recent() == {
+            "runtest_1": [RuntimeEntry(RunStatus.SUCCESS, None, None)],
+            "runtest_2": [RuntimeEntry(RunStatus.ERROR, None, None)],
+        }
+        assert runner.history.failed(tests) == [tests[1]]
+
+    def test_run_last_failed_none(self, tmp_path, capsys):
+        """Test that nothing is run when no tests failed last time"""
+        assert HyalusSuiteRunner(to_run=["runtest_1"], runs_dir=tmp_path, search_dirs=[TEST_DIR_1]).run()
+
+        runner = HyalusSuiteRunner(to_run=["runtest_1"], runs_dir=tmp_path, search_dirs=[TEST_DIR_1], last_failed=True)
+
+        assert runner.run()
+        assert capsys.readouterr().out.endswith("No tests failed last time\n")
+
+    def test_run_time_budget(self, tmp_path, capsys):
+        """Test that only the tests expected to finish within the time budget are run"""
+        runner = HyalusSuiteRunner(
+            to_run=["runtest_1", "runtest_7"],
+            runs_dir=tmp_path,
+            search_dirs=[TEST_DIR_1],
+            jobs=1,
+            time_budget=10 * 60,
+        )
+
+        assert runner.run()
+
+        runs = [run.name.rsplit("_", 2)[0] for run in tmp_path.iterdir() if run.is_dir()]
+
+        assert runs == ["runtest_1"]
+        assert "Running 1 of 2 test(s) within the time budget of 0:10:00" in capsys.readouterr().out
+
+    def test_plan(self, tmp_path, capsys):
+        """Test that the planned tests are printed in the order they would be started in with their predicted start
+        times, and that nothing is run
+        """
+        runner = HyalusSuiteRunner(
+            to_run=["runtest_1", "runtest_2", "runtest_7"],
+            runs_dir=tmp_path,
+            search_dirs=[TEST_DIR_1],
+            jobs=1,
+            time_budget=60 * 60,
+            plan=True,
+        )
+
+        assert runner.run()
+
+        lines = capsys.readouterr().out.splitlines()
+
+        assert lines[0].split() == ["START", "DURATION", "VALUE", "TEST"]
+        assert lines[1].split() == ["0:00:00", "0:32:30", "2.00", str(TEST_DIR_1 / "runtest_2")]
+        assert lines[2].split() == ["0:32:30", "0:02:30", "2.00", str(TEST_DIR_1 / "runtest_1")]
+        assert lines[3] == "Planned 2 of 3 test(s), predicted to take 0:35:00 of a 1:00:00 budget"
+        assert not any(run.is_dir() for run in tmp_path.iterdir())
+
+    def test_schedule_failed_first(self, tmp_path):
+        """Test that tests that failed last time are started before all others, longest first within each group"""
+        tests = [HyalusTest(TEST_DIR_1 / name) for name in ("runtest_2", "runtest_1", "runtest_7")]
+        runner = HyalusSuiteRunner(runs_dir=tmp_path, failed_first=True, use_catalog=False)
+
+        assert runner.schedule(tests) == longest_first(tests)
+
+        runner.history.record_outcomes(
+            {tests[0]: RunStatus.FAILURE, tests[2]: RunStatus.ERROR, tests[1]: RunStatus.SUCCESS}
+        )
+
+        assert runner.schedule(tests) == longest_first([tests[0], tests[2]]) + [tests[1]]
+
+    def test_run_changed_since(self, tmp_path, capsys):
+        """Test that only the tests that read a changed file last time they ran are run again"""
+        (data := tmp_path / "data.txt").write_text("data\n", encoding="utf-8")
+
+        reader = HyalusTest(tmp_path / "tests" / "reader")
+        shutil.copytree(TEST_DIR_1 / "runtest_1", reader)
+
+        config = reader.config.read_text(encoding="utf-8")
+        config = config.replace("from hyalus.config.steps", "from pathlib import Path\nfrom hyalus.config.steps")
+        config = config.replace("STEPS = [", f"STEPS = [\n    RunFunctionStep(Path({str(data)!r}).read_text),")
+        reader.config.write_text(config, encoding="utf-8")
+
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+        to_run = [reader, TEST_DIR_1 / "runtest_7"]
+
+        assert HyalusSuiteRunner(to_run=to_run, runs_dir=runs_dir, cleanup_on_pass=True).run()
+        capsys.readouterr()
+
+        assert HyalusSuiteRunner(to_run=to_run, runs_dir=runs_dir, changed_since=[str(data)]).run()
+
+        out = capsys.readouterr().out
+
+        assert "reader_" in out and "runtest_7_" not in out
+
+        assert HyalusSuiteRunner(to_run=to_run, runs_dir=runs_dir, changed_since=[str(tmp_path / "other.txt")]).run()
+        assert capsys.readouterr().out == "No tests affected by changes\n"
+
+    def test_run_reports(self, tmp_path, runs_dir):
+        """Test that a suite writes a JSON-lines report and a JUnit XML report of its tests"""
+        jsonl, junit = tmp_path / "report.jsonl", tmp_path / "junit.xml"
+        to_run = [TEST_DIR_1 / "runtest_1", TEST_DIR_1 / "runtest_7"]
+
+        runner = HyalusSuiteRunner(
+            to_run=to_run, runs_dir=runs_dir, cleanup_on_pass=True, jsonl_report=jsonl, junit_report=junit
+        )
+
+        assert runner.run()
+
+        reports = [json.loads(line) for line in jsonl.read_text(encoding="utf-8").splitlines()]
+
+        assert sorted(report["name"] for report in reports) == ["runtest_1", "runtest_7"]
+        assert all(report["status"] == RunStatus.SUCCESS.value and report["steps"] for report in reports)
+        assert all(step["wall_time"] is not None for report in reports for step in report["steps"])
+
+        suite = ElementTree.parse(junit).getroot().find("testsuite")
+
+        assert (suite.get("tests"), suite.get("failures"), suite.get("errors")) == ("2", "0", "0")
+
+    def test_run_event_loop(self, tmp_path, capsys):
+        """Test running a suite on an event loop, reporting each test as it finishes"""
+        tests = [tmp_path / "tests" / "async_pass", tmp_path / "tests" / "async_fail"]
+        _make_command_test(tests[0], "['true']")
+        _make_command_test(tests[1], "['false']")
+
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        runner = HyalusSuiteRunner(to_run=tests, runs_dir=runs_dir, event_loop=True)
+
+        assert not runner.run()
+
+        lines = capsys.readouterr().out.splitlines()
+
+        assert any(line.endswith(": SUCCESS") and "async_pass_" in line for line in lines)
+        assert any(line.endswith(": ERROR") and "async_fail_" in line for line in lines)
+
+    def test_run_threads(self, tmp_path, capsys):
+        """Test running a suite on threads, with tests waiting on their commands at once, up to jobs at a time"""
+        tests = [tmp_path / "tests" / f"sleep_{index}" for index in range(4)] + [tmp_path / "tests" / "fail"]
+        for test in tests[:-1]:
+            _make_command_test(test, "['sleep', '1']", "SubprocessStep")
+        _make_command_test(tests[-1], "['false']", "SubprocessStep")
+
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        runner = HyalusSuiteRunner(
+            to_run=tests, runs_dir=runs_dir, jobs=5, cpu_capacity=5, threads=True, jsonl_report=tmp_path / "r"
+        )
+        start = time.monotonic()
+
+        assert not runner.run()
+        assert time.monotonic() - start < 3.5
+
+        lines = capsys.readouterr().out.splitlines()
+
+        assert sum(line.endswith(": SUCCESS") and "sleep_" in line for line in lines) == 4
+        assert any(line.endswith(": ERROR") and "fail_" in line for line in lines)
+        assert len((tmp_path / "r").read_text(encoding="utf-8").splitlines()) == 5
+
+    @pytest.mark.parametrize("mode", ["threads", "event_loop"])
+    def test_run_timeout_exit(self, tmp_path, mode):
+        """Test that a Step still running past its test's timeout does not keep the suite's process from exiting"""
+        test = _make_stuck_test(tmp_path)
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+        start = time.monotonic()
+
+        command = [sys.executable, "-c", SUITE_RUN.format(mode=mode), test, runs_dir]
+        subprocess.run(command, check=True, capture_output=True, timeout=30)
+
+        assert time.monotonic() - start < 30
+        assert RunCatalog(runs_dir).find()[0].status is RunStatus.ERROR
+
+    @pytest.mark.parametrize("mode, step", [("threads", "SubprocessStep"), ("event_loop", "AsyncSubprocessStep")])
+    def test_run_log_isolation(self, tmp_path, mode, step):
+        """Test that tests running at once in one process each log only to their own run's log files"""
+        names = ["alpha", "beta"]
+        for name in names:
+            _make_command_test(tmp_path / "tests" / name, f"['sh', '-c', 'sleep 0.5 # MARK_{name}']", step)
+
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        tests = [tmp_path / "tests" / name for name in names]
+
+        assert HyalusSuiteRunner(to_run=tests, runs_dir=runs_dir, jobs=2, cpu_capacity=2, **{mode: True}).run()
+
+        for name, other in (names, names[::-1]):
+            (run_dir,) = runs_dir.glob(f"{name}_*")
+            logs = [run_dir / HYALUS_LOG, run_dir / HYALUS_PATH / STEP_LOG.format(1, step)]
+
+            for log in logs:
+                text = log.read_text(encoding="utf-8")
+
+                assert f"MARK_{name}" in text
+                assert f"MARK_{other}" not in text
+
+    def test_run_loads_tags_once(self, tmp_path, monkeypatch):
+        """Test that the tags of each test are only loaded once while the suite runs"""
+        tests = [tmp_path / "tests" / f"true_{index}" for index in range(2)]
+        for test in tests:
+            _make_command_test(test, "['true']", "SubprocessStep")
+
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        loads = []
+        load_config_tags = analyzer._load_config_tags  # pylint: disable=protected-access
+        monkeypatch.setattr(analyzer, "_load_config_tags", lambda path: loads.append(path) or load_config_tags(path))
+
+        assert HyalusSuiteRunner(to_run=tests, runs_dir=runs_dir, threads=True).run()
+        assert sorted(loads) == sorted(test / CONFIG_PY for test in tests)
+
+    def test_event_loop_and_threads(self):
+        """Test that tests cannot be run both on an event loop and on threads"""
+        with pytest.raises(ValueError):
+            HyalusSuiteRunner(event_loop=True, threads=True)
+
+    def test_run_event_loop_concurrent(self, tmp_path):
+        """Test that tests waiting on their processes on an event loop wait at once, up to jobs at a time"""
+        tests = [tmp_path / "tests" / f"async_sleep_{index}" for index in range(8)]
+        for test in tests:
+            _make_command_test(test, "['sleep', '1']")
+
+        runs_dir = tmp_path / "runs"
+        runs_dir.mkdir()
+
+        runner = HyalusSuiteRunner(to_run=tests, runs_dir=runs_dir, jobs=8, event_loop=True, cleanup_on_pass=True)
+        start = time.monotonic()
+
+        assert runner.run()
+        assert time.monotonic() - start < 6
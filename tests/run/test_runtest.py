@@ -5,14 +5,21 @@ __author__ = "David McConnell"
 __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
+import asyncio
+import json
 import os
 from pathlib import Path
 import re
+import sqlite3
+import time
 
 import pytest
 
 from hyalus.config import common as config_common
 from hyalus.run import common as run_common, runtest
+from hyalus.run.catalog import CATALOG_FILE, RunCatalog
+from hyalus.run.common import RunStatus
+from hyalus.run.stats import RuntimeHistory
 
 # pylint: disable=duplicate-code
 OUTER_DIR = Path(__file__).parent
@@ -20,6 +27,57 @@ TEST_DIR_1 = OUTER_DIR / "test_dir_1"
 TEST_DIR_2 = OUTER_DIR / "test_dir_2"
 
 
+# Steps wait on each other, so that they only pass if run concurrently
+DAG_CONFIG = """
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__created_on__ = "2023-03-15"
+
+from hyalus.config.steps import RunFunctionStep, AssertEQ
+from hyalus.config.tags import Short, Medium, Resources
+
+TEST_DESCRIPTION = "Runs independent steps concurrently"
+INPUT_DATA = "N/A, no input data"
+
+
+def handshake(mine, theirs):
+    import logging
+    import time
+    from pathlib import Path
+
+    logging.getLogger(__name__).info(f"Writing {{mine}}")
+    Path(mine).write_text(mine, encoding="utf-8")
+
+    for _ in range(40):
+        if Path(theirs).exists():
+            return
+        time.sleep(0.05)
+
+    assert False, f"{{theirs}} was never written"
+
+
+def fail():
+    assert False, "Failed"
+
+
+{steps}
+
+TAGS = [Short(), Resources(cpus={cpus})]
+"""
+
+
+def _make_test(tmp_path: Path, steps: str, cpus: int = 2) -> Path:
+    """Write a test with the given STEPS definition to tmp_path/tests/dag_test
+
+    :return: Path to the test
+    """
+    test = tmp_path / "tests" / "dag_test"
+    test.mkdir(parents=True)
+    (test / config_common.CONFIG_PY).write_text(DAG_CONFIG.format(steps=steps, cpus=cpus), encoding="utf-8")
+
+    return test
+
+
 @pytest.fixture(name="runs_dir", scope="module")
 def fixture_runs_dir(tmp_path_factory):
     """Module-scope temp directory"""
@@ -159,3 +217,220 @@ class TestHyalusTestRunner:
 
         assert (run_dir / config_common.HYALUS_PATH / "3_AssertEQButFail_log.txt").exists()
         assert not (run_dir / config_common.HYALUS_PATH / "4_AssertEQ_log.txt").exists()
+
+    @pytest.mark.parametrize("test_name, status", [("runtest_4", RunStatus.FAILURE), ("runtest_3", RunStatus.ERROR)])
+    def test_run_cataloged(self, tmp_path, test_name, status):
+        """Test that the final status, duration, and size of a run are recorded in the run catalog"""
+        runner = runtest.HyalusTestRunner(test_name, tmp_path, search_dirs=[TEST_DIR_2])
+        runner.run()
+
+        (entry,) = RunCatalog(tmp_path).find()
+
+        assert entry.test_name == test_name
+        assert entry.status is status
+        assert entry.duration is not None
+        assert entry.size > 0
+
+    def test_run_cleanup_uncataloged(self, tmp_path):
+        """Test that a cleaned up passing run does not remain in the run catalog"""
+        runner = runtest.HyalusTestRunner("runtest_1", tmp_path, search_dirs=[TEST_DIR_1], cleanup_on_pass=True)
+
+        assert runner.run()
+
+        with sqlite3.connect(tmp_path / CATALOG_FILE) as connection:
+            assert not connection.execute("SELECT * FROM runs").fetchall()
+
+    def test_run_cached_pass(self, tmp_path, capsys):
+        """Test that a test that passed before with the same fingerprint is not run again"""
+        assert runtest.HyalusTestRunner("runtest_1", tmp_path, search_dirs=[TEST_DIR_1], use_cache=True).run()
+
+        run_count = len([sub_dir for sub_dir in tmp_path.iterdir() if sub_dir.is_dir()])
+        capsys.readouterr()
+
+        assert runtest.HyalusTestRunner("runtest_1", tmp_path, search_dirs=[TEST_DIR_1], use_cache=True).run()
+
+        assert len([sub_dir for sub_dir in tmp_path.iterdir() if sub_dir.is_dir()]) == run_count
+        assert capsys.readouterr().out.strip('\n') == f"{TEST_DIR_1 / 'runtest_1'}: SUCCESS (CACHED)"
+
+    def test_run_failure_not_cached(self, tmp_path):
+        """Test that failing tests are run again even when their fingerprint is unchanged"""
+        for _ in range(2):
+            assert not runtest.HyalusTestRunner("runtest_4", tmp_path, search_dirs=[TEST_DIR_2], use_cache=True).run()
+
+        assert len([sub_dir for sub_dir in tmp_path.iterdir() if sub_dir.is_dir()]) == 2
+
+    def test_run_concurrent_steps(self, tmp_path):
+        """Test that steps declaring their dependencies run concurrently, with each step logging to its own log"""
+        test = _make_test(
+            tmp_path,
+            "ping = RunFunctionStep(handshake, 'output/ping', 'output/pong').depends_on().produces('output/ping')\n"
+            "pong = RunFunctionStep(handshake, 'output/pong', 'output/ping').depends_on().produces('output/pong')\n"
+            "STEPS = [ping, pong, AssertEQ(1, 1).depends_on('output/ping', 'output/pong')]",
+        )
+
+        assert runtest.HyalusTestRunner(test, tmp_path).run()
+
+        (run_dir,) = tmp_path.glob("dag_test_*")
+        ping_log = (run_dir / config_common.HYALUS_PATH / "1_RunFunctionStep_log.txt").read_text(encoding="utf-8")
+        pong_log = (run_dir / config_common.HYALUS_PATH / "2_RunFunctionStep_log.txt").read_text(encoding="utf-8")
+
+        assert "Writing output/ping" in ping_log and "Writing output/pong" not in ping_log
+        assert "Writing output/pong" in pong_log and "Writing output/ping" not in pong_log
+
+    def test_run_steps_in_order(self, tmp_path):
+        """Test that steps that do not declare their dependencies still run one at a time"""
+        test = _make_test(
+            tmp_path,
+            "STEPS = [RunFunctionStep(handshake, 'output/ping', 'output/pong'), "
+            "RunFunctionStep(handshake, 'output/pong', 'output/ping')]",
+        )
+
+        assert not runtest.HyalusTestRunner(test, tmp_path).run()
+
+    def test_run_concurrent_halt_on_failure(self, tmp_path):
+        """Test that no further steps are started once a concurrent step fails"""
+        test = _make_test(
+            tmp_path,
+            "STEPS = [RunFunctionStep(fail).depends_on(), AssertEQ(1, 1).depends_on(), AssertEQ(1, 1)]",
+        )
+
+        assert not runtest.HyalusTestRunner(test, tmp_path).run()
+
+        (run_dir,) = tmp_path.glob("dag_test_*")
+
+        assert not (run_dir / config_common.HYALUS_PATH / "3_AssertEQ_log.txt").exists()
+
+    def test_run_missing_dependency(self, tmp_path):
+        """Test that a step is an error if a file it depends on does not exist"""
+        test = _make_test(tmp_path, "STEPS = [AssertEQ(1, 1).depends_on('output/missing')]")
+
+        assert not runtest.HyalusTestRunner(test, tmp_path).run()
+
+        (entry,) = RunCatalog(tmp_path).find()
+
+        assert entry.status is RunStatus.ERROR
+
+    def test_run_invalid_dependency(self, tmp_path, capsys):
+        """Test that a step depending on a later step is an error"""
+        test = _make_test(tmp_path, "later = AssertEQ(1, 1)\nSTEPS = [AssertEQ(1, 1).depends_on(later), later]")
+
+        assert not runtest.HyalusTestRunner(test, tmp_path).run()
+
+        assert "which is not an earlier step" in capsys.readouterr().out
+
+    def test_report(self, tmp_path):
+        """Test that a test run reports its status, timings, and the Step that failed"""
+        test = _make_test(tmp_path, "STEPS = [AssertEQ(1, 1), RunFunctionStep(fail)]", cpus=1)
+        runner = runtest.HyalusTestRunner(test, tmp_path)
+
+        assert not runner.run()
+
+        report = runner.report
+        (run_dir,) = tmp_path.glob("dag_test_*")
+
+        assert (report.name, report.status, report.run_dir) == ("dag_test", RunStatus.FAILURE, str(run_dir))
+        assert report.failed_step.startswith("2 RunFunctionStep")
+        assert report.wall_time >= 0 and report.cpu_time >= 0
+        assert [(step.number, step.status) for step in report.steps] == [(1, "PASS"), (2, "FAIL")]
+        assert all(step.wall_time >= 0 and step.cpu_time >= 0 for step in report.steps)
+
+    def test_peak_memory(self, tmp_path):
+        """Test that the peak memory of a test run and its Steps is written to its run metadata"""
+        test = _make_test(tmp_path, "STEPS = [AssertEQ(1, 1), AssertEQ(2, 2)]", cpus=1)
+        runner = runtest.HyalusTestRunner(test, tmp_path)
+
+        assert runner.run()
+
+        (run_dir,) = tmp_path.glob("dag_test_*")
+        metadata = json.loads(run_common.HyalusRun(run_dir).run_metadata.read_text(encoding="utf-8"))
+
+        assert metadata["peak_memory"] == runner.report.peak_memory > 0
+        assert [step["step"] for step in metadata["step_peak_memory"]] == [1, 2]
+        assert all(step["peak_memory"] > 0 for step in metadata["step_peak_memory"])
+
+    def test_run_fixture_not_prepared(self, tmp_path, capsys):
+        """Test that a test using a suite fixture with no passing run errors without being run"""
+        test = _make_test(tmp_path, "STEPS = [AssertEQ(1, 1)]", cpus=1)
+        config = test / config_common.CONFIG_PY
+        config.write_text(
+            config.read_text(encoding="utf-8")
+            .replace("Resources\n", "Resources, UsesFixture\n")
+            .replace("TAGS = [", 'TAGS = [UsesFixture("missing"), '),
+            encoding="utf-8",
+        )
+
+        assert not runtest.HyalusTestRunner(test, tmp_path, search_dirs=[tmp_path / "tests"]).run()
+
+        assert "Suite fixture missing: Could not find item missing" in capsys.readouterr().out
+        assert not list(tmp_path.glob("dag_test_*"))
+
+    def test_runtime_drift(self, tmp_path, capsys):
+        """Test that a test taking a time outside the expected range of its RuntimeTag is warned about and recorded"""
+        test = _make_test(tmp_path, "STEPS = [AssertEQ(1, 1)]", cpus=1)
+        config = test / config_common.CONFIG_PY
+        config.write_text(config.read_text(encoding="utf-8").replace("Short()", "Medium()"), encoding="utf-8")
+
+        assert runtest.HyalusTestRunner(test, tmp_path).run()
+
+        out = capsys.readouterr().out
+
+        assert "WARNING: Took 0.0 minutes, outside the expected range of Medium: 5-60 minutes" in out
+        assert [run.runtime_tag for run in RuntimeHistory(tmp_path).recent()["dag_test"]] == ["Medium"]
+
+    def test_run_async(self, tmp_path):
+        """Test running a test on an event loop without changing the working directory"""
+        test = _make_test(
+            tmp_path,
+            "from hyalus.config.steps import AsyncSubprocessStep\n"
+            "STEPS = [AsyncSubprocessStep(['touch', 'output/touched']), AssertEQ(1, 1)]",
+        )
+        cwd = os.getcwd()
+
+        assert asyncio.run(runtest.HyalusTestRunner(test, tmp_path).run_async())
+        assert os.getcwd() == cwd
+
+        (run_dir,) = tmp_path.glob("dag_test_*")
+
+        assert (run_dir / "output" / "touched").exists()
+
+    def test_run_threaded(self, tmp_path):
+        """Test running a test on threads without changing the working directory"""
+        test = _make_test(
+            tmp_path,
+            "from hyalus.config.steps import SubprocessStep\n"
+            "STEPS = [SubprocessStep(['touch', 'output/touched']), AssertEQ(1, 1)]",
+        )
+        cwd = os.getcwd()
+
+        assert runtest.HyalusTestRunner(test, tmp_path).run_threaded()
+        assert os.getcwd() == cwd
+
+        (run_dir,) = tmp_path.glob("dag_test_*")
+
+        assert (run_dir / "output" / "touched").exists()
+
+    def test_run_threaded_timeout(self, tmp_path, capsys):
+        """Test that a test run on threads is marked as an error once it runs past its timeout"""
+        test = _make_test(
+            tmp_path,
+            "from hyalus.config.steps import SubprocessStep\nSTEPS = [SubprocessStep(['sleep', '3'])]",
+        )
+        start = time.monotonic()
+
+        assert not runtest.HyalusTestRunner(test, tmp_path).run_threaded(timeout=1)
+        assert time.monotonic() - start < 3
+        assert "Timed out after 0:00:01 during step 1" in capsys.readouterr().out
+
+    def test_run_async_timeout(self, tmp_path, capsys):
+        """Test that a test run on an event loop is stopped and marked as an error once it runs past its timeout"""
+        test = _make_test(
+            tmp_path,
+            "from hyalus.config.steps import AsyncSubprocessStep\nSTEPS = [AsyncSubprocessStep(['sleep', '60'])]",
+        )
+
+        assert not asyncio.run(runtest.HyalusTestRunner(test, tmp_path).run_async(timeout=1))
+
+        (entry,) = RunCatalog(tmp_path).find()
+
+        assert entry.status is RunStatus.ERROR
+        assert "Timed out after 0:00:01 during step 1" in capsys.readouterr().out
@@ -0,0 +1,319 @@
+"""Tests for the hyalus.run.schedule module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from math import inf
+from pathlib import Path
+import shutil
+
+from hyalus.run import schedule
+from hyalus.run.cache import ResultCache
+from hyalus.run.common import HyalusTest, RunStatus
+from hyalus.run.stats import RuntimeHistory
+
+# pylint: disable=duplicate-code
+OUTER_DIR = Path(__file__).parent
+TEST_DIR_1 = OUTER_DIR / "test_dir_1"
+TEST_DIR_2 = OUTER_DIR / "test_dir_2"
+
+RUNTEST_1 = HyalusTest(TEST_DIR_1 / "runtest_1")
+RUNTEST_2 = HyalusTest(TEST_DIR_1 / "runtest_2")
+RUNTEST_7 = HyalusTest(TEST_DIR_1 / "runtest_7")
+RUNTEST_5 = HyalusTest(TEST_DIR_2 / "runtest_5")
+
+
+def _copy_test(tmp_path: Path, name: str, dataset: str = None, input_data: bytes = None) -> HyalusTest:
+    """Copy runtest_1 to tmp_path under a new name, optionally declaring a Dataset and/or with an input file
+
+    :return: The copied test
+    """
+    test = HyalusTest(tmp_path / name)
+    shutil.copytree(RUNTEST_1, test)
+
+    if dataset is not None:
+        config = test.config.read_text(encoding="utf-8")
+        config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, Dataset")
+        config = config.replace("FunctionalTest()]", f"FunctionalTest(), Dataset({dataset!r})]")
+        test.config.write_text(config, encoding="utf-8")
+
+    if input_data is not None:
+        (test / "input").mkdir()
+        (test / "input" / "reference.bin").write_bytes(input_data)
+
+    return test
+
+
+class TestTagDuration:
+    """Tests for the tag_duration function"""
+
+    def test_runtime_tag(self):
+        """Test that the midpoint of the RuntimeTag's expected range is used"""
+        assert schedule.tag_duration(RUNTEST_7) == 120 * 60
+
+    def test_no_runtime_tag(self):
+        """Test that tests whose config cannot be loaded have no estimate"""
+        assert schedule.tag_duration(RUNTEST_5) is None
+
+
+class TestTestNeeds:
+    """Tests for the test_needs function"""
+
+    def test_resources_tag(self, tmp_path):
+        """Test that the CPUs and memory declared in a Resources tag are used"""
+        test = HyalusTest(tmp_path / "runtest_1")
+        shutil.copytree(RUNTEST_1, test)
+
+        config = (test / "config.py").read_text(encoding="utf-8")
+        config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, Resources")
+        config = config.replace("FunctionalTest()]", "FunctionalTest(), Resources(cpus=4, memory=8)]")
+        test.config.write_text(config, encoding="utf-8")
+
+        assert schedule.test_needs(test) == schedule.Capacity(4, 8)
+
+    def test_no_resources_tag(self):
+        """Test that tests without a Resources tag get the default needs"""
+        assert schedule.test_needs(RUNTEST_1) == schedule.DEFAULT_NEEDS
+
+
+class TestTestTimeout:
+    """Tests for the test_timeout function"""
+
+    def test_runtime_tag(self):
+        """Test that the timeout is a multiple of the upper end of the RuntimeTag's expected range"""
+        assert schedule.test_timeout(RUNTEST_1, 3) == 3 * 5 * 60
+
+    def test_no_limit(self):
+        """Test that tests may run indefinitely with a multiplier of 0, or without a config that can be loaded"""
+        assert schedule.test_timeout(RUNTEST_1, 0) is None
+        assert schedule.test_timeout(RUNTEST_5) is None
+
+    def test_timeout_tag(self, tmp_path):
+        """Test that a Timeout tag overrides the RuntimeTag"""
+        test = HyalusTest(tmp_path / "runtest_1")
+        shutil.copytree(RUNTEST_1, test)
+
+        config = test.config.read_text(encoding="utf-8")
+        config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, Timeout")
+        config = config.replace("FunctionalTest()]", "FunctionalTest(), Timeout(90)]")
+        test.config.write_text(config, encoding="utf-8")
+
+        assert schedule.test_timeout(test, 0) == 90 * 60
+
+
+class TestTestMemoryLimit:
+    """Tests for the test_memory_limit function"""
+
+    def test_resources_tag(self, tmp_path):
+        """Test that the limit is a multiple of the memory declared in the Resources tag"""
+        test = HyalusTest(tmp_path / "runtest_1")
+        shutil.copytree(RUNTEST_1, test)
+
+        config = test.config.read_text(encoding="utf-8")
+        config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, Resources")
+        config = config.replace("FunctionalTest()]", "FunctionalTest(), Resources(memory=2)]")
+        test.config.write_text(config, encoding="utf-8")
+
+        assert schedule.test_memory_limit(test, 1.5) == 3 * 1024**3
+        assert schedule.test_memory_limit(test, 0) is None
+
+    def test_no_memory(self):
+        """Test that tests declaring no memory are not limited"""
+        assert schedule.test_memory_limit(RUNTEST_1, 2) is None
+
+
+class TestAffinityGroups:
+    """Tests for the affinity_groups function"""
+
+    def test_dataset_tags(self, tmp_path):
+        """Test that tests declaring the same dataset are grouped, and tests sharing nothing are not"""
+        tests = [
+            _copy_test(tmp_path, "test_a", dataset="genome"),
+            _copy_test(tmp_path, "test_b"),
+            _copy_test(tmp_path, "test_c", dataset="genome"),
+        ]
+
+        assert schedule.affinity_groups(tests) == {tests[0]: 0, tests[2]: 0}
+
+    def test_identical_inputs(self, tmp_path):
+        """Test that tests with identical large input files are grouped only when comparing contents"""
+        tests = [
+            _copy_test(tmp_path, "test_a", input_data=b"x" * 100),
+            _copy_test(tmp_path, "test_b", input_data=b"y" * 100),
+            _copy_test(tmp_path, "test_c", input_data=b"x" * 100),
+            _copy_test(tmp_path, "test_d", input_data=b"x" * 10),
+        ]
+        cache = ResultCache(tmp_path)
+
+        assert schedule.affinity_groups(tests, cache, min_size=50) == {tests[0]: 0, tests[2]: 0}
+        assert not schedule.affinity_groups(tests, cache, min_size=1000)
+        assert not schedule.affinity_groups(tests, min_size=50)
+
+    def test_transitive(self, tmp_path):
+        """Test that tests linked through a test sharing data with both are grouped together"""
+        tests = [
+            _copy_test(tmp_path, "test_a", dataset="genome"),
+            _copy_test(tmp_path, "test_b", input_data=b"x" * 100),
+            _copy_test(tmp_path, "test_c", dataset="genome", input_data=b"x" * 100),
+            _copy_test(tmp_path, "test_d", dataset="other"),
+            _copy_test(tmp_path, "test_e", dataset="other"),
+        ]
+        groups = schedule.affinity_groups(tests, ResultCache(tmp_path), min_size=50)
+
+        assert groups == {tests[0]: 0, tests[1]: 0, tests[2]: 0, tests[3]: 1, tests[4]: 1}
+
+
+def test_group_shared_inputs():
+    """Test that tests of a group are moved up to start with the group's first test, and other tests keep their order"""
+    tests = [HyalusTest(f"/tests/test_{i}") for i in range(5)]
+    groups = {tests[1]: 0, tests[4]: 0, tests[2]: 1, tests[3]: 1}
+
+    assert schedule.group_shared_inputs(tests, groups) == [tests[0], tests[1], tests[4], tests[2], tests[3]]
+
+
+class TestMachineCapacity:
+    """Tests for the machine_capacity function"""
+
+    def test_configured(self):
+        """Test that configured capacity is used as-is"""
+        assert schedule.machine_capacity(3, 2.5) == schedule.Capacity(3, 2.5)
+
+    def test_detected(self):
+        """Test that unconfigured capacity is detected from the machine"""
+        capacity = schedule.machine_capacity()
+
+        assert capacity.cpus >= 1
+        assert capacity.memory > 0
+
+
+class TestResourcePacker:
+    """Tests for the ResourcePacker class"""
+
+    def test_capacity(self):
+        """Test that tests are only started while their needs fit, with smaller tests filling in behind a test that
+        does not fit yet
+        """
+        needs = {"a": schedule.Capacity(2, 6), "b": schedule.Capacity(2, 6), "c": schedule.Capacity(1, 1)}
+        packer = schedule.ResourcePacker(["a", "b", "c"], needs, schedule.Capacity(4, 8), jobs=4)
+
+        assert packer.ready() == ["a", "c"]
+        assert not packer.ready()
+
+        packer.finished("c")
+        assert not packer.ready()
+
+        packer.finished("a")
+        assert packer.ready() == ["b"]
+
+        packer.finished("b")
+        assert packer.done
+
+    def test_jobs(self):
+        """Test that no more than the given number of tests are started at once"""
+        packer = schedule.ResourcePacker(["a", "b", "c"], {}, schedule.Capacity(inf, inf), jobs=2)
+
+        assert packer.ready() == ["a", "b"]
+
+        packer.finished("b")
+        assert packer.ready() == ["c"]
+
+    def test_oversized(self):
+        """Test that a test needing more than the total capacity is still run, on its own"""
+        needs = {"a": schedule.Capacity(1, 1), "b": schedule.Capacity(16, 1)}
+        packer = schedule.ResourcePacker(["a", "b"], needs, schedule.Capacity(4, 8), jobs=4)
+
+        assert packer.ready() == ["a"]
+
+        packer.finished("a")
+        assert packer.ready() == ["b"]
+
+
+class TestPredictStarts:
+    """Tests for the predict_starts function"""
+
+    def test_jobs(self):
+        """Test that each test is predicted to start once an earlier test finishes"""
+        durations = {"a": 10, "b": 5, "c": 5, "d": 1}
+        starts = schedule.predict_starts(["a", "b", "c", "d"], durations, {}, schedule.Capacity(inf, inf), jobs=2)
+
+        assert starts == {"a": 0, "b": 0, "c": 5, "d": 10}
+
+    def test_capacity(self):
+        """Test that tests needing more than the capacity left are predicted to start once it frees up, and that a test
+        needing more than the total capacity is predicted to run on its own
+        """
+        needs = {"a": schedule.Capacity(2, 0), "b": schedule.Capacity(16, 0), "c": schedule.Capacity(1, 0)}
+        starts = schedule.predict_starts(
+            ["a", "b", "c"], {"a": 10, "b": 5, "c": 5}, needs, schedule.Capacity(2, inf), jobs=4
+        )
+
+        assert starts == {"a": 0, "b": 10, "c": 15}
+
+
+class TestLongestFirst:
+    """Tests for the longest_first function"""
+
+    def test_by_tags(self):
+        """Test ordering purely by RuntimeTag"""
+        assert schedule.longest_first([RUNTEST_1, RUNTEST_7, RUNTEST_2]) == [RUNTEST_7, RUNTEST_2, RUNTEST_1]
+
+    def test_history_overrides_tags(self):
+        """Test that recorded durations take precedence over RuntimeTags"""
+        history = {"runtest_1": 4 * 60 * 60}
+
+        assert schedule.longest_first([RUNTEST_1, RUNTEST_7, RUNTEST_2], history) == [RUNTEST_1, RUNTEST_7, RUNTEST_2]
+
+    def test_unknown_duration(self):
+        """Test that tests without an estimate are assumed to take the median of the other estimates, with ties broken
+        by path
+        """
+        expected = [RUNTEST_7, RUNTEST_2, RUNTEST_5, RUNTEST_1]
+
+        assert schedule.longest_first([RUNTEST_1, RUNTEST_5, RUNTEST_7, RUNTEST_2]) == expected
+
+
+class TestRunHistory:
+    """Tests for the run_history function"""
+
+    def test_recent_runs(self, tmp_path):
+        """Test that the most recent passing runs of each test are averaged, including runs whose run directories were
+        cleaned up
+        """
+        history = RuntimeHistory(tmp_path)
+
+        durations = [1000.0] + [10.0 * i for i in range(1, schedule.HISTORY_RUNS + 1)]
+
+        for duration in durations:
+            history.record("runtest_1", RunStatus.SUCCESS, duration, None)
+        history.record("runtest_1", RunStatus.ERROR, 5000.0, None)
+
+        expected = sum(durations[1:]) / schedule.HISTORY_RUNS
+
+        assert schedule.run_history(tmp_path, [RUNTEST_1, RUNTEST_2]) == {"runtest_1": expected}
+
+    def test_no_runs_dir(self, tmp_path):
+        """Test that a missing runs directory means there is no history"""
+        assert not schedule.run_history(tmp_path / "does_not_exist", [RUNTEST_1])
+
+
+class TestShard:
+    """Tests for the split_shards function"""
+
+    def test_balanced(self):
+        """Test that tests are dealt out longest first to the shard with the least expected duration so far"""
+        tests = [RUNTEST_1, RUNTEST_2, RUNTEST_5, RUNTEST_7, HyalusTest(TEST_DIR_2 / "runtest_4")]
+
+        assert schedule.split_shards(tests, 2) == [[RUNTEST_7], [RUNTEST_2, RUNTEST_5, RUNTEST_1, tests[-1]]]
+
+    def test_partition(self):
+        """Test that every test is in exactly one shard, whatever order the tests are given in"""
+        tests = [RUNTEST_1, RUNTEST_2, RUNTEST_5, RUNTEST_7]
+        shards = schedule.split_shards(tests, 3)
+
+        assert sorted(test for tests in shards for test in tests) == sorted(tests)
+        assert schedule.split_shards(list(reversed(tests)), 3) == shards
+
+    def test_more_shards_than_tests(self):
+        """Test that extra shards are left empty"""
+        assert schedule.split_shards([RUNTEST_1], 3) == [[RUNTEST_1], [], []]
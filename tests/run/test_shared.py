@@ -0,0 +1,93 @@
+"""Tests for the hyalus.run.shared module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+from pathlib import Path
+import shutil
+import sys
+
+import pytest
+
+from hyalus.run import shared
+from hyalus.run.common import HyalusTest
+from hyalus.run.shared import SetupFailed
+
+# pylint: disable=duplicate-code
+OUTER_DIR = Path(__file__).parent
+RUNTEST_1 = HyalusTest(OUTER_DIR / "test_dir_1" / "runtest_1")
+
+SETUP_MODULE = """
+from pathlib import Path
+
+CALLS = Path(__file__).with_name("calls.txt")
+
+
+def load():
+    with open(CALLS, "a", encoding="utf-8") as fh:
+        fh.write("load\\n")
+
+    return {"answer": 42}
+
+
+def broken():
+    with open(CALLS, "a", encoding="utf-8") as fh:
+        fh.write("broken\\n")
+
+    raise RuntimeError("boom")
+"""
+
+
+@pytest.fixture(name="setup_module")
+def fixture_setup_module(tmp_path, monkeypatch):
+    """Importable module of setup functions recording their calls in calls.txt, with no setup functions called yet"""
+    (tmp_path / "hyalus_setups.py").write_text(SETUP_MODULE, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(shared, "_results", {})
+    monkeypatch.setattr(shared, "_errors", {})
+
+    yield tmp_path / "calls.txt"
+
+    sys.modules.pop("hyalus_setups", None)
+
+
+def test_setup_names(tmp_path):
+    """Test that the setup functions a test uses are listed once each, in the order declared"""
+    test = HyalusTest(tmp_path / "test_1")
+    shutil.copytree(RUNTEST_1, test)
+
+    config = test.config.read_text(encoding="utf-8")
+    config = config.replace("Short, FunctionalTest", "Short, FunctionalTest, SharedSetup")
+    config = config.replace(
+        "FunctionalTest()]", 'FunctionalTest(), SharedSetup("a.b:c"), SharedSetup("d:e"), SharedSetup("a.b:c")]'
+    )
+    test.config.write_text(config, encoding="utf-8")
+
+    assert shared.setup_names(test) == ["a.b:c", "d:e"]
+    assert not shared.setup_names(RUNTEST_1)
+
+
+def test_shared_state(setup_module):
+    """Test that a setup function is only called the first time its result is asked for"""
+    assert shared.shared_state("hyalus_setups:load") == {"answer": 42}
+    assert shared.shared_state("hyalus_setups:load") is shared.shared_state("hyalus_setups:load")
+    assert setup_module.read_text(encoding="utf-8") == "load\n"
+
+
+@pytest.mark.parametrize("setup", ["hyalus_setups:missing", "hyalus_missing:load"])
+def test_shared_state_import_failed(setup_module, setup):
+    """Test that setup functions that cannot be imported fail"""
+    with pytest.raises(SetupFailed, match="Could not import"):
+        shared.shared_state(setup)
+
+
+def test_run_setups_failed(setup_module):
+    """Test that a failing setup function is not called again, and that its error is given to the tests using it"""
+    shared.run_setups(["hyalus_setups:broken", "hyalus_setups:load"])
+
+    with pytest.raises(SetupFailed, match="RuntimeError: boom"):
+        shared.shared_state("hyalus_setups:broken")
+
+    assert shared.shared_state("hyalus_setups:load") == {"answer": 42}
+    assert setup_module.read_text(encoding="utf-8") == "broken\nload\n"
@@ -0,0 +1,179 @@
+"""Tests for the hyalus.run.stats module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import time
+
+import pytest
+
+from hyalus.config.tags.runtime import Long, Medium, Short, runtime_tag_for
+from hyalus.run import stats
+from hyalus.run.common import HyalusTest, RunStatus
+from hyalus.run.stats import RUNTIMES_FILE, HyalusStatsRunner, RunStats, RuntimeEntry, RuntimeHistory, percentile
+
+
+def test_percentile():
+    """Test percentiles interpolate between values, and that a single value is every percentile"""
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+    assert percentile(list(map(float, range(101))), 95) == pytest.approx(95.0)
+
+
+@pytest.mark.parametrize("minutes, tag_type", [(0, Short), (5, Short), (5.1, Medium), (61, Long)])
+def test_runtime_tag_for(minutes, tag_type):
+    """Test that the shortest RuntimeTag including a duration is picked"""
+    assert isinstance(runtime_tag_for(minutes), tag_type)
+
+
+class TestRuntimeHistory:
+    """Tests for the RuntimeHistory class"""
+
+    def test_recent(self, tmp_path):
+        """Test that only the most recent runs of the given tests are returned, most recent first"""
+        history = RuntimeHistory(tmp_path)
+
+        for duration in (1.0, 2.0, 3.0):
+            history.record("test_1", RunStatus.SUCCESS, duration, Short())
+        history.record("test_2", RunStatus.FAILURE, 4.0, None)
+
+        assert history.recent(["test_1"], last=2) == {
+            "test_1": [RuntimeEntry(RunStatus.SUCCESS, 3.0, "Short"), RuntimeEntry(RunStatus.SUCCESS, 2.0, "Short")]
+        }
+        assert history.recent()["test_2"] == [RuntimeEntry(RunStatus.FAILURE, 4.0, None)]
+
+    def test_keep(self, tmp_path, monkeypatch):
+        """Test that only the most recent runs of each test are kept"""
+        monkeypatch.setattr(stats, "HISTORY_KEEP", 2)
+        history = RuntimeHistory(tmp_path)
+
+        for duration in (1.0, 2.0, 3.0):
+            history.record("test_1", RunStatus.SUCCESS, duration, Short())
+
+        assert [run.duration for run in history.recent(last=10)["test_1"]] == [3.0, 2.0]
+
+    def test_mean_durations(self, tmp_path):
+        """Test that only the most recent passing runs of the given tests are averaged"""
+        history = RuntimeHistory(tmp_path)
+
+        for status, duration in [
+            (RunStatus.SUCCESS, 100.0),
+            (RunStatus.SUCCESS, 2.0),
+            (RunStatus.ERROR, 50.0),
+            (RunStatus.SUCCESS, 4.0),
+            (RunStatus.FAILURE, 1.0),
+        ]:
+            history.record("test_1", status, duration, None)
+        history.record("test_2", RunStatus.ERROR, 5.0, None)
+        history.record_outcomes({HyalusTest("test_1"): RunStatus.SUCCESS})
+
+        assert history.mean_durations(["test_1", "test_2"], last=2) == {"test_1": 3.0}
+        assert not history.mean_durations([], last=2)
+
+    def test_last_finished(self, tmp_path):
+        """Test that when each of the given tests last finished is returned, for tests with runs"""
+        history = RuntimeHistory(tmp_path)
+        start = time.time()
+
+        history.record("test_1", RunStatus.SUCCESS, 1.0, None)
+        history.record("test_1", RunStatus.FAILURE, 1.0, None)
+        history.record("test_2", RunStatus.SUCCESS, 1.0, None)
+
+        last_finished = history.last_finished(["test_1", "test_3"])
+
+        assert list(last_finished) == ["test_1"]
+        assert start <= last_finished["test_1"] <= time.time()
+        assert not history.last_finished([])
+
+    def test_failed(self, tmp_path):
+        """Test that only tests whose most recent run did not pass are found, in the given order, including runs
+        recorded without a duration
+        """
+        tests = [HyalusTest(tmp_path / name) for name in ("a", "b", "c", "d")]
+        history = RuntimeHistory(tmp_path)
+
+        history.record(tests[0], RunStatus.FAILURE, 1.0, None)
+        history.record(tests[1], RunStatus.ERROR, 1.0, None)
+        history.record(tests[2], RunStatus.SUCCESS, 1.0, None)
+        history.record_outcomes({tests[1]: RunStatus.SUCCESS, tests[2]: RunStatus.ERROR})
+
+        assert history.failed(tests[::-1]) == [tests[2], tests[0]]
+
+    def test_failed_all(self, tmp_path):
+        """Test that every test that last failed and still exists is found when no tests are given"""
+        tests = [HyalusTest(tmp_path / name) for name in ("a", "b", "c")]
+        tests[0].mkdir()
+        tests[2].mkdir()
+
+        history = RuntimeHistory(tmp_path)
+        history.record_outcomes(dict.fromkeys(tests, RunStatus.FAILURE))
+
+        assert history.failed() == [tests[0], tests[2]]
+
+    def test_unreadable(self, tmp_path):
+        """Test that a history that cannot be read is treated as no tests having failed"""
+        (tmp_path / RUNTIMES_FILE).write_text("not a database", encoding="utf-8")
+        history = RuntimeHistory(tmp_path)
+
+        history.record_outcomes({HyalusTest(tmp_path / "a"): RunStatus.FAILURE})
+
+        assert not history.failed()
+
+
+class TestRunStats:
+    """Tests for the RunStats class"""
+
+    def test_from_runs(self):
+        """Test that durations are taken from passing runs only, and the tag from the most recent run, leaving out runs
+        without a duration
+        """
+        runs = [
+            RuntimeEntry(RunStatus.SUCCESS, None, None),
+            RuntimeEntry(RunStatus.SUCCESS, 600.0, "Medium"),
+            RuntimeEntry(RunStatus.FAILURE, 1.0, "Short"),
+            RuntimeEntry(RunStatus.SUCCESS, 1200.0, "Short"),
+        ]
+        run_stats = RunStats.from_runs("test_1", runs)
+
+        assert (run_stats.runs, run_stats.passed, run_stats.p50) == (3, 2, 900.0)
+        assert isinstance(run_stats.runtime_tag, Medium)
+        assert not run_stats.drifted
+
+    def test_drifted(self):
+        """Test that a test drifts once its p95 duration is outside its tag's range, and the tag it should have"""
+        run_stats = RunStats("test_1", 20, 20, 180.0, 1200.0, Short())
+
+        assert run_stats.drifted
+        assert isinstance(run_stats.suggested_tag, Medium)
+
+    def test_drifted_untagged(self):
+        """Test that tests without a RuntimeTag have drifted, unless they have no passing runs"""
+        assert RunStats("test_1", 1, 1, 1.0, 1.0, None).drifted
+        assert not RunStats("test_1", 1, 0, None, None, None).drifted
+
+
+class TestHyalusStatsRunner:
+    """Tests for the HyalusStatsRunner class"""
+
+    def test_run_drift(self, tmp_path, capsys):
+        """Test that only drifted tests are reported with drift set, along with their suggested tag"""
+        history = RuntimeHistory(tmp_path)
+        history.record("quick", RunStatus.SUCCESS, 60.0, Short())
+        history.record("slow", RunStatus.SUCCESS, 1200.0, Short())
+
+        HyalusStatsRunner(tmp_path).run()
+
+        assert [line.split()[0] for line in capsys.readouterr().out.splitlines()] == ["TEST", "quick", "slow"]
+
+        HyalusStatsRunner(tmp_path, drift=True).run()
+
+        row = capsys.readouterr().out.splitlines()[1].split()
+
+        assert row == ["slow", "1", "1", "20.0m", "20.0m", "Short", "Medium"]
+
+    def test_run_none(self, tmp_path, capsys):
+        """Test the message given when there are no drifted tests"""
+        HyalusStatsRunner(tmp_path, drift=True).run()
+
+        assert capsys.readouterr().out == "No drifted tests found\n"
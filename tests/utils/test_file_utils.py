@@ -4,6 +4,7 @@ __author__ = "David McConnell"
 __credits__ = ["David McConnell"]
 __maintainer__ = "David McConnell"
 
+import hashlib
 from pathlib import Path
 
 import pytest
@@ -29,3 +30,10 @@ class TestGlobFile:
         """Assert InvalidWildcard is raised from giving a wildcard with multiple results"""
         with pytest.raises(file_utils.InvalidWildcard):
             file_utils.glob_file(DATA_PATH / "*sv")
+
+
+def test_file_sha256():
+    """Test that the file hash matches the SHA-256 digest of the file's contents"""
+    path = DATA_PATH / "example.tsv"
+
+    assert file_utils.file_sha256(path) == hashlib.sha256(path.read_bytes()).hexdigest()
@@ -115,6 +115,87 @@ print(len(logger.handlers))
 
         assert stdout == "1\n1\n"
 
+    def test_routing_handler_ignored(self):
+        """Assert that logging is still configured if the only handler already present routes records elsewhere"""
+        cmd = """\
+import logging
+from hyalus.utils.logging_utils import RoutingHandler, configure_logging
+logging.getLogger().addHandler(RoutingHandler(lambda record: None))
+configure_logging(log_stdout=True)
+logging.getLogger().info("info message")
+"""
+        stdout = subprocess.check_output(["python3", "-c", cmd], text=True)
+
+        assert "info message" in stdout
+
+
+class TestRoutingHandler:
+    """Tests for the RoutingHandler class"""
+
+    def test_handle(self, tmp_log):
+        """Assert records are passed on to the handlers of the logger picked for them, and dropped if none is picked"""
+        target = logging.getLogger("hyalus_test_routing_target")
+        logging_utils.add_file_handler(tmp_log, target)
+        handler = logging_utils.RoutingHandler(lambda record: target if record.name == "routed" else None)
+
+        try:
+            for name in ("routed", "dropped"):
+                record = logging.makeLogRecord(
+                    {"name": name, "msg": f"{name} message", "levelno": logging.INFO, "full_module": __name__}
+                )
+
+                assert handler.handle(record) == (name == "routed")
+        finally:
+            logging_utils.remove_file_handler(tmp_log, target)
+
+        log = tmp_log.read_text(encoding="utf-8")
+
+        assert "routed message" in log and "dropped message" not in log
+
+
+    def test_handle_error(self, monkeypatch):
+        """Assert errors while routing a record are reported through handleError rather than raised to the caller"""
+
+        def fail_route(_):
+            raise IndexError("list index out of range")
+
+        errors = []
+        handler = logging_utils.RoutingHandler(fail_route)
+        monkeypatch.setattr(handler, "handleError", errors.append)
+        record = logging.makeLogRecord({"name": "routed", "msg": "message", "levelno": logging.INFO})
+
+        assert not handler.handle(record)
+        assert errors == [record]
+
+
+def _collector(records: list) -> logging.Handler:
+    """:return: Handler appending the message of each record it handles to the given list"""
+    handler = logging.Handler()
+    handler.emit = lambda record: records.append(record.getMessage())
+
+    return handler
+
+
+def test_unregistered_logger():
+    """Test that loggers of the same name each have handlers of their own, and still propagate to the named logger"""
+    first = logging_utils.unregistered_logger("hyalus_test.unregistered")
+    second = logging_utils.unregistered_logger("hyalus_test.unregistered")
+    named = logging.getLogger("hyalus_test.unregistered")
+
+    first_records, named_records = [], []
+    first.addHandler(_collector(first_records))
+    named.addHandler(handler := _collector(named_records))
+
+    try:
+        second.warning("second")
+        first.warning("first")
+    finally:
+        named.removeHandler(handler)
+
+    assert first is not second and second.parent is named
+    assert first_records == ["first"]
+    assert named_records == ["second", "first"]
+
 
 class TestFindHandler:
     """Tests for the find_handler utility function"""
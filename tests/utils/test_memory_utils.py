@@ -0,0 +1,40 @@
+"""Tests for the hyalus.utils.memory_utils module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import subprocess
+import sys
+
+from hyalus.utils import memory_utils
+
+MIB = 1024**2
+
+# Allocates memory and holds on to it long enough to be sampled
+ALLOCATE = "import time; data = bytearray({size}); data[::4096] = b'x' * len(data[::4096]); time.sleep(0.5)"
+
+
+def test_tree_rss():
+    """Test that the memory of this process is found"""
+    assert memory_utils.tree_rss() > 0
+
+
+class TestPeakMemory:
+    """Tests for the PeakMemory class"""
+
+    def test_child_process(self):
+        """Test that memory used by a child process counts towards the peak"""
+        with memory_utils.PeakMemory() as memory:
+            subprocess.run([sys.executable, "-c", ALLOCATE.format(size=300 * MIB)], check=True)
+
+        assert memory.peak >= 300 * MIB
+
+
+def test_limit_memory():
+    """Test that allocations past the limit fail with MemoryError"""
+    code = f"from hyalus.utils import memory_utils; memory_utils.limit_memory({512 * MIB}); bytearray({1024 * MIB})"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=False)
+
+    assert result.returncode != 0
+    assert "MemoryError" in result.stderr
@@ -0,0 +1,50 @@
+"""Tests for the hyalus.utils.sqlite_utils module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import sqlite3
+
+import pytest
+
+from hyalus.utils import sqlite_utils
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS items (name TEXT PRIMARY KEY);"
+
+
+class TestConnect:
+    """Tests for the connect function"""
+
+    def test_commit(self, tmp_path):
+        """Test that changes made within the context are committed"""
+        db_file = tmp_path / "test.sqlite"
+
+        with sqlite_utils.connect(db_file, SCHEMA, 1) as connection:
+            connection.execute("INSERT INTO items VALUES ('a')")
+
+        with sqlite_utils.connect(db_file, SCHEMA, 1) as connection:
+            assert connection.execute("SELECT name FROM items").fetchall() == [("a",)]
+
+    def test_rollback(self, tmp_path):
+        """Test that changes made within the context are rolled back on error"""
+        db_file = tmp_path / "test.sqlite"
+
+        with pytest.raises(sqlite3.IntegrityError):
+            with sqlite_utils.connect(db_file, SCHEMA, 1) as connection:
+                connection.execute("INSERT INTO items VALUES ('a')")
+                connection.execute("INSERT INTO items VALUES ('a')")
+
+        with sqlite_utils.connect(db_file, SCHEMA, 1) as connection:
+            assert not connection.execute("SELECT name FROM items").fetchall()
+
+    def test_version_change(self, tmp_path):
+        """Test that a database written with a different schema version is recreated"""
+        db_file = tmp_path / "test.sqlite"
+
+        with sqlite_utils.connect(db_file, SCHEMA, 1) as connection:
+            connection.execute("INSERT INTO items VALUES ('a')")
+
+        with sqlite_utils.connect(db_file, SCHEMA, 2) as connection:
+            assert not connection.execute("SELECT name FROM items").fetchall()
+            assert connection.execute("PRAGMA user_version").fetchone()[0] == 2
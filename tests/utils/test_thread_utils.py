@@ -0,0 +1,105 @@
+"""Tests for the hyalus.utils.thread_utils module"""
+
+__author__ = "David McConnell"
+__credits__ = ["David McConnell"]
+__maintainer__ = "David McConnell"
+
+import asyncio
+from contextvars import ContextVar
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from hyalus.utils import thread_utils
+
+# Leaves a call sleeping on the executor when the interpreter exits
+STUCK_CALL = (
+    "import time; from hyalus.utils.thread_utils import DaemonThreadExecutor; "
+    "DaemonThreadExecutor().submit(time.sleep, 30)"
+)
+
+# Leaves a call sleeping when the event loop waiting on it is done
+STUCK_LOOP = (
+    "import asyncio, time; from hyalus.utils.thread_utils import to_daemon_thread\n"
+    "async def main():\n"
+    "    try:\n"
+    "        await asyncio.wait_for(to_daemon_thread(time.sleep, 30), 0.1)\n"
+    "    except asyncio.TimeoutError:\n"
+    "        pass\n"
+    "asyncio.run(main())"
+)
+
+_var: ContextVar[str] = ContextVar("test_thread_utils_var", default="unset")
+
+
+class TestDaemonThreadExecutor:
+    """Tests for the DaemonThreadExecutor class"""
+
+    def test_submit(self):
+        """Test that each call is run on a daemon thread of its own, and that its result is set on its future"""
+        with thread_utils.DaemonThreadExecutor(thread_name_prefix="test") as executor:
+            futures = [executor.submit(lambda: threading.current_thread()) for _ in range(2)]
+            threads = [future.result(timeout=5) for future in futures]
+
+        assert threads[0] is not threads[1]
+        assert all(thread.daemon and thread.name.startswith("test_") for thread in threads)
+
+    def test_submit_exception(self):
+        """Test that an exception raised by a call is set on its future"""
+        with thread_utils.DaemonThreadExecutor() as executor:
+            future = executor.submit(int, "x")
+
+        with pytest.raises(ValueError):
+            future.result()
+
+    def test_submit_after_shutdown(self):
+        """Test that no calls can be submitted once the executor is shut down"""
+        executor = thread_utils.DaemonThreadExecutor()
+        executor.shutdown()
+
+        with pytest.raises(RuntimeError):
+            executor.submit(int)
+
+    def test_shutdown_no_wait(self):
+        """Test that shutting down without waiting returns while calls are still running"""
+        event = threading.Event()
+        executor = thread_utils.DaemonThreadExecutor()
+        future = executor.submit(event.wait)
+
+        executor.shutdown(wait=False)
+
+        assert not future.done()
+
+        event.set()
+
+        assert future.result(timeout=5)
+
+    def test_exit(self):
+        """Test that a call still running does not keep the process from exiting"""
+        start = time.monotonic()
+
+        subprocess.run([sys.executable, "-c", STUCK_CALL], check=True, timeout=20)
+
+        assert time.monotonic() - start < 20
+
+
+def test_to_daemon_thread():
+    """Test that a function is run on a daemon thread with the caller's context variables"""
+
+    async def main():
+        _var.set("set")
+        return await thread_utils.to_daemon_thread(lambda: (threading.current_thread().daemon, _var.get()))
+
+    assert asyncio.run(main()) == (True, "set")
+
+
+def test_to_daemon_thread_exit():
+    """Test that a call still running does not keep asyncio.run or the process from finishing"""
+    start = time.monotonic()
+
+    subprocess.run([sys.executable, "-c", STUCK_LOOP], check=True, timeout=20)
+
+    assert time.monotonic() - start < 20